@@ -1,12 +1,27 @@
 """
 Agent configuration for EDA Agent.
 Sets up the LLM and creates the agent with tools.
+
+The LLM client and LangChain agent are heavy to import, so they are built
+lazily on first use via get_agent(). warm_up() can be called from a
+background thread at startup to pay that cost before the first request.
+
+Each question is answered by an agent bound to the tools it needs only,
+with condensed tool descriptions (EDA_DYNAMIC_TOOLS, EDA_COMPACT_TOOLS):
+every bound tool's description is sent with every LLM call.
+
+Agents check for cancellation (tools.limits) before every LLM and tool
+call, so a request whose client went away stops at the next step.
 """
 import os
+import functools
+import threading
+from typing import Optional, Tuple
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.agents import create_agent
+from langchain_core.callbacks import BaseCallbackHandler
 from tools import ALL_TOOLS
+from tools.catalog import compact_tool, select_tools
+from tools.limits import checkpoint
 
 load_dotenv()
 
@@ -16,8 +31,18 @@ if not GOOGLE_API_KEY:
     print("[WARNING] GOOGLE_API_KEY not found in environment variables!")
     print("[WARNING] The agent will fail if API calls are attempted")
 
-# System prompt for the agent
-SYSTEM_PROMPT = (
+# --- Configuration ---
+# Bind only the tools a question needs (off: every tool on every call)
+DYNAMIC_TOOLS = os.getenv("EDA_DYNAMIC_TOOLS", "1").lower() in ("1", "true", "yes")
+# Condensed tool descriptions carrying their usage rules (off: full docstrings and rules in the prompt)
+COMPACT_TOOLS = os.getenv("EDA_COMPACT_TOOLS", "1").lower() in ("1", "true", "yes")
+# Agents kept, one per set of bound tools
+AGENT_CACHE_SIZE = 32
+
+# System prompt for the agent. It is the same for every question (what
+# varies, the bound tools and the question, comes after it), so LLM
+# providers can cache it as a prompt prefix.
+BASE_PROMPT = (
     "You are a data-focused assistant that helps users analyze CSV data. "
     "When a question requires information from the CSV, use the appropriate tool. "
     "\n\n"
@@ -32,18 +57,22 @@ SYSTEM_PROMPT = (
     "- ANY time the user says 'heatmap', 'heat map', 'show', 'plot', 'chart', 'visualize', or 'graph' → USE tool_plot\n"
     "- When user asks for 'correlation heatmap' or any variation with 'heatmap' → ALWAYS use tool_plot with plot_type='heatmap'\n"
     "- Only use tool_correlation when user explicitly asks for 'calculate correlation values' or 'correlation numbers' WITHOUT mentioning visualization\n"
-    "- For heatmap with specific columns, use: {\"plot_type\": \"heatmap\", \"columns\": [\"col1\", \"col2\", \"col3\"]}\n"
-    "- For heatmap with ALL numeric columns, use: {\"plot_type\": \"heatmap\"}\n"
+    "- Relationships between categorical columns (class, sex, embarked...) → tool_association, not tool_correlation\n"
     "\n"
-    "TOOL PARAMETERS:\n"
-    "- For tool_nulls: always pass an empty string \"\"\n"
-    "- For tool_schema: pass \"\" for all columns, or specific column names\n"
-    "- For tool_describe: pass \"\" for all numeric columns, or \"col1, col2\" for specific\n"
-    "- For tool_outliers: {\"column\": \"column_name\"} or {\"column\": \"column_name\", \"method\": \"iqr\"}\n"
-    "  - If user says 'method you prefer', use method 'iqr' (it's the recommended default)\n"
-    "- For tool_plot with heatmap (all columns): {\"plot_type\": \"heatmap\"}\n"
-    "- For tool_plot with heatmap (specific columns): {\"plot_type\": \"heatmap\", \"columns\": [\"age\", \"fare\", \"pclass\"]}\n"
-    "- For tool_plot with pairplot: {\"plot_type\": \"pairplot\"} or {\"plot_type\": \"pairplot\", \"columns\": [...]}\n"
+    "EVERY TOOL:\n"
+    "- SEVERAL DATASETS: when the question starts with [Datasets: ...], every tool accepts \"dataset\" to analyze\n"
+    "  another one, e.g. {\"dataset\": \"customers\", \"input\": \"\"} for tool_schema.\n"
+    "  To combine them use tool_join: {\"right\": \"customers\", \"on\": \"customer_id\", \"how\": \"left\"};\n"
+    "  then pass the returned \"name\" as \"dataset\" to other tools (e.g. tool_groupby on the joined data)\n"
+    "- ROW FILTERS: every tool accepts a \"where\" predicate to analyze a subset of rows, e.g.\n"
+    "  {\"column\": \"fare\", \"where\": \"pclass == 1\"} for outliers in fare among first-class passengers.\n"
+    "  Tools that take plain text put it in \"input\": {\"input\": \"age, fare\", \"where\": \"sex == 'female' and age < 18\"}.\n"
+    "  Use ==, !=, <, <=, >, >=, in [...], not in [...], and, or, not, isna(col), notna(col); quote text values\n"
+    "- LARGE RESULTS: long tool results are shortened to the most relevant part and report a \"handle\"\n"
+    "  (\"truncated\" field, \"matrix_handle\" or a '# Truncated' line). Answer from what is shown; only if the\n"
+    "  question needs the rest, call tool_expand: {\"handle\": \"res_...\", \"path\": \"...\", \"offset\": 0}\n"
+    "- ESTIMATES: results with an \"estimate\" field or a '# Estimated from a ... sample' line come from a sample\n"
+    "  of a large dataset. Say the figures are estimates and give the 95% intervals reported for the key ones\n"
     "\n"
     "After generating a plot, describe what the visualization shows in natural language. "
     "NEVER mention file paths, directories, or technical implementation details. "
@@ -57,12 +86,132 @@ SYSTEM_PROMPT = (
     "Always base your description on the real data provided in data_summary, not on generic assumptions."
 )
 
-# Initialize LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash",
-    temperature=0.1,
-    google_api_key=GOOGLE_API_KEY
+# Usage rules of each tool; with COMPACT_TOOLS they are part of the tool descriptions instead
+TOOL_PARAMETERS = (
+    "\n\n"
+    "TOOL PARAMETERS:\n"
+    "- For tool_nulls: always pass an empty string \"\"\n"
+    "- For tool_missingness (which columns are missing together, complete rows): \"\" or {\"columns\": [...]}\n"
+    "- For tool_schema: pass \"\" for all columns, or specific column names\n"
+    "- For tool_describe: pass \"\" for all numeric columns, or \"col1, col2\" for specific\n"
+    "- For tool_outliers: {\"column\": \"column_name\"} or {\"column\": \"column_name\", \"method\": \"iqr\"}\n"
+    "  - If user says 'method you prefer', use method 'iqr' (it's the recommended default)\n"
+    "  - For 'which columns have outliers?' make ONE call without \"column\": \"\" or {\"method\": \"mad\"}\n"
+    "  - For unusual rows / multivariate anomalies: {\"method\": \"isolation_forest\"}\n"
+    "- For tool_association: \"\" for every categorical column, or {\"columns\": [\"class\", \"sex\"], \"method\": \"mutual_info\"}\n"
+    "  (default method cramers_v: 0 = independent, 1 = one column determines the other)\n"
+    "- For tool_batch_profile: pass \"\" to profile ALL columns, or {\"columns\": [\"col1\", \"col2\"]}\n"
+    "  - Use it (ONE call) whenever the user asks to profile, summarize or give an overview of several or all columns;\n"
+    "    never call tool_column_profile repeatedly for that\n"
+    "- For tool_groupby: {\"by\": [\"pclass\", \"sex\"], \"metrics\": {\"fare\": [\"mean\", \"max\"]}}\n"
+    "  - Use it for any per-group number ('average X by Y', 'count per category', 'top N groups by ...');\n"
+    "    add \"sort_by\" (e.g. \"fare_mean\" or \"size\") and \"top_k\" for rankings. Only plot when asked to visualize\n"
+    "- For tool_timeseries: {\"time\": \"date\", \"value\": \"sales\", \"agg\": \"sum\", \"freq\": \"M\"}\n"
+    "  - Use it for trends over time ('sales per month', 'daily average', 'rolling mean'); omit \"value\" to count rows.\n"
+    "    To visualize a trend, use tool_plot with plot_type 'line' and the datetime column as x (one point per bucket)\n"
+    "- For tool_plot with heatmap (all columns): {\"plot_type\": \"heatmap\"}\n"
+    "- For tool_plot with heatmap (specific columns): {\"plot_type\": \"heatmap\", \"columns\": [\"age\", \"fare\", \"pclass\"]}\n"
+    "- For tool_plot with pairplot: {\"plot_type\": \"pairplot\"} or {\"plot_type\": \"pairplot\", \"columns\": [...]}\n"
+    "- To show several charts at once (e.g. the distribution of every numeric column), make ONE tool_plot call with\n"
+    "  {\"plot_type\": \"dashboard\", \"columns\": [\"age\", \"fare\"], \"panel_type\": \"histogram\"} or\n"
+    "  {\"plot_type\": \"dashboard\", \"panels\": [{\"plot_type\": \"countplot\", \"x\": \"sex\"}, {...}]}; describe each panel\n"
+    "  from data_summary.panels"
 )
 
-# Create agent with tools
-agent_executor = create_agent(model=llm, tools=ALL_TOOLS, system_prompt=SYSTEM_PROMPT)
+SYSTEM_PROMPT = BASE_PROMPT + TOOL_PARAMETERS
+
+# LLM client and agents are created on first use (see get_agent)
+_llm = None
+_llm_lock = threading.Lock()
+
+
+def get_llm():
+    """
+    Return the LLM client, creating it on first call.
+    Thread-safe: concurrent first calls build the client only once.
+    """
+    global _llm
+    if _llm is None:
+        with _llm_lock:
+            if _llm is None:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+
+                _llm = ChatGoogleGenerativeAI(
+                    model="gemini-2.0-flash",
+                    temperature=0.1,
+                    google_api_key=GOOGLE_API_KEY
+                )
+    return _llm
+
+
+def agent_tools(question: Optional[str] = None, dynamic: bool = DYNAMIC_TOOLS,
+                compact: bool = COMPACT_TOOLS) -> list:
+    """
+    Tools to bind for question.
+
+    Args:
+        question: The user's question (None: every tool)
+        dynamic: Bind only the tools the question needs
+        compact: Use the condensed tool descriptions
+
+    Returns:
+        Tools in ALL_TOOLS order
+    """
+    tools = select_tools(question) if dynamic else list(ALL_TOOLS)
+    return [compact_tool(t) for t in tools] if compact else tools
+
+
+class CancellationHandler(BaseCallbackHandler):
+    """Stops the agent before its next LLM or tool call once the request is cancelled."""
+    raise_error = True
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        checkpoint()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        checkpoint()
+
+    def on_tool_start(self, serialized, input_str, **kwargs):
+        checkpoint()
+
+
+def build_agent(llm, tools: list, compact: bool = COMPACT_TOOLS):
+    """Create an agent for llm with tools (as returned by agent_tools)."""
+    from langchain.agents import create_agent
+
+    agent = create_agent(model=llm, tools=tools, system_prompt=BASE_PROMPT if compact else SYSTEM_PROMPT)
+    return agent.with_config(callbacks=[CancellationHandler()])
+
+
+@functools.lru_cache(maxsize=AGENT_CACHE_SIZE)
+def _agent_for(names: Tuple[str, ...]):
+    by_name = {t.name: t for t in agent_tools()}
+    print(f"[DEBUG] Building agent with tools: {', '.join(names)}")
+    return build_agent(get_llm(), [by_name[name] for name in names])
+
+
+def get_agent(question: Optional[str] = None):
+    """
+    Return an agent able to answer question, creating it on first use.
+
+    With EDA_DYNAMIC_TOOLS, the agent only has the tools the question needs
+    (see tools.catalog.select_tools); agents are cached per set of tools.
+    """
+    names = tuple(t.name for t in agent_tools(question, compact=False))
+    return _agent_for(names)
+
+
+def warm_up():
+    """
+    Pre-load heavy dependencies so the first request does not pay for them.
+    Builds the agent and imports the plotting stack. Errors are logged, not raised,
+    since warm-up is best effort and the request path retries lazily.
+    """
+    from tools.plot import load_plotting
+
+    try:
+        load_plotting()
+        get_agent()
+        print("[DEBUG] Warm-up complete: plotting stack and agent loaded")
+    except Exception as e:
+        print(f"[WARNING] Warm-up failed: {e}")
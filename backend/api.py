@@ -4,31 +4,100 @@ Handles HTTP endpoints and routes requests to the agent.
 """
 import os
 import json
-import pandas as pd
-import io
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
+import asyncio
+import hashlib
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, File, UploadFile, Form, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from agent import agent_executor
-from tools.context import set_dataframe
+from agent import get_agent, warm_up
+from datasets import (
+    Dataset, DatasetNotFound, DEFAULT_CSV_PATH, DEFAULT_DATASET_ID, build_workspace, get_dataset,
+    list_datasets, memory_usage, require_dataset, stored_datasets
+)
+from jobs import job_manager, Job, JobQueueFull, SUCCEEDED, TERMINAL_STATUSES
+from tools.context import set_workspace
+from tools.estimates import progressive_mode
+from tools.limits import Cancelled, cancellation
+from tools.plot_store import resolve_plot, plot_etag, media_type
+from uploads import UploadError, dataset_id_for_digest, ingest_bytes, upload_manager
 
 # --- Configuration ---
-# Use absolute path relative to this file
-BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
-DEFAULT_CSV_PATH = os.path.join(BACKEND_DIR, "titanic.csv")
-PLOTS_DIR = os.path.join(BACKEND_DIR, "plots")
-os.makedirs(PLOTS_DIR, exist_ok=True)
+# Pre-load the agent and plotting stack in a background thread at startup
+PREWARM = os.getenv("EDA_PREWARM", "1").lower() in ("1", "true", "yes")
+# Interval between keep-alive comments on job event streams
+JOB_EVENTS_KEEPALIVE_SECONDS = 15
+# Interval between checks for a disconnected client while /ask is answered
+DISCONNECT_POLL_SECONDS = 0.5
+# Server processes started by `python api.py`; more than one needs EDA_SHARED_DIR
+WORKERS = int(os.getenv("EDA_WORKERS", "1"))
+HOST = os.getenv("EDA_HOST", "0.0.0.0")
+PORT = int(os.getenv("EDA_PORT", "8000"))
+
 # --- Pydantic Models ---
 class AnswerResponse(BaseModel):
     answer: str
     success: bool
     plot_url: str | None = None
+    dataset_id: str | None = None
+    # True when the answer uses sample-based estimates (progressive mode)
+    estimated: bool = False
+
+
+class UploadStatusResponse(BaseModel):
+    upload_id: str | None = None
+    filename: str | None = None
+    offset: int = 0
+    size: int | None = None
+    chunk_size: int | None = None
+    dataset_id: str | None = None
+    complete: bool = False
+
+
+class DatasetResponse(BaseModel):
+    dataset_id: str
+    name: str | None = None
+    filename: str | None = None
+    rows: int
+    columns: int
+    memory_mb: float | None = None
+    complete: bool = True
+
+
+class DatasetListResponse(BaseModel):
+    datasets: list[DatasetResponse]
+    used_mb: float
+    budget_mb: float
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
+    error: str | None = None
+    error_status: int | None = None
+    result: AnswerResponse | None = None
+    partial_result: AnswerResponse | None = None
+    status_url: str
+    events_url: str
 
 
 # --- FastAPI App ---
-app = FastAPI(title="EDA Agent API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the optional background warm-up without blocking startup."""
+    if PREWARM:
+        threading.Thread(target=warm_up, name="eda-warm-up", daemon=True).start()
+    yield
+
+
+app = FastAPI(title="EDA Agent API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -37,6 +106,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Upload-Offset"],  # Lets the browser resume chunked uploads
 )
 
 
@@ -60,10 +130,188 @@ def health():
     }
 
 
+def resolve_dataset(
+    dataset_type: str,
+    dataset_id: str | None,
+    contents: bytes | None,
+    filename: str | None
+) -> Dataset:
+    """
+    Find or load the dataset for a request.
+    
+    Args:
+        dataset_type: Either 'default' or 'custom'
+        dataset_id: Id of a dataset uploaded earlier (takes precedence)
+        contents: Raw CSV bytes sent with the request for custom datasets
+        filename: Original file name (for logging)
+        
+    Returns:
+        Registered Dataset with a parsed and compacted DataFrame
+    """
+    if dataset_id:
+        return require_dataset(dataset_id)
+    if dataset_type == "custom" and contents is not None:
+        return ingest_bytes(contents, filename)
+    # Use default Titanic dataset
+    return require_dataset(DEFAULT_DATASET_ID)
+
+
+def run_agent(question: str, dataset_id: str | None = None) -> AnswerResponse:
+    """
+    Run the agent on the current dataframe and build the response.
+    
+    Args:
+        question: The user's question
+        
+    Returns:
+        AnswerResponse with the answer and optional plot URL
+    """
+    result = get_agent(question).invoke({"messages": [("human", question)]})
+    last_message = result["messages"][-1]
+    
+    # Extract plot URL from tool responses
+    plot_url = None
+    for msg in result["messages"]:
+        if hasattr(msg, 'name') and msg.name == 'tool_plot':
+            try:
+                tool_result = json.loads(msg.content)
+                if tool_result.get("success") and tool_result.get("plot_url"):
+                    plot_url = tool_result["plot_url"]
+                    print(f"[DEBUG] Plot URL extracted from tool: {plot_url}")
+                    break
+            except (json.JSONDecodeError, AttributeError):
+                continue
+    
+    return AnswerResponse(answer=last_message.content, success=True, plot_url=plot_url, dataset_id=dataset_id)
+
+
+def parse_dataset_ids(value: str | None) -> list[str]:
+    """Split a comma-separated list of dataset ids."""
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def answer_question(
+    question: str,
+    dataset_type: str,
+    dataset_id: str | None,
+    contents: bytes | None,
+    filename: str | None,
+    extra_dataset_ids: list[str] | None = None,
+    progressive: bool = False,
+    cancel: threading.Event | None = None
+) -> AnswerResponse:
+    """
+    Load the dataset (and any extra datasets) into the current context and answer the question.
+
+    In progressive mode, large datasets are first answered from samples. In a
+    background job the estimated answer is published as the job's partial
+    result and the question is answered again, exactly, once the exact tool
+    results are ready; otherwise the estimated answer is returned and the
+    exact results are cached for the next questions.
+
+    Once cancel is set, the agent and its tools stop at their next
+    checkpoint and Cancelled is raised (see tools.limits).
+    """
+    with cancellation(cancel):
+        return _answer_question(question, dataset_type, dataset_id, contents, filename, extra_dataset_ids,
+                                progressive)
+
+
+def _answer_question(
+    question: str,
+    dataset_type: str,
+    dataset_id: str | None,
+    contents: bytes | None,
+    filename: str | None,
+    extra_dataset_ids: list[str] | None,
+    progressive: bool
+) -> AnswerResponse:
+    dataset = resolve_dataset(dataset_type, dataset_id, contents, filename)
+    others = [require_dataset(i) for i in extra_dataset_ids or [] if i != dataset.id]
+    
+    # Set the workspace in the context for tools to use; the main dataset is the current one
+    workspace = build_workspace([dataset] + others)
+    set_workspace(workspace, workspace.names[0])
+    summary = workspace.summary()
+    if others:
+        listing = ", ".join(f"{d['name']} ({d['rows']} rows)" for d in summary)
+        question = f"[Datasets: {listing}; current: {workspace.names[0]}]\n{question}"
+    sampled = [d for d in summary if "sample_rows" in d]
+    if sampled:
+        # Tools without a SQL path see only the sample; tell the model so it can say so
+        listing = ", ".join(f"{d['name']}: {d['sample_rows']} of {d['rows']} rows" for d in sampled)
+        question = f"[Sampled datasets ({listing}); aggregations use every row]\n{question}"
+    
+    if not progressive:
+        return run_agent(question, dataset.id)
+    with progressive_mode() as refinement:
+        answer = run_agent(question, dataset.id)
+    if not refinement.estimated:
+        return answer
+    answer.estimated = True
+    if not job_manager.publish_partial(answer):
+        return answer
+    print(f"[DEBUG] Published estimated answer; waiting for {len(refinement.futures)} exact results")
+    refinement.wait()
+    return run_agent(question, dataset.id)
+
+
+async def answer_until_disconnect(request: Request, *args) -> AnswerResponse:
+    """
+    Run answer_question(*args) in a worker thread, cancelling it when the
+    client disconnects, so a closed tab stops paying for LLM calls and tools.
+    Concurrent requests run their tools side by side; tool_plot serializes
+    its pyplot rendering (tools/plot.py).
+    """
+    cancel = threading.Event()
+
+    async def watch():
+        while not await request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        print("[DEBUG] Client disconnected; cancelling the request")
+        cancel.set()
+
+    watcher = asyncio.create_task(watch())
+    try:
+        return await run_in_threadpool(answer_question, *args, cancel=cancel)
+    finally:
+        watcher.cancel()
+
+
+def error_status_code(e: Exception) -> int:
+    """Map an exception raised while answering to an HTTP status code."""
+    return error_to_http(e).status_code
+
+
+def error_to_http(e: Exception) -> HTTPException:
+    """Convert an exception into the HTTPException returned to the client."""
+    if isinstance(e, DatasetNotFound):
+        return HTTPException(status_code=404, detail=str(e))
+    # Handle specific API quota/rate limit errors
+    error_message = str(e)
+    if "429" in error_message or "RESOURCE_EXHAUSTED" in error_message:
+        return HTTPException(
+            status_code=429,
+            detail="API quota exceeded. The Google Gemini API has rate limits. Please wait a moment and try again, or upgrade your API key for higher limits."
+        )
+    elif "RATE_LIMIT_EXCEEDED" in error_message:
+        return HTTPException(
+            status_code=429,
+            detail="Too many requests. Please wait a moment before trying again."
+        )
+    else:
+        return HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/ask", response_model=AnswerResponse)
 async def ask_question(
+    request: Request,
     question: str = Form(...),
     dataset_type: str = Form("default"),
+    dataset_id: str = Form(None),
+    datasets: str = Form(None),
+    mode: str = Form("sync"),
+    progressive: bool = Form(False),
     file: UploadFile = File(None)
 ):
     """
@@ -72,122 +320,288 @@ async def ask_question(
     Args:
         question: The user's question
         dataset_type: Either 'default' or 'custom'
+        dataset_id: Optional id from /uploads; avoids re-sending the CSV
+        datasets: Optional comma-separated ids of more uploaded datasets to
+            analyze alongside the main one (e.g. to join them)
+        mode: 'sync' to wait for the answer, 'async' to get a job id immediately
+        progressive: Answer large datasets from samples first (marked 'estimated');
+            async jobs then publish the estimate as 'partial_result' and the
+            exact answer as 'result'
         file: Optional CSV file for custom datasets
         
     Returns:
-        AnswerResponse with the answer and optional plot URL
+        AnswerResponse with the answer and optional plot URL, or a
+        JobStatusResponse (HTTP 202) when mode is 'async'. A sync request
+        whose client disconnects is cancelled (async jobs keep running).
     """
-    try:
-        # Load the appropriate CSV based on the request
-        if dataset_type == "custom" and file:
-            # Read the uploaded CSV file
-            contents = await file.read()
-            
-            # Try different encodings and parse CSV with better type inference
-            try:
-                df = pd.read_csv(
-                    io.BytesIO(contents),
-                    encoding='utf-8',
-                    sep=None,  # Auto-detect separator (comma, semicolon, tab, etc.)
-                    engine='python',  # More flexible parser
-                    skipinitialspace=True,  # Remove spaces after delimiter
-                    na_values=['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', '?']  # Common null values
-                )
-            except UnicodeDecodeError:
-                # Try with latin-1 encoding if utf-8 fails
-                df = pd.read_csv(
-                    io.BytesIO(contents),
-                    encoding='latin-1',
-                    sep=None,
-                    engine='python',
-                    skipinitialspace=True,
-                    na_values=['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', '?']
-                )
-            
-            print(f"[DEBUG] Loaded custom CSV: {file.filename}, shape: {df.shape}")
-            print(f"[DEBUG] Initial dtypes: {df.dtypes.to_dict()}")
-            
-            # Try to convert columns to numeric when possible
-            for col in df.columns:
-                if df[col].dtype == 'object':  # If column is string/object type
-                    try:
-                        # Try to convert to numeric, keeping non-numeric as NaN
-                        converted = pd.to_numeric(df[col], errors='coerce')
-                        # Only replace if at least 50% of values are numeric
-                        if converted.notna().sum() / len(df) > 0.5:
-                            df[col] = converted
-                            print(f"[DEBUG] Converted column '{col}' to numeric")
-                    except Exception as e:
-                        print(f"[DEBUG] Could not convert '{col}' to numeric: {e}")
-            
-            print(f"[DEBUG] Final dtypes after conversion: {df.dtypes.to_dict()}")
-            print(f"[DEBUG] Numeric columns: {df.select_dtypes(include=['number']).columns.tolist()}")
-            
+    contents = None
+    filename = None
+    if dataset_type == "custom" and file and not dataset_id:
+        # Read the uploaded CSV file
+        contents = await file.read()
+        filename = file.filename
+    
+    extra_ids = parse_dataset_ids(datasets)
+    
+    if mode == "async":
+        # Identical questions on identical data share one job and its cached result
+        if dataset_id:
+            data_key = dataset_id
+        elif contents is not None:
+            data_key = dataset_id_for_digest(hashlib.sha256(contents).hexdigest())
         else:
-            # Use default Titanic dataset
-            df = pd.read_csv(DEFAULT_CSV_PATH)
-            print(f"[DEBUG] Loaded default CSV: {DEFAULT_CSV_PATH}, shape: {df.shape}")
-        
-        # Set the dataframe in the context for tools to use
-        set_dataframe(df)
-        
-        # Process the question with the agent
-        result = agent_executor.invoke({"messages": [("human", question)]})
-        last_message = result["messages"][-1]
-        
-        # Extract plot URL from tool responses
-        plot_url = None
-        for msg in result["messages"]:
-            if hasattr(msg, 'name') and msg.name == 'tool_plot':
-                try:
-                    tool_result = json.loads(msg.content)
-                    if tool_result.get("success") and tool_result.get("plot_url"):
-                        plot_url = tool_result["plot_url"]
-                        print(f"[DEBUG] Plot URL extracted from tool: {plot_url}")
-                        break
-                except (json.JSONDecodeError, AttributeError):
-                    continue
-        
-        return AnswerResponse(answer=last_message.content, success=True, plot_url=plot_url)
+            data_key = DEFAULT_DATASET_ID
+        data_key = ",".join([data_key] + extra_ids)
+        cache_key = hashlib.sha256(f"{data_key}:{question}:{progressive}".encode()).hexdigest()
+        try:
+            job = job_manager.submit(
+                lambda: answer_question(question, dataset_type, dataset_id, contents, filename, extra_ids,
+                                        progressive),
+                cache_key=cache_key,
+                error_status=error_status_code,
+            )
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        print(f"[DEBUG] Submitted job {job.id} ({job.status})")
+        return JSONResponse(status_code=202, content=job_status(job).model_dump())
+    
+    try:
+        return await answer_until_disconnect(request, question, dataset_type, dataset_id, contents, filename,
+                                             extra_ids, progressive)
+    except Cancelled:
+        print("[DEBUG] /ask cancelled after the client disconnected")
+        # Nobody is listening; 499 is the conventional "client closed request" status
+        return Response(status_code=499)
     except Exception as e:
         print(f"[ERROR] Exception in /ask endpoint: {str(e)}")
         import traceback
         traceback.print_exc()
+        raise error_to_http(e)
+
+
+def job_status(job: Job) -> JobStatusResponse:
+    """Build the API view of a job."""
+    return JobStatusResponse(
+        **job.to_dict(),
+        result=job.result if job.status == SUCCEEDED else None,
+        partial_result=job.partial_result if job.status != SUCCEEDED else None,
+        status_url=f"/jobs/{job.id}",
+        events_url=f"/jobs/{job.id}/events",
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+def get_job(job_id: str):
+    """
+    Poll the status of a background job.
+    
+    Args:
+        job_id: Id returned by /ask in async mode
         
-        # Handle specific API quota/rate limit errors
-        error_message = str(e)
-        if "429" in error_message or "RESOURCE_EXHAUSTED" in error_message:
-            raise HTTPException(
-                status_code=429,
-                detail="API quota exceeded. The Google Gemini API has rate limits. Please wait a moment and try again, or upgrade your API key for higher limits."
-            )
-        elif "RATE_LIMIT_EXCEEDED" in error_message:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please wait a moment before trying again."
-            )
-        else:
-            raise HTTPException(status_code=500, detail=str(e))
+    Returns:
+        JobStatusResponse; 'result' is set once the job has succeeded
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job_status(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Subscribe to a background job as Server-Sent Events.
+    Emits a 'status' event on every change (including a partial result)
+    and closes after the final state.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def event_stream():
+        nonlocal job
+        last_version = None
+        while True:
+            if job.version != last_version:
+                last_version = job.version
+                yield f"event: status\ndata: {job_status(job).model_dump_json()}\n\n"
+            if job.status in TERMINAL_STATUSES:
+                break
+            # Wait off the event loop (the job may run in another worker);
+            # a comment line keeps proxies from timing out
+            job = await run_in_threadpool(job_manager.wait, job, JOB_EVENTS_KEEPALIVE_SECONDS, last_version)
+            if job.version == last_version:
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+def upload_error_to_http(e: UploadError) -> HTTPException:
+    """Convert an UploadError, exposing the offset to resume from when known."""
+    headers = {"Upload-Offset": str(e.expected_offset)} if e.expected_offset is not None else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+
+def dataset_response(dataset: Dataset) -> DatasetResponse:
+    return DatasetResponse(
+        dataset_id=dataset.id,
+        name=dataset.name,
+        filename=dataset.filename,
+        rows=dataset.rows,
+        columns=int(dataset.df.shape[1]),
+        memory_mb=round(dataset.nbytes / 1024 / 1024, 2),
+    )
+
+
+@app.post("/uploads", response_model=UploadStatusResponse)
+def create_upload(
+    filename: str = Form(...),
+    size: int = Form(None),
+    sha256: str = Form(None)
+):
+    """
+    Start a chunked, resumable CSV upload.
+    
+    Args:
+        filename: Original file name
+        size: Total size in bytes (optional, enables completeness checks)
+        sha256: Hex SHA-256 of the file (optional); if the server already
+            holds this file, the existing dataset id is returned and no
+            upload is needed
+        
+    Returns:
+        Upload session (upload_id, offset, chunk_size) or, for a known
+        file, the dataset_id with complete=True
+    """
+    if sha256:
+        existing = get_dataset(dataset_id_for_digest(sha256.lower()))
+        if existing is not None:
+            print(f"[DEBUG] Upload of {filename} deduplicated to dataset {existing.id}")
+            return UploadStatusResponse(filename=filename, dataset_id=existing.id, complete=True)
+    try:
+        session = upload_manager.create(filename, size, sha256)
+    except UploadError as e:
+        raise upload_error_to_http(e)
+    return UploadStatusResponse(**session.to_dict())
+
+
+@app.get("/uploads/{upload_id}", response_model=UploadStatusResponse)
+def get_upload(upload_id: str):
+    """Return the number of bytes received so far, to resume an interrupted upload."""
+    session = upload_manager.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return UploadStatusResponse(**session.to_dict())
+
+
+@app.put("/uploads/{upload_id}", response_model=UploadStatusResponse)
+async def upload_chunk(upload_id: str, request: Request, offset: int = Query(...)):
+    """
+    Append the raw request body to an upload, starting at offset.
+    The body is streamed to disk and parsed while it arrives.
+    Returns 409 with an Upload-Offset header if offset does not match.
+    """
+    session = upload_manager.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    try:
+        session.begin(offset)
+    except UploadError as e:
+        raise upload_error_to_http(e)
+    try:
+        async for piece in request.stream():
+            if piece:
+                await run_in_threadpool(session.write, piece)
+    except UploadError as e:
+        raise upload_error_to_http(e)
+    finally:
+        session.end()
+    return UploadStatusResponse(**session.to_dict())
+
+
+@app.post("/uploads/{upload_id}/complete", response_model=DatasetResponse)
+async def complete_upload(upload_id: str):
+    """
+    Finish an upload: verify it, deduplicate by content hash and register the dataset.
+    
+    Returns:
+        DatasetResponse with the dataset_id to pass to /ask
+    """
+    try:
+        dataset = await run_in_threadpool(upload_manager.complete, upload_id)
+    except UploadError as e:
+        raise upload_error_to_http(e)
+    except Exception as e:
+        print(f"[ERROR] Could not parse upload {upload_id}: {e}")
+        raise HTTPException(status_code=400, detail=f"Could not parse CSV: {e}")
+    return dataset_response(dataset)
+
+
+@app.get("/datasets", response_model=DatasetListResponse)
+def get_datasets():
+    """
+    List the datasets held in memory (uploads and join results) and the memory budget.
+    With several workers, datasets in the shared store are listed too; memory_mb is
+    only reported for the ones this worker holds.
+    """
+    usage = memory_usage()
+    stored = [
+        DatasetResponse(dataset_id=meta["dataset_id"], name=meta["name"], filename=meta["filename"],
+                        rows=meta["rows"], columns=meta["columns"])
+        for meta in stored_datasets()
+    ]
+    return DatasetListResponse(
+        datasets=[dataset_response(d) for d in list_datasets()] + stored,
+        used_mb=usage["used_mb"],
+        budget_mb=usage["budget_mb"],
+    )
+
+
+@app.get("/datasets/{dataset_id}", response_model=DatasetResponse)
+def get_dataset_info(dataset_id: str):
+    """Check whether a dataset is still held by the server."""
+    dataset = get_dataset(dataset_id)
+    if dataset is None:
+        raise HTTPException(status_code=404, detail="Dataset not found")
+    return dataset_response(dataset)
 
 
 @app.get("/plots/{filename}")
-def get_plot(filename: str):
+def get_plot(filename: str, request: Request):
     """
     Serve generated plot images.
     
+    Plot file names are content hashes, so responses carry a strong ETag
+    and are cacheable forever; conditional requests get 304 Not Modified.
+    
     Args:
         filename: Name of the plot file
         
     Returns:
         FileResponse with the plot image
     """
-    filepath = os.path.join(PLOTS_DIR, filename)
-    if not os.path.exists(filepath):
+    filepath = resolve_plot(filename)
+    if filepath is None:
         raise HTTPException(status_code=404, detail="Plot not found")
-    return FileResponse(filepath, media_type="image/png")
+    
+    etag, immutable = plot_etag(filename, filepath)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=31536000, immutable" if immutable else "public, max-age=3600",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    return FileResponse(filepath, media_type=media_type(filename), headers=headers)
 
 
 # --- Main ---
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # Every worker imports this module again; they meet in the shared directory
+        os.environ.setdefault("EDA_SHARED_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shared"))
+        print(f"[DEBUG] Starting {WORKERS} workers sharing {os.environ['EDA_SHARED_DIR']}")
+        uvicorn.run("api:app", host=HOST, port=PORT, workers=WORKERS)
+    else:
+        uvicorn.run(app, host=HOST, port=PORT)
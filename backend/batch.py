@@ -0,0 +1,305 @@
+"""
+Headless batch EDA for EDA Agent.
+
+Profiles every CSV of a directory without the LLM: each file is loaded
+with the upload ingestion path and the deterministic tools are run on it
+(schema, nulls, describe, outliers, correlation and the standard plots),
+writing one JSON and one HTML report per dataset plus an index with
+per-file timings. Files are spread over a process pool, largest first.
+
+Datasets and shareable tool results (plots) are kept in the shared
+directory (EDA_SHARED_DIR, by default backend/shared, as with several API
+workers), so a later run over unchanged files attaches to the parsed
+copies instead of parsing them again. Within a run, the tools read the
+background profile started when each dataset is registered. Run with
+EDA_SHARED_DIR= (empty) to keep nothing between runs.
+
+Usage (from the backend/ directory):
+    python batch.py exports/
+    python batch.py exports/ --out reports --workers 4
+    python batch.py exports/ --pattern "sales_*.csv"
+"""
+import os
+import sys
+import csv
+import glob
+import html
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Set before the tools are imported: they read it at import time
+os.environ.setdefault("EDA_SHARED_DIR", os.path.join(BACKEND_DIR, "shared"))
+
+import pandas as pd  # noqa: E402
+
+from datasets import Dataset, release_dataset  # noqa: E402
+from tools import (  # noqa: E402
+    tool_schema,
+    tool_nulls,
+    tool_describe,
+    tool_outliers,
+    tool_correlation,
+    tool_plot,
+)
+from tools.context import set_dataframe  # noqa: E402
+from tools.plot import MAX_PANELS, load_plotting  # noqa: E402
+from tools.shaping import output_budget  # noqa: E402
+from uploads import ingest_file  # noqa: E402
+
+# --- Configuration ---
+# Worker processes (each profiles one file at a time)
+BATCH_WORKERS = int(os.getenv("EDA_BATCH_WORKERS", str(os.cpu_count() or 1)))
+# Numeric columns in the correlation matrix and heatmap
+MAX_CORRELATION_COLUMNS = 30
+# Categorical columns with more categories than this get no countplot
+MAX_COUNTPLOT_CATEGORIES = 30
+PLOTS_SUBDIR = "plots"
+
+
+def report_steps(df: pd.DataFrame) -> List[Tuple[str, object, str]]:
+    """(step name, tool, input) of the report of df; inputs depend on its columns."""
+    numeric = list(df.select_dtypes(include="number").columns)
+    categorical = [c for c in df.columns
+                   if pd.api.types.is_bool_dtype(df[c].dtype)
+                   or (isinstance(df[c].dtype, pd.CategoricalDtype)
+                       and len(df[c].cat.categories) <= MAX_COUNTPLOT_CATEGORIES)]
+    panels = ([{"plot_type": "histogram", "x": str(c)} for c in numeric]
+              + [{"plot_type": "countplot", "x": str(c)} for c in categorical])[:MAX_PANELS]
+
+    steps = [
+        ("schema", tool_schema, ""),
+        ("nulls", tool_nulls, ""),
+        ("describe", tool_describe, ""),
+        ("outliers", tool_outliers, ""),
+    ]
+    columns = [str(c) for c in numeric[:MAX_CORRELATION_COLUMNS]]
+    if len(columns) > 1:
+        steps.append(("correlation", tool_correlation, json.dumps({"columns": columns})))
+    if panels:
+        steps.append(("distributions", tool_plot, json.dumps({"plot_type": "dashboard", "panels": panels,
+                                                              "title": "Distributions"})))
+    if len(columns) > 1:
+        steps.append(("correlation_heatmap", tool_plot, json.dumps({"plot_type": "heatmap", "columns": columns})))
+    return steps
+
+
+def _parse(output: str):
+    try:
+        return json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        return output
+
+
+def _copy_plot(result, out_dir: str) -> Optional[str]:
+    """Copy a plot into the report directory; returns its path relative to it."""
+    path = result.get("plot_path") if isinstance(result, dict) else None
+    if not path or not os.path.exists(path):
+        return None
+    target = os.path.join(out_dir, PLOTS_SUBDIR, os.path.basename(path))
+    # Plot files are named after their content: an existing copy is the same image
+    if not os.path.exists(target):
+        shutil.copyfile(path, target)
+    return f"{PLOTS_SUBDIR}/{os.path.basename(path)}"
+
+
+def run_report(dataset: Dataset, out_dir: str) -> Tuple[dict, dict]:
+    """
+    Run every report step on a dataset.
+
+    Returns:
+        Tuple of (results by step, seconds by step)
+    """
+    set_dataframe(dataset.df)
+    results, seconds = {}, {}
+    # Reports keep full results: no LLM prompt to fit them in
+    with output_budget(0):
+        for name, tool, input_str in report_steps(dataset.df):
+            start = time.perf_counter()
+            result = _parse(tool.invoke(input_str))
+            seconds[name] = round(time.perf_counter() - start, 3)
+            plot = _copy_plot(result, out_dir)
+            if plot is not None:
+                result = {key: value for key, value in result.items() if key not in ("plot_path", "plot_url")}
+                result["plot"] = plot
+            results[name] = result
+    return results, seconds
+
+
+def report_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def profile_file(path: str, out_dir: str) -> dict:
+    """
+    Load one CSV, run the report steps and write its JSON and HTML reports.
+
+    Returns:
+        Summary for the index: file, report name, shape, timings and any error
+    """
+    summary = {"file": path, "report": report_name(path)}
+    start = time.perf_counter()
+    try:
+        dataset, parsed = ingest_file(path)
+        seconds = {"load": round(time.perf_counter() - start, 3)}
+        summary.update({"dataset_id": dataset.id, "rows": dataset.rows, "columns": int(dataset.df.shape[1]),
+                        "parsed": parsed})
+        results, step_seconds = run_report(dataset, out_dir)
+        seconds.update(step_seconds)
+        seconds["total"] = round(time.perf_counter() - start, 3)
+        summary["seconds"] = seconds
+        summary["errors"] = {name: result["error"] for name, result in results.items()
+                             if isinstance(result, dict) and "error" in result}
+        report = {**summary, "generated": datetime.now().isoformat(timespec="seconds"), "results": results}
+        with open(os.path.join(out_dir, f"{summary['report']}.json"), "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        with open(os.path.join(out_dir, f"{summary['report']}.html"), "w", encoding="utf-8") as f:
+            f.write(render_report(report))
+        release_dataset(dataset.id)
+    except Exception as e:
+        print(f"[DEBUG] Batch report of {path} failed: {e}")
+        summary["error"] = str(e)
+        summary.setdefault("seconds", {})["total"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+# --- HTML ---
+STYLE = """
+body { font-family: sans-serif; margin: 2em; color: #222; }
+table { border-collapse: collapse; margin: 0.5em 0 1.5em; font-size: 0.9em; }
+th, td { border: 1px solid #ccc; padding: 0.25em 0.6em; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+pre { background: #f6f6f6; padding: 0.8em; overflow-x: auto; font-size: 0.85em; }
+img { max-width: 100%; }
+.error { color: #b00; }
+"""
+
+
+def _table(rows: List[List[str]]) -> str:
+    """HTML table; the first row is the header."""
+    cells = []
+    for i, row in enumerate(rows):
+        tag = "th" if i == 0 else "td"
+        cells.append("<tr>" + "".join(f"<{tag}>{html.escape(str(v))}</{tag}>" for v in row) + "</tr>")
+    return "<table>" + "".join(cells) + "</table>"
+
+
+def _result_html(result) -> str:
+    """A step result: plots as images, CSV text as a table, anything else as JSON."""
+    if isinstance(result, dict) and "plot" in result:
+        return f'<img src="{html.escape(result["plot"])}" alt="">'
+    if isinstance(result, str):
+        rows = [row for row in csv.reader(result.strip().splitlines()) if row]
+        if len(rows) > 1 and len({len(row) for row in rows}) == 1:
+            return _table(rows)
+        return f"<pre>{html.escape(result)}</pre>"
+    error = ""
+    if isinstance(result, dict) and "error" in result:
+        error = f'<p class="error">{html.escape(str(result["error"]))}</p>'
+    return error + f"<pre>{html.escape(json.dumps(result, indent=2, default=str))}</pre>"
+
+
+def render_report(report: dict) -> str:
+    """HTML page of one dataset's report; plots are linked from PLOTS_SUBDIR."""
+    title = html.escape(os.path.basename(report["file"]))
+    seconds = report["seconds"]
+    parts = [
+        f"<h1>{title}</h1>",
+        f"<p>{report['rows']} rows &times; {report['columns']} columns &middot; dataset "
+        f"{html.escape(report['dataset_id'])} ({'parsed' if report['parsed'] else 'reused'}) &middot; "
+        f"generated {html.escape(report['generated'])}</p>",
+        "<h2>Timings</h2>",
+        _table([["step", "seconds"]] + [[name, f"{s:.3f}"] for name, s in seconds.items()]),
+    ]
+    for name, result in report["results"].items():
+        parts.append(f"<h2>{html.escape(name)} <small>({seconds.get(name, 0):.3f} s)</small></h2>")
+        parts.append(_result_html(result))
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{title}</title>"
+            f"<style>{STYLE}</style></head><body>{''.join(parts)}</body></html>")
+
+
+def render_index(summaries: List[dict], wall_seconds: float) -> str:
+    """HTML index linking every report, with per-file timings."""
+    rows = [["file", "rows", "columns", "load s", "total s", "status"]]
+    links = []
+    for s in summaries:
+        seconds = s.get("seconds", {})
+        status = f"failed: {s['error']}" if "error" in s else (
+            f"{len(s['errors'])} step errors" if s.get("errors") else "ok")
+        rows.append([os.path.basename(s["file"]), s.get("rows", ""), s.get("columns", ""),
+                     seconds.get("load", ""), seconds.get("total", ""), status])
+        if "error" not in s:
+            links.append(f'<li><a href="{html.escape(s["report"])}.html">{html.escape(s["report"])}</a></li>')
+    return (f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>EDA batch report</title>"
+            f"<style>{STYLE}</style></head><body><h1>EDA batch report</h1>"
+            f"<p>{len(summaries)} files in {wall_seconds:.1f} s</p>{_table(rows)}<ul>{''.join(links)}</ul>"
+            f"</body></html>")
+
+
+# --- Main ---
+def find_files(directory: str, pattern: str) -> List[str]:
+    """CSV files of directory matching pattern, largest first (so the pool does not end on a big one)."""
+    files = [p for p in glob.glob(os.path.join(directory, pattern)) if os.path.isfile(p)]
+    return sorted(files, key=lambda p: (-os.path.getsize(p), p))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Profile every CSV of a directory without the LLM")
+    parser.add_argument("directory", help="Directory with the CSV files")
+    parser.add_argument("--out", default="reports", help="Directory for the reports (default: reports)")
+    parser.add_argument("--pattern", default="*.csv", help="File name pattern (default: *.csv)")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help="Worker processes (default: EDA_BATCH_WORKERS or the number of CPUs)")
+    args = parser.parse_args(argv)
+
+    files = find_files(args.directory, args.pattern)
+    if not files:
+        print(f"[BATCH] no files matching {args.pattern} in {args.directory}")
+        return 1
+    names = [report_name(p) for p in files]
+    if len(set(names)) < len(names):
+        print("[BATCH] several files share a report name; rename them or narrow --pattern")
+        return 1
+    os.makedirs(os.path.join(args.out, PLOTS_SUBDIR), exist_ok=True)
+
+    # Imported once here rather than in every worker (forked workers inherit it)
+    load_plotting()
+    workers = max(1, min(args.workers, len(files)))
+    print(f"[BATCH] {len(files)} files, {workers} workers, reports in {args.out}")
+    start = time.perf_counter()
+    summaries = []
+
+    def done(summary: dict):
+        summaries.append(summary)
+        status = f"failed: {summary['error']}" if "error" in summary else "ok"
+        print(f"[BATCH] {os.path.basename(summary['file']):<40} {summary['seconds']['total']:>8.2f} s  {status}")
+
+    if workers == 1:
+        for path in files:
+            done(profile_file(path, args.out))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(profile_file, path, args.out) for path in files]
+            for future in as_completed(futures):
+                done(future.result())
+
+    wall = time.perf_counter() - start
+    summaries.sort(key=lambda s: s["file"])
+    with open(os.path.join(args.out, "index.json"), "w") as f:
+        json.dump({"generated": datetime.now().isoformat(timespec="seconds"), "seconds": round(wall, 3),
+                   "files": summaries}, f, indent=2, default=str)
+    with open(os.path.join(args.out, "index.html"), "w", encoding="utf-8") as f:
+        f.write(render_index(summaries, wall))
+    failed = sum(1 for s in summaries if "error" in s)
+    print(f"[BATCH] {len(files) - failed} reports written in {wall:.1f} s"
+          + (f", {failed} files failed" if failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,4 @@
+"""
+Benchmark scripts for EDA Agent.
+Standalone scripts that measure tool performance; not part of the API.
+"""
@@ -0,0 +1,96 @@
+"""
+Payload-size benchmark for tool results.
+
+Runs every tool case of bench_tools (plus cases that stress wide and
+high-cardinality data) twice: without output shaping (budget 0, the full
+payloads tools returned before shaping existed) and with the token
+budget (EDA_TOOL_TOKEN_BUDGET or --budget), and reports the size of each
+result in characters and estimated tokens. Shows how much prompt the
+shaping layer saves and which tools still produce the largest payloads.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_payloads
+    python -m benchmarks.bench_payloads --rows 10000 --cols 500 --budget 1000
+    python -m benchmarks.bench_payloads --output payloads.json
+"""
+import os
+import sys
+import json
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from tools import (  # noqa: E402
+    tool_schema,
+    tool_correlation,
+    tool_categorical_distribution,
+    tool_batch_profile,
+    tool_plot,
+)
+from tools.context import set_dataframe  # noqa: E402
+from tools.shaping import TOKEN_BUDGET, estimate_tokens, output_budget  # noqa: E402
+from benchmarks.bench_tools import CASES, _call  # noqa: E402
+from benchmarks.synthetic import make_frame  # noqa: E402
+
+
+def wide_cases(columns: list) -> list:
+    """Cases whose payload grows with the number of columns or categories."""
+    numeric = [c for c in columns if c.startswith("num_")]
+    return [
+        ("tool_schema[all]", tool_schema, ""),
+        ("tool_correlation[wide]", tool_correlation, json.dumps({"columns": numeric[:60]})),
+        ("tool_categorical_distribution[cat_2]", tool_categorical_distribution,
+         json.dumps({"column": "cat_2", "top_k": 100})),
+        ("tool_batch_profile[all]", tool_batch_profile, ""),
+        ("tool_plot[countplot:cat_2]", tool_plot, json.dumps({"plot_type": "countplot", "x": "cat_2"})),
+    ]
+
+
+def measure(cases: list, budget: int) -> dict:
+    """Result size of every case under budget (0 = unlimited)."""
+    sizes = {}
+    with output_budget(budget):
+        for name, tool, input_str in cases:
+            output, error = _call(tool, input_str)
+            sizes[name] = {"chars": len(output), "tokens": estimate_tokens(output), "error": error}
+    return sizes
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure tool result sizes with and without output shaping")
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--cols", type=int, default=300)
+    parser.add_argument("--budget", type=int, default=TOKEN_BUDGET, help="Token budget per tool result")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args(argv)
+
+    df = make_frame(args.rows, args.cols)
+    set_dataframe(df)
+    cases = CASES + wide_cases([str(c) for c in df.columns])
+
+    before = measure(cases, 0)
+    after = measure(cases, args.budget)
+
+    print(f"[BENCH] payloads for {args.rows}x{args.cols}, budget {args.budget} tokens")
+    print(f"  {'case':<40} {'before':>9} {'after':>9}  saved")
+    results = []
+    for name, _, _ in cases:
+        b, a = before[name], after[name]
+        saved = 1 - a["tokens"] / b["tokens"] if b["tokens"] else 0.0
+        flag = f"  error: {a['error']}" if a["error"] else ""
+        print(f"  {name:<40} {b['tokens']:>9} {a['tokens']:>9}  {saved:6.1%}{flag}")
+        results.append({"case": name, "before": b, "after": a})
+    total_before = sum(r["before"]["tokens"] for r in results)
+    total_after = sum(r["after"]["tokens"] for r in results)
+    print(f"  {'total':<40} {total_before:>9} {total_after:>9}  {1 - total_after / max(total_before, 1):6.1%}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "cols": args.cols, "budget": args.budget, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
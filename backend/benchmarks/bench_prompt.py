@@ -0,0 +1,132 @@
+"""
+Prompt-size benchmark for the agent.
+
+Answers a fixed set of questions with a local fake chat model that records
+every request instead of calling an API, and reports the input tokens of
+each LLM call (system prompt + bound tool schemas + messages, estimated
+like tool results are) in three configurations:
+
+- all tools: every tool with its full docstring (the agent before dynamic
+  binding, EDA_DYNAMIC_TOOLS=0 EDA_COMPACT_TOOLS=0)
+- compact: every tool with its condensed description
+- dynamic: only the tools each question needs, condensed (the default)
+
+It also reports the prefix shared by every request: the part an LLM
+provider can cache across questions.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_prompt
+    python -m benchmarks.bench_prompt --verbose --output prompt.json
+"""
+import os
+import sys
+import json
+import argparse
+from typing import Any, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.utils.function_calling import convert_to_openai_tool  # noqa: E402
+from pydantic import Field  # noqa: E402
+
+from agent import agent_tools, build_agent  # noqa: E402
+from tools.shaping import estimate_tokens  # noqa: E402
+
+QUESTIONS = [
+    "How many missing values are there in each column?",
+    "What are the column names and types?",
+    "Give me statistics for age and fare",
+    "Show me the distribution of ages",
+    "Create a correlation heatmap",
+    "Are there outliers in fare? Use the method you prefer",
+    "Which columns have outliers?",
+    "What is the average fare by class and sex?",
+    "Profile all the columns of the dataset",
+    "What are the most common embarkation ports?",
+    "Calculate the correlation values between age, fare and pclass",
+    "How did the number of bookings evolve per month?",
+    "¿Cuántos valores faltantes hay por columna?",
+    "Muéstrame un histograma de la tarifa",
+    "¿Cuál es la tarifa promedio por clase?",
+    "[Datasets: orders (5000 rows), customers (300 rows); current: orders]\nJoin orders with customers and give the total by country",
+]
+
+CONFIGURATIONS = [
+    ("all tools", {"dynamic": False, "compact": False}),
+    ("compact", {"dynamic": False, "compact": True}),
+    ("dynamic", {"dynamic": True, "compact": True}),
+]
+
+
+class RecordingChatModel(BaseChatModel):
+    """Chat model answering "Done." to everything and recording each request as sent."""
+    requests: List[str] = Field(default_factory=list)
+    tool_schemas: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "recording"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.model_copy(update={"tool_schemas": [convert_to_openai_tool(t) for t in tools]})
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        # Providers send the system instruction, then the tool declarations, then the conversation
+        system = [m.content for m in messages if m.type == "system"]
+        conversation = [{"role": m.type, "content": m.content} for m in messages if m.type != "system"]
+        self.requests.append("\n".join(system) + "\n" + json.dumps(self.tool_schemas) + "\n"
+                             + json.dumps(conversation, ensure_ascii=False))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="Done."))])
+
+
+def measure(dynamic: bool, compact: bool) -> dict:
+    """Input tokens of the LLM call answering each question."""
+    llm = RecordingChatModel()
+    requests = llm.requests  # shared by the copies bind_tools makes
+    calls = []
+    for question in QUESTIONS:
+        tools = agent_tools(question, dynamic=dynamic, compact=compact)
+        build_agent(llm, tools, compact=compact).invoke({"messages": [("human", question)]})
+        calls.append({"question": question, "tools": [t.name for t in tools],
+                      "tokens": estimate_tokens(requests[-1])})
+    return {"calls": calls, "total_tokens": sum(c["tokens"] for c in calls),
+            "shared_prefix_tokens": estimate_tokens(os.path.commonprefix(requests))}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure agent prompt sizes with a fake model")
+    parser.add_argument("--verbose", action="store_true", help="List the tokens and tools of every question")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {name: measure(**options) for name, options in CONFIGURATIONS}
+    baseline = results[CONFIGURATIONS[0][0]]["total_tokens"]
+
+    print(f"[BENCH] input tokens per LLM call over {len(QUESTIONS)} questions")
+    print(f"  {'configuration':<12} {'mean':>7} {'total':>8} {'tools':>6} {'shared prefix':>14}  saved")
+    for name, result in results.items():
+        calls = result["calls"]
+        tools = sum(len(c["tools"]) for c in calls) / len(calls)
+        saved = 100 * (1 - result["total_tokens"] / baseline)
+        print(f"  {name:<12} {result['total_tokens'] / len(calls):>7.0f} {result['total_tokens']:>8} "
+              f"{tools:>6.1f} {result['shared_prefix_tokens']:>14}  {saved:5.1f}%")
+    if args.verbose:
+        print("\n  tokens (all tools / dynamic) and tools bound per question:")
+        for before, after in zip(results["all tools"]["calls"], results["dynamic"]["calls"]):
+            question = before["question"].splitlines()[-1]
+            print(f"  {before['tokens']:>6} {after['tokens']:>6}  {question[:50]:<50} "
+                  f"{', '.join(t[5:] for t in after['tools'])}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
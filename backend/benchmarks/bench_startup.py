@@ -0,0 +1,97 @@
+"""
+Startup-time benchmark for the API worker.
+
+Each scenario runs in a fresh interpreter so module caches do not hide
+import cost. The scenarios separate what a worker pays before it can accept
+requests ("import api") from what is deferred to first use.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10 --importtime
+"""
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import api": "import api",
+    "import api + agent": "import api; from agent import get_agent; get_agent()",
+    "import api + plotting": "import api; from tools.plot import load_plotting; load_plotting()",
+    "full warm-up": "import api; from agent import warm_up; warm_up()",
+}
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    # The LLM client refuses to build without a key; a placeholder is enough
+    # since no request is sent.
+    env.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+    env["EDA_PREWARM"] = "0"
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+
+def time_scenario(code: str, runs: int) -> list:
+    """Run code in fresh interpreters and return wall times in seconds."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=BACKEND_DIR, env=_env(), check=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def top_imports(code: str, limit: int = 15) -> list:
+    """Return the slowest top-level imports reported by -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND_DIR, env=_env(), capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        # Nesting is encoded as two spaces per level after the separator;
+        # keep the module itself and its direct imports.
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative) / 1_000_000, name.strip()))
+    rows.sort(reverse=True)
+    return rows[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure API worker startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per scenario")
+    parser.add_argument("--importtime", action="store_true",
+                        help="Show the slowest imports for 'import api'")
+    args = parser.parse_args(argv)
+
+    baseline = statistics.median(time_scenario("pass", args.runs))
+    print(f"[BENCH] interpreter startup: {baseline * 1000:.0f} ms (subtracted below)")
+    for name, code in SCENARIOS.items():
+        timings = time_scenario(code, args.runs)
+        median = statistics.median(timings) - baseline
+        print(f"  {name:<24} {median * 1000:>8.0f} ms  (min {(min(timings) - baseline) * 1000:.0f} ms)")
+
+    if args.importtime:
+        print("\n[BENCH] slowest top-level imports for 'import api':")
+        for seconds, name in top_imports(SCENARIOS["import api"]):
+            print(f"  {name:<40} {seconds * 1000:>8.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
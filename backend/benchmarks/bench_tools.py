@@ -0,0 +1,303 @@
+"""
+Microbenchmarks for every tool in backend/tools.
+
+Runs each tool (and each tool_plot plot_type) over synthetic frames of
+increasing size, recording wall time and peak Python-tracked memory.
+Cold timings run on a fresh copy of the frame (nothing cached yet), warm
+timings repeat the call on the same frame (per-dataset caches filled).
+Results can be stored as a named baseline and compared against later runs
+to see which tool degrades first as datasets grow.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.bench_tools
+    python -m benchmarks.bench_tools --rows 1000,100000 --cols 10,500
+    python -m benchmarks.bench_tools --preset full --save-baseline main
+    python -m benchmarks.bench_tools --compare main
+"""
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from tools import (  # noqa: E402
+    tool_schema,
+    tool_nulls,
+    tool_missingness,
+    tool_describe,
+    tool_column_profile,
+    tool_outliers,
+    tool_correlation,
+    tool_association,
+    tool_categorical_distribution,
+    tool_groupby,
+    tool_timeseries,
+    tool_plot,
+)
+from tools.context import set_dataframe  # noqa: E402
+from benchmarks.synthetic import make_frame  # noqa: E402
+
+BASELINES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+PRESETS = {
+    "quick": {"rows": [1_000, 100_000], "cols": [10, 100]},
+    "default": {"rows": [1_000, 100_000, 1_000_000], "cols": [10, 100, 500]},
+    "full": {"rows": [1_000, 100_000, 1_000_000, 10_000_000], "cols": [10, 100, 1_000, 5_000]},
+}
+
+# Plot types that render every row are skipped above this many rows
+# unless --max-plot-rows is raised.
+DEFAULT_MAX_PLOT_ROWS = 1_000_000
+
+
+def _plot_case(plot_type: str, **params):
+    """Build a benchmark case for a tool_plot plot_type."""
+    return (f"tool_plot[{plot_type}]", tool_plot, json.dumps({"plot_type": plot_type, **params}))
+
+
+# (case name, tool, input string). Column names refer to the fixed layout
+# produced by make_frame: num_0 int, num_1 float with nulls, num_2 lognormal,
+# cat_0 has 3 categories, cat_1 has 10 categories with nulls, ts_0 is a datetime.
+CASES = [
+    ("tool_schema", tool_schema, ""),
+    ("tool_nulls", tool_nulls, ""),
+    ("tool_missingness", tool_missingness, ""),
+    ("tool_describe", tool_describe, ""),
+    ("tool_column_profile[num]", tool_column_profile, "num_1"),
+    ("tool_column_profile[cat]", tool_column_profile, "cat_1"),
+    ("tool_outliers[iqr]", tool_outliers, json.dumps({"column": "num_2", "method": "iqr"})),
+    ("tool_outliers[zscore]", tool_outliers, json.dumps({"column": "num_2", "method": "zscore"})),
+    ("tool_outliers[all]", tool_outliers, ""),
+    ("tool_outliers[isolation_forest]", tool_outliers, json.dumps({"method": "isolation_forest"})),
+    ("tool_outliers[where]", tool_outliers, json.dumps({"column": "num_2",
+                                                        "where": "cat_0 == 'c0_1' and num_0 > 50"})),
+    ("tool_correlation", tool_correlation, json.dumps({"columns": ["num_0", "num_1", "num_2"]})),
+    ("tool_association", tool_association, ""),
+    ("tool_categorical_distribution", tool_categorical_distribution, json.dumps({"column": "cat_1"})),
+    ("tool_groupby", tool_groupby, json.dumps({"by": ["cat_0", "cat_1"],
+                                               "metrics": {"num_1": ["mean", "median"], "num_2": "max"}})),
+    ("tool_timeseries", tool_timeseries, json.dumps({"value": "num_2", "agg": "mean", "rolling": 7})),
+    ("tool_timeseries[h]", tool_timeseries, json.dumps({"value": "num_1", "freq": "h", "agg": "median"})),
+    _plot_case("histogram", x="num_1"),
+    _plot_case("bar", x="cat_0", y="num_2"),
+    _plot_case("boxplot", x="cat_0", y="num_2"),
+    _plot_case("scatter", x="num_1", y="num_2"),
+    _plot_case("line", x="num_0", y="num_2"),
+    ("tool_plot[line:time]", tool_plot, json.dumps({"plot_type": "line", "x": "ts_0", "y": "num_2",
+                                                    "hue": "cat_0"})),
+    _plot_case("countplot", x="cat_1"),
+    _plot_case("violin", x="cat_0", y="num_2"),
+    _plot_case("heatmap"),
+    _plot_case("pairplot", columns=["num_0", "num_1", "num_2"]),
+    _plot_case("dashboard", panels=[{"plot_type": "histogram", "x": "num_1"}, {"plot_type": "countplot", "x": "cat_1"},
+                                    {"plot_type": "boxplot", "x": "cat_0", "y": "num_2"}, {"plot_type": "heatmap"}]),
+]
+
+
+def _call(tool, input_str: str):
+    """Invoke a tool and remove any plot file it produced."""
+    output = tool.invoke(input_str)
+    error = None
+    try:
+        parsed = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        parsed = None
+    if isinstance(parsed, dict):
+        error = parsed.get("error")
+        plot_path = parsed.get("plot_path")
+        if plot_path and os.path.exists(plot_path):
+            os.remove(plot_path)
+    return output, error
+
+
+def run_case(tool, df, input_str: str, repeat: int) -> dict:
+    """
+    Time a tool call on a cold and on a warm dataset, and measure its peak traced memory.
+
+    Each cold call runs on a fresh deep copy of df, so neither the per-frame
+    caches (tools/cache.py) nor pandas' index hash tables hold anything from
+    earlier calls. Warm calls then repeat the call on the last copy, as a
+    follow-up question on the same dataset would.
+
+    Args:
+        tool: LangChain tool to invoke
+        df: Dataset the tool runs on
+        input_str: Input passed to the tool
+        repeat: Number of timed repetitions, cold and warm each
+
+    Returns:
+        Dict with median/min cold seconds, median warm seconds, peak memory
+        in MB of a cold call, output size and error
+    """
+    cold, warm = [], []
+    output, error = "", None
+    for _ in range(repeat):
+        set_dataframe(df.copy(deep=True))
+        gc.collect()
+        start = time.perf_counter()
+        output, error = _call(tool, input_str)
+        cold.append(time.perf_counter() - start)
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        _call(tool, input_str)
+        warm.append(time.perf_counter() - start)
+
+    # Memory is measured on a separate run so tracing overhead does not
+    # distort the timings above.
+    set_dataframe(df.copy(deep=True))
+    gc.collect()
+    tracemalloc.start()
+    _call(tool, input_str)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    set_dataframe(df)
+
+    return {
+        "median_s": round(statistics.median(cold), 6),
+        "min_s": round(min(cold), 6),
+        "warm_median_s": round(statistics.median(warm), 6),
+        "peak_mb": round(peak / 1024 / 1024, 3),
+        "output_chars": len(output),
+        "error": error,
+    }
+
+
+def run_suite(rows_list, cols_list, repeat, max_cells, max_plot_rows, only=None) -> list:
+    """
+    Run every benchmark case over the cartesian product of sizes.
+
+    Returns:
+        List of result dicts, one per (case, rows, cols) combination
+    """
+    results = []
+    for rows in rows_list:
+        for cols in cols_list:
+            size = f"{rows}x{cols}"
+            if rows * cols > max_cells:
+                print(f"[BENCH] skip {size}: {rows * cols} cells exceeds --max-cells")
+                results.append({"size": size, "rows": rows, "cols": cols, "skipped": "max_cells"})
+                continue
+
+            build_start = time.perf_counter()
+            df = make_frame(rows, cols)
+            frame_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+            print(f"[BENCH] frame {size}: {frame_mb:.1f} MB built in "
+                  f"{time.perf_counter() - build_start:.2f}s")
+            for name, tool, input_str in CASES:
+                if only and not any(o in name for o in only):
+                    continue
+                entry = {"case": name, "size": size, "rows": rows, "cols": cols}
+                if name.startswith("tool_plot") and rows > max_plot_rows:
+                    entry["skipped"] = "max_plot_rows"
+                    results.append(entry)
+                    continue
+                entry.update(run_case(tool, df, input_str, repeat))
+                results.append(entry)
+                status = f"error: {entry['error']}" if entry["error"] else "ok"
+                print(f"  {name:<34} {entry['median_s'] * 1000:>10.1f} ms cold "
+                      f"{entry['warm_median_s'] * 1000:>10.1f} ms warm "
+                      f"{entry['peak_mb']:>10.1f} MB  {status}")
+
+            del df
+            gc.collect()
+    return results
+
+
+def save_baseline(name: str, results: list) -> str:
+    """Store results as a named baseline JSON file."""
+    os.makedirs(BASELINES_DIR, exist_ok=True)
+    path = os.path.join(BASELINES_DIR, f"{name}.json")
+    with open(path, "w") as f:
+        json.dump({
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "results": results,
+        }, f, indent=2)
+    return path
+
+
+def compare_baseline(name: str, results: list, threshold: float) -> int:
+    """
+    Compare results against a stored baseline and print regressions.
+
+    Returns:
+        Number of cases slower than the baseline by more than threshold
+    """
+    path = os.path.join(BASELINES_DIR, f"{name}.json")
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+    previous = {(r.get("case"), r["size"]): r for r in baseline if "median_s" in r}
+
+    regressions = 0
+    print(f"\n[BENCH] comparison against baseline '{name}' (threshold {threshold:.0%})")
+    for r in results:
+        key = (r.get("case"), r["size"])
+        if "median_s" not in r or key not in previous:
+            continue
+        old = previous[key]
+        ratio = r["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        # Baselines saved before warm timings were recorded compare cold times only
+        warm_ratio = (r["warm_median_s"] / old["warm_median_s"] if old.get("warm_median_s")
+                      else ratio)
+        mem_ratio = r["peak_mb"] / old["peak_mb"] if old["peak_mb"] else 1.0
+        flag = ""
+        if max(ratio, warm_ratio) > 1 + threshold:
+            flag = "  <-- slower"
+            regressions += 1
+        elif max(ratio, warm_ratio) < 1 - threshold:
+            flag = "  faster"
+        print(f"  {key[0]:<34} {key[1]:>14}  cold x{ratio:5.2f}  warm x{warm_ratio:5.2f}  "
+              f"mem x{mem_ratio:5.2f}{flag}")
+    return regressions
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark EDA Agent tools over synthetic data")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--rows", type=_int_list, help="Comma-separated row counts (overrides preset)")
+    parser.add_argument("--cols", type=_int_list, help="Comma-separated column counts (overrides preset)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per case")
+    parser.add_argument("--only", help="Comma-separated substrings of case names to run")
+    parser.add_argument("--max-cells", type=int, default=500_000_000,
+                        help="Skip frame sizes with more rows*cols than this")
+    parser.add_argument("--max-plot-rows", type=int, default=DEFAULT_MAX_PLOT_ROWS,
+                        help="Skip plot cases above this many rows")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store results as a named baseline")
+    parser.add_argument("--compare", metavar="NAME", help="Compare results against a stored baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown reported as a regression")
+    parser.add_argument("--output", help="Also write raw results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rows_list = args.rows or PRESETS[args.preset]["rows"]
+    cols_list = args.cols or PRESETS[args.preset]["cols"]
+    only = [o.strip() for o in args.only.split(",")] if args.only else None
+
+    results = run_suite(rows_list, cols_list, args.repeat, args.max_cells, args.max_plot_rows, only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        print(f"[BENCH] baseline saved to {save_baseline(args.save_baseline, results)}")
+    if args.compare:
+        regressions = compare_baseline(args.compare, results, args.threshold)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
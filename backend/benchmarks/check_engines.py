@@ -0,0 +1,138 @@
+"""
+Parity check between the pandas and SQL (DuckDB) engines.
+
+Runs every tool that has a SQL code path on the same synthetic frames with
+each engine and compares the JSON outputs exactly. With --out-of-core, the
+frame is also written to CSV and loaded the way large uploads are (Parquet
+plus a sample); SQL-backed tools on the sample must match pandas on the
+full in-memory frame. Timings of both engines are printed for reference.
+
+Exits with status 1 when any output differs.
+
+Usage (from the backend/ directory):
+    python -m benchmarks.check_engines
+    python -m benchmarks.check_engines --rows 1000,1000000 --cols 20
+    python -m benchmarks.check_engines --out-of-core
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from tools import (  # noqa: E402
+    tool_nulls,
+    tool_missingness,
+    tool_describe,
+    tool_outliers,
+    tool_correlation,
+    tool_association,
+    tool_categorical_distribution,
+    tool_groupby,
+)
+from tools.context import set_dataframe  # noqa: E402
+from tools.sql_engine import DUCKDB_AVAILABLE, use_engine  # noqa: E402
+from ingest import load_out_of_core, prepare_dataframe  # noqa: E402
+from benchmarks.synthetic import make_frame  # noqa: E402
+
+# Column names refer to the fixed layout produced by make_frame (see bench_tools.CASES)
+CASES = [
+    ("tool_nulls", tool_nulls, ""),
+    ("tool_missingness", tool_missingness, ""),
+    ("tool_missingness[columns]", tool_missingness, json.dumps({"columns": ["num_1", "cat_1", "cat_0"], "top_k": 2})),
+    ("tool_describe", tool_describe, ""),
+    ("tool_describe[columns]", tool_describe, json.dumps({"columns": ["num_1", "num_2", "cat_0"]})),
+    ("tool_categorical_distribution", tool_categorical_distribution, json.dumps({"column": "cat_1"})),
+    ("tool_categorical_distribution[top_k]", tool_categorical_distribution,
+     json.dumps({"column": "cat_2", "top_k": 5})),
+    ("tool_correlation[pearson]", tool_correlation, json.dumps({"columns": ["num_0", "num_1", "num_2"]})),
+    ("tool_correlation[spearman]", tool_correlation, json.dumps({"columns": ["num_0", "num_1", "num_2", "num_3"],
+                                                                 "method": "spearman"})),
+    ("tool_association", tool_association, ""),
+    ("tool_association[mutual_info]", tool_association, json.dumps({"columns": ["cat_0", "cat_1", "flag_0", "num_0"],
+                                                                     "method": "mutual_info"})),
+    ("tool_outliers[iqr]", tool_outliers, json.dumps({"column": "num_2", "method": "iqr"})),
+    ("tool_outliers[zscore]", tool_outliers, json.dumps({"column": "num_2", "method": "zscore"})),
+    ("tool_outliers[mad]", tool_outliers, json.dumps({"column": "num_1", "method": "mad"})),
+    ("tool_outliers[all]", tool_outliers, ""),
+    ("tool_outliers[all:mad]", tool_outliers, json.dumps({"method": "mad"})),
+    ("tool_groupby", tool_groupby, json.dumps({"by": ["cat_0", "cat_1"],
+                                               "metrics": {"num_1": ["mean", "median", "std"],
+                                                           "num_2": ["min", "max", "sum"],
+                                                           "cat_2": ["count", "nunique"]}})),
+    ("tool_groupby[dropna]", tool_groupby, json.dumps({"by": "cat_1", "dropna": False,
+                                                       "metrics": {"num_0": "var"}, "top_k": 5})),
+]
+
+
+def _run(tool, input_str: str):
+    start = time.perf_counter()
+    output = tool.invoke(input_str)
+    return output, time.perf_counter() - start
+
+
+def compare(name: str, expected_df, actual_df, actual_engine: str, label: str) -> int:
+    """Run every case on both frames and print one line per case. Returns the number of mismatches."""
+    mismatches = 0
+    for case, tool, input_str in CASES:
+        set_dataframe(expected_df)
+        with use_engine("pandas"):
+            expected, pandas_s = _run(tool, input_str)
+        set_dataframe(actual_df)
+        with use_engine(actual_engine):
+            actual, sql_s = _run(tool, input_str)
+        same = expected == actual
+        mismatches += not same
+        status = "ok" if same else "MISMATCH"
+        print(f"  {case:<38} {name:>12}  pandas {pandas_s * 1000:8.1f} ms  "
+              f"{label} {sql_s * 1000:8.1f} ms  {status}")
+        if not same:
+            print(f"    pandas: {expected[:400]}")
+            print(f"    {label}: {actual[:400]}")
+    return mismatches
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare tool outputs of the pandas and SQL engines")
+    parser.add_argument("--rows", type=_int_list, default=[1_000, 100_000])
+    parser.add_argument("--cols", type=_int_list, default=[12])
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Also check large-upload loading (CSV -> Parquet + sample)")
+    args = parser.parse_args(argv)
+
+    if not DUCKDB_AVAILABLE:
+        print("[CHECK] duckdb is not installed; nothing to compare")
+        return 0
+
+    mismatches = 0
+    for rows in args.rows:
+        for cols in args.cols:
+            df = make_frame(rows, cols)
+            name = f"{rows}x{cols}"
+            mismatches += compare(name, df, df, "duckdb", "duckdb")
+            if not args.out_of_core:
+                continue
+            with tempfile.TemporaryDirectory() as tmp:
+                csv_path = os.path.join(tmp, "data.csv")
+                df.to_csv(csv_path, index=False)
+                # Reference: the full frame in memory. Not a pandas re-parse of the CSV:
+                # read_csv may round the last digit of a float, DuckDB parses exactly.
+                full = prepare_dataframe(df.copy())
+                sample, _ = load_out_of_core(csv_path, os.path.join(tmp, "data.parquet"))
+                mismatches += compare(name, full, sample, "auto", "parquet")
+
+    print(f"[CHECK] {'all outputs match' if not mismatches else f'{mismatches} mismatching outputs'}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Synthetic dataset generation for benchmarks.
+Builds Titanic-like frames of arbitrary size with a mix of column types.
+"""
+import numpy as np
+import pandas as pd
+
+
+def make_frame(rows: int, cols: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic DataFrame with numeric, categorical, boolean and datetime columns.
+
+    Roughly 60% of the columns are numeric (int and float, some with missing
+    values and heavy tails), 30% are low/medium cardinality strings and 10%
+    are booleans. One extra datetime column, ts_0, spreads the rows over a
+    year with a few missing timestamps. The first columns always follow the same layout so that
+    benchmarks can address them by name regardless of width: num_0 to num_2,
+    cat_0, cat_1 and flag_0 exist at every width.
+
+    Args:
+        rows: Number of rows
+        cols: Number of columns (minimum 6)
+        seed: Random seed for reproducibility
+
+    Returns:
+        DataFrame with columns named num_<i>, cat_<i>, flag_<i> and ts_0
+    """
+    rng = np.random.default_rng(seed)
+    cols = max(cols, 6)
+    n_cat = max(2, int(cols * 0.3))
+    n_flag = max(1, int(cols * 0.1))
+    n_num = cols - n_cat - n_flag
+
+    data = {}
+    for i in range(n_num):
+        if i % 3 == 0:
+            values = rng.integers(0, 100, size=rows)
+        elif i % 3 == 1:
+            values = rng.normal(30.0, 12.0, size=rows)
+            values[rng.random(rows) < 0.15] = np.nan
+        else:
+            values = rng.lognormal(2.5, 1.0, size=rows)
+        data[f"num_{i}"] = values
+
+    for i in range(n_cat):
+        cardinality = (3, 10, 50, 1000)[i % 4]
+        labels = np.array([f"c{i}_{j}" for j in range(cardinality)], dtype=object)
+        codes = rng.integers(0, cardinality, size=rows)
+        values = labels[codes]
+        if i % 2 == 1:
+            values[rng.random(rows) < 0.05] = None
+        data[f"cat_{i}"] = values
+
+    for i in range(n_flag):
+        data[f"flag_{i}"] = rng.random(rows) < 0.4
+
+    seconds = rng.integers(0, 365 * 86400, size=rows)
+    stamps = pd.Timestamp("2024-01-01") + pd.to_timedelta(seconds, unit="s")
+    data["ts_0"] = stamps.where(rng.random(rows) >= 0.01)
+
+    return pd.DataFrame(data)
@@ -0,0 +1,285 @@
+"""
+Dataset registry for EDA Agent.
+Keeps parsed DataFrames in memory, keyed by dataset id, so repeated
+questions (and repeated uploads of the same file) reuse one parsed copy.
+
+Uploaded datasets are identified by the SHA-256 of their raw bytes, which
+makes deduplication automatic. The bundled Titanic CSV uses DEFAULT_DATASET_ID.
+Datasets derived by the tools (join results) are stored here too, keyed by a
+hash of their inputs. All of them share one memory budget: the least
+recently used datasets are evicted when it is exceeded. A dataset evicted
+from memory is loaded again from its source file (the finished upload) the
+next time it is asked for, as long as that file is still on disk (in
+multi-worker mode, also when another worker registered it).
+
+With several worker processes, datasets are also written to the shared
+store (store.py): a worker asked for a dataset it does not hold attaches to
+the stored copy, and the worker that parsed it switches to that copy too.
+"""
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import time
+from typing import Dict, List, Optional, Tuple
+import pandas as pd
+
+from ingest import load_source, prepare_dataframe
+from store import dataset_store
+from tools.cache import set_frame_key
+from tools.profiling import profile_dataset
+from tools.sql_engine import attach_source, source_of
+from tools.workspace import Workspace, dataset_name
+
+# --- Configuration ---
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CSV_PATH = os.path.join(BACKEND_DIR, "titanic.csv")
+DEFAULT_DATASET_ID = "default"
+# Maximum number of datasets kept in memory (least recently used are dropped)
+MAX_DATASETS = int(os.getenv("EDA_MAX_DATASETS", "8"))
+# Memory held by all datasets together (the most recent one is always kept)
+MEMORY_BUDGET_MB = float(os.getenv("EDA_MEMORY_BUDGET_MB", "2048"))
+# Rows sampled to estimate the size of text columns
+MEMORY_SAMPLE_ROWS = 10_000
+
+
+class DatasetNotFound(LookupError):
+    """Raised when a dataset id is unknown or no longer held in memory."""
+
+
+@dataclass
+class Dataset:
+    """A parsed dataset and where it came from."""
+    id: str
+    df: pd.DataFrame
+    filename: Optional[str] = None
+    source_path: Optional[str] = None
+    loaded_at: float = field(default_factory=time.time)
+    nbytes: int = 0
+
+    @property
+    def rows(self) -> int:
+        """Rows of the full dataset; df holds only a sample of large out-of-core uploads."""
+        source = source_of(self.df)
+        return source.rows if source is not None else int(self.df.shape[0])
+
+    @property
+    def name(self) -> str:
+        """Short name used to refer to the dataset in a workspace."""
+        return dataset_name(self.filename, self.id[:8])
+
+
+_datasets: "OrderedDict[str, Dataset]" = OrderedDict()
+_lock = threading.Lock()
+# (filename, source_path) of every dataset registered from a file, kept after eviction
+_sources: Dict[str, Tuple[Optional[str], str]] = {}
+# Serializes reloads, so a dataset asked for by several requests is parsed once
+_reload_lock = threading.Lock()
+
+
+def register_dataset(dataset_id: str, df: pd.DataFrame, filename: Optional[str] = None,
+                     source_path: Optional[str] = None) -> Dataset:
+    """
+    Store a parsed dataset under dataset_id, replacing any previous entry.
+    Evicts the least recently used datasets beyond MAX_DATASETS or MEMORY_BUDGET_MB.
+    In multi-worker mode the dataset is written to the shared store and the
+    stored (memory-mapped) copy is registered instead of df. Either way its
+    background profile starts (tools/profiling.py).
+    """
+    dataset = None
+    if source_path is not None:
+        with _lock:
+            _sources[dataset_id] = (filename, source_path)
+    if dataset_store is not None:
+        dataset_store.save(dataset_id, df, filename, source_path, source_of(df))
+        dataset = attach_dataset(dataset_id)
+    if dataset is None:
+        dataset = _register(Dataset(id=dataset_id, df=df, filename=filename, source_path=source_path,
+                                    nbytes=frame_nbytes(df)))
+    # Precompute what first questions usually need while the user types one
+    profile_dataset(dataset.df)
+    return dataset
+
+
+def _register(dataset: Dataset) -> Dataset:
+    """Hold dataset in this process, evicting the least recently used ones over the limits."""
+    dataset_id = dataset.id
+    budget = MEMORY_BUDGET_MB * 1024 * 1024
+    with _lock:
+        _datasets[dataset_id] = dataset
+        _datasets.move_to_end(dataset_id)
+        while len(_datasets) > 1 and (len(_datasets) > MAX_DATASETS or _used_bytes() > budget):
+            evicted_id, evicted = _datasets.popitem(last=False)
+            print(f"[DEBUG] Evicted dataset {evicted_id} from memory "
+                  f"({evicted.nbytes / 1024 / 1024:.1f} MB)")
+    return dataset
+
+
+def frame_nbytes(df: pd.DataFrame, sample_size: int = MEMORY_SAMPLE_ROWS) -> int:
+    """
+    Approximate memory held by df. Columns of Python objects (e.g. strings)
+    are measured on a sample of rows and scaled, since measuring every
+    object is slow on large frames.
+    """
+    usage = df.memory_usage(index=True, deep=False)
+    total = int(usage.sum())
+    if len(df) <= sample_size:
+        return int(df.memory_usage(index=True, deep=True).sum())
+    sample = df.sample(sample_size, random_state=0)
+    deep = sample.memory_usage(index=False, deep=True)
+    shallow = sample.memory_usage(index=False, deep=False)
+    extra = (deep - shallow)[deep > shallow]
+    return total + int(extra.sum() * len(df) / sample_size)
+
+
+def attach_dataset(dataset_id: str) -> Optional[Dataset]:
+    """Register the shared store's copy of dataset_id, or return None if it is not stored."""
+    loaded = dataset_store.load(dataset_id)
+    if loaded is None:
+        return None
+    df, meta = loaded
+    if meta["source"] is not None:
+        attach_source(df, *meta["source"])
+    # Lets tools share their results on this dataset across workers
+    set_frame_key(df, f"{dataset_id}@{meta['version']}")
+    return _register(Dataset(id=dataset_id, df=df, filename=meta["filename"],
+                             source_path=meta["source_path"], loaded_at=meta["created_at"],
+                             nbytes=frame_nbytes(df)))
+
+
+def _used_bytes() -> int:
+    return sum(d.nbytes for d in _datasets.values())
+
+
+def memory_usage() -> Dict[str, float]:
+    """Memory held by registered datasets and the configured budget, in MB."""
+    with _lock:
+        used = _used_bytes()
+        count = len(_datasets)
+    return {"datasets": count, "used_mb": round(used / 1024 / 1024, 2), "budget_mb": MEMORY_BUDGET_MB}
+
+
+def list_datasets() -> List[Dataset]:
+    """Registered datasets, most recently used last."""
+    with _lock:
+        return list(_datasets.values())
+
+
+def stored_datasets() -> List[Dict]:
+    """Metadata of the datasets in the shared store that this worker does not hold."""
+    if dataset_store is None:
+        return []
+    with _lock:
+        held = set(_datasets)
+    return [{**meta, "name": dataset_name(meta["filename"], meta["dataset_id"][:8])}
+            for meta in dataset_store.list() if meta["dataset_id"] not in held]
+
+
+def get_dataset(dataset_id: str) -> Optional[Dataset]:
+    """Return a registered dataset (loading the default one on demand), or None."""
+    with _lock:
+        dataset = _datasets.get(dataset_id)
+        if dataset is not None:
+            _datasets.move_to_end(dataset_id)
+            return dataset
+    if dataset_store is not None:
+        dataset = attach_dataset(dataset_id)
+        if dataset is not None:
+            return dataset
+    if dataset_id == DEFAULT_DATASET_ID:
+        return load_default_dataset()
+    return reload_dataset(dataset_id)
+
+
+def reload_dataset(dataset_id: str) -> Optional[Dataset]:
+    """
+    Load an evicted dataset again from its source file and register it.
+
+    Returns:
+        The dataset, or None if it was not loaded from a file or the file is gone
+    """
+    with _lock:
+        source = _sources.get(dataset_id)
+    if source is None and dataset_store is not None:
+        # Registered by another worker: the store keeps the metadata of evicted datasets
+        meta = dataset_store.meta(dataset_id)
+        if meta is not None and meta["source_path"] is not None:
+            source = (meta["filename"], meta["source_path"])
+    if source is None:
+        return None
+    filename, path = source
+    with _reload_lock:
+        with _lock:
+            dataset = _datasets.get(dataset_id)
+        if dataset is not None:
+            # Reloaded by a concurrent request
+            return dataset
+        if not os.path.exists(path):
+            with _lock:
+                _sources.pop(dataset_id, None)
+            return None
+        print(f"[DEBUG] Reloading evicted dataset {dataset_id} from {path}")
+        try:
+            df = load_source(path)
+        except Exception as e:
+            print(f"[DEBUG] Could not reload dataset {dataset_id}: {e}")
+            return None
+        return register_dataset(dataset_id, df, filename=filename, source_path=path)
+
+
+def require_dataset(dataset_id: str) -> Dataset:
+    """Like get_dataset, but raises DatasetNotFound instead of returning None."""
+    dataset = get_dataset(dataset_id)
+    if dataset is None:
+        raise DatasetNotFound(f"Dataset '{dataset_id}' not found. Please upload it again.")
+    return dataset
+
+
+def has_dataset(dataset_id: str) -> bool:
+    """True if dataset_id is currently held in memory."""
+    with _lock:
+        return dataset_id in _datasets
+
+
+def release_dataset(dataset_id: str):
+    """Stop holding dataset_id in memory (the shared store keeps its copy, if any)."""
+    with _lock:
+        _datasets.pop(dataset_id, None)
+
+
+def load_default_dataset() -> Dataset:
+    """Parse the bundled Titanic CSV once and register it."""
+    df = pd.read_csv(DEFAULT_CSV_PATH)
+    print(f"[DEBUG] Loaded default CSV: {DEFAULT_CSV_PATH}, shape: {df.shape}")
+    df = prepare_dataframe(df)
+    return register_dataset(DEFAULT_DATASET_ID, df, filename=os.path.basename(DEFAULT_CSV_PATH),
+                            source_path=DEFAULT_CSV_PATH)
+
+
+class RegistryStore:
+    """Workspace store backed by the registry, so derived datasets count against the memory budget."""
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        dataset = get_dataset(key)
+        return dataset.df if dataset is not None else None
+
+    def put(self, key: str, df: pd.DataFrame, name: str) -> None:
+        register_dataset(key, df, filename=name)
+
+
+registry_store = RegistryStore()
+
+
+def build_workspace(datasets: List[Dataset]) -> Workspace:
+    """
+    Workspace with the given datasets, named after their files.
+    Repeated names get a numeric suffix; the first dataset is the current one.
+    """
+    frames, keys = {}, {}
+    for dataset in datasets:
+        name, suffix = dataset.name, 2
+        while name in frames:
+            name, suffix = f"{dataset.name}_{suffix}", suffix + 1
+        frames[name] = dataset.df
+        keys[name] = dataset.id
+    return Workspace(frames, keys, store=registry_store)
@@ -0,0 +1,420 @@
+"""
+Dataset ingestion for EDA Agent.
+Parses uploaded CSVs and compacts the resulting DataFrame for analysis.
+Large CSVs can instead be converted to Parquet and sampled (see load_out_of_core).
+"""
+import io
+import os
+import csv
+import warnings
+import importlib.util
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from tools.sql_engine import SAMPLE_ROWS, attach_source, convert_to_parquet, sample_source
+
+# --- Configuration ---
+# Values treated as missing when parsing uploaded CSVs
+NA_VALUES = ['', 'NA', 'N/A', 'null', 'NULL', 'None', '-', '?']
+# Apply load-time compaction (downcasting and categoricals)
+COMPACT_DATAFRAMES = os.getenv("EDA_COMPACT_DATAFRAMES", "1").lower() in ("1", "true", "yes")
+# String columns become 'category' when unique values / rows is at most this ratio...
+CATEGORY_MAX_RATIO = float(os.getenv("EDA_CATEGORY_MAX_RATIO", "0.5"))
+# ...and the number of unique values is at most this
+CATEGORY_MAX_UNIQUE = int(os.getenv("EDA_CATEGORY_MAX_UNIQUE", "100000"))
+# Remaining object string columns use Arrow-backed storage when pyarrow is installed
+ARROW_STRINGS = importlib.util.find_spec("pyarrow") is not None
+# Convert text columns that hold dates/timestamps to datetime64 at load
+DETECT_DATETIMES = os.getenv("EDA_DETECT_DATETIMES", "1").lower() in ("1", "true", "yes")
+# Share of sampled values that must parse as dates for a column to be converted
+DATETIME_MIN_RATIO = 0.9
+DATETIME_SAMPLE_SIZE = 1000
+# Distinct sampled values whose formats are tried for the whole column
+DATETIME_GUESS_VALUES = 10
+# Bytes IncrementalCSVParser buffers waiting for a line or quoted field to end
+# before it gives up and parses the whole file at the end
+MAX_TAIL_BYTES = int(os.getenv("EDA_MAX_TAIL_BYTES", str(8 * 1024 * 1024)))
+
+
+def _is_text(s: pd.Series) -> bool:
+    """True for object and string columns (pandas 2 'object' or pandas 3 'str')."""
+    return s.dtype == object or pd.api.types.is_string_dtype(s.dtype)
+
+
+def parse_csv(source) -> pd.DataFrame:
+    """
+    Parse a CSV with separator auto-detection.
+    Tries UTF-8 first and falls back to latin-1.
+    
+    Args:
+        source: Raw CSV bytes or a path to a CSV file
+    """
+    # Try different encodings and parse CSV with better type inference
+    try:
+        return pd.read_csv(
+            io.BytesIO(source) if isinstance(source, bytes) else source,
+            encoding='utf-8',
+            sep=None,  # Auto-detect separator (comma, semicolon, tab, etc.)
+            engine='python',  # More flexible parser
+            skipinitialspace=True,  # Remove spaces after delimiter
+            na_values=NA_VALUES  # Common null values
+        )
+    except UnicodeDecodeError:
+        # Try with latin-1 encoding if utf-8 fails
+        return pd.read_csv(
+            io.BytesIO(source) if isinstance(source, bytes) else source,
+            encoding='latin-1',
+            sep=None,
+            engine='python',
+            skipinitialspace=True,
+            na_values=NA_VALUES
+        )
+
+
+class IncrementalCSVParser:
+    """
+    Parse a CSV while its bytes are still arriving.
+
+    Bytes are fed in arbitrary chunks; every complete line block is parsed
+    immediately with the fast C engine and kept as a DataFrame piece, so the
+    raw upload never has to be held in memory. The separator is sniffed from
+    the first block, and the encoding switches from UTF-8 to latin-1 the
+    first time a block fails to decode.
+
+    Each block infers its own dtypes, so a column can come out int64 in one
+    block and text in another; finish() re-reads such columns from the
+    spooled file so they get the single dtype a full parse would give.
+
+    If a block cannot be parsed incrementally (e.g. ragged rows), or more
+    than MAX_TAIL_BYTES wait for a line to end (e.g. a stray quote keeps a
+    "quoted field" open), the parser marks itself as failed and finish()
+    re-parses the whole spooled file with the flexible settings used by
+    parse_csv.
+    """
+
+    def __init__(self):
+        self._tail = b""
+        self._columns: Optional[List[str]] = None
+        self._sep = ","
+        self._encoding = "utf-8"
+        self._pieces: List[pd.DataFrame] = []
+        self.failed = False
+
+    def feed(self, chunk: bytes):
+        """Consume the next chunk of raw bytes."""
+        if self.failed:
+            return
+        data = self._tail + chunk
+        cut = data.rfind(b"\n")
+        # An odd number of quotes means the last newline is inside a quoted
+        # field; wait for more data before parsing.
+        if cut < 0 or data[:cut + 1].count(b'"') % 2 == 1:
+            if len(data) > MAX_TAIL_BYTES:
+                print(f"[DEBUG] No complete line in {len(data)} bytes, will parse the full file")
+                self.failed = True
+                self._pieces = []
+                data = b""
+            self._tail = data
+            return
+        block = data[:cut + 1]
+        self._tail = data[cut + 1:]
+        self._parse(block)
+
+    def _read(self, block: bytes, **kwargs) -> pd.DataFrame:
+        try:
+            block.decode(self._encoding)
+        except UnicodeDecodeError:
+            self._encoding = "latin-1"
+        return pd.read_csv(
+            io.BytesIO(block),
+            encoding=self._encoding,
+            sep=self._sep,
+            skipinitialspace=True,
+            na_values=NA_VALUES,
+            **kwargs
+        )
+
+    def _parse(self, block: bytes):
+        try:
+            if self._columns is None:
+                sample = block[:64 * 1024].decode(self._encoding, errors="replace")
+                try:
+                    self._sep = csv.Sniffer().sniff(sample, delimiters=",;\t|").delimiter
+                except csv.Error:
+                    self._sep = ","
+                piece = self._read(block)
+                self._columns = list(piece.columns)
+            else:
+                piece = self._read(block, header=None, names=self._columns)
+            if len(piece):
+                self._pieces.append(piece)
+        except Exception as e:
+            print(f"[DEBUG] Incremental CSV parse failed, will parse the full file: {e}")
+            self.failed = True
+            self._pieces = []
+
+    def finish(self, spool_path: str) -> pd.DataFrame:
+        """
+        Parse any remaining bytes and return the full DataFrame.
+
+        Args:
+            spool_path: Path of the file holding all bytes fed so far, used
+                as a fallback when incremental parsing failed
+        """
+        if not self.failed and self._tail.strip():
+            self._parse(self._tail if self._tail.endswith(b"\n") else self._tail + b"\n")
+            self._tail = b""
+        if self.failed or self._columns is None:
+            return parse_csv(spool_path)
+        if not self._pieces:
+            return pd.DataFrame(columns=self._columns)
+        mixed = [i for i in range(len(self._columns))
+                 if len({piece.dtypes.iloc[i] for piece in self._pieces}) > 1]
+        df = pd.concat(self._pieces, ignore_index=True)
+        self._pieces = []
+        if mixed:
+            df = self._reparse_columns(df, mixed, spool_path)
+        return df
+
+    def _reparse_columns(self, df: pd.DataFrame, positions: List[int], spool_path: str) -> pd.DataFrame:
+        """Replace the columns at positions with a parse of the whole spooled file."""
+        print(f"[DEBUG] Re-parsing columns with mixed block dtypes: {[self._columns[i] for i in positions]}")
+        full = pd.read_csv(
+            spool_path,
+            encoding=self._encoding,
+            sep=self._sep,
+            skipinitialspace=True,
+            na_values=NA_VALUES,
+            usecols=positions
+        )
+        if len(full) != len(df):
+            return parse_csv(spool_path)
+        for j, i in enumerate(positions):
+            df.isetitem(i, full.iloc[:, j])
+        return df
+
+
+def coerce_numeric_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert text columns to numeric when more than half of the values parse as numbers.
+    Modifies and returns df.
+    """
+    for col in df.columns:
+        if _is_text(df[col]):  # If column is string/object type
+            try:
+                # Try to convert to numeric, keeping non-numeric as NaN
+                converted = pd.to_numeric(df[col], errors='coerce')
+                # Only replace if at least 50% of values are numeric
+                if converted.notna().sum() / len(df) > 0.5:
+                    df[col] = converted
+                    print(f"[DEBUG] Converted column '{col}' to numeric")
+            except Exception as e:
+                print(f"[DEBUG] Could not convert '{col}' to numeric: {e}")
+    return df
+
+
+def _looks_like_datetime(s: pd.Series) -> Optional[str]:
+    """
+    Decide from a sample whether a text column holds dates.
+
+    Returns:
+        The strftime format to parse the column with, or None if the column
+        is not a datetime column
+    """
+    sample = s.dropna()
+    if sample.empty:
+        return None
+    sample = sample.iloc[:DATETIME_SAMPLE_SIZE].astype(str)
+    # Plain numbers (ids, years, amounts) are not treated as dates
+    if sample.str.fullmatch(r"[+-]?\d+(\.\d+)?").mean() > 0.5:
+        return None
+    if not sample.str.contains(r"\d").all():
+        return None
+
+    # Dates need a format pandas recognizes, with a year: fractions ("1/2"),
+    # phone numbers, ranges and versions have none
+    try:
+        from pandas.tseries.api import guess_datetime_format
+    except ImportError:
+        return None
+    candidates = []
+    with warnings.catch_warnings():
+        # Both orders are tried on purpose; pandas warns when one contradicts dayfirst
+        warnings.simplefilter("ignore", UserWarning)
+        for value in sample.unique()[:DATETIME_GUESS_VALUES]:
+            for dayfirst in (False, True):
+                fmt = guess_datetime_format(value, dayfirst=dayfirst)
+                if fmt and ("%Y" in fmt or "%y" in fmt) and fmt not in candidates:
+                    candidates.append(fmt)
+    # One format must fit the column: mixing formats would read some dates
+    # month-first and others day-first
+    best, best_ratio = None, DATETIME_MIN_RATIO
+    for fmt in candidates:
+        ratio = pd.to_datetime(sample, format=fmt, errors="coerce").notna().mean()
+        if ratio > best_ratio or (best is None and ratio >= best_ratio):
+            best, best_ratio = fmt, ratio
+    return best
+
+
+def parse_datetime_columns(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Convert text columns whose values are dates or timestamps to datetime64.
+    Values that fail to parse become NaT.
+
+    Returns:
+        Tuple of (DataFrame, names of converted columns)
+    """
+    converted = []
+    result = df.copy(deep=False)
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
+        if not _is_text(s):
+            continue
+        fmt = _looks_like_datetime(s)
+        if fmt is None:
+            continue
+        parsed = pd.to_datetime(s, format=fmt, errors="coerce")
+        if parsed.notna().sum() >= DATETIME_MIN_RATIO * s.notna().sum():
+            result.isetitem(i, parsed)
+            converted.append(str(col))
+    return result, converted
+
+
+def memory_usage_mb(df: pd.DataFrame) -> float:
+    """Deep memory usage of a DataFrame in megabytes."""
+    return float(df.memory_usage(deep=True).sum()) / 1024 / 1024
+
+
+def _compact_series(s: pd.Series) -> pd.Series:
+    """Return a smaller representation of s, or s itself if none applies."""
+    if pd.api.types.is_bool_dtype(s.dtype) or isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+
+    if pd.api.types.is_integer_dtype(s.dtype):
+        # Integer downcasting is always lossless
+        return pd.to_numeric(s, downcast='integer')
+
+    if pd.api.types.is_float_dtype(s.dtype):
+        # Only downcast floats when every value survives the round trip
+        values = s.to_numpy(dtype=np.float64, na_value=np.nan)
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32.astype(np.float64), values, equal_nan=True):
+            return s.astype(np.float32)
+        return s
+
+    if _is_text(s):
+        n = len(s)
+        n_unique = s.nunique(dropna=True)
+        if n and n_unique <= CATEGORY_MAX_UNIQUE and n_unique / n <= CATEGORY_MAX_RATIO:
+            return s.astype('category')
+        if ARROW_STRINGS and s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string":
+            return s.astype("string[pyarrow]")
+
+    return s
+
+
+def compact_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Shrink a DataFrame's memory footprint without changing its values.
+
+    - Integer columns are downcast to the smallest integer type that fits
+    - Float columns become float32 when that is lossless
+    - Low-cardinality text columns become 'category'
+    - Other pure-string object columns become Arrow-backed strings (if pyarrow is available)
+
+    Args:
+        df: DataFrame to compact
+
+    Returns:
+        Tuple of (compacted DataFrame, report) where report contains memory
+        before/after in MB and the dtype change of every converted column
+    """
+    before = memory_usage_mb(df)
+    changes = {}
+    result = df.copy(deep=False)
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
+        new = _compact_series(s)
+        if new.dtype != s.dtype:
+            changes[str(col)] = f"{s.dtype} -> {new.dtype}"
+            result.isetitem(i, new)
+    after = memory_usage_mb(result)
+
+    report = {
+        "memory_before_mb": round(before, 3),
+        "memory_after_mb": round(after, 3),
+        "saved_pct": round((1 - after / before) * 100, 1) if before else 0.0,
+        "converted_columns": changes,
+    }
+    return result, report
+
+
+def prepare_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Apply the load-time stages (if enabled) and log their effect:
+    datetime detection, then compaction.
+    """
+    if DETECT_DATETIMES:
+        df, converted = parse_datetime_columns(df)
+        if converted:
+            print(f"[DEBUG] Parsed datetime columns: {converted}")
+    if not COMPACT_DATAFRAMES:
+        return df
+    df, report = compact_dataframe(df)
+    print(f"[DEBUG] Compacted dataframe: {report['memory_before_mb']} MB -> "
+          f"{report['memory_after_mb']} MB ({report['saved_pct']}% saved)")
+    if report["converted_columns"]:
+        print(f"[DEBUG] Compacted columns: {report['converted_columns']}")
+    return df
+
+
+def load_out_of_core(path: str, target: str) -> Tuple[pd.DataFrame, int]:
+    """
+    Convert a large CSV to Parquet and load a random sample of it.
+
+    Column types are decided on a first sample with the same rules as
+    in-memory uploads (numeric coercion, datetime detection) and applied to
+    the whole file during the conversion. The returned sample is backed by
+    the Parquet file, so the SQL engine aggregates over every row.
+
+    Args:
+        path: CSV file
+        target: Parquet file to write
+
+    Returns:
+        Tuple of (prepared sample DataFrame, number of rows in the file)
+    """
+    raw, _ = sample_source(path, SAMPLE_ROWS, NA_VALUES)
+    text_columns = [col for col in raw.columns if _is_text(raw[col])]
+    sample = coerce_numeric_columns(raw.copy())
+    casts = {col: "DOUBLE" for col in text_columns if pd.api.types.is_numeric_dtype(sample[col])}
+    date_formats = {}
+    if DETECT_DATETIMES:
+        for col in text_columns:
+            if col not in casts:
+                fmt = _looks_like_datetime(sample[col])
+                if fmt is not None:
+                    date_formats[col] = fmt
+    convert_to_parquet(path, target, casts, date_formats, NA_VALUES)
+
+    df, rows = sample_source(target, SAMPLE_ROWS)
+    print(f"[DEBUG] Converted {path} to Parquet: {rows} rows, sampled {len(df)}")
+    df = prepare_dataframe(df)
+    attach_source(df, target, rows)
+    return df, rows
+
+
+def load_source(path: str) -> pd.DataFrame:
+    """
+    Load a dataset again from the file it was registered from.
+
+    A Parquet file (an out-of-core upload) is sampled again and the sample
+    stays backed by the file; a CSV is parsed and prepared as at upload.
+    """
+    if path.endswith(".parquet"):
+        df, rows = sample_source(path, SAMPLE_ROWS)
+        df = prepare_dataframe(df)
+        attach_source(df, path, rows)
+        return df
+    return prepare_dataframe(coerce_numeric_columns(parse_csv(path)))
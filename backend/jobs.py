@@ -0,0 +1,377 @@
+"""
+Background job management for EDA Agent.
+Runs long analyses in a bounded worker pool so /ask can return immediately.
+
+Jobs are kept in memory with their result until they expire (JOB_TTL_SECONDS
+after finishing). Submitting the same cache key while a job is queued,
+running or still cached returns the existing job instead of recomputing.
+
+With several worker processes (EDA_SHARED_DIR), every job is also recorded
+on disk, so any worker can report its status and result and reuse it for
+the same cache key; the job itself runs in the worker that accepted it.
+That worker refreshes the records of its unfinished jobs every
+JOB_HEARTBEAT_SECONDS. A queued or running record whose worker has stopped
+(no heartbeat for JOB_STALE_SECONDS, or its process is gone) is marked
+failed, never reused, and expires like any finished job.
+
+A running job may publish a partial result (e.g. an estimated answer)
+before its final one; every change bumps the job's version, which is what
+waiters and event streams watch.
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from tools.cache import SHARED_DIR
+
+# --- Configuration ---
+JOB_WORKERS = int(os.getenv("EDA_JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("EDA_JOB_QUEUE_SIZE", "16"))
+JOB_TTL_SECONDS = int(os.getenv("EDA_JOB_TTL_SECONDS", "900"))
+# Job records visible to every worker process (empty: jobs stay in memory)
+JOBS_DIR = os.path.join(SHARED_DIR, "jobs") if SHARED_DIR else ""
+# How often a worker re-reads the record of a job running in another worker
+JOB_POLL_SECONDS = 0.5
+# How often a worker refreshes the records of its unfinished jobs
+JOB_HEARTBEAT_SECONDS = 5
+# Unfinished records not refreshed for this long belong to a stopped worker
+JOB_STALE_SECONDS = int(os.getenv("EDA_JOB_STALE_SECONDS", "60"))
+# Identifies this worker process in job records
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+
+class JobQueueFull(Exception):
+    """Raised when the number of pending jobs reaches JOB_QUEUE_SIZE."""
+
+
+# Job whose function runs in the current context (None outside jobs)
+_current_job: ContextVar[Optional["Job"]] = ContextVar("current_job", default=None)
+
+
+@dataclass
+class Job:
+    """State of a single background job."""
+    id: str
+    cache_key: Optional[str] = None
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    partial_result: Any = None
+    error: Optional[str] = None
+    error_status: int = 500
+    # Incremented on every change of status or partial result
+    version: int = 0
+    # Worker process running the job, and when it last refreshed the record
+    owner: str = WORKER_ID
+    heartbeat_at: Optional[float] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+    changed: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    def notify(self):
+        """Wake up waiters after a change (the version was already bumped)."""
+        with self.changed:
+            self.changed.notify_all()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serializable view of the job (without the result payload)."""
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "error_status": self.error_status if self.status == FAILED else None,
+        }
+
+    def to_record(self) -> Dict[str, Any]:
+        """The job with its result, as stored for other worker processes."""
+        dump = lambda value: value.model_dump() if hasattr(value, "model_dump") else value
+        return {**self.to_dict(), "cache_key": self.cache_key, "result": dump(self.result),
+                "partial_result": dump(self.partial_result), "version": self.version,
+                "error_status": self.error_status, "owner": self.owner, "heartbeat_at": self.heartbeat_at}
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        job = cls(id=record["job_id"], cache_key=record["cache_key"], status=record["status"],
+                  created_at=record["created_at"], started_at=record["started_at"],
+                  finished_at=record["finished_at"], result=record["result"],
+                  partial_result=record.get("partial_result"), error=record["error"],
+                  error_status=record["error_status"], version=record.get("version", 0),
+                  owner=record.get("owner", ""), heartbeat_at=record.get("heartbeat_at"))
+        if job.status in TERMINAL_STATUSES:
+            job.done.set()
+        return job
+
+
+class JobManager:
+    """
+    Bounded background job runner with result caching and expiry.
+
+    Args:
+        max_workers: Number of jobs executed concurrently
+        max_pending: Maximum number of queued or running jobs
+        ttl_seconds: How long finished jobs (and their results) are kept
+        shared_dir: Directory for job records shared with other processes (None: memory only)
+    """
+
+    def __init__(self, max_workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_SIZE,
+                 ttl_seconds: int = JOB_TTL_SECONDS, shared_dir: Optional[str] = JOBS_DIR or None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="eda-job")
+        self._max_pending = max_pending
+        self._ttl = ttl_seconds
+        self._shared_dir = shared_dir
+        if shared_dir:
+            os.makedirs(shared_dir, exist_ok=True)
+        self._jobs: Dict[str, Job] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        # Serializes record writes, so a heartbeat never overwrites a newer state
+        self._save_lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, fn: Callable[[], Any], cache_key: Optional[str] = None,
+               error_status: Optional[Callable[[Exception], int]] = None) -> Job:
+        """
+        Schedule fn to run in the worker pool.
+
+        Args:
+            fn: Callable with no arguments producing the job result
+            cache_key: Optional key; an existing live job with the same key is reused
+            error_status: Optional mapping from an exception to an HTTP status code
+
+        Returns:
+            The new or reused Job
+
+        Raises:
+            JobQueueFull: If too many jobs are already pending
+        """
+        with self._lock:
+            self._purge_expired()
+            if cache_key and cache_key in self._by_key:
+                existing = self._jobs.get(self._by_key[cache_key])
+                if existing and existing.status != FAILED:
+                    return existing
+            if cache_key and self._shared_dir:
+                # A live job submitted to another worker
+                existing = self._load(self._read(f"key_{cache_key}").get("job_id", ""))
+                if existing and existing.status != FAILED:
+                    return existing
+
+            pending = sum(1 for j in self._jobs.values() if j.status not in TERMINAL_STATUSES)
+            if pending >= self._max_pending:
+                raise JobQueueFull(f"Too many pending jobs ({pending}). Please try again later.")
+
+            job = Job(id=uuid.uuid4().hex, cache_key=cache_key)
+            self._jobs[job.id] = job
+            if cache_key:
+                self._by_key[cache_key] = job.id
+        self._save(job)
+        if self._shared_dir:
+            if cache_key:
+                self._write(f"key_{cache_key}", {"job_id": job.id})
+            self._start_heartbeat()
+
+        # Run in a copy of the caller's context so values the job sets
+        # (e.g. the current dataframe) stay local to it
+        ctx = copy_context()
+        self._executor.submit(ctx.run, self._run, job, fn, error_status)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id (also from other workers), or None if unknown or expired."""
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+        if job is None and self._shared_dir:
+            return self._load(job_id)
+        return job
+
+    def wait(self, job: Job, timeout: float, version: Optional[int] = None) -> Job:
+        """
+        Wait up to timeout seconds for job to change (state or partial result).
+
+        Args:
+            job: Job to watch
+            timeout: Maximum seconds to wait
+            version: Version already seen (default: job.version)
+
+        Returns:
+            The job, re-read from its record if it runs in another worker
+        """
+        version = job.version if version is None else version
+        with self._lock:
+            local = job.id in self._jobs
+        if local or not self._shared_dir:
+            with job.changed:
+                job.changed.wait_for(lambda: job.version != version or job.status in TERMINAL_STATUSES, timeout)
+            return job
+        deadline = time.time() + timeout
+        while True:
+            current = self._load(job.id) or job
+            if current.version != version or current.status in TERMINAL_STATUSES or time.time() >= deadline:
+                return current
+            time.sleep(JOB_POLL_SECONDS)
+
+    def publish_partial(self, result: Any) -> bool:
+        """
+        Make result the partial result of the job running in the current context.
+
+        Returns:
+            False when not called from a job (nobody could see the partial result)
+        """
+        job = _current_job.get()
+        if job is None:
+            return False
+        job.partial_result = result
+        job.version += 1
+        self._save(job)
+        job.notify()
+        return True
+
+    # --- Shared records ---
+
+    def _read(self, name: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self._shared_dir, f"{name}.json")) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, name: str, record: Dict[str, Any]):
+        fd, tmp_path = tempfile.mkstemp(dir=self._shared_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(record, f, default=str)
+        os.replace(tmp_path, os.path.join(self._shared_dir, f"{name}.json"))
+
+    def _save(self, job: Job):
+        if self._shared_dir:
+            with self._save_lock:
+                job.heartbeat_at = time.time()
+                self._write(job.id, job.to_record())
+
+    def _load(self, job_id: str) -> Optional[Job]:
+        """Job recorded by any worker, or None if unknown or expired."""
+        record = self._read(job_id) if job_id else {}
+        if not record:
+            return None
+        if record["finished_at"] is not None and time.time() - record["finished_at"] > self._ttl:
+            self._remove(job_id, record.get("cache_key"))
+            return None
+        job = Job.from_record(record)
+        if _is_stale(record):
+            # Its worker stopped: fail it (it expires after the TTL) and stop reusing it by key
+            print(f"[DEBUG] Job {job_id} of stopped worker {record.get('owner')} marked as failed")
+            job.status = FAILED
+            job.error = "The worker running this job stopped. Please ask again."
+            job.error_status = 503
+            job.finished_at = time.time()
+            job.version += 1
+            job.done.set()
+            self._write(job_id, job.to_record())
+            if job.cache_key and self._read(f"key_{job.cache_key}").get("job_id") == job_id:
+                self._remove("", job.cache_key)
+        return job
+
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._beat, name="eda-job-heartbeat", daemon=True)
+                self._heartbeat.start()
+
+    def _beat(self):
+        """Refresh the records of unfinished local jobs; drop expired and stale records of any worker."""
+        while True:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+            with self._lock:
+                unfinished = [job for job in self._jobs.values() if job.status not in TERMINAL_STATUSES]
+            for job in unfinished:
+                self._save(job)
+            self._sweep_records()
+
+    def _sweep_records(self):
+        for name in os.listdir(self._shared_dir):
+            if name.endswith(".json") and not name.startswith("key_"):
+                self._load(name[:-len(".json")])
+
+    def _remove(self, job_id: str, cache_key: Optional[str]):
+        names = ([job_id] if job_id else []) + ([f"key_{cache_key}"] if cache_key else [])
+        for name in names:
+            try:
+                os.remove(os.path.join(self._shared_dir, f"{name}.json"))
+            except OSError:
+                pass
+
+    def _run(self, job: Job, fn: Callable[[], Any], error_status):
+        _current_job.set(job)
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.version += 1
+        self._save(job)
+        job.notify()
+        try:
+            job.result = fn()
+            job.status = SUCCEEDED
+        except Exception as e:
+            print(f"[ERROR] Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.error_status = error_status(e) if error_status else 500
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            job.version += 1
+            self._save(job)
+            job.done.set()
+            job.notify()
+
+    def _purge_expired(self):
+        """Drop finished jobs older than the TTL. Caller must hold the lock."""
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self._ttl
+        ]
+        for job_id in expired:
+            job = self._jobs.pop(job_id)
+            if job.cache_key and self._by_key.get(job.cache_key) == job_id:
+                del self._by_key[job.cache_key]
+            if self._shared_dir:
+                self._remove(job_id, job.cache_key)
+
+
+def _is_stale(record: Dict[str, Any]) -> bool:
+    """True for a queued or running record whose worker process has stopped."""
+    if record["status"] in TERMINAL_STATUSES:
+        return False
+    if time.time() - (record.get("heartbeat_at") or record["created_at"]) > JOB_STALE_SECONDS:
+        return True
+    host, _, pid = (record.get("owner") or "").rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+# Shared manager used by the API
+job_manager = JobManager()
@@ -0,0 +1,255 @@
+"""
+Shared on-disk dataset store for multi-worker deployments.
+
+With EDA_SHARED_DIR set, every dataset registered by any worker process is
+also written here, and workers that do not hold a dataset attach to it by
+id instead of parsing the upload again. Columns with a plain numpy layout
+(numbers, booleans, datetimes and category codes) are stored as .npy files
+and memory-mapped read-only, so all workers share one copy of them through
+the OS page cache. Other columns (strings, mixed objects) are pickled.
+
+Each dataset is a directory written under a temporary name and renamed in
+place, so readers never see a partial dataset and concurrent writers of the
+same id simply keep the first copy. Datasets loaded from a file (the bundled
+CSV) remember its size and mtime and are discarded when the file changes.
+
+Datasets not loaded for EDA_SHARED_STORE_TTL_SECONDS are evicted, and the
+least recently loaded ones go first while the store takes more than
+EDA_SHARED_STORE_MAX_MB. Evicting a dataset that has a source file only
+deletes its columns: the metadata stays, so any worker can parse the
+dataset again from that file (datasets.reload_dataset). Workers that
+already hold it keep their mapped copy.
+"""
+import os
+import json
+import time
+import uuid
+import pickle
+import shutil
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from tools.cache import SHARED_DIR
+from tools.sql_engine import Source
+
+# --- Configuration ---
+DATASETS_DIR = os.path.join(SHARED_DIR, "datasets") if SHARED_DIR else ""
+META_FILE = "meta.json"
+FRAME_FILE = "frame.pkl"
+# Datasets not loaded by any worker for longer than this are evicted
+STORE_TTL_SECONDS = int(os.getenv("EDA_SHARED_STORE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Disk space for stored datasets; the least recently loaded are evicted beyond it
+STORE_MAX_MB = float(os.getenv("EDA_SHARED_STORE_MAX_MB", "10240"))
+
+
+def _is_plain(values: Any) -> bool:
+    """True for numpy arrays that np.save writes without pickling."""
+    return isinstance(values, np.ndarray) and values.dtype.kind in "biufcmM"
+
+
+def _file_stamp(path: Optional[str]) -> Optional[List[float]]:
+    try:
+        stat = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+class DatasetStore:
+    """Datasets shared by every worker process, one directory per dataset id."""
+
+    def __init__(self, directory: str, ttl_seconds: float = STORE_TTL_SECONDS,
+                 max_mb: float = STORE_MAX_MB):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_mb * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+    def _dir(self, dataset_id: str) -> str:
+        # Ids are hashes, "default" or "join_..." keys; keep them to safe file names
+        safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in dataset_id)
+        return os.path.join(self.directory, safe)
+
+    def save(self, dataset_id: str, df: pd.DataFrame, filename: Optional[str] = None,
+             source_path: Optional[str] = None, source: Optional[Source] = None):
+        """
+        Write df under dataset_id unless another worker already did.
+
+        Args:
+            dataset_id: Registry id of the dataset
+            df: Parsed DataFrame (a sample for out-of-core datasets)
+            filename: Original file name
+            source_path: File the dataset was loaded from
+            source: Parquet source of a sampled dataset, re-attached on load
+        """
+        target = self._dir(dataset_id)
+        if os.path.isdir(target):
+            existing = self._read_meta(dataset_id)
+            if existing is None or not existing.get("evicted"):
+                return
+            # Evicted: store the reloaded copy in place of the metadata
+            shutil.rmtree(target, ignore_errors=True)
+        tmp = os.path.join(self.directory, f".{os.path.basename(target)}.{uuid.uuid4().hex}.tmp")
+        os.makedirs(tmp)
+        try:
+            frame = {"columns": df.columns, "index": df.index, "other": {}, "categories": {}}
+            for i in range(df.shape[1]):
+                s = df.iloc[:, i]
+                if isinstance(s.dtype, pd.CategoricalDtype) and _is_plain(s.cat.codes.to_numpy()):
+                    np.save(os.path.join(tmp, f"c{i}.npy"), s.cat.codes.to_numpy())
+                    frame["categories"][i] = (s.cat.categories, s.cat.ordered)
+                elif isinstance(s.dtype, np.dtype) and _is_plain(s.to_numpy()):
+                    np.save(os.path.join(tmp, f"c{i}.npy"), s.to_numpy())
+                else:
+                    frame["other"][i] = s
+            with open(os.path.join(tmp, FRAME_FILE), "wb") as f:
+                pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+            meta = {
+                "dataset_id": dataset_id,
+                "version": uuid.uuid4().hex[:12],
+                "filename": filename,
+                "source_path": source_path,
+                "source_stamp": _file_stamp(source_path),
+                "source": [source.path, source.rows] if source is not None else None,
+                "rows": source.rows if source is not None else int(df.shape[0]),
+                "columns": int(df.shape[1]),
+                "created_at": time.time(),
+            }
+            with open(os.path.join(tmp, META_FILE), "w") as f:
+                json.dump(meta, f)
+            os.rename(tmp, target)
+            print(f"[DEBUG] Stored dataset {dataset_id} in shared store")
+        except OSError:
+            # Another worker renamed its copy first
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(target):
+                raise
+        self.prune(keep=dataset_id)
+
+    def _read_meta(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self._dir(dataset_id), META_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def meta(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Metadata of a stored dataset, or None if it is missing or its source file changed.
+        Evicted datasets have "evicted": True and cannot be loaded.
+        """
+        meta = self._read_meta(dataset_id)
+        if meta is None:
+            return None
+        if meta.get("source_stamp") is not None and _file_stamp(meta["source_path"]) != meta["source_stamp"]:
+            print(f"[DEBUG] Source of stored dataset {dataset_id} changed; discarding it")
+            self.remove(dataset_id)
+            return None
+        return meta
+
+    def load(self, dataset_id: str) -> Optional[Tuple[pd.DataFrame, Dict[str, Any]]]:
+        """
+        Attach to a stored dataset.
+
+        Returns:
+            (DataFrame with memory-mapped columns, metadata), or None if it is not stored
+        """
+        meta = self.meta(dataset_id)
+        if meta is None or meta.get("evicted"):
+            return None
+        target = self._dir(dataset_id)
+        columns = {}
+        try:
+            with open(os.path.join(target, FRAME_FILE), "rb") as f:
+                frame = pickle.load(f)
+            for i in range(len(frame["columns"])):
+                if i in frame["other"]:
+                    columns[i] = frame["other"][i]
+                    continue
+                values = np.load(os.path.join(target, f"c{i}.npy"), mmap_mode="r")
+                if i in frame["categories"]:
+                    categories, ordered = frame["categories"][i]
+                    values = pd.Categorical.from_codes(values, categories=categories, ordered=ordered,
+                                                       validate=False)
+                columns[i] = pd.Series(values, index=frame["index"], copy=False)
+            # The metadata's mtime is the last time any worker loaded the dataset
+            os.utime(os.path.join(target, META_FILE))
+        except OSError:
+            # Evicted by another worker meanwhile
+            return None
+        df = pd.DataFrame(columns, index=frame["index"], copy=False)
+        df.columns = frame["columns"]
+        return df, meta
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Metadata of every stored dataset."""
+        metas = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.startswith("."):
+                meta = self.meta(name)
+                if meta is not None and not meta.get("evicted"):
+                    metas.append(meta)
+        return metas
+
+    def prune(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Evict datasets not loaded for ttl_seconds, then the least recently
+        loaded ones while the store takes more than max_mb.
+
+        Args:
+            keep: Dataset id never evicted (the one just stored)
+
+        Returns:
+            Ids of the evicted datasets
+        """
+        now = time.time()
+        entries, used = [], 0
+        for name in os.listdir(self.directory):
+            meta = None if name.startswith(".") else self._read_meta(name)
+            if meta is None or meta.get("evicted"):
+                continue
+            target = self._dir(meta["dataset_id"])
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(target))
+                loaded_at = os.path.getmtime(os.path.join(target, META_FILE))
+            except OSError:
+                continue
+            used += size
+            if meta["dataset_id"] != keep:
+                entries.append((loaded_at, size, meta))
+
+        evicted = []
+        for loaded_at, size, meta in sorted(entries, key=lambda entry: entry[:2]):
+            if now - loaded_at <= self.ttl_seconds and used <= self.max_bytes:
+                break
+            self._evict(meta)
+            used -= size
+            evicted.append(meta["dataset_id"])
+            print(f"[DEBUG] Evicted dataset {meta['dataset_id']} from shared store "
+                  f"({size / 1024 / 1024:.1f} MB)")
+        return evicted
+
+    def _evict(self, meta: Dict[str, Any]):
+        """Delete a dataset's columns, keeping its metadata if it can be reloaded from a file."""
+        target = self._dir(meta["dataset_id"])
+        if meta.get("source_stamp") is None:
+            self.remove(meta["dataset_id"])
+            return
+        tmp = os.path.join(self.directory, f".{META_FILE}.{uuid.uuid4().hex}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({**meta, "evicted": True}, f)
+        os.replace(tmp, os.path.join(target, META_FILE))
+        for name in os.listdir(target):
+            if name != META_FILE:
+                try:
+                    os.remove(os.path.join(target, name))
+                except OSError:
+                    pass
+
+    def remove(self, dataset_id: str):
+        shutil.rmtree(self._dir(dataset_id), ignore_errors=True)
+
+
+# Shared store used by the registry (None: single-process mode)
+dataset_store = DatasetStore(DATASETS_DIR) if DATASETS_DIR else None
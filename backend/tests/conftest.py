@@ -0,0 +1,56 @@
+"""
+Shared fixtures for the backend tests.
+
+Run from the backend/ directory: python -m pytest -q
+Generated plots and uploads go to a temporary directory, and datasets are
+not profiled in the background, so tests see only their own computations.
+"""
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Read by the modules at import time: set before any of them is imported
+_TMP_DIR = tempfile.mkdtemp(prefix="eda-tests-")
+os.environ.setdefault("EDA_PLOTS_DIR", os.path.join(_TMP_DIR, "plots"))
+os.environ.setdefault("EDA_UPLOADS_DIR", os.path.join(_TMP_DIR, "uploads"))
+os.environ.setdefault("EDA_PROFILE_ON_LOAD", "0")
+os.environ.pop("EDA_SHARED_DIR", None)
+
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from tools.context import set_dataframe  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def titanic_frame() -> pd.DataFrame:
+    """The bundled Titanic CSV, prepared as at load time."""
+    from ingest import prepare_dataframe
+
+    return prepare_dataframe(pd.read_csv(os.path.join(BACKEND_DIR, "titanic.csv")))
+
+
+@pytest.fixture
+def titanic(titanic_frame) -> pd.DataFrame:
+    """Titanic as the current dataframe of the test."""
+    set_dataframe(titanic_frame)
+    return titanic_frame
+
+
+@pytest.fixture(scope="session")
+def synthetic_frame() -> pd.DataFrame:
+    """Benchmark frame (benchmarks/synthetic.py): numeric, categorical, boolean and datetime columns."""
+    from benchmarks.synthetic import make_frame
+
+    return make_frame(5000, 12)
+
+
+@pytest.fixture
+def synthetic(synthetic_frame) -> pd.DataFrame:
+    """The synthetic frame as the current dataframe of the test."""
+    set_dataframe(synthetic_frame)
+    return synthetic_frame
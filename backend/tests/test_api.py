@@ -0,0 +1,64 @@
+"""Tests for answering questions in worker threads (api.answer_until_disconnect)."""
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import api
+from tools import tool_plot
+from tools.limits import Cancelled, checkpoint
+
+SPECS = [
+    {"plot_type": "histogram", "x": "age"},
+    {"plot_type": "countplot", "x": "embark_town", "hue": "sex"},
+    {"plot_type": "scatter", "x": "age", "y": "fare", "hue": "survived"},
+    {"plot_type": "heatmap"},
+    {"plot_type": "bar", "x": "class", "y": "fare"},
+]
+
+
+class FakeRequest:
+    """Stands in for the /ask request; disconnected tells whether its client has left."""
+
+    def __init__(self, disconnected: bool = False):
+        self.disconnected = disconnected
+
+    async def is_disconnected(self) -> bool:
+        return self.disconnected
+
+
+def plot_agent(question: str, dataset_id: str | None = None) -> api.AnswerResponse:
+    """Stands in for the LLM agent: the question is a plot spec, answered with tool_plot."""
+    checkpoint()
+    result = json.loads(tool_plot.invoke(question))
+    assert "error" not in result, result
+    return api.AnswerResponse(answer="", success=True, plot_url=result["plot_url"], dataset_id=dataset_id)
+
+
+async def ask_all(questions, disconnected: bool = False):
+    return await asyncio.gather(*(api.answer_until_disconnect(FakeRequest(disconnected), question, "default",
+                                                              None, None, None)
+                                  for question in questions))
+
+
+def test_concurrent_questions_plot_like_serial_ones(monkeypatch):
+    monkeypatch.setattr(api, "run_agent", plot_agent)
+    questions = [json.dumps(spec) for spec in SPECS]
+    expected = [os.path.basename(answer.plot_url) for answer in asyncio.run(ask_all(questions))]
+    answers = asyncio.run(ask_all(questions * 4))
+    assert [os.path.basename(answer.plot_url) for answer in answers] == expected * 4
+
+
+def test_disconnect_cancels_the_question(monkeypatch):
+    def slow_agent(question: str, dataset_id: str | None = None) -> api.AnswerResponse:
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            checkpoint()
+            time.sleep(0.01)
+        raise AssertionError("the question was not cancelled")
+
+    monkeypatch.setattr(api, "run_agent", slow_agent)
+    with pytest.raises(Cancelled):
+        asyncio.run(ask_all(["slow question"], disconnected=True))
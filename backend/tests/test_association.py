@@ -0,0 +1,74 @@
+"""Parity of tool_association (tools/association.py) with measures computed from pandas.crosstab."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import association as association_module
+from tools import tool_association
+from tools.association import association_matrix
+from tools.sql_engine import DUCKDB_AVAILABLE, use_engine
+
+TITANIC_COLUMNS = ["sex", "pclass", "embarked", "survived", "deck", "who", "alone"]
+SYNTHETIC_COLUMNS = ["cat_0", "cat_1", "cat_2", "flag_0"]
+ENGINES = ["pandas"] + (["duckdb"] if DUCKDB_AVAILABLE else [])
+
+
+def _crosstab_measures(a: pd.Series, b: pd.Series) -> dict:
+    """Cramér's V and mutual information (nats) of two columns, rows missing either value left out."""
+    table = pd.crosstab(a, b).to_numpy(dtype=float)
+    n = table.sum()
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    chi2 = ((table - expected) ** 2 / expected).sum()
+    observed = table > 0
+    mutual_info = (table[observed] / n * np.log(table[observed] / expected[observed])).sum()
+    return {"cramers_v": np.sqrt(chi2 / (n * (min(table.shape) - 1))), "mutual_info": mutual_info}
+
+
+def _entropy(s: pd.Series) -> float:
+    p = s.value_counts(normalize=True).to_numpy()
+    return float(-(p * np.log(p)).sum())
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("method", ["cramers_v", "mutual_info"])
+@pytest.mark.parametrize("frame, columns", [("titanic", TITANIC_COLUMNS), ("synthetic", SYNTHETIC_COLUMNS)])
+def test_tool_matches_crosstab(request, frame, columns, method, engine):
+    df = request.getfixturevalue(frame)
+    with use_engine(engine):
+        result = json.loads(tool_association.invoke(json.dumps({"columns": columns, "method": method,
+                                                                 "top_k": 100})))
+    matrix = result["association_matrix"]
+    assert result["columns"] == columns
+    for i, a in enumerate(columns):
+        diagonal = _entropy(df[a]) if method == "mutual_info" else 1.0
+        assert matrix[a][a] == pytest.approx(diagonal, abs=1e-4)
+        for b in columns[i + 1:]:
+            expected = _crosstab_measures(df[a], df[b])[method]
+            assert matrix[a][b] == matrix[b][a] == pytest.approx(expected, abs=1e-4)
+
+
+def test_parallel_counting_gives_the_same_matrix(synthetic_frame, monkeypatch):
+    df = synthetic_frame.copy()
+    serial = association_matrix(df, SYNTHETIC_COLUMNS, "mutual_info")
+    monkeypatch.setattr(association_module, "PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(association_module, "ASSOCIATION_WORKERS", 4)
+    parallel = association_matrix(df.copy(), SYNTHETIC_COLUMNS, "mutual_info")
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_dependent_and_independent_columns():
+    rng = np.random.default_rng(0)
+    a = rng.choice(["x", "y", "z"], 20_000)
+    df = pd.DataFrame({"a": a, "same": pd.Series(a).map({"x": 1, "y": 2, "z": 3}),
+                       "noise": rng.choice(["p", "q"], 20_000)})
+    matrix = association_matrix(df, ["a", "same", "noise"])
+    assert matrix.loc["a", "same"] == pytest.approx(1.0)
+    assert matrix.loc["a", "noise"] < 0.05
+
+
+def test_columns_outside_the_category_range_are_skipped(titanic):
+    result = json.loads(tool_association.invoke(json.dumps({"columns": ["sex", "fare", "deck", "embark_town"]})))
+    assert "fare" in result["skipped"]
+    assert result["columns"] == ["sex", "deck", "embark_town"]
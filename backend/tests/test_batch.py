@@ -0,0 +1,86 @@
+"""Tests for the headless batch CLI (batch.py): reports written, datasets reused from the shared store."""
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Imported first: store.py reads EDA_SHARED_DIR at import time, unset here (conftest)
+import datasets
+import uploads
+from store import DatasetStore
+
+
+def _csvs(directory) -> dict:
+    rng = np.random.default_rng(0)
+    frames = {
+        "sales": pd.DataFrame({"units": rng.integers(0, 50, 300), "price": rng.normal(20, 4, 300).round(2),
+                               "region": rng.choice(["north", "south"], 300)}),
+        "visits": pd.DataFrame({"minutes": rng.exponential(5, 200).round(1), "pages": rng.integers(1, 9, 200)}),
+    }
+    directory.mkdir()
+    for name, df in frames.items():
+        df.to_csv(directory / f"{name}.csv", index=False)
+    return frames
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """batch.py with the shared store in tmp_path, and no dataset held by this process."""
+    monkeypatch.setenv("EDA_SHARED_DIR", str(tmp_path / "shared"))
+    import batch
+
+    monkeypatch.setattr(datasets, "dataset_store", DatasetStore(str(tmp_path / "shared" / "datasets")))
+    monkeypatch.setattr(datasets, "_datasets", OrderedDict())
+    monkeypatch.setattr(datasets, "_sources", {})
+    return batch
+
+
+def _index(out) -> dict:
+    with open(out / "index.json") as f:
+        return {os.path.basename(s["file"]): s for s in json.load(f)["files"]}
+
+
+def test_batch_writes_a_report_per_file(batch, tmp_path):
+    frames = _csvs(tmp_path / "exports")
+    out = tmp_path / "reports"
+    assert batch.main([str(tmp_path / "exports"), "--out", str(out), "--workers", "1"]) == 0
+
+    index = _index(out)
+    assert sorted(index) == ["sales.csv", "visits.csv"]
+    assert (out / "index.html").read_text().count('<a href="') == 2
+    for name, df in frames.items():
+        summary = index[f"{name}.csv"]
+        assert (summary["rows"], summary["columns"]) == df.shape
+        assert summary["parsed"] and not summary["errors"]
+        with open(out / f"{name}.json") as f:
+            report = json.load(f)
+        assert list(report["results"]) == [s[0] for s in batch.report_steps(df)]
+        assert report["results"]["describe"]
+        # Plots are copied next to the reports and linked from the HTML
+        plot = report["results"]["distributions"]["plot"]
+        assert (out / plot).exists()
+        assert f'src="{plot}"' in (out / f"{name}.html").read_text()
+
+
+def test_rerun_reuses_the_datasets_of_the_shared_store(batch, tmp_path, monkeypatch):
+    _csvs(tmp_path / "exports")
+    args = [str(tmp_path / "exports"), "--out", str(tmp_path / "reports"), "--workers", "1"]
+    assert batch.main(args) == 0
+    first = _index(tmp_path / "reports")
+    assert sorted(m["dataset_id"] for m in datasets.dataset_store.list()) \
+        == sorted(s["dataset_id"] for s in first.values())
+
+    # A new run: nothing held in memory, and the CSVs must not be parsed again
+    monkeypatch.setattr(datasets, "_datasets", OrderedDict())
+    monkeypatch.setattr(datasets, "_sources", {})
+    monkeypatch.setattr(uploads, "IncrementalCSVParser", None)
+    assert batch.main(args) == 0
+    second = _index(tmp_path / "reports")
+    for name, summary in second.items():
+        assert not summary["parsed"] and not summary["errors"]
+        assert summary["dataset_id"] == first[name]["dataset_id"]
+        assert (summary["rows"], summary["columns"]) == (first[name]["rows"], first[name]["columns"])
+        assert "(reused)" in (tmp_path / "reports" / name.replace(".csv", ".html")).read_text()
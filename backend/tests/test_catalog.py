@@ -0,0 +1,45 @@
+"""Tests for per-question tool selection (tools/catalog.py)."""
+import pytest
+
+from tools import ALL_TOOLS
+from tools.catalog import ALWAYS_BOUND, CORE_TOOLS, select_tools
+
+QUESTIONS = [
+    ("Which passengers paid the most?", ["tool_describe", "tool_groupby"]),
+    ("Which 10 tickets were most expensive?", ["tool_describe", "tool_groupby"]),
+    ("How many passengers survived?", ["tool_categorical_distribution", "tool_groupby"]),
+    ("¿Cuántos pasajeros sobrevivieron?", ["tool_categorical_distribution", "tool_groupby"]),
+    ("What is the average fare by class?", ["tool_describe", "tool_groupby"]),
+    ("Show the age histogram", ["tool_plot"]),
+    ("Are there outliers in fare?", ["tool_outliers"]),
+    ("Give me an overview of every column", ["tool_batch_profile"]),
+    ("Which columns have missing values?", ["tool_nulls", "tool_missingness"]),
+    ("Is fare correlated with age?", ["tool_correlation"]),
+    ("Is there a trend in sales over time?", ["tool_timeseries"]),
+]
+
+
+def _names(question):
+    return [t.name for t in select_tools(question)]
+
+
+@pytest.mark.parametrize("question, needed", QUESTIONS, ids=[q for q, _ in QUESTIONS])
+def test_questions_get_the_tools_that_answer_them(question, needed):
+    names = _names(question)
+    assert set(needed + list(ALWAYS_BOUND + CORE_TOOLS)) <= set(names)
+    # Selection keeps ALL_TOOLS order, so equal selections give equal prompts
+    assert names == [t.name for t in ALL_TOOLS if t.name in names]
+
+
+def test_explicit_questions_narrow_the_tools():
+    assert "tool_join" not in _names("Are there outliers in fare?")
+    assert len(_names("Are there outliers in fare?")) < len(ALL_TOOLS)
+
+
+@pytest.mark.parametrize("question", [None, "", "Hello!"])
+def test_questions_without_triggers_get_every_tool(question):
+    assert _names(question) == [t.name for t in ALL_TOOLS]
+
+
+def test_several_datasets_bind_join():
+    assert "tool_join" in _names("[Datasets: orders, customers]\nAverage fare by class?")
@@ -0,0 +1,82 @@
+"""Tests for the dataset registry (datasets.py) and the cleanup of finished uploads (uploads.py)."""
+import os
+import time
+
+import pandas as pd
+import pytest
+
+import uploads
+from datasets import (DatasetNotFound, get_dataset, has_dataset, register_dataset, release_dataset,
+                      require_dataset)
+from ingest import load_source
+from tools.sql_engine import DUCKDB_AVAILABLE, source_of
+
+
+def _upload(name: str, content: str, age: float = 0) -> str:
+    """Write a finished upload last used age seconds ago."""
+    path = os.path.join(uploads.UPLOADS_DIR, f"{name}.csv")
+    with open(path, "w") as f:
+        f.write(content)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def test_evicted_dataset_is_reloaded_from_its_file():
+    path = _upload("ds_reload", "a,b\n1,x\n2,y\n3,x\n")
+    df = load_source(path)
+    register_dataset("ds_reload", df, filename="reload.csv", source_path=path)
+    release_dataset("ds_reload")
+    assert not has_dataset("ds_reload")
+
+    dataset = require_dataset("ds_reload")
+    assert has_dataset("ds_reload")
+    assert dataset.filename == "reload.csv" and dataset.source_path == path
+    pd.testing.assert_frame_equal(dataset.df, df)
+
+
+@pytest.mark.skipif(not DUCKDB_AVAILABLE, reason="duckdb is not installed")
+def test_evicted_out_of_core_dataset_keeps_its_parquet_source(tmp_path):
+    from ingest import load_out_of_core
+
+    csv_path = tmp_path / "big.csv"
+    pd.DataFrame({"n": range(100), "c": ["a", "b"] * 50}).to_csv(csv_path, index=False)
+    parquet_path = str(tmp_path / "ds_big.parquet")
+    df, rows = load_out_of_core(str(csv_path), parquet_path)
+    register_dataset("ds_big", df, filename="big.csv", source_path=parquet_path)
+    release_dataset("ds_big")
+
+    dataset = get_dataset("ds_big")
+    assert source_of(dataset.df).path == parquet_path
+    assert dataset.rows == rows == 100
+
+
+def test_dataset_whose_file_is_gone_must_be_uploaded_again():
+    path = _upload("ds_gone", "a\n1\n")
+    register_dataset("ds_gone", load_source(path), filename="gone.csv", source_path=path)
+    release_dataset("ds_gone")
+    os.remove(path)
+    with pytest.raises(DatasetNotFound):
+        require_dataset("ds_gone")
+
+
+def test_cleanup_deletes_unused_and_least_recently_used_uploads(monkeypatch):
+    for name in os.listdir(uploads.UPLOADS_DIR):
+        os.remove(os.path.join(uploads.UPLOADS_DIR, name))
+    monkeypatch.setattr(uploads, "UPLOAD_FILE_TTL_SECONDS", 3600)
+    monkeypatch.setattr(uploads, "UPLOADS_MAX_MB", 1.5)
+    megabyte = "x" * 1024 * 1024
+    expired = _upload("ds_expired", "a\n1\n", age=7200)
+    oldest = _upload("ds_oldest", megabyte, age=600)
+    newest = _upload("ds_newest", megabyte, age=300)
+    recent = _upload("ds_recent", megabyte)
+    held = _upload("ds_held", "a\n1\n", age=7200)
+    register_dataset("ds_held", load_source(held), filename="held.csv", source_path=held)
+    try:
+        # Expired first, then the least recently used until the rest fit;
+        # written just now or held in memory are kept
+        assert uploads.cleanup_uploads() == [expired, oldest, newest]
+        assert os.path.exists(recent) and os.path.exists(held)
+        assert time.time() - os.path.getmtime(held) < 60
+    finally:
+        release_dataset("ds_held")
@@ -0,0 +1,45 @@
+"""Tests for progressive (sample-first) tool answers."""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+import pandas as pd
+
+from tools import estimates, tool_plot
+from tools.context import use_dataframe
+from tools.plot import load_plotting
+
+SPECS = [
+    {"plot_type": "histogram", "x": "age"},
+    {"plot_type": "countplot", "x": "embark_town", "hue": "sex"},
+    {"plot_type": "scatter", "x": "age", "y": "fare", "hue": "survived"},
+    {"plot_type": "boxplot", "x": "pclass", "y": "fare"},
+    {"plot_type": "bar", "x": "class", "y": "fare"},
+]
+
+
+def _plot(spec: dict) -> dict:
+    result = json.loads(tool_plot.invoke(json.dumps(spec)))
+    assert "error" not in result, result
+    return result
+
+
+def test_background_exact_plots_match_serial_renders(titanic_frame, monkeypatch):
+    monkeypatch.setattr(estimates, "ESTIMATE_MIN_ROWS", 1000)
+    monkeypatch.setattr(estimates, "ESTIMATE_SAMPLE_ROWS", 500)
+    large = pd.concat([titanic_frame] * 4, ignore_index=True)
+    with use_dataframe(large):
+        expected = [os.path.basename(_plot(spec)["plot_path"]) for spec in SPECS]
+        with estimates.progressive_mode() as refinement:
+            # Estimated plots render in the foreground while the exact ones render in the background
+            with ThreadPoolExecutor(4) as executor:
+                futures = [executor.submit(copy_context().run, _plot, spec) for spec in SPECS * 3]
+                for future in futures:
+                    future.result()
+            assert refinement.estimated
+            assert refinement.wait(timeout=120)
+        # The exact results are cached and now returned outside progressive mode
+        exact = [os.path.basename(_plot(spec)["plot_path"]) for spec in SPECS]
+    assert exact == expected
+    assert load_plotting()[0].get_fignums() == []
@@ -0,0 +1,92 @@
+"""Parity of "where" filters (tools/filters.py) with pandas boolean indexing."""
+import json
+
+import pandas as pd
+import pytest
+
+from tools import tool_groupby
+from tools.filters import FilterError, compile_mask, filter_frame
+
+SYNTHETIC_CASES = [
+    ("num_0 > 50", lambda df: df["num_0"] > 50),
+    ("10 < num_0 <= 20", lambda df: (df["num_0"] > 10) & (df["num_0"] <= 20)),
+    ("num_0 >= 20 and num_1 < 30", lambda df: (df["num_0"] >= 20) & (df["num_1"] < 30)),
+    ("num_0 > 50 & flag_0", lambda df: (df["num_0"] > 50) & df["flag_0"]),
+    ("~flag_0 | num_2 > 10", lambda df: ~df["flag_0"] | (df["num_2"] > 10)),
+    ("not (num_1 < 30)", lambda df: ~(df["num_1"] < 30)),
+    ("num_1 > num_4", lambda df: df["num_1"] > df["num_4"]),
+    ("cat_0 == 'c0_1' or cat_1 in ['c1_2', 'c1_3']",
+     lambda df: (df["cat_0"] == "c0_1") | df["cat_1"].isin(["c1_2", "c1_3"])),
+    ("cat_1 not in ['c1_0']", lambda df: ~df["cat_1"].isin(["c1_0"])),
+    ("isna(num_1)", lambda df: df["num_1"].isna()),
+    ("notna(cat_1) and `num_3` == 7", lambda df: df["cat_1"].notna() & (df["num_3"] == 7)),
+    ("cat_0 == 'C0_2'", lambda df: df["cat_0"] == "c0_2"),
+    ("num_0 == '42'", lambda df: df["num_0"] == 42),
+]
+
+TITANIC_CASES = [
+    ("pclass == 1 and sex == 'female'", lambda df: (df["pclass"] == 1) & (df["sex"] == "female")),
+    ("embark_town in ['Cherbourg', 'Queenstown'] or isna(deck)",
+     lambda df: df["embark_town"].isin(["Cherbourg", "Queenstown"]) | df["deck"].isna()),
+    ("age >= 18 & fare > 100", lambda df: (df["age"] >= 18) & (df["fare"] > 100)),
+]
+
+
+def _assert_filters_like_pandas(df: pd.DataFrame, where: str, expected):
+    expected_mask = expected(df).to_numpy(dtype=bool)
+    subset, mask, _ = filter_frame(df, where)
+    assert (mask == expected_mask).all()
+    pd.testing.assert_frame_equal(subset, df[expected_mask])
+    # The repeated call is served from the caches
+    again, cached_mask, _ = filter_frame(df, where)
+    assert again is subset or expected_mask.all()
+    assert (cached_mask == expected_mask).all()
+
+
+@pytest.mark.parametrize("where, expected", SYNTHETIC_CASES, ids=[case[0] for case in SYNTHETIC_CASES])
+def test_synthetic_filters_match_pandas(synthetic_frame, where, expected):
+    _assert_filters_like_pandas(synthetic_frame, where, expected)
+
+
+@pytest.mark.parametrize("where, expected", TITANIC_CASES, ids=[case[0] for case in TITANIC_CASES])
+def test_titanic_filters_match_pandas(titanic_frame, where, expected):
+    _assert_filters_like_pandas(titanic_frame, where, expected)
+
+
+def test_missing_values_are_not_in_any_list():
+    df = pd.DataFrame({"s": ["x", "y", None]})
+    assert filter_frame(df, "s not in ['x']")[1].tolist() == [False, True, True]
+    assert filter_frame(df, "s != 'x'")[1].tolist() == [False, True, True]
+
+
+def test_reordered_predicates_share_a_canonical_form(synthetic_frame):
+    _, first, _ = compile_mask(synthetic_frame, "num_0 > 50 and cat_0 == 'c0_1'")
+    _, second, _ = compile_mask(synthetic_frame, "cat_0=='c0_1' & num_0>50")
+    assert first == second
+
+
+def test_filter_matching_every_row_returns_the_frame(synthetic_frame):
+    subset, mask, _ = filter_frame(synthetic_frame, "num_0 >= 0")
+    assert subset is synthetic_frame
+    assert mask.all()
+
+
+def test_column_typos_are_corrected(synthetic_frame):
+    _, _, corrections = filter_frame(synthetic_frame, "numm_0 > 50")
+    assert corrections == [("numm_0", "num_0")]
+
+
+@pytest.mark.parametrize("where", ["num_0 = 5", "num_0.real > 1", "missing_column > 1", "num_0 > 'abc'"])
+def test_invalid_filters_raise(synthetic_frame, where):
+    with pytest.raises(FilterError):
+        compile_mask(synthetic_frame, where)
+
+
+def test_tools_run_on_the_filtered_rows(synthetic):
+    result = json.loads(tool_groupby.invoke(json.dumps({"by": "cat_0", "where": "num_0 > 50"})))
+    matched = int((synthetic["num_0"] > 50).sum())
+    assert result["filter"] == {"where": "num_0 > 50", "rows": matched, "total_rows": len(synthetic)}
+    assert result["rows_grouped"] == matched
+
+    result = json.loads(tool_groupby.invoke(json.dumps({"by": "cat_0", "where": "num_0 > 1000"})))
+    assert result["error"] == "Filter 'num_0 > 1000' matched no rows"
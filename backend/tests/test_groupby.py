@@ -0,0 +1,77 @@
+"""Parity of tool_groupby with pandas groupby."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import tool_groupby
+from tools.shaping import output_budget
+from tools.sql_engine import use_engine
+
+METRICS = {
+    "num_1": ["count", "sum", "mean", "median", "min", "max", "std", "var"],
+    "num_2": ["mean", "median"],
+    "cat_2": ["count", "nunique"],
+}
+
+
+def _groupby(params: dict) -> dict:
+    with use_engine("pandas"), output_budget(0):
+        result = json.loads(tool_groupby.invoke(json.dumps(params)))
+    assert "error" not in result, result
+    return result
+
+
+def _expected(df: pd.DataFrame, keys, metrics, dropna: bool = True) -> pd.DataFrame:
+    """The same aggregation with pandas groupby, ordered by key (missing keys last)."""
+    grouped = df.groupby(keys, dropna=dropna, sort=True)
+    out = grouped.size().rename("size").to_frame()
+    for column, names in metrics.items():
+        for metric in names:
+            out[f"{column}_{metric}"] = grouped[column].agg(metric)
+    return out.reset_index()
+
+
+def _assert_groups_match(groups: list, expected: pd.DataFrame):
+    actual = pd.DataFrame(groups, columns=list(expected.columns))
+    assert len(actual) == len(expected)
+    for column in expected.columns:
+        if pd.api.types.is_numeric_dtype(expected[column]):
+            np.testing.assert_allclose(actual[column].astype(float), expected[column].astype(float),
+                                       rtol=0, atol=1e-4, err_msg=column)
+        else:
+            assert actual[column].isna().tolist() == expected[column].isna().tolist(), column
+            assert actual[column].dropna().tolist() == expected[column].dropna().tolist(), column
+
+
+@pytest.mark.parametrize("dropna", [True, False])
+def test_metrics_match_pandas(synthetic, dropna):
+    keys = ["cat_0", "cat_1"]
+    result = _groupby({"by": keys, "metrics": METRICS, "dropna": dropna, "top_k": 100})
+    expected = _expected(synthetic, keys, METRICS, dropna)
+    assert result["n_groups"] == len(expected)
+    assert result["rows_grouped"] == int(expected["size"].sum())
+    _assert_groups_match(result["groups"], expected)
+
+
+def test_cached_index_serves_other_metrics(synthetic):
+    # The second call reuses the group codes built by the first
+    _groupby({"by": "cat_1", "metrics": {"num_0": "sum"}})
+    result = _groupby({"by": "cat_1", "metrics": {"num_4": ["min", "max"]}})
+    _assert_groups_match(result["groups"], _expected(synthetic, ["cat_1"], {"num_4": ["min", "max"]}))
+
+
+def test_top_k_matches_sorted_pandas_groups(synthetic):
+    result = _groupby({"by": "cat_2", "metrics": {"num_2": "mean"}, "sort_by": "num_2_mean",
+                       "ascending": False, "top_k": 7})
+    expected = _expected(synthetic, ["cat_2"], {"num_2": ["mean"]})
+    expected = expected.sort_values("num_2_mean", ascending=False).head(7).reset_index(drop=True)
+    assert result["n_groups"] == synthetic["cat_2"].nunique()
+    _assert_groups_match(result["groups"], expected)
+
+
+def test_where_groups_the_matching_rows(synthetic):
+    result = _groupby({"by": "cat_0", "metrics": {"num_0": ["sum", "mean"]}, "where": "num_0 > 50 and flag_0"})
+    subset = synthetic[(synthetic["num_0"] > 50) & synthetic["flag_0"]]
+    _assert_groups_match(result["groups"], _expected(subset, ["cat_0"], {"num_0": ["sum", "mean"]}))
@@ -0,0 +1,91 @@
+"""Tests for CSV ingestion (ingest.py)."""
+import pandas as pd
+import pytest
+
+import ingest
+from ingest import IncrementalCSVParser, parse_csv
+
+
+def _incremental(path, chunk_size: int) -> IncrementalCSVParser:
+    parser = IncrementalCSVParser()
+    data = path.read_bytes()
+    for start in range(0, len(data), chunk_size):
+        parser.feed(data[start:start + chunk_size])
+    return parser
+
+
+def _write(tmp_path, lines) -> "pathlib.Path":
+    path = tmp_path / "upload.csv"
+    path.write_bytes(("\n".join(lines) + "\n").encode("utf-8"))
+    return path
+
+
+@pytest.mark.parametrize("chunk_size", [64, 1000, 1 << 20])
+def test_incremental_parse_matches_parse_csv(tmp_path, chunk_size):
+    # Early blocks see only numbers (or no values) in columns that hold text or floats later
+    lines = ["code,value,flag,note"]
+    for i in range(500):
+        code = str(i) if i < 200 else f"A{i - 200}"
+        value = str(i) if i < 300 else f"{i}.5"
+        flag = "" if i < 100 else ("True" if i % 2 else "False")
+        note = "NA" if i < 450 else f'"note, {i}"'
+        lines.append(f"{code},{value},{flag},{note}")
+    path = _write(tmp_path, lines)
+
+    parser = _incremental(path, chunk_size)
+    df = parser.finish(str(path))
+    assert not parser.failed
+    pd.testing.assert_frame_equal(df, parse_csv(str(path)))
+    assert df["code"].map(type).eq(str).all()
+
+
+def test_unbalanced_quote_falls_back_to_full_parse(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, "MAX_TAIL_BYTES", 1024)
+    lines = ["item,size", 'tv,55" screen'] + [f"item{i},{i}" for i in range(500)]
+    path = _write(tmp_path, lines)
+
+    parser = _incremental(path, 64)
+    assert parser.failed
+    # Nothing is buffered once the parser gave up
+    assert parser._tail == b""
+    pd.testing.assert_frame_equal(parser.finish(str(path)), parse_csv(str(path)))
+
+
+@pytest.mark.parametrize("values", [
+    ["1/2", "3/4", "1/3", "2/3", "5/8"],  # fractions
+    ["555-1234", "555-9876", "555-0000", "555-4321", "555-1111"],  # phone numbers
+    ["1-5", "6-10", "11-15", "16-20", "21-25"],  # ranges
+    ["1.2.3", "2.0.1", "3.10.4", "1.0.0", "0.9.12"],  # versions
+])
+def test_non_dates_stay_text(values):
+    df, converted = ingest.parse_datetime_columns(pd.DataFrame({"col": values * 20}))
+    assert converted == []
+    assert df["col"].tolist() == values * 20
+
+
+@pytest.mark.parametrize("values", [
+    ["2024-01-05", "2024-02-10", "2023-12-31"],
+    ["05/01/2024", "06/15/2024", "12/31/2023"],
+    ["2024-01-05 10:30:00", "2024-01-05 11:00:00", "2024-01-06 09:15:00"],
+    ["Jan 5, 2024", "Feb 10, 2024", "Dec 31, 2023"],
+])
+def test_dates_are_converted(values):
+    df, converted = ingest.parse_datetime_columns(pd.DataFrame({"col": values * 20}))
+    assert converted == ["col"]
+    assert pd.api.types.is_datetime64_any_dtype(df["col"])
+    assert df["col"].notna().all()
+
+
+def test_day_first_dates_use_one_format():
+    values = ["05/01/2024", "13/01/2024", "14/02/2024", "01/03/2024"]
+    df, converted = ingest.parse_datetime_columns(pd.DataFrame({"col": values * 20}))
+    assert converted == ["col"]
+    expected = pd.to_datetime(["2024-01-05", "2024-01-13", "2024-02-14", "2024-03-01"])
+    assert df["col"].iloc[:4].tolist() == expected.tolist()
+
+
+def test_columns_without_a_single_format_stay_text():
+    values = ["2024-01-05", "Jan 5 2024"]
+    df, converted = ingest.parse_datetime_columns(pd.DataFrame({"col": values * 50}))
+    assert converted == []
+    assert df["col"].tolist() == values * 50
@@ -0,0 +1,86 @@
+"""Tests for background jobs shared between worker processes (jobs.py)."""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import jobs
+from jobs import FAILED, RUNNING, SUCCEEDED, JobManager
+
+
+def _record(shared_dir, job_id: str) -> dict:
+    with open(os.path.join(shared_dir, f"{job_id}.json")) as f:
+        return json.load(f)
+
+
+def _fake_running_job(shared_dir, cache_key: str, **fields) -> str:
+    """Write the records of a running job as another worker would."""
+    now = time.time()
+    record = {"job_id": "other", "status": RUNNING, "created_at": now, "started_at": now,
+              "finished_at": None, "error": None, "error_status": 500, "cache_key": cache_key,
+              "result": None, "partial_result": None, "version": 1, "owner": "elsewhere:1",
+              "heartbeat_at": now, **fields}
+    for name, content in (("other", record), (f"key_{cache_key}", {"job_id": "other"})):
+        with open(os.path.join(shared_dir, f"{name}.json"), "w") as f:
+            json.dump(content, f)
+    return "other"
+
+
+def test_workers_share_job_records(tmp_path):
+    first, second = JobManager(shared_dir=str(tmp_path)), JobManager(shared_dir=str(tmp_path))
+    release = threading.Event()
+    job = first.submit(lambda: release.wait(30) and {"answer": 42}, cache_key="question")
+
+    # The other worker joins the running job instead of starting its own
+    joined = second.submit(lambda: {"answer": 0}, cache_key="question")
+    assert joined.id == job.id
+    release.set()
+    assert job.done.wait(30)
+    finished = second.wait(joined, timeout=30)
+    assert finished.status == SUCCEEDED
+    assert finished.result == {"answer": 42}
+    assert second.get(job.id).result == {"answer": 42}
+
+
+def test_job_of_a_dead_process_is_not_reused(tmp_path):
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    job_id = _fake_running_job(tmp_path, "question", owner=f"{jobs.socket.gethostname()}:{dead.pid}")
+
+    manager = JobManager(shared_dir=str(tmp_path))
+    job = manager.submit(lambda: "fresh", cache_key="question")
+    assert job.id != job_id
+    assert job.done.wait(30) and job.result == "fresh"
+    stale = _record(tmp_path, job_id)
+    assert stale["status"] == FAILED and stale["finished_at"] is not None
+
+
+def test_job_without_heartbeat_fails_and_expires(tmp_path):
+    job_id = _fake_running_job(tmp_path, "question", heartbeat_at=time.time() - jobs.JOB_STALE_SECONDS - 1)
+    manager = JobManager(shared_dir=str(tmp_path), ttl_seconds=0)
+
+    job = manager.get(job_id)
+    assert job.status == FAILED and job.error_status == 503
+    assert not os.path.exists(tmp_path / "key_question.json")
+    # Failed records expire like any finished job
+    time.sleep(0.01)
+    manager._sweep_records()
+    assert manager.get(job_id) is None
+    assert not os.path.exists(tmp_path / f"{job_id}.json")
+
+
+def test_heartbeat_keeps_long_jobs_alive(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(jobs, "JOB_STALE_SECONDS", 0.5)
+    first, second = JobManager(shared_dir=str(tmp_path)), JobManager(shared_dir=str(tmp_path))
+    release = threading.Event()
+    job = first.submit(lambda: release.wait(30), cache_key="slow")
+    time.sleep(1)
+    try:
+        assert second.get(job.id).status == RUNNING
+        assert second.submit(lambda: None, cache_key="slow").id == job.id
+    finally:
+        release.set()
+    assert job.done.wait(30)
@@ -0,0 +1,112 @@
+"""Parity of tool_join (tools/join.py) with pandas.merge, and workspace dataset selection."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import tool_describe, tool_groupby, tool_join
+from tools.context import get_workspace, set_dataframe, set_workspace
+from tools.join import JOIN_TYPES
+from tools.workspace import LocalStore, Workspace
+
+RNG = np.random.default_rng(0)
+ORDERS = pd.DataFrame({
+    "order_id": np.arange(400),
+    # Ids 0..59: customers 50..59 are unknown, customers 60..79 have no orders
+    "customer_id": RNG.integers(0, 60, 400),
+    "amount": RNG.normal(100, 20, 400).round(2),
+    "name": [f"order_{i}" for i in range(400)],
+})
+CUSTOMERS = pd.DataFrame({
+    "customer_id": RNG.permutation(np.r_[0:50, 60:80]),
+    "country": RNG.choice(["es", "fr", "de"], 70),
+})
+CUSTOMERS["name"] = "customer_" + CUSTOMERS["customer_id"].astype(str)
+# Several payments per customer: a many-to-many join with the orders
+PAYMENTS = pd.DataFrame({"customer_id": RNG.integers(0, 60, 300), "paid": RNG.integers(1, 50, 300)})
+
+
+def _workspace(**frames) -> Workspace:
+    # A fresh store per test: cached joins are keyed by dataset name
+    workspace = Workspace(frames, store=LocalStore())
+    set_workspace(workspace, active=next(iter(frames)))
+    return workspace
+
+
+def _join(**params) -> tuple:
+    result = json.loads(tool_join.invoke(json.dumps(params)))
+    return result, get_workspace().frame(result["name"])
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows in a fixed order: the strategies keep the probe side's order, pandas.merge its own."""
+    return df.sort_values(list(df.columns), na_position="last", kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("how", JOIN_TYPES)
+@pytest.mark.parametrize("customers", [CUSTOMERS, CUSTOMERS.sort_values("customer_id")],
+                         ids=["unsorted", "sorted"])
+def test_join_matches_pandas_merge(how, customers):
+    _workspace(orders=ORDERS, customers=customers)
+    result, joined = _join(right="customers", on="customer_id", how=how)
+    expected = pd.merge(ORDERS, customers, on="customer_id", how=how, suffixes=("", "_customers"))
+    assert result["rows"] == len(expected)
+    assert list(joined.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(_canonical(joined), _canonical(expected), check_dtype=False)
+
+
+@pytest.mark.parametrize("how", JOIN_TYPES)
+def test_many_to_many_join_matches_pandas_merge(how):
+    _workspace(orders=ORDERS, payments=PAYMENTS)
+    result, joined = _join(right="payments", on="customer_id", how=how)
+    assert result["strategy"] == "merge"
+    expected = pd.merge(ORDERS, PAYMENTS, on="customer_id", how=how, suffixes=("", "_payments"))
+    pd.testing.assert_frame_equal(_canonical(joined), _canonical(expected), check_dtype=False)
+
+
+def test_join_strategy_follows_the_keys():
+    _workspace(orders=ORDERS, customers=CUSTOMERS, sorted_customers=CUSTOMERS.sort_values("customer_id"))
+    assert _join(right="customers", on="customer_id")[0]["strategy"] == "hash"
+    assert _join(right="sorted_customers", on="customer_id")[0]["strategy"] == "sort_merge"
+    # The same join again is served from the store
+    assert _join(right="customers", on="customer_id")[0]["strategy"] == "cached"
+
+
+def test_join_corrects_key_and_column_names():
+    _workspace(orders=ORDERS, customers=CUSTOMERS)
+    result, joined = _join(right="Customers", left_on="Customer_ID", right_on="customerid",
+                           columns=["countr"])
+    assert list(joined.columns) == list(ORDERS.columns) + ["country"]
+    assert "'Customer_ID' → 'customer_id'" in result["note"] and "'countr' → 'country'" in result["note"]
+
+    result = json.loads(tool_join.invoke(json.dumps({"right": "customers", "on": "zzz"})))
+    assert result["error"] == "Key columns not found: zzz, zzz"
+
+
+def test_tools_run_on_the_selected_dataset():
+    _workspace(orders=ORDERS, customers=CUSTOMERS)
+    selected = tool_describe.invoke(json.dumps({"dataset": "custmers"}))
+    set_dataframe(CUSTOMERS)
+    assert selected == "# Dataset: customers\n" + tool_describe.invoke("")
+
+    _workspace(orders=ORDERS, customers=CUSTOMERS)
+    result = json.loads(tool_groupby.invoke(json.dumps({"by": "country", "dataset": "customers",
+                                                        "where": "customer_id < 10"})))
+    assert result["dataset"] == "customers"
+    assert result["filter"]["rows"] == int((CUSTOMERS["customer_id"] < 10).sum())
+    assert result["filter"]["total_rows"] == len(CUSTOMERS)
+
+
+def test_joined_dataset_is_selectable_by_other_tools():
+    _workspace(orders=ORDERS, customers=CUSTOMERS)
+    name = _join(right="customers", on="customer_id")[0]["name"]
+    result = json.loads(tool_groupby.invoke(json.dumps({"by": "country", "dataset": name})))
+    assert result["dataset"] == name
+    assert result["rows_grouped"] == len(get_workspace().frame(name))
+
+
+def test_unknown_dataset_lists_the_available_ones():
+    _workspace(orders=ORDERS, customers=CUSTOMERS)
+    result = json.loads(tool_describe.invoke(json.dumps({"dataset": "invoices"})))
+    assert result["error"] == "Dataset not found. Available datasets: orders, customers"
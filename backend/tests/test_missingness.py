@@ -0,0 +1,121 @@
+"""Parity of tool_missingness (tools/missingness.py) with missing-value patterns from df.isna()."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import missingness as missingness_module
+from tools import tool_missingness
+from tools.missingness import missingness
+from tools.context import set_dataframe
+from tools.sql_engine import DUCKDB_AVAILABLE, use_engine
+
+ENGINES = ["pandas"] + (["duckdb"] if DUCKDB_AVAILABLE else [])
+
+
+def _wide_frame() -> pd.DataFrame:
+    """20 columns with different missing rates, over a row count that is not a multiple of 8."""
+    rng = np.random.default_rng(0)
+    rows = 1003
+    data = {f"c{i}": np.where(rng.random(rows) < 0.02 * (i % 7), np.nan, rng.normal(size=rows))
+            for i in range(20)}
+    df = pd.DataFrame(data)
+    # Columns missing together
+    df.loc[df["c3"].isna(), "c10"] = np.nan
+    df["text"] = pd.Series(np.where(rng.random(rows) < 0.1, None, "x"), dtype=object)
+    return df
+
+
+def _expected(df: pd.DataFrame) -> dict:
+    """Missing-value structure from df.isna(), columns and patterns in the tool's order."""
+    isna = df.isna()
+    counts = isna.sum()
+    missing = [c for c in counts.sort_values(ascending=False, kind="stable").index if counts[c] > 0]
+    rows_missing = isna[missing]
+    counted = rows_missing[rows_missing.any(axis=1)].value_counts()
+    # Most rows first, then the pattern whose first differing column is missing
+    patterns = sorted(((tuple(bool(flag) for flag in key), int(n)) for key, n in counted.items()),
+                      key=lambda p: (-p[1], tuple(not flag for flag in p[0])))
+    pairs = {}
+    for i, a in enumerate(missing):
+        for b in missing[i + 1:]:
+            both = int((isna[a] & isna[b]).sum())
+            if both:
+                pairs[(a, b)] = (both, round(both / int((isna[a] | isna[b]).sum()), 4))
+    return {
+        "missing_by_column": {c: int(counts[c]) for c in df.columns if counts[c] > 0},
+        "complete_rows": int((~isna.any(axis=1)).sum()),
+        "missing": missing,
+        "patterns": [(tuple(c for c, flag in zip(missing, key) if flag), n) for key, n in patterns],
+        "pairs": pairs,
+    }
+
+
+def _run(df: pd.DataFrame, engine: str, **params) -> dict:
+    set_dataframe(df)
+    with use_engine(engine):
+        return json.loads(tool_missingness.invoke(json.dumps(params)))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("frame", ["titanic_frame", "synthetic_frame", "wide"])
+def test_patterns_match_isna(request, frame, engine):
+    df = _wide_frame() if frame == "wide" else request.getfixturevalue(frame)
+    expected = _expected(df)
+    missing = expected["missing"]
+    with use_engine(engine):
+        stats = missingness(df, missing, missing, missing, top_k=len(df))
+    assert stats["complete_rows"] == expected["complete_rows"]
+    assert stats["n_patterns"] == len(expected["patterns"])
+    assert [(tuple(c for c, flag in zip(missing, p) if flag), int(n)) for p, n in stats["patterns"]] \
+        == expected["patterns"]
+    for (a, b), (both, _) in expected["pairs"].items():
+        assert stats["co_missing"][missing.index(a), missing.index(b)] == both
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("frame", ["titanic_frame", "synthetic_frame", "wide"])
+def test_tool_lists_the_most_common_patterns(request, frame, engine):
+    df = _wide_frame() if frame == "wide" else request.getfixturevalue(frame)
+    expected = _expected(df)
+    result = _run(df, engine, top_k=10_000)
+
+    assert result["missing_by_column"] == expected["missing_by_column"]
+    assert result["complete_rows"] == expected["complete_rows"]
+    assert result["n_patterns"] == len(expected["patterns"])
+    # Output shaping may cut the lists short, never reorder them
+    listed = [(tuple(p["missing"]), p["rows"]) for p in result["patterns"]]
+    assert listed == expected["patterns"][:len(listed)]
+    pairs = {tuple(p["columns"]): (p["rows"], p["jaccard"]) for p in result["co_missing"]}
+    assert pairs == {pair: value for pair, value in expected["pairs"].items() if pair in pairs}
+    rows = [p["rows"] for p in result["co_missing"]]
+    assert rows == sorted(rows, reverse=True)
+    assert min(rows, default=0) >= max((both for pair, (both, _) in expected["pairs"].items()
+                                        if pair not in pairs), default=0)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_engines_list_the_same_top_patterns(engine):
+    df = _wide_frame()
+    assert _run(df, engine, top_k=5) == _run(df, "pandas", top_k=5)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_complete_rows_count_columns_left_out_of_the_patterns(engine, monkeypatch):
+    monkeypatch.setattr(missingness_module, "MAX_PATTERN_COLUMNS", 3)
+    df = _wide_frame()
+    result = _run(df, engine)
+    assert result["complete_rows"] == int((~df.isna().any(axis=1)).sum())
+    assert all(len(p["missing"]) <= 3 for p in result["patterns"])
+    assert "Patterns cover the 3 columns" in result["note"]
+
+
+def test_selected_columns_only(titanic):
+    result = json.loads(tool_missingness.invoke(json.dumps({"columns": ["age", "deck", "fare"]})))
+    isna = titanic[["age", "deck", "fare"]].isna()
+    assert result["columns_checked"] == 3
+    assert result["complete_rows"] == int((~isna.any(axis=1)).sum())
+    assert result["co_missing"][0] == {"columns": ["deck", "age"], "rows": int((isna["deck"] & isna["age"]).sum()),
+                                       "jaccard": round((isna["deck"] & isna["age"]).sum()
+                                                        / (isna["deck"] | isna["age"]).sum(), 4)}
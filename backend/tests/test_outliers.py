@@ -0,0 +1,115 @@
+"""Parity of tool_outliers (tools/outliers.py) with the per-column pandas implementation it replaced."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import tool_outliers
+from tools.context import set_dataframe
+from tools.isolation import _grow, average_path_length, isolation_scores
+from tools.outliers import DEFAULT_THRESHOLDS
+
+TITANIC_COLUMNS = ["age", "fare", "sibsp", "parch", "pclass"]
+SYNTHETIC_COLUMNS = ["num_0", "num_1", "num_2", "num_4", "num_5"]
+
+
+def _pandas_outliers(s: pd.Series, method: str) -> dict:
+    """Single-column outliers as tool_outliers computed them with pandas, plus the MAD method."""
+    s = s.dropna().astype(float)
+    threshold = DEFAULT_THRESHOLDS[method]
+    if method == "iqr":
+        q1, q3 = s.quantile(0.25), s.quantile(0.75)
+        lower, upper = q1 - threshold * (q3 - q1), q3 + threshold * (q3 - q1)
+    elif method == "zscore":
+        lower, upper = s.mean() - threshold * s.std(), s.mean() + threshold * s.std()
+    else:
+        median = s.median()
+        scale = (s - median).abs().median() / 0.6745 or (s - median).abs().mean() * 1.2533
+        lower, upper = median - threshold * scale, median + threshold * scale
+    outliers = s[(s < lower) | (s > upper)]
+    return {
+        "bounds": [lower, upper],
+        "count": int(len(outliers)),
+        "percentage": round(float(len(outliers) / len(s) * 100), 2),
+        "min": float(outliers.min()) if not outliers.empty else None,
+        "max": float(outliers.max()) if not outliers.empty else None,
+    }
+
+
+def _call(**params) -> dict:
+    return json.loads(tool_outliers.invoke(json.dumps(params)))
+
+
+@pytest.mark.parametrize("method", ["iqr", "zscore", "mad"])
+@pytest.mark.parametrize("column", TITANIC_COLUMNS)
+def test_single_column_matches_pandas(titanic, column, method):
+    expected = _pandas_outliers(titanic[column], method)
+    result = _call(column=column, method=method)
+    assert result["outliers"]["count"] == expected["count"]
+    assert result["outliers"]["percentage"] == expected["percentage"]
+    assert result["outliers"]["min"] == expected["min"]
+    assert result["outliers"]["max"] == expected["max"]
+    if method != "zscore":
+        assert result["bounds"]["lower"] == round(expected["bounds"][0], 4)
+        assert result["bounds"]["upper"] == round(expected["bounds"][1], 4)
+
+
+@pytest.mark.parametrize("method", ["iqr", "zscore", "mad"])
+@pytest.mark.parametrize("frame, columns", [("titanic", TITANIC_COLUMNS), ("synthetic", SYNTHETIC_COLUMNS)])
+def test_multi_column_ranking_matches_pandas(request, frame, columns, method):
+    df = request.getfixturevalue(frame)
+    result = _call(columns=columns, method=method, top_k=20)
+    ranked = {r["column"]: r for r in result["ranking"]}
+    for column in columns:
+        expected = _pandas_outliers(df[column], method)
+        if expected["count"] == 0:
+            assert column not in ranked
+            continue
+        entry = ranked[column]
+        assert (entry["count"], entry["percentage"]) == (expected["count"], expected["percentage"])
+        assert (entry["min_outlier"], entry["max_outlier"]) == (expected["min"], expected["max"])
+        np.testing.assert_allclose(entry["bounds"], expected["bounds"], atol=1e-4)
+    percentages = [r["percentage"] for r in result["ranking"]]
+    assert percentages == sorted(percentages, reverse=True)
+
+
+def _reference_scores(X: np.ndarray, n_trees: int = 100, sample_size: int = 256, seed: int = 0):
+    """Isolation scores from walking every row down every tree, one row at a time."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(sample_size, len(X))
+    max_depth = int(np.ceil(np.log2(max(sample_size, 2))))
+    depths = np.zeros(len(X))
+    for _ in range(n_trees):
+        tree = _grow(X[rng.choice(len(X), sample_size, replace=False)], max_depth, rng)
+        for i, row in enumerate(X):
+            node = 0
+            while tree.feature[node] >= 0:
+                go_left = row[tree.feature[node]] < tree.threshold[node]
+                node = tree.left[node] if go_left else tree.right[node]
+            depths[i] += tree.leaf_depth[node]
+    return 2.0 ** (-(depths / n_trees) / average_path_length(sample_size))
+
+
+def test_isolation_scores_match_row_by_row_traversal():
+    rng = np.random.default_rng(1)
+    X = rng.normal(size=(600, 4))
+    np.testing.assert_allclose(isolation_scores(X), _reference_scores(X))
+
+
+def test_isolation_forest_finds_planted_anomalies():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame(rng.normal(size=(2000, 3)), columns=["a", "b", "c"])
+    # Unusual in every feature: a value beyond the range of one feature alone is
+    # isolated no faster than the sample's own extremes
+    planted = [17, 512, 1999]
+    df.loc[planted, ["a", "b", "c"]] = [[6.0, 12.0, -5.0], [-6.0, -15.0, 5.0], [5.0, 20.0, 6.0]]
+    # Missing values are imputed with the median
+    df.loc[planted[0], "a"] = np.nan
+    set_dataframe(df)
+    result = _call(method="isolation_forest", contamination=len(planted) / len(df))
+    assert result["anomalous_rows"]["count"] == len(planted)
+    assert sorted(int(r["row"]) for r in result["top_anomalies"]) == planted
+    assert next(iter(result["most_unusual_columns"])) == "b"
+    # Scores are reproducible
+    assert _call(method="isolation_forest") == _call(method="isolation_forest")
@@ -0,0 +1,53 @@
+"""Tests for tool_plot rendering."""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from tools import tool_plot
+from tools import plot as plot_module
+from tools.plot import load_plotting
+
+SPECS = [
+    {"plot_type": "histogram", "x": "age"},
+    {"plot_type": "boxplot", "x": "pclass", "y": "fare"},
+    {"plot_type": "countplot", "x": "embark_town", "hue": "sex"},
+    {"plot_type": "scatter", "x": "age", "y": "fare", "hue": "survived"},
+    {"plot_type": "heatmap"},
+    {"plot_type": "dashboard", "panels": [{"plot_type": "histogram", "x": "fare"},
+                                          {"plot_type": "countplot", "x": "class"}]},
+    {"plot_type": "line", "x": "age", "y": "fare"},
+    {"plot_type": "violin", "x": "sex", "y": "age"},
+    {"plot_type": "bar", "x": "class", "y": "fare"},
+]
+
+
+def _image(spec: dict) -> str:
+    """Content-addressed file name of the plot drawn for spec."""
+    result = json.loads(tool_plot.invoke(json.dumps(spec)))
+    assert "error" not in result, result
+    return os.path.basename(result["plot_path"])
+
+
+def test_concurrent_plots_match_serial_renders(titanic):
+    expected = {i: _image(spec) for i, spec in enumerate(SPECS)}
+    calls = [i % len(SPECS) for i in range(40)]
+    with ThreadPoolExecutor(8) as executor:
+        # Each call sees the test's dataframe, as tools run by the agent do
+        futures = [(i, executor.submit(copy_context().run, _image, SPECS[i])) for i in calls]
+        images = [(i, future.result()) for i, future in futures]
+    assert [name for _, name in images] == [expected[i] for i, _ in images]
+    assert load_plotting()[0].get_fignums() == []
+
+
+def test_failed_draw_closes_its_figure(titanic, monkeypatch):
+    plt, _ = load_plotting()
+
+    def fail(df, params, plt, sns):
+        plt.plot([1, 2], [3, 4])
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(plot_module, "_draw", fail)
+    result = json.loads(tool_plot.invoke(json.dumps({"plot_type": "histogram", "x": "age"})))
+    assert result["error"] == "Failed to generate plot: boom"
+    assert plt.get_fignums() == []
@@ -0,0 +1,53 @@
+"""Tests for the background profile (tools/profiling.py)."""
+import threading
+
+import pandas as pd
+import pytest
+
+from tools.limits import Cancelled, cancellation, checkpoint
+from tools.profiling import precomputed, schedule
+
+
+def test_cancelled_claim_hands_the_task_back(titanic_frame):
+    df = titanic_frame.copy()
+    release = threading.Event()
+    # Keeps the pool busy, so the tool below claims the queued task itself
+    schedule(df, "blocker", lambda frame: release.wait(30), priority=-1)
+
+    def profile(frame):
+        checkpoint()
+        return len(frame)
+
+    schedule(df, "rows", profile, priority=0)
+    cancelled = threading.Event()
+    cancelled.set()
+    with cancellation(cancelled), pytest.raises(Cancelled):
+        precomputed(df, "rows")
+
+    # A caller waiting for the task and one claiming it again both get the result
+    # (without the hand-back both would block forever: daemon threads, joined with a timeout)
+    results = []
+
+    def call():
+        results.append(precomputed(df, "rows"))
+
+    callers = [threading.Thread(target=call, daemon=True) for _ in range(2)]
+    for caller in callers:
+        caller.start()
+    try:
+        for caller in callers:
+            caller.join(timeout=30)
+    finally:
+        release.set()
+    assert results == [len(df), len(df)]
+
+
+def test_failed_task_returns_none(titanic_frame):
+    df = titanic_frame.copy()
+
+    def fail(frame):
+        raise ValueError("boom")
+
+    schedule(df, "broken", fail, priority=0)
+    assert precomputed(df, "broken") is None
+    assert precomputed(pd.DataFrame(), "broken") is None
@@ -0,0 +1,53 @@
+"""Tests for bounding tool results to the token budget (tools/shaping.py)."""
+import json
+
+from tools import tool_groupby
+from tools.shaping import output_budget, shape_json, shape_output
+
+
+def test_groupby_keeps_groups_when_shaped(titanic):
+    output = tool_groupby.invoke(json.dumps({"by": ["age", "sex"], "metrics": {"fare": ["mean", "max", "min"]},
+                                             "top_k": 200}))
+    result = json.loads(output)
+    assert result["groups"]
+    assert "." not in result["truncated"]["kept"]
+    assert result["truncated"]["kept"]["groups"][0] < result["n_groups"]
+    for key in ("by", "n_groups", "rows_grouped", "sorted_by", "ascending"):
+        assert key in result
+
+
+def test_root_with_many_fields_is_never_cut():
+    # Shaped like a tool_missingness result: the payload is one of 8+ top-level fields
+    result = {
+        "rows": 100000, "columns_checked": 40, "missing_by_column": {f"c{i}": 1000 - i for i in range(40)},
+        "complete_rows": 500, "complete_rows_pct": 0.5, "n_patterns": 300,
+        "patterns": [{"missing": [f"c{i}", f"c{i + 1}"], "rows": 300 - i, "pct": 0.3} for i in range(300)],
+        "co_missing": [{"columns": [f"c{i}", f"c{i + 1}"], "rows": 10, "jaccard": 0.1} for i in range(39)],
+    }
+    shaped = json.loads(shape_output(json.dumps(result), budget=600))
+    assert set(result) <= set(shaped)
+    assert shaped["patterns"] == result["patterns"][:len(shaped["patterns"])]
+    assert "." not in shaped["truncated"]["kept"]
+
+
+def test_dict_of_fields_is_not_cut():
+    # Per-column stats dicts are fields: only the per-column map around them is cut
+    stats = {"count": 1, "mean": 2.0, "std": 3.0, "min": 0.0, "p50": 2.0, "max": 9.0, "missing": 0}
+    result = {"rows": 10, "profiles": {f"col_{i}": {"dtype": "float", "stats": dict(stats)} for i in range(200)}}
+    shaped, cut = shape_json(result, budget=500)
+    assert list(cut) == ["profiles"]
+    assert all(p["stats"] == stats for p in shaped["profiles"].values())
+
+
+def test_numeric_dict_keeps_largest_values():
+    result = {"column": "x", "frequencies": {f"v{i}": i for i in range(500)}}
+    shaped, cut = shape_json(result, budget=200)
+    kept = list(shaped["frequencies"].values())
+    assert kept == sorted(kept, reverse=True) and kept[0] == 499
+    assert shaped["column"] == "x"
+
+
+def test_unlimited_budget_returns_output_unchanged(titanic):
+    with output_budget(0):
+        output = tool_groupby.invoke(json.dumps({"by": ["age", "sex"], "metrics": {"fare": "mean"}, "top_k": 200}))
+    assert "truncated" not in json.loads(output)
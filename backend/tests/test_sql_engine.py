@@ -0,0 +1,81 @@
+"""Parity of the SQL (DuckDB) engine with pandas, on the cases of benchmarks/check_engines.py."""
+import pandas as pd
+import pytest
+
+import ingest
+import tools
+from benchmarks.check_engines import CASES
+from ingest import load_out_of_core, prepare_dataframe
+from tools.context import set_dataframe
+from tools.sql_engine import DUCKDB_AVAILABLE, convert_to_parquet, use_engine
+
+pytestmark = pytest.mark.skipif(not DUCKDB_AVAILABLE, reason="duckdb is not installed")
+
+CASE_IDS = [case[0] for case in CASES]
+
+
+def _output(df: pd.DataFrame, engine: str, tool, input_str: str) -> str:
+    set_dataframe(df)
+    with use_engine(engine):
+        return tool.invoke(input_str)
+
+
+@pytest.fixture(scope="module")
+def out_of_core(synthetic_frame, tmp_path_factory):
+    """(full frame as loaded in memory, 1000-row sample of the same CSV loaded as a large upload)."""
+    tmp = tmp_path_factory.mktemp("out_of_core")
+    csv_path = tmp / "data.csv"
+    synthetic_frame.to_csv(csv_path, index=False)
+    # Reference: the full frame in memory, not a pandas re-parse of the CSV
+    # (read_csv may round the last digit of a float, DuckDB parses exactly)
+    full = prepare_dataframe(synthetic_frame.copy())
+    with pytest.MonkeyPatch.context() as patch:
+        # Fewer rows than the file, so SQL-backed tools must scan the Parquet file to match
+        patch.setattr(ingest, "SAMPLE_ROWS", 1000)
+        sample, _ = load_out_of_core(str(csv_path), str(tmp / "data.parquet"))
+    assert len(sample) < len(full)
+    return full, sample
+
+
+@pytest.mark.parametrize("name, tool, input_str", CASES, ids=CASE_IDS)
+def test_duckdb_matches_pandas(synthetic_frame, name, tool, input_str):
+    expected = _output(synthetic_frame, "pandas", tool, input_str)
+    assert _output(synthetic_frame, "duckdb", tool, input_str) == expected
+
+
+@pytest.mark.parametrize("name, tool, input_str", CASES, ids=CASE_IDS)
+def test_out_of_core_matches_pandas(out_of_core, name, tool, input_str):
+    full, sample = out_of_core
+    expected = _output(full, "pandas", tool, input_str)
+    assert _output(sample, "auto", tool, input_str) == expected
+
+
+def test_out_of_core_dates_match_in_memory_parse(tmp_path, monkeypatch):
+    import duckdb
+
+    days = pd.date_range("2024-01-01", periods=2000, freq="D")
+    csv_path = tmp_path / "dates.csv"
+    pd.DataFrame({
+        # No single format fits: must stay text on both paths, with no value lost
+        "mixed": ["2024-01-05", "Jan 5 2024"] * 1000,
+        # One non-ISO format: both paths convert every value
+        "day": days.strftime("%b %d %Y"),
+    }).to_csv(csv_path, index=False)
+    memory = prepare_dataframe(ingest.parse_csv(str(csv_path)))
+
+    monkeypatch.setattr(ingest, "SAMPLE_ROWS", 500)
+    target = tmp_path / "dates.parquet"
+    sample, rows = load_out_of_core(str(csv_path), str(target))
+    stored = duckdb.sql(f"SELECT * FROM read_parquet('{target}')").df()
+
+    assert rows == 2000
+    assert not pd.api.types.is_datetime64_any_dtype(memory["mixed"])
+    assert stored["mixed"].tolist() == memory["mixed"].astype(str).tolist()
+    assert pd.api.types.is_datetime64_any_dtype(sample["day"])
+    assert stored["day"].tolist() == memory["day"].tolist() == days.tolist()
+    assert _output(sample, "auto", tools.tool_nulls, "") == _output(memory, "pandas", tools.tool_nulls, "")
+
+    # Without a concrete format a column is copied as text, never cast by DuckDB
+    convert_to_parquet(str(csv_path), str(tmp_path / "text.parquet"), date_formats={"mixed": ""})
+    copied = duckdb.sql(f"SELECT mixed FROM read_parquet('{tmp_path / 'text.parquet'}')").df()
+    assert copied["mixed"].tolist() == ["2024-01-05", "Jan 5 2024"] * 1000
@@ -0,0 +1,109 @@
+"""Tests for the shared on-disk dataset store (store.py)."""
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import datasets
+from datasets import get_dataset, register_dataset, release_dataset
+from store import META_FILE, DatasetStore
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "int": np.arange(6, dtype="int32"),
+        "float": [1.5, np.nan, 2.0, 3.25, np.nan, 0.0],
+        "flag": [True, False, True, True, False, False],
+        "when": pd.date_range("2024-01-01", periods=6, freq="D"),
+        "cat": pd.Categorical(["a", "b", "a", None, "c", "b"]),
+        "text": ["x", None, "zz", "x", "y", "w"],
+    }, index=pd.RangeIndex(10, 16))
+
+
+def _csv(tmp_path, name: str) -> str:
+    path = str(tmp_path / name)
+    _frame().to_csv(path, index=False)
+    return path
+
+
+def _assert_same(loaded: pd.DataFrame, df: pd.DataFrame):
+    """Equal values and dtypes (loaded columns are memory-mapped arrays, not plain ndarrays)."""
+    pd.testing.assert_series_equal(loaded.dtypes, df.dtypes)
+    pd.testing.assert_frame_equal(loaded.astype(object), df.astype(object))
+
+
+def _age(store: DatasetStore, dataset_id: str, seconds: float):
+    """Pretend dataset_id was last loaded seconds ago."""
+    stamp = time.time() - seconds
+    os.utime(os.path.join(store._dir(dataset_id), META_FILE), (stamp, stamp))
+
+
+def test_saved_dataset_loads_back_equal(tmp_path):
+    store = DatasetStore(str(tmp_path / "store"))
+    df = _frame()
+    store.save("ds_round", df, filename="round.csv")
+
+    loaded, meta = store.load("ds_round")
+    _assert_same(loaded, df)
+    assert isinstance(loaded["int"].values, np.memmap)
+    assert meta["rows"] == 6 and meta["columns"] == 6 and meta["filename"] == "round.csv"
+    # A second save of the same id keeps the first copy
+    store.save("ds_round", df.head(2))
+    assert store.load("ds_round")[1]["version"] == meta["version"]
+    assert [m["dataset_id"] for m in store.list()] == ["ds_round"]
+
+
+def test_dataset_is_discarded_when_its_source_changes(tmp_path):
+    store = DatasetStore(str(tmp_path / "store"))
+    path = _csv(tmp_path, "source.csv")
+    store.save("ds_source", _frame(), source_path=path)
+    assert store.load("ds_source") is not None
+    with open(path, "a") as f:
+        f.write("6,1.0,True,2024-01-07,a,v\n")
+    assert store.load("ds_source") is None
+    assert not os.path.exists(store._dir("ds_source"))
+
+
+def test_prune_evicts_unused_then_least_recently_loaded(tmp_path):
+    store = DatasetStore(str(tmp_path / "store"), ttl_seconds=3600)
+    for dataset_id in ("ds_expired", "ds_old", "ds_new"):
+        store.save(dataset_id, _frame(), source_path=_csv(tmp_path, f"{dataset_id}.csv"))
+    store.save("join_old", _frame())
+    _age(store, "ds_expired", 7200)
+    _age(store, "join_old", 300)
+    _age(store, "ds_old", 200)
+    _age(store, "ds_new", 100)
+    size = sum(e.stat().st_size for e in os.scandir(store._dir("ds_new")))
+    store.max_bytes = 2.5 * size
+
+    assert store.prune() == ["ds_expired", "join_old"]
+    assert [m["dataset_id"] for m in store.list()] == ["ds_new", "ds_old"]
+    # Datasets with a source file keep their metadata; derived ones are gone
+    assert store.load("ds_expired") is None
+    assert store.meta("ds_expired")["evicted"]
+    assert os.listdir(store._dir("ds_expired")) == [META_FILE]
+    assert store.meta("join_old") is None
+
+    # Storing an evicted dataset again replaces its metadata
+    store.save("ds_expired", _frame(), source_path=str(tmp_path / "ds_expired.csv"))
+    _assert_same(store.load("ds_expired")[0], _frame())
+
+
+def test_any_worker_reloads_a_dataset_evicted_from_the_store(tmp_path, monkeypatch):
+    store = DatasetStore(str(tmp_path / "store"), ttl_seconds=0)
+    monkeypatch.setattr(datasets, "dataset_store", store)
+    path = _csv(tmp_path, "ds_shared.csv")
+    register_dataset("ds_shared", datasets.load_source(path), filename="shared.csv", source_path=path)
+    # Another worker: it never registered the dataset and does not hold it
+    release_dataset("ds_shared")
+    monkeypatch.setattr(datasets, "_sources", {})
+    time.sleep(0.01)
+    assert store.prune() == ["ds_shared"]
+
+    try:
+        dataset = get_dataset("ds_shared")
+        assert dataset.filename == "shared.csv" and dataset.source_path == path
+        assert not store.meta("ds_shared").get("evicted")
+    finally:
+        release_dataset("ds_shared")
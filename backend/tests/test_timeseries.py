@@ -0,0 +1,54 @@
+"""Tests for time buckets (tools/timeseries.py) against pandas resampling."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tools import tool_timeseries
+from tools.timeseries import normalize_freq, resample
+
+
+@pytest.mark.parametrize("freq, expected", [
+    ("15min", "15min"), ("10D", "10D"), ("2 W", "2W"), ("3months", "3M"),
+    ("1D", "D"), ("1h", "h"), ("daily", "D"), ("ME", "M"), ("auto", None), (None, None),
+])
+def test_frequencies_keep_their_multiplier(freq, expected):
+    assert normalize_freq(freq) == expected
+
+
+@pytest.mark.parametrize("freq", ["1", "0D", "fortnight", "15 mins later"])
+def test_unknown_frequencies_raise(freq):
+    with pytest.raises(ValueError):
+        normalize_freq(freq)
+
+
+@pytest.mark.parametrize("freq", ["15min", "h", "7h", "D", "10D"])
+def test_fixed_buckets_match_pandas_resample(synthetic_frame, freq):
+    # A month keeps fine frequencies within MAX_BUCKETS
+    df = synthetic_frame[synthetic_frame["ts_0"].between("2024-03-10 13:00", "2024-04-10")]
+    series = resample(df, "ts_0", freq, "num_1", "mean")
+    expected = df.set_index("ts_0")["num_1"].resample(freq).mean()
+    np.testing.assert_allclose(series.to_numpy(), expected.to_numpy(), equal_nan=True)
+    assert (pd.DatetimeIndex(series.index) == expected.index).all()
+
+
+@pytest.mark.parametrize("freq, unit, count", [("M", "M", 1), ("2M", "M", 2), ("3W", "W", 3)])
+def test_calendar_buckets_group_consecutive_periods(synthetic_frame, freq, unit, count):
+    df = synthetic_frame
+    series = resample(df, "ts_0", freq)
+    ordinals = df["ts_0"].dropna().dt.to_period(unit).map(lambda p: p.ordinal)
+    first = ordinals.min()
+    expected = ((ordinals - first) // count).value_counts().sort_index()
+    assert series[series > 0].tolist() == expected.tolist()
+    # Buckets are labelled by their first period
+    assert list(series.index[:2]) == [pd.Period(ordinal=first + i * count, freq=unit) for i in range(2)]
+
+
+def test_tool_reports_the_multiplied_frequency(synthetic):
+    result = json.loads(tool_timeseries.invoke(json.dumps({"value": "num_2", "freq": "10D"})))
+    assert result["freq"] == "10D"
+    assert result["buckets"] == len(resample(synthetic, "ts_0", "10D"))
+
+    result = json.loads(tool_timeseries.invoke(json.dumps({"freq": "fortnight"})))
+    assert result["error"].startswith("Unknown frequency 'fortnight'")
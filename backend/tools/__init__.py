@@ -4,32 +4,53 @@ Exports all available analysis tools.
 """
 from .schema import tool_schema
 from .nulls import tool_nulls
+from .missingness import tool_missingness
 from .describe import tool_describe
 from .plot import tool_plot
 from .column_profile import tool_column_profile
 from .outliers import tool_outliers
 from .correlation import tool_correlation
+from .association import tool_association
 from .categorical_distribution import tool_categorical_distribution
+from .batch_profile import tool_batch_profile
+from .groupby import tool_groupby
+from .timeseries import tool_timeseries
+from .join import tool_join
+from .shaping import tool_expand
 
 __all__ = [
     "tool_schema",
     "tool_nulls",
+    "tool_missingness",
     "tool_describe",
     "tool_plot",
     "tool_column_profile",
     "tool_outliers",
     "tool_correlation",
+    "tool_association",
     "tool_categorical_distribution",
+    "tool_batch_profile",
+    "tool_groupby",
+    "tool_timeseries",
+    "tool_join",
+    "tool_expand",
 ]
 
 # List of all tools for easy import
 ALL_TOOLS = [
     tool_schema,
     tool_nulls,
+    tool_missingness,
     tool_describe,
     tool_plot,
     tool_column_profile,
     tool_outliers,
     tool_correlation,
+    tool_association,
     tool_categorical_distribution,
+    tool_batch_profile,
+    tool_groupby,
+    tool_timeseries,
+    tool_join,
+    tool_expand,
 ]
@@ -0,0 +1,258 @@
+"""
+Association tool - Measures how strongly categorical columns depend on each other.
+
+Correlations only cover numeric columns. Here every pair of categorical (or
+low-cardinality) columns gets a contingency table, built from the columns'
+cached integer codes with one np.bincount per pair (one GROUPING SETS scan on the
+SQL engine), and the table gives Cramér's V or the mutual information.
+Pairs are counted in a thread pool, and each pair's values are cached per
+dataset, so changing the method or the column list only counts new pairs.
+"""
+import os
+import json
+import math
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .cache import frame_cache, shared_result
+from .context import get_dataframe
+from .correlation import strongest_pairs
+from .encoding import encode
+from .filters import filterable
+from .limits import budgeted, checkpoint
+from .shaping import bounded, current_budget, result_store
+from .sql_engine import engine_name, sql_engine
+from .utils import validate_and_match_columns, get_correction_message
+
+# Columns with more distinct values than this are skipped (their tables are mostly empty cells)
+MAX_CATEGORIES = 50
+# Columns compared in one call (pairs grow quadratically)
+MAX_ASSOCIATION_COLUMNS = 30
+# Pairs listed when the matrix has more pairs than this
+DEFAULT_TOP_K = 10
+METHODS = ("cramers_v", "mutual_info")
+# Threads counting contingency tables, for frames with at least PARALLEL_MIN_ROWS rows
+ASSOCIATION_WORKERS = min(8, os.cpu_count() or 1)
+PARALLEL_MIN_ROWS = 100_000
+# Pair values and column codes kept per dataset
+ASSOCIATION_CACHE_ENTRIES = 2048
+CODES_CACHE_ENTRIES = MAX_ASSOCIATION_COLUMNS
+
+
+def association(table: np.ndarray) -> Dict[str, Optional[float]]:
+    """
+    Cramér's V (0 to 1) and mutual information (in nats) of a contingency table.
+
+    Args:
+        table: Rows per combination of values (rows: first column, columns: second)
+
+    Returns:
+        Both measures; None when a column has fewer than two values in the table
+    """
+    table = table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0].astype(float)
+    if min(table.shape) < 2:
+        return {"cramers_v": None, "mutual_info": None}
+    n = table.sum()
+    expected = np.outer(table.sum(axis=1), table.sum(axis=0)) / n
+    observed = table > 0
+    # Exact sums (fsum): the result does not depend on the order of the values
+    chi2 = math.fsum((((table - expected) ** 2) / expected).ravel())
+    mutual_info = math.fsum(table[observed] / n * np.log(table[observed] / expected[observed]))
+    return {"cramers_v": math.sqrt(chi2 / (n * (min(table.shape) - 1))), "mutual_info": max(mutual_info, 0.0)}
+
+
+def entropy(counts: np.ndarray) -> float:
+    """Entropy (in nats) of a column with these value counts: its mutual information with itself."""
+    counts = np.asarray(counts, dtype=float)
+    p = counts[counts > 0] / counts.sum()
+    return -math.fsum(p * np.log(p))
+
+
+def _codes(df: pd.DataFrame, column) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Integer codes of a column shifted by one (0 for missing values), in the
+    smallest integer type, and the rows per code (missing values first).
+    """
+    def compute():
+        codes, values = encode(df[column])
+        shifted = (codes.astype(np.int64, copy=False) + 1).astype(np.min_scalar_type(len(values)))
+        return shifted, np.bincount(shifted, minlength=len(values) + 1)
+
+    return frame_cache(df, "association_codes", CODES_CACHE_ENTRIES).get_or_compute(column, compute)
+
+
+def _table(df: pd.DataFrame, a, b) -> np.ndarray:
+    """Contingency table of columns a and b (rows missing either value are left out)."""
+    codes_a, counts_a = _codes(df, a)
+    codes_b, counts_b = _codes(df, b)
+    width = len(counts_b)
+    # Cell of each row, without masking missing values: they land in row or column 0, dropped after counting
+    cells = np.multiply(codes_a, width, dtype=np.int32 if len(counts_a) * width < 2 ** 31 else np.int64)
+    cells += codes_b
+    return np.bincount(cells, minlength=len(counts_a) * width).reshape(len(counts_a), width)[1:, 1:]
+
+
+def _counts_table(counts: pd.DataFrame) -> np.ndarray:
+    """Contingency table from rows per value combination (columns a, b and n)."""
+    rows, row_values = pd.factorize(counts.iloc[:, 0])
+    cols, col_values = pd.factorize(counts.iloc[:, 1])
+    cells = rows.astype(np.int64) * len(col_values) + cols
+    return np.bincount(cells, weights=counts["n"].to_numpy(dtype=float),
+                       minlength=len(row_values) * len(col_values)).reshape(len(row_values), len(col_values))
+
+
+def cardinalities(df: pd.DataFrame, columns: list, limit: Optional[int] = None) -> Dict[str, int]:
+    """
+    Distinct non-missing values of each column. With limit, the columns after
+    the limit-th one with 2 to MAX_CATEGORIES values are left out.
+    """
+    sql = sql_engine(df)
+    counts = sql.distinct_counts([str(c) for c in columns]) if sql is not None else None
+    sizes, eligible = {}, 0
+    for col in columns:
+        if limit is not None and eligible >= limit:
+            break
+        checkpoint()
+        sizes[col] = counts[str(col)] if counts is not None else int(np.count_nonzero(_codes(df, col)[1][1:]))
+        eligible += 2 <= sizes[col] <= MAX_CATEGORIES
+    return sizes
+
+
+def association_matrix(df: pd.DataFrame, columns: list, method: str = "cramers_v") -> pd.DataFrame:
+    """
+    Association of every pair of columns (pairs undefined for lack of values are NaN).
+    The diagonal is 1 for Cramér's V and each column's entropy for mutual information.
+    """
+    cache = frame_cache(df, "association", ASSOCIATION_CACHE_ENTRIES)
+    engine = engine_name(df)
+    pairs = [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]]
+    values = {p: cache.get((engine,) + p) for p in pairs}
+    entropies = {c: cache.get((engine, c)) for c in columns} if method == "mutual_info" else {}
+    todo = [p for p, value in values.items() if value is None]
+    singles = [c for c, value in entropies.items() if value is None]
+
+    if todo or singles:
+        sql = sql_engine(df)
+        if sql is not None:
+            counts = sql.pair_counts(todo + [(c,) for c in singles])
+            computed = [association(_counts_table(frame)) for frame in counts[:len(todo)]]
+            computed_entropies = [entropy(frame["n"].to_numpy()) for frame in counts[len(todo):]]
+        else:
+            def compute(pair):
+                checkpoint()
+                return association(_table(df, *pair))
+
+            if len(todo) > 1 and len(df) >= PARALLEL_MIN_ROWS and ASSOCIATION_WORKERS > 1:
+                with ThreadPoolExecutor(max_workers=ASSOCIATION_WORKERS) as executor:
+                    # Each pair runs in a copy of this context, so its checkpoint sees the request's limits
+                    futures = [executor.submit(copy_context().run, compute, pair) for pair in todo]
+                    computed = [future.result() for future in futures]
+            else:
+                computed = [compute(pair) for pair in todo]
+            computed_entropies = [entropy(_codes(df, c)[1][1:]) for c in singles]
+        for pair, value in zip(todo, computed):
+            values[pair] = value
+            cache.put((engine,) + pair, value)
+        for col, value in zip(singles, computed_entropies):
+            entropies[col] = value
+            cache.put((engine, col), value)
+
+    matrix = pd.DataFrame(np.nan, index=columns, columns=columns)
+    for col in columns:
+        matrix.loc[col, col] = entropies[col] if method == "mutual_info" else 1.0
+    for (a, b), value in values.items():
+        if value[method] is not None:
+            matrix.loc[a, b] = matrix.loc[b, a] = value[method]
+    return matrix
+
+
+@tool
+@bounded
+@filterable
+@budgeted
+@shared_result
+def tool_association(input_str: str) -> str:
+    """
+    Measures association between categorical columns (e.g. class, sex, embarked),
+    which correlations cannot: Cramér's V (0 = independent, 1 = one determines the other)
+    or mutual information (in nats). Numeric columns with few distinct values count as categorical.
+
+    Input JSON (all fields optional):
+    {
+        "columns": ["class", "sex", "embarked"],  # Default: every column with 2 to 50 distinct values
+        "method": "cramers_v" | "mutual_info",  # Default: "cramers_v"
+        "top_k": 10  # With more pairs than this, only the strongest pairs are returned
+    }
+
+    Examples:
+    - "" → associations between all categorical columns
+    - {"columns": ["sex", "survived"], "method": "mutual_info"}
+    """
+    df = get_dataframe()
+    params = json.loads(input_str) if input_str.strip() else {}
+    method = str(params.get("method", "cramers_v")).lower()
+    top_k = max(1, int(params.get("top_k", DEFAULT_TOP_K)))
+    if method not in METHODS:
+        return json.dumps({"error": f"Unknown method: {method}", "supported_methods": list(METHODS)})
+
+    corrections = []
+    columns = params.get("columns")
+    if columns:
+        if not isinstance(columns, list):
+            return json.dumps({"error": "'columns' must be a list of column names"})
+        columns, corrections, not_found = validate_and_match_columns(columns, list(df.columns), cutoff=0.6)
+        if not_found:
+            return json.dumps({
+                "error": f"Columns not found: {', '.join(not_found)}",
+                "available_columns": list(df.columns)
+            })
+    else:
+        columns = list(df.columns)
+    columns = list(dict.fromkeys(columns))
+
+    skipped = {}
+    sizes = cardinalities(df, columns, limit=MAX_ASSOCIATION_COLUMNS)
+    for col, size in sizes.items():
+        if size < 2:
+            skipped[str(col)] = "fewer than 2 distinct values"
+        elif size > MAX_CATEGORIES:
+            skipped[str(col)] = f"{size} distinct values (max {MAX_CATEGORIES})"
+    notes = []
+    if len(sizes) < len(columns):
+        notes.append(f"Compared the first {MAX_ASSOCIATION_COLUMNS} eligible columns; {len(columns) - len(sizes)} "
+                     "more columns were not checked (pass \"columns\" to choose them).")
+    columns = [c for c in sizes if str(c) not in skipped]
+    if len(columns) < 2:
+        return json.dumps({"error": "At least two columns with 2 to "
+                                    f"{MAX_CATEGORIES} distinct values are needed", "skipped": skipped})
+
+    matrix = association_matrix(df, columns, method).round(4)
+    result = {
+        "method": method,
+        "columns": [str(c) for c in columns],
+        "association_matrix": matrix.astype(object).where(matrix.notna(), None).to_dict()
+    }
+    pairs = strongest_pairs(matrix, key="value")
+    if current_budget() and len(pairs) > top_k:
+        # Many pairs: the strongest ones, with the full matrix behind a handle
+        handle = result_store.put(json.dumps(result))
+        result = {
+            "method": method,
+            "columns": [str(c) for c in columns],
+            "strongest_pairs": pairs[:top_k],
+            "n_pairs": len(pairs),
+            "matrix_handle": handle
+        }
+        notes.append(f"Showing the {top_k} strongest of {len(pairs)} pairs. Call tool_expand with "
+                     f"{{\"handle\": \"{handle}\", \"path\": \"association_matrix.<column>\"}} "
+                     f"for one column's associations.")
+    if skipped:
+        result["skipped"] = skipped
+    if corrections:
+        notes.append(get_correction_message(corrections))
+    if notes:
+        result["note"] = " ".join(notes)
+    return json.dumps(result)
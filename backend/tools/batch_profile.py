@@ -0,0 +1,207 @@
+"""
+Batch Profile tool - Profiles many columns in a single pass.
+"""
+import os
+import json
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .cache import shared_result
+from .context import get_dataframe
+from .filters import filterable
+from .limits import budgeted, checkpoint
+from .profiling import precomputed
+from .shaping import bounded
+from .utils import validate_and_match_columns, get_correction_message
+
+# Maximum number of columns included in one result (keeps the LLM context small)
+MAX_PROFILED_COLUMNS = 200
+# Top values reported per column by default
+DEFAULT_TOP_K = 3
+# Threads used for per-column value counts when parallel mode is on
+PROFILE_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def _value_summary(s: pd.Series, top_k: int) -> tuple:
+    """Return (cardinality, top values) from a single value_counts pass."""
+    checkpoint()
+    counts = s.value_counts(dropna=True)
+    counts = counts[counts > 0]
+    return int(counts.size), {str(k): int(v) for k, v in counts.head(top_k).items()}
+
+
+def _numeric_stats(numeric: pd.DataFrame) -> dict:
+    """
+    Compute summary statistics for all numeric columns at once.
+    Works on a single float matrix so every statistic is one numpy reduction.
+    """
+    values = numeric.to_numpy(dtype=float, na_value=np.nan)
+    quartiles = numeric.quantile([0.25, 0.5, 0.75]).to_numpy(dtype=float)
+    q1, median, q3 = quartiles
+    iqr = q3 - q1
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # All-NaN columns produce NaN statistics, reported as None
+        warnings.simplefilter("ignore", RuntimeWarning)
+        count = (~np.isnan(values)).sum(axis=0)
+        mean = np.nanmean(values, axis=0)
+        centered = values - mean
+        squared = centered * centered
+        m2 = np.nanmean(squared, axis=0)
+        m3 = np.nanmean(squared * centered, axis=0)
+        std = np.sqrt(m2 * count / (count - 1))
+        # Adjusted Fisher-Pearson skewness, as computed by pandas
+        skew = np.sqrt(count * (count - 1)) / (count - 2) * m3 / m2 ** 1.5
+        skew = np.where((count > 2) & (m2 > 0), skew, np.where(count > 2, 0.0, np.nan))
+        outliers = ((values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)).sum(axis=0)
+        minimum = np.nanmin(values, axis=0)
+        maximum = np.nanmax(values, axis=0)
+
+    stats = {}
+    for i, col in enumerate(numeric.columns):
+        stats[col] = {
+            "min": _round(minimum[i]),
+            "max": _round(maximum[i]),
+            "mean": _round(mean[i]),
+            "median": _round(median[i]),
+            "std": _round(std[i]),
+            "skew": _round(skew[i]),
+            "outliers": int(outliers[i]),
+        }
+    return stats
+
+
+def profile_columns(df: pd.DataFrame, top_k: int = DEFAULT_TOP_K, parallel: bool = True) -> dict:
+    """
+    Profile every column of df with vectorized, frame-wide operations.
+
+    Missing counts, numeric statistics and IQR outlier counts are computed
+    once for all columns instead of column by column. Cardinality and top
+    values come from one value_counts per column; those run in a thread
+    pool when parallel is True.
+
+    Args:
+        df: DataFrame (already restricted to the columns to profile)
+        top_k: Number of most frequent values reported per column
+        parallel: Compute per-column value counts in parallel
+
+    Returns:
+        Dict mapping column name to its compact profile
+    """
+    total = len(df)
+    missing = df.isna().sum()
+
+    numeric = df.select_dtypes(include="number")
+    numeric_stats = _numeric_stats(numeric) if not numeric.empty else {}
+
+    columns = list(df.columns)
+    if parallel and len(columns) > 1 and PROFILE_WORKERS > 1:
+        with ThreadPoolExecutor(max_workers=PROFILE_WORKERS) as executor:
+            # Each column runs in a copy of this context, so its checkpoint sees the request's limits
+            futures = [executor.submit(copy_context().run, _value_summary, df[c], top_k) for c in columns]
+            summaries = [future.result() for future in futures]
+    else:
+        summaries = [_value_summary(df[c], top_k) for c in columns]
+
+    profiles = {}
+    for col, (cardinality, top) in zip(columns, summaries):
+        profile = {
+            "dtype": str(df[col].dtype),
+            "missing": int(missing[col]),
+            "missing_pct": round(float(missing[col] / total * 100), 2) if total else 0.0,
+            "unique": cardinality,
+            "top": top,
+        }
+        if col in numeric_stats:
+            profile["stats"] = numeric_stats[col]
+        profiles[str(col)] = profile
+    return profiles
+
+
+def _round(value, digits: int = 4):
+    """Round a scalar statistic for output, mapping NaN to None."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+@tool
+@bounded
+@filterable
+@budgeted
+@shared_result
+def tool_batch_profile(input_str: str = "") -> str:
+    """
+    Profiles many columns in ONE call: dtype, missing count/%, unique count,
+    top values and, for numeric columns, min/max/mean/median/std/skew and IQR outlier count.
+    Use this instead of calling tool_column_profile once per column.
+
+    Input (JSON string, optional):
+    {
+        "columns": ["age", "fare", "sex"],  # Optional: defaults to all columns
+        "top_k": 3,  # Optional: number of top values per column
+        "parallel": true  # Optional: count values of several columns concurrently
+    }
+
+    Examples:
+    - "" → profile all columns
+    - {"columns": ["age", "fare"]} → profile only those columns
+    """
+    df = get_dataframe()
+    params = {}
+    if input_str and input_str.strip():
+        try:
+            params = json.loads(input_str)
+        except json.JSONDecodeError:
+            # Also accept a plain comma-separated list of columns
+            params = {"columns": [c.strip() for c in input_str.split(",") if c.strip()]}
+
+    requested = params.get("columns")
+    top_k = int(params.get("top_k", DEFAULT_TOP_K))
+    parallel = bool(params.get("parallel", True))
+    corrections, not_found = [], []
+
+    if requested:
+        columns, corrections, not_found = validate_and_match_columns(
+            requested, list(df.columns), cutoff=0.6
+        )
+        if not columns:
+            return json.dumps({
+                "error": "None of the requested columns were found",
+                "available_columns": list(df.columns)
+            })
+    else:
+        columns = list(df.columns)
+
+    columns = list(dict.fromkeys(columns))
+    n_requested = len(columns)
+    truncated = n_requested > MAX_PROFILED_COLUMNS
+    columns = columns[:MAX_PROFILED_COLUMNS]
+
+    # Profiles of single columns do not depend on the other columns
+    profiles = precomputed(df, "profiles") if top_k == DEFAULT_TOP_K else None
+    if profiles is not None and all(str(c) in profiles for c in columns):
+        profiles = {str(c): profiles[str(c)] for c in columns}
+    else:
+        profiles = profile_columns(df[columns], top_k=top_k, parallel=parallel)
+
+    result = {
+        "rows": int(len(df)),
+        "columns_profiled": len(columns),
+        "profiles": profiles,
+    }
+
+    notes = []
+    if truncated:
+        notes.append(f"Only the first {MAX_PROFILED_COLUMNS} of {n_requested} columns were profiled; "
+                     f"pass 'columns' to profile others.")
+    if not_found:
+        notes.append(f"Columns not found: {', '.join(not_found)}")
+    if corrections:
+        notes.append(get_correction_message(corrections))
+    if notes:
+        result["note"] = " ".join(notes)
+
+    return json.dumps(result)
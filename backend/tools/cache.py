@@ -0,0 +1,200 @@
+"""
+Per-dataset computation cache for EDA Agent tools.
+
+Datasets are not modified after loading, so intermediate results that are
+expensive to build (group indices, masks, ...) can be reused by later tool
+calls on the same DataFrame. Entries are tied to the DataFrame object they
+were computed from and are dropped when it is garbage collected.
+
+With several worker processes (EDA_SHARED_DIR), whole tool results are also
+cached on disk by dataset id, so a profile or plot computed by one worker
+is reused by the others (see shared_result).
+"""
+import os
+import json
+import glob
+import hashlib
+import weakref
+import tempfile
+import functools
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import pandas as pd
+
+from .context import get_dataframe
+from .shaping import current_budget
+
+# Maximum number of entries kept per namespace and DataFrame (least recently used are dropped)
+TOOL_CACHE_ENTRIES = int(os.getenv("EDA_TOOL_CACHE_ENTRIES", "16"))
+# Directory shared by every worker process (datasets, jobs, tool results); empty disables it
+SHARED_DIR = os.path.abspath(os.getenv("EDA_SHARED_DIR")) if os.getenv("EDA_SHARED_DIR") else ""
+# Tool results kept on disk per tool (least recently used are dropped)
+SHARED_CACHE_ENTRIES = int(os.getenv("EDA_SHARED_CACHE_ENTRIES", "512"))
+
+
+class FrameCache:
+    """Small thread-safe LRU cache for one namespace of one DataFrame."""
+
+    def __init__(self, max_entries: int = TOOL_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing and storing it on a miss.
+        compute runs outside the lock, so concurrent misses may both compute.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key without computing it."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return default
+
+    def put(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# id(DataFrame) -> namespace -> FrameCache
+_caches: Dict[int, Dict[str, FrameCache]] = {}
+_lock = threading.Lock()
+
+
+def _release(frame_id: int):
+    with _lock:
+        namespaces = _caches.pop(frame_id, None)
+    # Dropped outside the lock: cached values (e.g. filtered subsets) may be
+    # DataFrames whose own release runs right here
+    del namespaces
+
+
+def frame_cache(df: pd.DataFrame, namespace: str, max_entries: int = TOOL_CACHE_ENTRIES) -> FrameCache:
+    """
+    Return the cache for namespace attached to df, creating it if needed.
+    max_entries only applies when the cache is created.
+    """
+    frame_id = id(df)
+    with _lock:
+        namespaces = _caches.get(frame_id)
+        if namespaces is None:
+            namespaces = _caches[frame_id] = {}
+            # Drop the entries when the DataFrame goes away so the id can be reused safely
+            weakref.finalize(df, _release, frame_id)
+        cache = namespaces.get(namespace)
+        if cache is None:
+            cache = namespaces[namespace] = FrameCache(max_entries)
+        return cache
+
+
+def get_cache(namespace: str) -> FrameCache:
+    """Return the cache for namespace attached to the current dataframe."""
+    return frame_cache(get_dataframe(), namespace)
+
+
+def set_frame_key(df: pd.DataFrame, key: str):
+    """Record the stable key (dataset id and version) df was loaded under."""
+    frame_cache(df, "frame").put("key", key)
+
+
+def frame_key(df: pd.DataFrame) -> Optional[str]:
+    """Key recorded by set_frame_key, or None (e.g. for filtered subsets)."""
+    return frame_cache(df, "frame").get("key")
+
+
+class SharedCache:
+    """
+    Text results on disk under SHARED_DIR, visible to every worker process.
+    Files are written atomically; the least recently used beyond max_entries are deleted.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = SHARED_CACHE_ENTRIES):
+        self.directory = os.path.join(SHARED_DIR, "cache", namespace)
+        self.max_entries = max_entries
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode()).hexdigest()[:32] + ".txt")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return value
+
+    def put(self, key: str, value: str):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(value)
+        os.replace(tmp_path, self._path(key))
+        self._prune()
+
+    def _prune(self):
+        paths = glob.glob(os.path.join(self.directory, "*.txt"))
+        if len(paths) <= self.max_entries:
+            return
+        by_age = sorted(paths, key=lambda p: os.stat(p).st_mtime if os.path.exists(p) else 0)
+        for path in by_age[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+_shared: Dict[str, SharedCache] = {}
+
+
+def shared_result(func):
+    """
+    Decorator for tool functions: reuse the result any worker computed for
+    the same dataset and input. Only active when SHARED_DIR is set, and only
+    for frames loaded from the dataset registry (filtered subsets have no
+    key and are computed as usual). Apply it below @filterable.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = frame_key(get_dataframe()) if SHARED_DIR else None
+        if key is None:
+            return func(*args, **kwargs)
+        cache = _shared.get(func.__name__)
+        if cache is None:
+            cache = _shared.setdefault(func.__name__, SharedCache(func.__name__))
+        # Some tools adapt their output to the token budget
+        entry = json.dumps([key, args, kwargs, current_budget()], default=str)
+        output = cache.get(entry)
+        if output is None:
+            output = func(*args, **kwargs)
+            cache.put(entry, output)
+        return output
+    return wrapper
@@ -0,0 +1,165 @@
+"""
+Tool catalog for EDA Agent: condensed descriptions and per-question selection.
+
+Every tool bound to the agent is sent with its description on every LLM
+call, so the full docstrings (tool_plot's alone is a few hundred tokens)
+cost prompt tokens whether the question needs the tool or not. This module
+provides:
+
+- compact_tool(t): a copy of a tool with a condensed description that also
+  carries its usage rules (the system prompt then stays the same for every
+  question, a prefix LLM providers can cache).
+- select_tools(question): the tools a question may need, matched by
+  keyword (English and Spanish). Questions matching nothing get every tool,
+  so selection can only narrow the choice when the question is explicit.
+  Generic words ("most", "count", "top") trigger tools that cannot answer
+  every question they appear in, and the agent cannot ask for tools it was
+  not given, so a core analysis set is bound with every selection.
+
+Tools are always returned in ALL_TOOLS order, so the same selection gives
+the same prompt prefix.
+"""
+import re
+from typing import List, Optional
+
+from . import ALL_TOOLS
+
+# Condensed descriptions. The row filter ("where") and workspace ("dataset")
+# parameters every tool accepts are explained once, in the system prompt.
+COMPACT_DESCRIPTIONS = {
+    "tool_schema": (
+        "Column names and data types as JSON. Input: \"\" for all columns, \"N\" for the first N, "
+        "or \"col1, col2\"."
+    ),
+    "tool_nulls": "Missing values per column (only columns with any). Input: \"\".",
+    "tool_missingness": (
+        "How missing values co-occur: complete rows, most common missing-value patterns and column pairs "
+        "missing together. Input JSON (optional): {\"columns\": [...], \"top_k\": 10}."
+    ),
+    "tool_describe": (
+        "describe() statistics (count, mean, std, min, quartiles, max) of numeric columns as CSV. "
+        "Input: \"\" for all numeric columns or \"col1, col2\"."
+    ),
+    "tool_plot": (
+        "Draws a plot and returns its URL and a data_summary to describe it (never mention file paths). "
+        "Input JSON: {\"plot_type\": histogram|bar|boxplot|scatter|line|countplot|violin|heatmap|pairplot|dashboard, "
+        "\"x\", \"y\", \"hue\", \"columns\": [...] (heatmap/pairplot), \"freq\"/\"agg\" (line over a datetime x), "
+        "\"title\"}; x/y/columns are auto-detected when omitted. "
+        "Use it whenever the user says show, plot, chart, graph, visualize or heatmap "
+        "(correlation heatmap: {\"plot_type\": \"heatmap\"}). Several charts in ONE call: "
+        "{\"plot_type\": \"dashboard\", \"columns\": [...], \"panel_type\": \"histogram\"} or "
+        "{\"plot_type\": \"dashboard\", \"panels\": [{plot spec}, ...]}; each panel's summary is in data_summary.panels."
+    ),
+    "tool_column_profile": "Detailed profile of ONE column. Input: the column name.",
+    "tool_outliers": (
+        "Outliers of one column ({\"column\": \"age\"}) or, with one call, of every numeric column "
+        "(\"\", ranked by outlier share). \"method\": iqr (default, use when the user lets you choose), zscore, "
+        "mad (skewed data) or isolation_forest (unusual ROWS across numeric columns); optional \"threshold\", "
+        "\"columns\", \"top_k\"."
+    ),
+    "tool_correlation": (
+        "Correlation values (no plot) between numeric columns. Input JSON: {\"columns\": [...], "
+        "\"method\": pearson|spearman, \"top_k\": strongest pairs returned}. For a heatmap use tool_plot."
+    ),
+    "tool_association": (
+        "Association between categorical columns (e.g. class, sex, embarked), which correlations cannot measure. "
+        "Input JSON (optional): {\"columns\": [...] (default: every column with 2-50 distinct values), "
+        "\"method\": cramers_v (0-1, default)|mutual_info (nats), \"top_k\": 10}."
+    ),
+    "tool_categorical_distribution": (
+        "Value frequencies of a categorical column. Input JSON: {\"column\": \"sex\", \"top_k\": 10}."
+    ),
+    "tool_batch_profile": (
+        "Profiles many columns in ONE call (dtype, missing, unique, top values, numeric stats, IQR outliers). "
+        "Use it for any overview or summary of several/all columns, never tool_column_profile per column. "
+        "Input: \"\" for all columns or {\"columns\": [...], \"top_k\": 3}."
+    ),
+    "tool_groupby": (
+        "Per-group numbers ('average X by Y', counts per category, top N groups). Input JSON: "
+        "{\"by\": [\"pclass\", \"sex\"], \"metrics\": {\"fare\": [\"mean\", \"max\"]}, \"sort_by\": \"fare_mean\"|\"size\", "
+        "\"ascending\": false, \"top_k\": 20, \"dropna\": true}. Metrics: count, nunique, sum, mean, median, min, "
+        "max, std, var. Only plot when asked to visualize."
+    ),
+    "tool_timeseries": (
+        "Trends over time: buckets rows by a datetime column and aggregates them, with summary and recent buckets. "
+        "Input JSON: {\"time\": \"date\", \"value\": \"sales\" (omit to count rows), \"agg\": \"sum\", "
+        "\"freq\": s|min|h|D|W|M|Q|Y|auto, \"rolling\": 7, \"max_points\": 30}. To visualize a trend use "
+        "tool_plot with plot_type line and the datetime column as x."
+    ),
+    "tool_join": (
+        "Joins two workspace datasets and adds the result as a new dataset; pass the returned \"name\" as "
+        "\"dataset\" to other tools. Input JSON: {\"right\": \"customers\", \"on\": \"customer_id\" "
+        "(or \"left_on\"/\"right_on\"), \"how\": inner|left|right|outer, \"left\", \"columns\", \"name\"}."
+    ),
+    "tool_expand": (
+        "More of a truncated tool result. Only call it if the question needs the part that was cut. "
+        "Input JSON: {\"handle\": \"res_...\", \"path\": \"data_summary.frequencies\", \"offset\": 0, \"limit\": 50}."
+    ),
+}
+
+# Tools bound for every question (cheap, and needed to find columns or read truncated results)
+ALWAYS_BOUND = ("tool_schema", "tool_expand")
+# General analysis tools bound for every question, in case the triggered ones cannot answer it
+CORE_TOOLS = ("tool_describe", "tool_groupby", "tool_batch_profile")
+
+# Words that make a tool relevant (lowercase, matched at word starts)
+TOOL_TRIGGERS = {
+    "tool_nulls": r"missing|null|nan\b|empty|blank|incomplete|falta|nulo|vac[ií]o",
+    "tool_missingness": (r"missing|null|incomplete|complete row|pattern|together|co-?occur|falta|nulo|incomplet"
+                         r"|complet[ao]s|patr[oó]n|patrones|juntos|a la vez"),
+    "tool_describe": (r"stat|describ|summar|mean|average|median|std|deviation|min|max|range|quartile|percentile"
+                      r"|estad[ií]stic|media|promedio|mediana|desviaci|rango|resum"),
+    "tool_plot": (r"plot|chart|graph|visuali|heat ?map|show|draw|display|histogram|box ?plot|scatter|violin"
+                  r"|pair ?plot|dashboard|distribution|gr[aá]fic|muestr|mu[eé]stra|dibuj|visualiz|histograma"
+                  r"|diagrama|mapa de calor|distribuci"),
+    "tool_column_profile": r"profil|column|perfil|columna",
+    "tool_outliers": r"outlier|anomal|unusual|extreme|atypical|at[ií]pic|an[oó]mal|inusual|extremo",
+    "tool_correlation": r"correlat|relat|associat|correlaci|relaci|asociaci",
+    "tool_association": (r"associat|relat|depend|independ|cram[eé]r|mutual|contingen|categor"
+                         r"|asociaci|relaci|dependen|independen|contingencia"),
+    "tool_categorical_distribution": (r"distribution|frequen|count|categor|common|most|top|value|how many"
+                                      r"|distribuci|frecuen|cu[aá]nt|categor|com[uú]n|valor"),
+    "tool_batch_profile": (r"profil|overview|summar|all columns|every column|each column|dataset|general"
+                           r"|perfil|resum|todas las columnas|cada columna|visi[oó]n general"),
+    "tool_groupby": (r"by|per|each|group|segment|breakdown|top|rank|highest|lowest|best|worst|compar"
+                     r"|por|cada|grupo|segment|mayor|menor|mejor|peor|compar"),
+    "tool_timeseries": (r"time|trend|date|day|daily|week|month|quarter|year|hour|season|over time|evolution"
+                        r"|growth|tiempo|tendencia|fecha|d[ií]a|diari|semana|mes|mensual|trimest|a[nñ]o|anual"
+                        r"|hora|evoluci|crecimiento"),
+    "tool_join": r"join|merge|combin|link|match|lookup|unir|cruz|combina|enlaz",
+}
+_TRIGGER_PATTERNS = {name: re.compile(r"\b(?:" + words + ")", re.IGNORECASE)
+                     for name, words in TOOL_TRIGGERS.items()}
+
+
+def compact_tool(t):
+    """Copy of tool t with its condensed description (t itself if it has none)."""
+    description = COMPACT_DESCRIPTIONS.get(t.name)
+    return t.model_copy(update={"description": description}) if description else t
+
+
+def select_tools(question: Optional[str]) -> List:
+    """
+    Tools the agent needs to answer question.
+
+    Args:
+        question: The user's question (None: every tool)
+
+    Returns:
+        Tools in ALL_TOOLS order: the ones triggered by the question plus
+        ALWAYS_BOUND and CORE_TOOLS, or every tool when nothing is triggered
+    """
+    if not question:
+        return list(ALL_TOOLS)
+    # Context lines the API prepends ("[Datasets: ...]") are not part of the question
+    lines = question.split("\n")
+    notes = [line for line in lines if line.startswith("[") and line.endswith("]")]
+    text = "\n".join(line for line in lines if line not in notes)
+    wanted = {name for name, pattern in _TRIGGER_PATTERNS.items() if pattern.search(text)}
+    if any(note.startswith("[Datasets:") for note in notes):
+        # Several datasets loaded: they may have to be combined
+        wanted.add("tool_join")
+    if not wanted - {"tool_join"}:
+        return list(ALL_TOOLS)
+    wanted.update(ALWAYS_BOUND + CORE_TOOLS)
+    return [t for t in ALL_TOOLS if t.name in wanted]
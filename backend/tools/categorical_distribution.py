@@ -2,11 +2,28 @@
 Categorical Distribution tool - Frequency distribution for categorical columns.
 """
 import json
+import pandas as pd
 from langchain_core.tools import tool
 from .context import get_dataframe
+from .encoding import value_counts
+from .filters import filterable
+from .limits import budgeted
+from .shaping import bounded
+from .sql_engine import sql_engine
 from .utils import find_column_match
 
+def top_values(counts: pd.Series, top_k: int) -> pd.Series:
+    """The top_k largest counts; ties are ordered by value label so the result is deterministic."""
+    if len(counts) > top_k:
+        counts = counts[counts >= counts.nlargest(top_k).iloc[-1]]
+    order = sorted(range(len(counts)), key=lambda i: (-counts.iloc[i], str(counts.index[i])))
+    return counts.iloc[order[:top_k]]
+
+
 @tool
+@bounded
+@filterable
+@budgeted
 def tool_categorical_distribution(input_str: str) -> str:
     """
     Returns frequency distribution for a categorical column.
@@ -32,12 +49,16 @@ def tool_categorical_distribution(input_str: str) -> str:
             error_msg += f" Did you mean '{suggestion}'?"
         return json.dumps({"error": error_msg})
 
-    s = df[matched_column].dropna()
-    total = len(s)
-
-    counts = s.value_counts()
-    top = counts.head(top_k)
-    other_count = counts.iloc[top_k:].sum()
+    sql = sql_engine(df)
+    if sql is not None:
+        counts, cardinality, total = sql.value_counts(matched_column, top_k)
+        top = top_values(counts, top_k)
+    else:
+        # Counts per distinct value are cached; only the top values are selected per call
+        counts = value_counts(df, matched_column)
+        cardinality, total = counts.cardinality, counts.total
+        top = counts.top(top_k, by_label=True)
+    other_count = total - top.sum()
 
     distribution = {
         str(k): {
@@ -55,6 +76,6 @@ def tool_categorical_distribution(input_str: str) -> str:
 
     return json.dumps({
         "column": matched_column,  # Use the actual matched column name
-        "cardinality": int(counts.size),
+        "cardinality": int(cardinality),
         "distribution": distribution
     })
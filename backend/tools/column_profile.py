@@ -4,10 +4,19 @@ Column Profile tool - Detailed profiling of individual columns.
 import json
 import pandas as pd
 from langchain_core.tools import tool
+from .cache import shared_result
 from .context import get_dataframe
+from .encoding import value_counts
+from .filters import filterable
+from .limits import budgeted
+from .shaping import bounded
 from .utils import find_column_match
 
 @tool
+@bounded
+@filterable
+@budgeted
+@shared_result
 def tool_column_profile(column: str) -> str:
     """
     Returns a detailed, neutral profile of a single column.
@@ -32,21 +41,21 @@ def tool_column_profile(column: str) -> str:
     # Use the matched column name
     s = df[matched_column]
     total = len(s)
+    counts = value_counts(df, matched_column)
 
     profile = {
         "column": matched_column,  # Use the actual matched column name
         "dtype": str(s.dtype),
         "missing": {
-            "count": int(s.isna().sum()),
-            "percentage": round(float(s.isna().mean() * 100), 2)
+            "count": int(total - counts.total),
+            "percentage": round(float((total - counts.total) / total * 100), 2) if total else 0.0
         },
-        "cardinality": int(s.nunique(dropna=True))
+        "cardinality": counts.cardinality
     }
 
     # Top values
-    value_counts = s.value_counts(dropna=True).head(10)
     profile["top_values"] = {
-        str(k): int(v) for k, v in value_counts.items()
+        str(k): int(v) for k, v in counts.top(10).items()
     }
 
     # Numeric-only stats
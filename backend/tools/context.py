@@ -1,22 +1,58 @@
 """
 Data context management for EDA Agent.
-Handles the current dataframe being analyzed.
+Handles the current dataframe being analyzed and the workspace of
+named datasets it belongs to.
+
+The dataframe is stored in a ContextVar so that concurrent requests and
+background jobs each see their own dataset. LangChain runs tools in
+context-copying executors, so a value set before invoking the agent is
+visible to every tool call it makes.
 """
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator, Optional
 import pandas as pd
 
-# Global dataframe that will be set per request
-df = None
+if TYPE_CHECKING:
+    from .workspace import Workspace
+
+# Dataframe for the current request or job
+_current_df: ContextVar[Optional[pd.DataFrame]] = ContextVar("current_df", default=None)
+# Named datasets of the current request (None: only the current dataframe)
+_workspace: ContextVar[Optional["Workspace"]] = ContextVar("workspace", default=None)
 
 
 def set_dataframe(dataframe: pd.DataFrame):
-    """Set the current dataframe for analysis."""
-    global df
-    df = dataframe
+    """Set the current dataframe for analysis (on its own, without a workspace)."""
+    _current_df.set(dataframe)
+    _workspace.set(None)
+
+
+def set_workspace(workspace: Optional["Workspace"], active: Optional[str] = None):
+    """Set the named datasets of the current request; active becomes the current dataframe."""
+    _workspace.set(workspace)
+    if workspace is not None and active is not None:
+        _current_df.set(workspace.frame(active))
+
+
+def get_workspace() -> Optional["Workspace"]:
+    """Get the workspace of the current request, if one was set."""
+    return _workspace.get()
 
 
 def get_dataframe() -> pd.DataFrame:
     """Get the current dataframe."""
-    global df
+    df = _current_df.get()
     if df is None:
         raise ValueError("No dataframe loaded. Please load a dataset first.")
     return df
+
+
+@contextmanager
+def use_dataframe(dataframe: pd.DataFrame) -> Iterator[pd.DataFrame]:
+    """Temporarily make dataframe the current one (e.g. a filtered subset)."""
+    token = _current_df.set(dataframe)
+    try:
+        yield dataframe
+    finally:
+        _current_df.reset(token)
@@ -2,24 +2,62 @@
 Correlation tool - Computes correlation matrices.
 """
 import json
+import numpy as np
+import pandas as pd
 from langchain_core.tools import tool
 from .context import get_dataframe
+from .estimates import progressive
+from .filters import filterable
+from .limits import budgeted
+from .profiling import precomputed
+from .shaping import bounded, current_budget, result_store
+from .sql_engine import sql_engine
 from .utils import validate_and_match_columns, get_correction_message
 
+# Pairs listed when the matrix has more pairs than this
+DEFAULT_TOP_K = 10
+
+
+def strongest_pairs(corr: pd.DataFrame, key: str = "r") -> list:
+    """Every column pair of a correlation matrix, strongest (largest |r|) first; undefined pairs are skipped."""
+    values = corr.to_numpy(dtype=float)
+    upper = np.triu_indices(len(corr.columns), k=1)
+    r = values[upper]
+    defined = ~np.isnan(r)
+    rows, cols, r = upper[0][defined], upper[1][defined], r[defined]
+    order = np.argsort(-np.abs(r), kind="stable")
+    return [{"a": str(corr.columns[rows[i]]), "b": str(corr.columns[cols[i]]), key: round(float(r[i]), 4)}
+            for i in order]
+
+
+def correlation_matrix(df: pd.DataFrame, columns: list, method: str = "pearson") -> pd.DataFrame:
+    """Correlation matrix of the numeric columns, on the SQL engine if active (pearson and spearman)."""
+    sql = sql_engine(df)
+    if sql is not None and method in ("pearson", "spearman"):
+        return sql.correlation(columns, method)
+    return df[columns].corr(method=method)
+
+
 @tool
+@bounded
+@filterable
+@budgeted
+@progressive
 def tool_correlation(input_str: str) -> str:
     """
     Computes correlation matrix for selected numeric columns.
     Input JSON:
     {
         "columns": ["age", "fare", "sibsp"],
-        "method": "pearson" | "spearman"
+        "method": "pearson" | "spearman",
+        "top_k": 10  # Optional: with more pairs than this, only the strongest pairs are returned
     }
     """
     df = get_dataframe()
     params = json.loads(input_str)
     columns = params.get("columns")
     method = params.get("method", "pearson")
+    top_k = max(1, int(params.get("top_k", DEFAULT_TOP_K)))
 
     if not columns or not isinstance(columns, list):
         return json.dumps({"error": "A list of columns is required"})
@@ -52,16 +90,35 @@ def tool_correlation(input_str: str) -> str:
     if numeric_df.empty:
         return json.dumps({"error": "No numeric columns available for correlation"})
 
-    corr = numeric_df.corr(method=method)
+    full = precomputed(df, "correlation") if method == "pearson" else None
+    if full is not None and set(numeric_df.columns) <= set(full.columns):
+        # Pairwise correlations do not depend on the other columns
+        corr = full.loc[list(numeric_df.columns), list(numeric_df.columns)]
+    else:
+        corr = correlation_matrix(df, list(numeric_df.columns), method)
     
     result = {
         "method": method,
         "columns": list(corr.columns),
         "correlation_matrix": corr.round(4).to_dict()
     }
+    pairs = strongest_pairs(corr)
+    if current_budget() and len(pairs) > top_k:
+        # Wide matrices: the strongest pairs, with the full matrix behind a handle
+        handle = result_store.put(json.dumps(result))
+        result = {
+            "method": method,
+            "columns": list(corr.columns),
+            "strongest_pairs": pairs[:top_k],
+            "n_pairs": len(pairs),
+            "matrix_handle": handle,
+            "note": f"Showing the {top_k} strongest of {len(pairs)} pairs. Call tool_expand with "
+                    f"{{\"handle\": \"{handle}\", \"path\": \"correlation_matrix.<column>\"}} "
+                    f"for one column's correlations."
+        }
     
     # Add correction message if columns were fuzzy matched
     if corrections:
-        result["note"] = get_correction_message(corrections)
+        result["note"] = " ".join(filter(None, [result.get("note"), get_correction_message(corrections)]))
 
     return json.dumps(result)
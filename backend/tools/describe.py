@@ -1,11 +1,46 @@
 """
 Describe tool - Returns statistical summary of data.
 """
+from typing import List, Optional
+import pandas as pd
 from langchain_core.tools import tool
 from .context import get_dataframe
+from .estimates import progressive
+from .filters import filterable
+from .limits import budgeted
+from .profiling import precomputed
+from .shaping import bounded
+from .sql_engine import sql_engine
 from .utils import validate_and_match_columns, get_correction_message
 
+# Rows of describe() for numeric columns; a table that also has datetime columns orders them differently
+NUMERIC_ROWS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def describe_stats(df: pd.DataFrame, cols: Optional[List[str]] = None) -> pd.DataFrame:
+    """DataFrame.describe() of cols (default: the numeric and datetime columns), on the SQL engine if active."""
+    sql = sql_engine(df)
+    if sql is not None and sql.describe_columns(cols):
+        return sql.describe(cols)
+    return df[cols].describe() if cols else df.describe()
+
+
+def _slice_stats(df: pd.DataFrame, full: pd.DataFrame, cols: List[str]) -> Optional[pd.DataFrame]:
+    """describe() of cols taken from describe() of every column, or None if it would differ."""
+    if not set(cols) <= set(full.columns):
+        return None
+    if all(pd.api.types.is_datetime64_any_dtype(df[c]) for c in cols):
+        return None  # datetime-only tables have no std row
+    stats = full[cols]
+    if not any(pd.api.types.is_datetime64_any_dtype(df[c]) for c in cols):
+        stats = stats.loc[NUMERIC_ROWS].astype(float)
+    return stats
+
 @tool
+@bounded
+@filterable
+@budgeted
+@progressive
 def tool_describe(input_str: str) -> str:
     """
     Returns statistical summary (describe()) of numeric columns.
@@ -36,8 +71,17 @@ def tool_describe(input_str: str) -> str:
         else:
             cols = None  # Fall back to all columns if nothing matched
     
-    stats = df[cols].describe() if cols else df.describe()
-    result = stats.to_csv(index=True)
+    full = precomputed(df, "describe")
+    stats = None
+    if full is not None:
+        stats = full if not cols else _slice_stats(df, full, cols)
+    if stats is None:
+        stats = describe_stats(df, cols)
+    # Mean timestamps to the second: sub-second digits are noise and depend on summation order
+    stats = stats.apply(lambda s: s.map(lambda v: v.round("s") if isinstance(v, pd.Timestamp) else v)
+                        if s.dtype == object else s)
+    # 10 significant digits: enough for analysis, and identical across engines
+    result = stats.to_csv(index=True, float_format="%.10g")
     
     # Add note about corrections if any
     if corrections:
@@ -0,0 +1,99 @@
+"""
+Dictionary-encoded value counts for EDA Agent tools.
+
+value_counts() on a text column hashes every string on every call. Here a
+column is encoded once per dataset as integer codes plus its distinct
+values (categorical columns already are: their codes are used as they
+are), and the count of every distinct value is one np.bincount over the
+codes. The counts are cached per column, so later frequency queries on the
+same column only pick their top values, with np.argpartition, instead of
+hashing and sorting the whole column again.
+"""
+import heapq
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .cache import frame_cache
+from .profiling import precomputed
+
+# Columns whose value counts are kept per dataset
+ENCODING_CACHE_ENTRIES = 64
+
+
+def encode(s: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Integer codes (-1 for missing values) and distinct values of s.
+    Distinct values are in category order for categoricals, else in order of first appearance.
+    """
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy(), s.cat.categories
+    codes, values = pd.factorize(s, use_na_sentinel=True)
+    return codes, pd.Index(values)
+
+
+@dataclass
+class ValueCounts:
+    """Number of rows of every distinct non-null value of a column."""
+    values: pd.Index
+    counts: np.ndarray
+    total: int
+    # Codes that occur at least once (categoricals may have unused categories)
+    present: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.present = np.flatnonzero(self.counts)
+
+    @property
+    def cardinality(self) -> int:
+        return int(self.present.size)
+
+    def top(self, k: Optional[int] = None, by_label: bool = False) -> pd.Series:
+        """
+        The k most frequent values (all when k is None), most frequent first.
+
+        Args:
+            k: Number of values to return
+            by_label: Order ties by str(value) instead of the order value_counts() uses
+                (category order or first appearance)
+
+        Returns:
+            Series of counts indexed by value
+        """
+        codes = self.present
+        label = (lambda code: str(self.values[code])) if by_label else None
+        if k is not None and k < codes.size:
+            if k <= 0:
+                return pd.Series([], index=self.values[:0], dtype=np.int64)
+            counts = self.counts[codes]
+            # The k-th largest count: every code above it is in, ties at it fill the remaining places
+            threshold = counts[np.argpartition(counts, -k)[-k]]
+            above = codes[counts > threshold]
+            tied = codes[counts == threshold]
+            need = k - above.size
+            tied = np.array(heapq.nsmallest(need, tied, key=label), dtype=codes.dtype) if label else tied[:need]
+            codes = np.concatenate([above, tied])
+        if label:
+            codes = np.array(sorted(codes, key=lambda code: (-self.counts[code], label(code))), dtype=codes.dtype)
+        else:
+            codes = codes[np.lexsort((codes, -self.counts[codes]))]
+        return pd.Series(self.counts[codes], index=self.values[codes])
+
+
+def count_values(s: pd.Series) -> ValueCounts:
+    """Value counts of s from its dictionary encoding."""
+    codes, values = encode(s)
+    valid = codes[codes >= 0]
+    counts = np.bincount(valid, minlength=len(values)).astype(np.int64)
+    return ValueCounts(values=values, counts=counts, total=int(valid.size))
+
+
+def value_counts(df: pd.DataFrame, column) -> ValueCounts:
+    """Value counts of df[column], computed once per DataFrame and column (or by the background profile)."""
+    def compute():
+        counts = precomputed(df, f"counts:{column}")
+        return counts if counts is not None else count_values(df[column])
+
+    cache = frame_cache(df, "encoding", ENCODING_CACHE_ENTRIES)
+    return cache.get_or_compute(column, compute)
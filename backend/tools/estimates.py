@@ -0,0 +1,323 @@
+"""
+Progressive answers for EDA Agent tools.
+
+In progressive mode (see progressive_mode), tools decorated with
+@progressive answer from a cached stratified sample of large datasets
+first, marked as an estimate with 95% confidence intervals, while the
+exact result is computed in a background pool. The exact result is cached
+per dataset and input, so the same call returns it, and no estimate, once
+it is ready. The API uses this to send an estimated answer right away and
+the exact one when the background work has finished.
+
+The sample keeps every stratum of the lowest-cardinality categorical (or
+boolean) column in proportion, so group shares are not distorted by
+chance; without such a column it is a plain random sample.
+"""
+import io
+import os
+import csv
+import json
+import math
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .cache import frame_cache
+from .context import get_dataframe, use_dataframe
+from .encoding import encode, value_counts
+from .limits import detach
+from .sql_engine import source_of, use_engine
+
+# --- Configuration ---
+# Datasets with fewer rows are always answered exactly
+ESTIMATE_MIN_ROWS = int(os.getenv("EDA_ESTIMATE_MIN_ROWS", "200000"))
+# Rows in the sample estimates are computed from
+ESTIMATE_SAMPLE_ROWS = int(os.getenv("EDA_ESTIMATE_SAMPLE_ROWS", "50000"))
+# Threads computing exact results in the background
+EXACT_WORKERS = int(os.getenv("EDA_EXACT_WORKERS", "2"))
+# Columns with more distinct values than this are not used as strata
+MAX_STRATA = 50
+# Two-sided 95% normal quantile
+CONFIDENCE = 0.95
+Z_SCORE = 1.959964
+# Correlation pairs given an interval (strongest first)
+MAX_INTERVAL_PAIRS = 20
+
+# Exact results run beside the request's own tool calls (tool_plot serializes
+# its pyplot rendering with a lock, see tools/plot.py)
+_executor = ThreadPoolExecutor(max_workers=EXACT_WORKERS, thread_name_prefix="eda-exact")
+# (id(df), tool, input) -> exact computation in progress
+_running: Dict[Tuple, Future] = {}
+_lock = threading.Lock()
+
+
+@dataclass
+class Refinement:
+    """Exact computations started while answering one request."""
+    futures: List[Future] = field(default_factory=list)
+
+    @property
+    def estimated(self) -> bool:
+        """True if any tool answered with an estimate."""
+        return bool(self.futures)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for every exact result; returns False on timeout."""
+        _, pending = wait(self.futures, timeout=timeout)
+        return not pending
+
+
+# Refinement of the current request (None: progressive mode is off)
+_refinement: ContextVar[Optional[Refinement]] = ContextVar("refinement", default=None)
+
+
+@contextmanager
+def progressive_mode() -> Iterator[Refinement]:
+    """Let @progressive tools answer from samples in this block."""
+    refinement = Refinement()
+    token = _refinement.set(refinement)
+    try:
+        yield refinement
+    finally:
+        _refinement.reset(token)
+
+
+# --- Sampling ---
+
+def _strata_column(df: pd.DataFrame) -> Optional[str]:
+    """Lowest-cardinality categorical or boolean column with 2..MAX_STRATA values."""
+    best, best_size = None, MAX_STRATA + 1
+    for col in df.columns:
+        dtype = df[col].dtype
+        if not (isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype)):
+            continue
+        size = value_counts(df, col).cardinality
+        if 2 <= size < best_size:
+            best, best_size = col, size
+    return best
+
+
+def stratified_sample(df: pd.DataFrame, rows: int, seed: int = 0) -> Tuple[pd.DataFrame, Optional[str]]:
+    """
+    Sample of rows rows of df, in the original row order.
+
+    Returns:
+        (sample, name of the column whose groups keep their share, or None for a plain random sample)
+    """
+    n = len(df)
+    if n <= rows:
+        return df, None
+    rng = np.random.default_rng(seed)
+    column = _strata_column(df)
+    if column is None:
+        return df.iloc[np.sort(rng.choice(n, rows, replace=False))], None
+
+    codes = encode(df[column])[0].astype(np.int64) + 1  # missing values are a stratum of their own
+    sizes = np.bincount(codes)
+    exact = sizes * rows / n
+    quota = np.floor(exact).astype(np.int64)
+    # Hand the rows lost to rounding to the strata with the largest remainders
+    quota[np.argsort(quota - exact)[:rows - quota.sum()]] += 1
+    # Rows grouped by stratum (a stable sort of small integers is a radix sort), then quota of each at random
+    order = np.argsort(codes.astype(np.int16), kind="stable")
+    starts = np.cumsum(sizes) - sizes
+    picked = [order[start + rng.choice(size, count, replace=False)]
+              for start, size, count in zip(starts, sizes, quota) if count]
+    return df.iloc[np.sort(np.concatenate(picked))], str(column)
+
+
+def estimate_sample(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[str]]:
+    """Cached stratified sample of df used for estimates."""
+    return frame_cache(df, "estimates").get_or_compute(
+        "sample", lambda: stratified_sample(df, ESTIMATE_SAMPLE_ROWS))
+
+
+def total_rows(df: pd.DataFrame) -> int:
+    """Rows of the full dataset (df is itself a sample of out-of-core datasets)."""
+    source = source_of(df)
+    return source.rows if source is not None else len(df)
+
+
+# --- Confidence intervals ---
+
+def _round(value: float) -> float:
+    return float(f"{value:.6g}")
+
+
+def mean_interval(mean: float, std: float, count: float) -> Optional[List[float]]:
+    """Normal-approximation interval of a mean, or None with fewer than two values."""
+    if not count or count < 2 or not np.isfinite(std):
+        return None
+    half = Z_SCORE * std / math.sqrt(count)
+    return [_round(mean - half), _round(mean + half)]
+
+
+def share_interval(percentage: float, count: float) -> Optional[List[float]]:
+    """Wilson interval of a percentage observed among count rows."""
+    if not count:
+        return None
+    p = percentage / 100
+    denominator = 1 + Z_SCORE ** 2 / count
+    center = (p + Z_SCORE ** 2 / (2 * count)) / denominator
+    half = Z_SCORE * math.sqrt(p * (1 - p) / count + Z_SCORE ** 2 / (4 * count ** 2)) / denominator
+    return [round(max(0.0, center - half) * 100, 2), round(min(1.0, center + half) * 100, 2)]
+
+
+def correlation_interval(r: float, count: int) -> Optional[List[float]]:
+    """Fisher z interval of a correlation coefficient."""
+    if count < 4 or not np.isfinite(r):
+        return None
+    if abs(r) >= 1:
+        return [r, r]
+    z, half = math.atanh(r), Z_SCORE / math.sqrt(count - 3)
+    return [round(math.tanh(z - half), 4), round(math.tanh(z + half), 4)]
+
+
+def _describe_intervals(text: str) -> Dict[str, Any]:
+    rows = list(csv.reader(io.StringIO("\n".join(
+        line for line in text.splitlines() if line.strip() and not line.startswith("#")))))
+    stats = {row[0]: row[1:] for row in rows[1:] if row}
+    means = {}
+    if {"count", "mean", "std"} <= stats.keys():
+        for i, col in enumerate(rows[0][1:]):
+            try:
+                interval = mean_interval(float(stats["mean"][i]), float(stats["std"][i]), float(stats["count"][i]))
+            except ValueError:  # datetime and text columns
+                continue
+            if interval is not None:
+                means[col] = interval
+    return {"mean": means} if means else {}
+
+
+def _intervals(output: Any, sample: pd.DataFrame) -> Dict[str, Any]:
+    """Confidence intervals for the main statistics of a tool result computed on sample."""
+    if isinstance(output, str):
+        return _describe_intervals(output)
+    intervals = {}
+    if "correlation_matrix" in output or "strongest_pairs" in output:
+        pairs = output.get("strongest_pairs")
+        if pairs is None:
+            matrix = output["correlation_matrix"]
+            names = list(matrix)
+            pairs = [{"a": a, "b": b, "r": matrix[a][b]} for i, a in enumerate(names) for b in names[i + 1:]
+                     if matrix[a][b] is not None and matrix[a][b] == matrix[a][b]]
+            pairs.sort(key=lambda p: -abs(p["r"]))
+        r = {}
+        for pair in pairs[:MAX_INTERVAL_PAIRS]:
+            if pair["a"] in sample.columns and pair["b"] in sample.columns:
+                count = int((sample[pair["a"]].notna() & sample[pair["b"]].notna()).sum())
+                interval = correlation_interval(pair["r"], count)
+                if interval is not None:
+                    r[f"{pair['a']}|{pair['b']}"] = interval
+        if r:
+            intervals["r"] = r
+    items = output.get("ranking") or ([dict(output["outliers"], column=output["column"])]
+                                      if isinstance(output.get("outliers"), dict) and "column" in output else [])
+    shares = {}
+    for item in items:
+        if item.get("percentage"):
+            count = item["count"] * 100 / item["percentage"]
+        else:
+            count = int(sample[item["column"]].notna().sum()) if item["column"] in sample.columns else 0
+        interval = share_interval(item.get("percentage", 0.0), count)
+        if interval is not None:
+            shares[item["column"]] = interval
+    if shares:
+        intervals["percentage"] = shares
+    summary = output.get("data_summary")
+    # A dashboard has the summary of each of its panels
+    summaries = [panel.get("data_summary") for panel in summary["panels"]] \
+        if isinstance(summary, dict) and "panels" in summary else [summary]
+    means = {}
+    for summary in summaries:
+        if isinstance(summary, dict) and {"mean", "std", "count"} <= summary.keys():
+            interval = mean_interval(summary["mean"], summary["std"], summary["count"])
+            if interval is not None:
+                means[str(summary.get("column"))] = interval
+    if means:
+        intervals["mean"] = means
+    return intervals
+
+
+def _annotate(output: str, sample: pd.DataFrame, total: int, stratified_by: Optional[str]) -> str:
+    """Mark a result computed on sample as an estimate and add its confidence intervals."""
+    try:
+        result = json.loads(output)
+    except json.JSONDecodeError:
+        result = None
+    how = f"stratified by {stratified_by}" if stratified_by else "random"
+    note = (f"Estimated from a {how} sample of {len(sample)} of {total} rows; counts refer to the sample. "
+            "The exact result is being computed; the same call returns it once ready.")
+    if isinstance(result, dict):
+        if "error" in result:
+            return output
+        result["estimate"] = {"sample_rows": len(sample), "total_rows": total, "confidence": CONFIDENCE,
+                              "intervals": _intervals(result, sample), "note": note}
+        return json.dumps(result, default=str)
+    lines = [f"# {note}"]
+    for stat, values in _intervals(output, sample).items():
+        listing = ", ".join(f"{col} [{lo}, {hi}]" for col, (lo, hi) in values.items())
+        lines.append(f"# {int(CONFIDENCE * 100)}% CI of {stat}: {listing}")
+    return output + "\n" + "\n".join(lines)
+
+
+# --- Decorator ---
+
+def _start_exact(df: pd.DataFrame, key: Tuple, compute) -> Future:
+    """Run compute in the background (once per key) and cache its result for df."""
+    exact = frame_cache(df, "exact")
+    with _lock:
+        future = _running.get(key)
+        if future is not None:
+            return future
+
+        def run():
+            try:
+                output = compute()
+                exact.put(key[1:], output)
+                return output
+            finally:
+                with _lock:
+                    _running.pop(key, None)
+
+        # Same workspace, engine and budget as the request, without progressive mode;
+        # the exact result is cached for later requests, so it outlives cancellation and time budgets
+        ctx = copy_context()
+        ctx.run(_refinement.set, None)
+        ctx.run(detach)
+        future = _running[key] = _executor.submit(ctx.run, run)
+    return future
+
+
+def progressive(func):
+    """
+    Decorator for tool functions: in progressive mode, answer large datasets
+    from a sample and compute the exact result in the background. Apply it
+    below @filterable, so the sample is drawn from the selected (and
+    filtered) dataset.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        df = get_dataframe()
+        key = (id(df), func.__name__, json.dumps([args, kwargs], default=str))
+        # Exact results computed in the background serve later calls in any mode
+        cached = frame_cache(df, "exact").get(key[1:])
+        if cached is not None:
+            return cached
+        refinement = _refinement.get()
+        total = total_rows(df)
+        if refinement is None or total < ESTIMATE_MIN_ROWS:
+            return func(*args, **kwargs)
+
+        refinement.futures.append(_start_exact(df, key, lambda: func(*args, **kwargs)))
+        sample, stratified_by = estimate_sample(df)
+        with use_dataframe(sample), use_engine("pandas"):
+            output = func(*args, **kwargs)
+        return _annotate(output, sample, total, stratified_by)
+    return wrapper
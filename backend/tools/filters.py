@@ -0,0 +1,353 @@
+"""
+Row filters for EDA Agent tools.
+
+Every tool accepts an optional "where" predicate such as
+    pclass == 1 and sex == 'female'
+    age >= 18 & fare > 100
+    embark_town in ['Cherbourg', 'Queenstown'] or isna(deck)
+so questions can be answered for a subset of rows without a new upload.
+
+Predicates are parsed with Python's ast module and only comparisons,
+boolean operators, literals and isna()/notna() are allowed (no attribute
+access or arbitrary calls). Each comparison is compiled to a boolean mask
+that is cached per dataset; full predicates are the bitwise combination of
+those masks, so related filters ("pclass == 1", "pclass == 1 and age < 18")
+reuse each other's work. The filtered frame is cached as well and the
+unfiltered frame is passed through untouched when every row matches.
+
+The same wrapper handles "dataset", which points the tool at another
+dataset of the request's workspace (see workspace.py).
+"""
+import io
+import re
+import ast
+import tokenize
+import json
+import inspect
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .context import get_dataframe, use_dataframe
+from .cache import frame_cache
+from .utils import find_column_match
+from .workspace import current_workspace
+
+# Cached masks per dataset (one bool per row each)
+MASK_CACHE_ENTRIES = 32
+# Cached filtered frames per dataset
+SUBSET_CACHE_ENTRIES = 4
+
+FILTER_DOC = """
+    Optional row filter: send a JSON object with "where" (e.g. "pclass == 1 and sex == 'female'")
+    next to this tool's usual parameters; a plain-text input goes in "input".
+    Add "dataset" (e.g. "customers") to analyze another dataset of the workspace.
+"""
+
+_BACKTICK = re.compile(r"`([^`]+)`")
+_COMPARISONS = {
+    ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=",
+    ast.Gt: ">", ast.GtE: ">=", ast.In: "in", ast.NotIn: "not in",
+}
+# Operator to use when the literal is on the left ("1 < pclass" is "pclass > 1")
+_FLIPPED = {"==": "==", "!=": "!=", "<": ">", "<=": ">=", ">": "<", ">=": "<="}
+_NULL_CHECKS = {"isna": True, "isnull": True, "notna": False, "notnull": False}
+
+
+class FilterError(ValueError):
+    """Raised when a where predicate cannot be parsed or applied."""
+
+
+class _Compiler:
+    """Turns a predicate AST into a boolean mask over df, caching every comparison."""
+
+    def __init__(self, df: pd.DataFrame, aliases: Dict[str, str]):
+        self.df = df
+        self.aliases = aliases
+        self.masks = frame_cache(df, "masks", MASK_CACHE_ENTRIES)
+        self.corrections: List[Tuple[str, str]] = []
+
+    def compile(self, node: ast.AST) -> Tuple[np.ndarray, str]:
+        """Return (mask, canonical text) for node."""
+        if isinstance(node, ast.BoolOp):
+            parts = [self.compile(v) for v in node.values]
+            join = " and " if isinstance(node.op, ast.And) else " or "
+            return self._combine(parts, isinstance(node.op, ast.And), join)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            mask, text = self.compile(node.operand)
+            return ~mask, f"not ({text})"
+        if isinstance(node, ast.Compare):
+            parts, left = [], node.left
+            for op, right in zip(node.ops, node.comparators):
+                parts.append(self._comparison(left, _COMPARISONS.get(type(op)), right))
+                left = right
+            return self._combine(parts, True, " and ") if len(parts) > 1 else parts[0]
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1:
+            func = node.func.id.lower()
+            if func in _NULL_CHECKS:
+                column = self._column(node.args[0])
+                return self._atom(f"{func}({column!r})",
+                                  lambda: self.df[column].isna().to_numpy() == _NULL_CHECKS[func])
+        if isinstance(node, ast.Name):
+            # A bare column is true where its value is truthy (e.g. a boolean flag)
+            column = self._column(node)
+            return self._atom(f"{column!r}",
+                              lambda: self.df[column].fillna(False).astype(bool).to_numpy())
+        raise FilterError(f"Unsupported expression: {ast.unparse(node)}")
+
+    def _combine(self, parts, is_and: bool, join: str) -> Tuple[np.ndarray, str]:
+        mask = parts[0][0]
+        for other, _ in parts[1:]:
+            mask = mask & other if is_and else mask | other
+        # and/or are commutative: sort operands so reordered predicates share cache entries
+        return mask, "(" + join.join(sorted(text for _, text in parts)) + ")"
+
+    def _atom(self, key: str, compute) -> Tuple[np.ndarray, str]:
+        mask = self.masks.get_or_compute(key, compute)
+        mask.flags.writeable = False
+        return mask, key
+
+    def _column(self, node: ast.AST) -> str:
+        if not isinstance(node, ast.Name):
+            raise FilterError(f"Expected a column name, got: {ast.unparse(node)}")
+        name = self.aliases.get(node.id, node.id)
+        columns = [str(c) for c in self.df.columns]
+        if name in columns:
+            return name
+        match = find_column_match(name, columns, cutoff=0.8)
+        if match is None:
+            raise FilterError(f"Column '{name}' not found in filter")
+        self.corrections.append((name, match))
+        return match
+
+    def _comparison(self, left: ast.AST, op: Optional[str], right: ast.AST) -> Tuple[np.ndarray, str]:
+        if op is None:
+            raise FilterError("Unsupported comparison operator")
+        if not isinstance(left, ast.Name) and isinstance(right, ast.Name) and op in _FLIPPED:
+            left, right, op = right, left, _FLIPPED[op]
+        column = self._column(left)
+
+        if isinstance(right, ast.Name) and right.id not in ("True", "False", "None"):
+            other = self._column(right)
+            return self._atom(f"{column!r} {op} {other!r}",
+                              lambda: self._compare(self.df[column], op, self.df[other]))
+
+        value = _literal(right)
+        if op in ("in", "not in"):
+            if not isinstance(value, (list, tuple, set)):
+                value = [value]
+            value = list(value)
+        series = self.df[column]
+        return self._atom(f"{column!r} {op} {value!r}",
+                          lambda: self._compare(series, op, _coerce_value(series, value)))
+
+    @staticmethod
+    def _compare(series: pd.Series, op: str, value: Any) -> np.ndarray:
+        try:
+            if op == "in":
+                result = series.isin(value)
+            elif op == "not in":
+                # Missing values are not in the list, as with != and pandas' ~isin
+                result = ~series.isin(value)
+            elif value is None:
+                if op not in ("==", "!="):
+                    raise FilterError(f"Only == and != can compare '{series.name}' with None")
+                result = series.isna() if op == "==" else series.notna()
+            else:
+                result = {
+                    "==": series.__eq__, "!=": series.__ne__, "<": series.__lt__,
+                    "<=": series.__le__, ">": series.__gt__, ">=": series.__ge__,
+                }[op](value)
+        except (TypeError, ValueError) as e:
+            raise FilterError(f"Cannot compare column '{series.name}' {op} {value!r}: {e}")
+        return result.to_numpy(dtype=bool, na_value=False)
+
+
+def _literal(node: ast.AST) -> Any:
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise FilterError(f"Expected a literal value, got: {ast.unparse(node)}")
+
+
+def _coerce_value(series: pd.Series, value: Any) -> Any:
+    """Adapt literal values to the column: numeric strings for numbers, case of text labels."""
+    values = value if isinstance(value, list) else [value]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        coerced = []
+        for v in values:
+            try:
+                coerced.append(float(v) if isinstance(v, str) else v)
+            except ValueError:
+                raise FilterError(f"Column '{series.name}' is numeric; cannot compare it with {v!r}")
+        values = coerced
+    elif any(isinstance(v, str) for v in values):
+        # Match text labels case-insensitively when none matches exactly
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            uniques = series.cat.categories
+        elif series.isin(values).any():
+            uniques = None
+        else:
+            uniques = series.dropna().unique()
+        if uniques is not None:
+            present = set(map(str, uniques))
+            lowered = {str(u).lower(): u for u in uniques}
+            values = [lowered.get(v.lower(), v) if isinstance(v, str) and v not in present else v
+                      for v in values]
+    return values if isinstance(value, list) else values[0]
+
+
+def _rewrite_operators(text: str) -> str:
+    """
+    Read &, | and ~ as and, or, not (as pandas.query does), so that
+    "a == 1 | b == 2" groups the comparisons instead of binding "1 | b".
+    """
+    words = {"&": "and", "|": "or", "~": "not"}
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(text).readline):
+        if token.type == tokenize.OP and token.string in words:
+            token = token._replace(type=tokenize.NAME, string=words[token.string])
+        tokens.append((token.type, token.string))
+    return tokenize.untokenize(tokens)
+
+
+def _parse(where: str) -> Tuple[ast.AST, Dict[str, str]]:
+    """Parse a predicate; `backticked names` may contain spaces or symbols."""
+    aliases: Dict[str, str] = {}
+
+    def alias(match: re.Match) -> str:
+        name = f"__column_{len(aliases)}"
+        aliases[name] = match.group(1)
+        return name
+
+    text = _BACKTICK.sub(alias, where.strip())
+    try:
+        text = _rewrite_operators(text)
+        return ast.parse(text, mode="eval").body, aliases
+    except (SyntaxError, tokenize.TokenError):
+        hint = " Use '==' for equality." if re.search(r"[^=!<>]=[^=]", text) else ""
+        raise FilterError(f"Invalid filter expression: {where!r}.{hint}")
+
+
+def compile_mask(df: pd.DataFrame, where: str) -> Tuple[np.ndarray, str, List[Tuple[str, str]]]:
+    """
+    Compile a where predicate into a boolean mask over df.
+
+    Returns:
+        Tuple of (boolean mask, canonical predicate text, column name corrections).
+        The canonical text identifies the predicate regardless of spacing or typos.
+    """
+    node, aliases = _parse(where)
+    compiler = _Compiler(df, aliases)
+    mask, canonical = compiler.compile(node)
+    mask = np.asarray(mask, dtype=bool)
+    if mask.shape != (len(df),):
+        raise FilterError(f"Filter {where!r} does not select rows")
+    return mask, canonical, compiler.corrections
+
+
+def filter_frame(df: pd.DataFrame, where: str) -> Tuple[pd.DataFrame, np.ndarray, List[Tuple[str, str]]]:
+    """
+    Return (rows of df matching where, their mask, column name corrections).
+    df itself is returned when every row matches; other subsets are cached.
+    """
+    mask, canonical, corrections = compile_mask(df, where)
+    if mask.all():
+        # Never cache df under itself: the cache would keep it alive
+        return df, mask, corrections
+    subsets = frame_cache(df, "subsets", SUBSET_CACHE_ENTRIES)
+    subset = subsets.get_or_compute(canonical, lambda: df[mask])
+    return subset, mask, corrections
+
+
+def _split_where(value: Any) -> Tuple[Any, Optional[str], Optional[str]]:
+    """Extract "where" and "dataset" from a JSON tool input; returns (remaining input, where, dataset)."""
+    if not isinstance(value, str) or ('"where"' not in value and '"dataset"' not in value):
+        return value, None, None
+    try:
+        params = json.loads(value)
+    except json.JSONDecodeError:
+        return value, None, None
+    if not isinstance(params, dict) or ("where" not in params and "dataset" not in params):
+        return value, None, None
+    where = params.pop("where", None)
+    dataset = params.pop("dataset", None)
+    if "input" in params:
+        remaining = params.pop("input")
+        if params:
+            raise FilterError(f"Unexpected parameters next to 'input': {', '.join(params)}")
+    else:
+        remaining = json.dumps(params) if params else ""
+    where = (str(where).strip() or None) if where is not None else None
+    dataset = (str(dataset).strip() or None) if dataset is not None else None
+    return remaining, where, dataset
+
+
+def _annotate(output: str, where: Optional[str], rows: int, total: int, corrections,
+              dataset: Optional[str] = None) -> str:
+    """Add the dataset used and the applied filter to a tool result."""
+    try:
+        result = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        result = None
+    info = {"where": where, "rows": rows, "total_rows": total}
+    if corrections:
+        info["corrected_columns"] = {req: match for req, match in corrections}
+
+    if isinstance(result, dict):
+        if dataset is not None:
+            result["dataset"] = dataset
+        if where is not None:
+            result["filter"] = info
+        return json.dumps(result, default=str)
+    if dataset is not None:
+        output = f"# Dataset: {dataset}\n{output}"
+    if where is not None:
+        output = f"{output}\n# Filter: {where} ({rows} of {total} rows)"
+    return output
+
+
+def filterable(func):
+    """
+    Decorator for tool functions: accept an optional "where" predicate and
+    an optional "dataset" name from the request's workspace.
+
+    The tool then runs with the selected (and filtered) frame as the current
+    dataframe, and the result reports which dataset and how many rows were
+    used. Apply it below @tool.
+    """
+    signature = inspect.signature(func)
+    param = next(iter(signature.parameters))
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        try:
+            remaining, where, dataset = _split_where(bound.arguments[param])
+            if where is None and dataset is None:
+                return func(*bound.args, **bound.kwargs)
+            if dataset is not None:
+                workspace = current_workspace()
+                dataset = workspace.resolve(dataset)
+                if dataset is None:
+                    raise FilterError(f"Dataset not found. Available datasets: {', '.join(workspace.names)}")
+                df = workspace.frame(dataset)
+            else:
+                df = get_dataframe()
+            subset, corrections = df, []
+            if where is not None:
+                subset, _, corrections = filter_frame(df, where)
+        except FilterError as e:
+            return json.dumps({"error": str(e)})
+
+        if subset.empty and where is not None:
+            return json.dumps({"error": f"Filter '{where}' matched no rows", "total_rows": len(df)})
+        bound.arguments[param] = remaining
+        with use_dataframe(subset):
+            output = func(*bound.args, **bound.kwargs)
+        return _annotate(output, where, len(subset), len(df), corrections, dataset)
+
+    wrapper.__doc__ = (func.__doc__ or "").rstrip() + "\n" + FILTER_DOC
+    return wrapper
@@ -0,0 +1,306 @@
+"""
+Group By tool - Multi-key, multi-metric aggregations.
+
+Rows are mapped to integer group codes once per key set. The codes are
+cached per dataset, so later aggregations over the same keys skip hashing
+the key columns again. Every metric is a numpy reduction over those codes
+(bincount, reduceat, sorting), so cost does not grow with the number of groups.
+When the SQL engine is active the aggregation is one GROUP BY query instead.
+"""
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .context import get_dataframe
+from .filters import filterable
+from .limits import budgeted
+from .shaping import bounded
+from .cache import frame_cache
+from .sql_engine import sql_engine
+from .utils import validate_and_match_columns, get_correction_message
+
+NUMERIC_METRICS = ("sum", "mean", "median", "min", "max", "std", "var")
+ANY_METRICS = ("count", "nunique")
+DEFAULT_TOP_K = 20
+MAX_TOP_K = 100
+
+
+@dataclass
+class GroupIndex:
+    """Integer group codes for one key set of one DataFrame."""
+    keys: List[str]
+    codes: np.ndarray  # group code per row, -1 for rows excluded by a missing key
+    labels: pd.DataFrame  # key values, row i describes group i
+    sizes: np.ndarray  # number of rows per group
+    _sorted: Optional[Tuple[np.ndarray, np.ndarray]] = field(default=None, repr=False)
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.sizes)
+
+    def sorted_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row positions ordered by group, start offset of each group), built once."""
+        if self._sorted is None:
+            valid = np.flatnonzero(self.codes >= 0)
+            order = valid[np.argsort(_compact_codes(self.codes[valid], self.n_groups), kind="stable")]
+            starts = np.concatenate(([0], np.cumsum(self.sizes)[:-1]))
+            self._sorted = (order, starts)
+        return self._sorted
+
+
+def _compact_codes(codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """Narrow codes to the smallest integer dtype; numpy radix-sorts 8/16-bit integers."""
+    for dtype in (np.uint8, np.int16, np.int32):
+        if n_groups <= np.iinfo(dtype).max:
+            return codes.astype(dtype)
+    return codes
+
+
+def build_group_index(df: pd.DataFrame, keys: List[str], dropna: bool = True) -> GroupIndex:
+    """
+    Factorize the key columns into one integer code per row.
+
+    Each key is factorized on its own and combined with the running codes;
+    the combination is re-factorized so codes stay dense and never overflow.
+    Codes are numbered in order of first appearance.
+    """
+    n = len(df)
+    codes = np.zeros(n, dtype=np.int64)
+    for i, key in enumerate(keys):
+        key_codes, uniques = pd.factorize(df[key], use_na_sentinel=dropna)
+        key_codes = key_codes.astype(np.int64)
+        if i == 0:
+            codes = key_codes
+            continue
+        valid = (codes >= 0) & (key_codes >= 0)
+        combined = codes[valid] * max(len(uniques), 1) + key_codes[valid]
+        codes = np.full(n, -1, dtype=np.int64)
+        codes[valid] = pd.factorize(combined)[0]
+
+    valid_rows = np.flatnonzero(codes >= 0)
+    valid_codes = codes[valid_rows]
+    # A row is the first of its group when its code exceeds every earlier code
+    previous_max = np.concatenate(([-1], np.maximum.accumulate(valid_codes)[:-1])) if n else valid_codes
+    first_rows = valid_rows[valid_codes > previous_max]
+
+    return GroupIndex(
+        keys=list(keys),
+        codes=codes,
+        labels=df[keys].iloc[first_rows].reset_index(drop=True),
+        sizes=np.bincount(valid_codes, minlength=len(first_rows)),
+    )
+
+
+def get_group_index(df: pd.DataFrame, keys: List[str], dropna: bool = True) -> GroupIndex:
+    """Return the cached GroupIndex of df for keys, building it on first use."""
+    cache = frame_cache(df, "groupby")
+    return cache.get_or_compute((tuple(keys), dropna), lambda: build_group_index(df, keys, dropna))
+
+
+def aggregate(series: pd.Series, index: GroupIndex, metric: str) -> np.ndarray:
+    """
+    Compute one metric of series for every group of index.
+
+    Returns:
+        Array with one value per group (NaN where the group has no values)
+    """
+    n_groups = index.n_groups
+    valid = index.codes >= 0
+    codes = index.codes[valid]
+
+    if metric == "count":
+        return np.bincount(codes[series.notna().to_numpy()[valid]], minlength=n_groups)
+    if metric == "nunique":
+        value_codes = pd.factorize(series)[0].astype(np.int64)[valid]
+        present = value_codes >= 0
+        width = int(value_codes.max()) + 1 if present.any() else 1
+        pairs = pd.unique(codes[present] * width + value_codes[present])
+        return np.bincount(pairs // width, minlength=n_groups)
+
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metric in ("min", "max"):
+            order, starts = index.sorted_rows()
+            reduce = np.fmin if metric == "min" else np.fmax
+            # Empty groups (e.g. time buckets without rows) have no extreme value
+            nonempty = index.sizes > 0
+            reduced = np.full(n_groups, np.nan)
+            if nonempty.any():
+                reduced[nonempty] = reduce.reduceat(values[order], starts[nonempty])
+            return reduced
+
+        group_values = values[valid]
+        present = ~np.isnan(group_values)
+        count = np.bincount(codes, weights=present, minlength=n_groups)
+
+        if metric == "median":
+            # Sort values inside each group (NaN last), then pick the middle element(s).
+            # Two stable passes (values, then compact codes) beat np.lexsort.
+            order = np.argsort(group_values, kind="stable")
+            order = order[np.argsort(_compact_codes(codes, n_groups)[order], kind="stable")]
+            ordered = group_values[order]
+            starts = np.concatenate(([0], np.cumsum(index.sizes)[:-1]))
+            n_present = count.astype(np.int64)
+            lower = starts + np.maximum(n_present - 1, 0) // 2
+            upper = starts + n_present // 2
+            lower = np.minimum(lower, len(ordered) - 1)
+            upper = np.minimum(upper, len(ordered) - 1)
+            median = (ordered[lower] + ordered[upper]) / 2 if len(ordered) else np.empty(0)
+            return np.where(n_present > 0, median, np.nan)
+
+        total = np.bincount(codes, weights=np.where(present, group_values, 0.0), minlength=n_groups)
+        if metric == "sum":
+            return total
+        mean = total / count
+        if metric == "mean":
+            return mean
+        deviation = np.where(present, group_values - mean[codes], 0.0)
+        variance = np.bincount(codes, weights=deviation * deviation, minlength=n_groups) / (count - 1)
+        variance = np.where(count > 1, variance, np.nan)
+        return variance if metric == "var" else np.sqrt(variance)
+
+
+def _parse_metrics(metrics) -> Dict[str, List[str]]:
+    """Normalize {"col": "mean"} / {"col": ["mean", "max"]} / ["col:mean"] into {col: [metrics]}."""
+    if isinstance(metrics, dict):
+        return {col: [m] if isinstance(m, str) else list(m) for col, m in metrics.items()}
+    parsed: Dict[str, List[str]] = {}
+    for spec in metrics or []:
+        col, _, metric = str(spec).partition(":")
+        parsed.setdefault(col.strip(), []).append(metric.strip() or "count")
+    return parsed
+
+
+def _top_rows(values: np.ndarray, top_k: int, ascending: bool) -> np.ndarray:
+    """Positions of the top_k values in sorted order, NaN last; partial sort when top_k is small."""
+    keys = values if ascending else -values
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    if top_k < len(keys):
+        candidates = np.argpartition(keys, top_k - 1)[:top_k]
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates], kind="stable")]
+
+
+@tool
+@bounded
+@filterable
+@budgeted
+def tool_groupby(input_str: str) -> str:
+    """
+    Groups rows by one or more columns and aggregates other columns per group,
+    e.g. "average fare by class and sex". Several metrics can be computed in one call.
+
+    Input JSON:
+    {
+        "by": ["pclass", "sex"],
+        "metrics": {"fare": ["mean", "max"], "age": "median"},  # Optional: group sizes are always included
+        "sort_by": "fare_mean",  # Optional: "size", a key column or "<column>_<metric>"
+        "ascending": false,  # Optional
+        "top_k": 20,  # Optional: number of groups returned (max 100)
+        "dropna": true  # Optional: ignore rows where a key is missing
+    }
+
+    Metrics: count, nunique (any column); sum, mean, median, min, max, std, var (numeric columns).
+    Without sort_by, groups are ordered by key when they all fit in top_k, otherwise largest first.
+    """
+    df = get_dataframe()
+    params = json.loads(input_str)
+
+    by = params.get("by") or params.get("keys") or params.get("group_by")
+    if isinstance(by, str):
+        by = [by]
+    if not by:
+        return json.dumps({"error": "Provide at least one column in 'by'",
+                           "available_columns": list(df.columns)})
+
+    available = list(df.columns)
+    keys, corrections, not_found = validate_and_match_columns(by, available, cutoff=0.6)
+    if not_found:
+        return json.dumps({"error": f"Group columns not found: {', '.join(not_found)}",
+                           "available_columns": available})
+    keys = list(dict.fromkeys(keys))
+
+    top_k = max(1, min(int(params.get("top_k", DEFAULT_TOP_K)), MAX_TOP_K))
+    dropna = bool(params.get("dropna", True))
+
+    requested, skipped = [], []
+    for col, metrics in _parse_metrics(params.get("metrics")).items():
+        matched, col_corrections, _ = validate_and_match_columns([col], available, cutoff=0.6)
+        if not matched:
+            skipped.append(f"'{col}' (column not found)")
+            continue
+        column = matched[0]
+        corrections.extend(col_corrections)
+        numeric = pd.api.types.is_numeric_dtype(df[column])
+        for metric in dict.fromkeys(m.lower() for m in metrics):
+            if metric not in NUMERIC_METRICS + ANY_METRICS:
+                skipped.append(f"'{column}:{metric}' (unknown metric)")
+            elif metric in NUMERIC_METRICS and not numeric:
+                skipped.append(f"'{column}:{metric}' (column is not numeric)")
+            else:
+                requested.append((column, metric))
+
+    sql = sql_engine(df)
+    if sql is not None:
+        out = sql.groupby(keys, requested, dropna)
+        out.columns = [str(k) for k in keys] + list(out.columns[len(keys):])
+        for column, metric in requested:
+            out[f"{column}_{metric}"] = np.round(out[f"{column}_{metric}"].to_numpy(), 4)
+    else:
+        index = get_group_index(df, keys, dropna)
+        out = index.labels.copy()
+        out.columns = [str(k) for k in keys]
+        out["size"] = index.sizes
+        for column, metric in requested:
+            out[f"{column}_{metric}"] = np.round(aggregate(df[column], index, metric), 4)
+        # Groups come in order of first appearance; order them by key like the SQL engine
+        try:
+            out = out.sort_values(list(out.columns[:len(keys)]), kind="stable",
+                                  na_position="last").reset_index(drop=True)
+        except TypeError:
+            pass
+    n_groups = len(out)
+
+    sort_by = params.get("sort_by")
+    if sort_by is not None and sort_by not in out.columns:
+        skipped.append(f"sort_by '{sort_by}' (not a result column)")
+        sort_by = None
+
+    if sort_by is None and n_groups <= top_k:
+        sort_by, ascending = list(out.columns[:len(keys)]), bool(params.get("ascending", True))
+    elif sort_by is None:
+        sort_by, ascending = "size", bool(params.get("ascending", False))
+    else:
+        ascending = bool(params.get("ascending", sort_by in out.columns[:len(keys)]))
+
+    if isinstance(sort_by, str) and pd.api.types.is_numeric_dtype(out[sort_by]):
+        rows = _top_rows(out[sort_by].to_numpy(dtype=float), top_k, ascending)
+    else:
+        # out has a RangeIndex, so sorted labels are row positions
+        rows = out.sort_values(sort_by, ascending=ascending, kind="stable",
+                               na_position="last").index.to_numpy()[:top_k]
+
+    top = out.iloc[rows]
+    result = {
+        "by": out.columns[:len(keys)].tolist(),
+        "n_groups": n_groups,
+        "rows_grouped": int(out["size"].sum()),
+        "sorted_by": sort_by,
+        "ascending": ascending,
+        "groups": top.astype(object).where(top.notna(), None).to_dict(orient="records"),
+    }
+
+    notes = []
+    if n_groups > top_k:
+        notes.append(f"Showing {len(rows)} of {n_groups} groups.")
+    if skipped:
+        notes.append(f"Skipped: {', '.join(skipped)}.")
+    if corrections:
+        notes.append(get_correction_message(corrections))
+    if notes:
+        result["note"] = " ".join(notes)
+
+    return json.dumps(result, default=str)
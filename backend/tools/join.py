@@ -0,0 +1,283 @@
+"""
+Join tool - Combine two datasets of the workspace on key columns.
+
+The strategy depends on the keys:
+- "hash": one side has unique keys (a lookup table such as customers).
+  Its key index is hashed once and cached per dataset, and every row of
+  the other side is looked up with a single vectorized get_indexer call.
+- "sort_merge": as above, but the unique side is already sorted by key,
+  so rows are matched by binary search without building a hash table.
+- "merge": many-to-many keys or outer joins go through pandas.merge,
+  after checking that the output size stays within MAX_JOIN_ROWS.
+
+The hash table is built on the smaller of the unique sides. Join results
+are stored under a key derived from their inputs, so asking for the same
+join again (in this or a later request) reuses the result.
+"""
+import os
+import json
+import hashlib
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .context import get_dataframe
+from .filters import filterable
+from .shaping import bounded
+from .cache import frame_cache
+from .workspace import Workspace, current_workspace
+from .utils import validate_and_match_columns, get_correction_message
+
+JOIN_TYPES = ("inner", "left", "right", "outer")
+# Refuse joins whose result would have more rows than this
+MAX_JOIN_ROWS = int(os.getenv("EDA_MAX_JOIN_ROWS", "20000000"))
+PREVIEW_ROWS = 5
+
+
+def key_index(df: pd.DataFrame, keys: List[str]) -> pd.Index:
+    """
+    Index over the key columns of df, cached per dataset.
+    pandas caches uniqueness, sortedness and the hash table on the Index object,
+    so they are computed once per dataset and key set.
+    """
+    def build() -> pd.Index:
+        if len(keys) == 1:
+            return pd.Index(df[keys[0]])
+        return pd.MultiIndex.from_frame(df[keys])
+    return frame_cache(df, "join").get_or_compute(tuple(keys), build)
+
+
+def plan_join(left: pd.Index, right: pd.Index, how: str) -> Tuple[str, Optional[str]]:
+    """
+    Choose the join strategy.
+
+    Returns:
+        (strategy, side with unique keys that gets looked up: "left", "right" or None)
+    """
+    candidates = []
+    if how in ("inner", "left") and right.is_unique:
+        candidates.append(("right", len(right)))
+    if how in ("inner", "right") and left.is_unique:
+        candidates.append(("left", len(left)))
+    if not candidates:
+        return "merge", None
+    build = min(candidates, key=lambda c: c[1])[0]
+    index = right if build == "right" else left
+    single = not isinstance(index, pd.MultiIndex)
+    if single and index.is_monotonic_increasing and not index.hasnans:
+        return "sort_merge", build
+    return "hash", build
+
+
+def _lookup(build: pd.Index, probe: pd.Index, strategy: str) -> np.ndarray:
+    """Position in build of every probe key, -1 when it has no match."""
+    if strategy == "hash":
+        return build.get_indexer(probe)
+    positions = build.searchsorted(probe)
+    if len(build) == 0:
+        return np.full(len(probe), -1, dtype=np.intp)
+    clipped = np.minimum(positions, len(build) - 1)
+    found = np.asarray(build.take(clipped) == probe, dtype=bool)
+    return np.where(found, clipped, -1)
+
+
+def _take(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """Rows of df at positions, with all-missing rows where the position is -1."""
+    if len(positions) and positions.min() >= 0:
+        return df.iloc[positions].reset_index(drop=True)
+    return df.reset_index(drop=True).reindex(positions).reset_index(drop=True)
+
+
+def lookup_join(left: pd.DataFrame, right: pd.DataFrame, left_on: List[str], right_on: List[str],
+                how: str, strategy: str, build: str, suffix: str,
+                right_columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Join where the build side has unique keys. Rows follow the order of the other (probe) side.
+
+    Returns:
+        (joined frame, number of probe rows without a match)
+    """
+    build_df, probe_df = (right, left) if build == "right" else (left, right)
+    build_keys, probe_keys = (right_on, left_on) if build == "right" else (left_on, right_on)
+    positions = _lookup(key_index(build_df, build_keys), key_index(probe_df, probe_keys), strategy)
+
+    matched = positions >= 0
+    unmatched = int((~matched).sum())
+    if how == "inner" and unmatched:
+        rows = np.flatnonzero(matched)
+        probe_df, positions = probe_df.iloc[rows], positions[rows]
+    if right_columns is not None:
+        # Index positions refer to rows, so selecting columns after the lookup is safe
+        build_df, probe_df = (build_df[right_columns], probe_df) if build == "right" else (
+            build_df, probe_df[right_columns])
+    # All probe rows are kept in order; copy-on-write shares their columns with the source
+    probe_part = probe_df.reset_index(drop=True)
+    build_part = _take(build_df, positions)
+
+    if build == "right":
+        left_part, right_part = probe_part, build_part
+    else:
+        left_part, right_part = build_part, probe_part
+        # Keys come from the probe side so right-join rows without a match keep their key
+        for lk, rk in zip(left_on, right_on):
+            if lk == rk:
+                left_part[lk] = right_part[rk]
+    return _combine(left_part, right_part, left_on, right_on, suffix), unmatched
+
+
+def _combine(left: pd.DataFrame, right: pd.DataFrame, left_on: List[str], right_on: List[str],
+             suffix: str) -> pd.DataFrame:
+    """Place right's columns after left's, dropping shared keys and suffixing clashing names."""
+    shared_keys = {rk for lk, rk in zip(left_on, right_on) if lk == rk}
+    right = right.drop(columns=[c for c in right.columns if c in shared_keys])
+    right = right.rename(columns={c: f"{c}{suffix}" for c in right.columns if c in left.columns})
+    return pd.concat([left, right], axis=1)
+
+
+def estimate_rows(left: pd.DataFrame, right: pd.DataFrame, left_on: List[str], right_on: List[str],
+                  how: str) -> int:
+    """Exact number of rows a many-to-many join produces, from per-key counts."""
+    left_counts = key_index(left, left_on).value_counts(dropna=False)
+    right_counts = key_index(right, right_on).value_counts(dropna=False)
+    both = left_counts.to_frame("l").join(right_counts.to_frame("r"), how="outer").fillna(0)
+    pairs = both["l"] * both["r"]
+    rows = pairs.sum()
+    if how in ("left", "outer"):
+        rows += both["l"][both["r"] == 0].sum()
+    if how in ("right", "outer"):
+        rows += both["r"][both["l"] == 0].sum()
+    return int(rows)
+
+
+def join_frames(left: pd.DataFrame, right: pd.DataFrame, left_on: List[str], right_on: List[str],
+                how: str = "inner", suffix: str = "_right",
+                right_columns: Optional[List[str]] = None) -> Tuple[pd.DataFrame, dict]:
+    """
+    Join two frames with the strategy chosen by plan_join.
+    right_columns restricts the columns taken from right (keys are always kept).
+
+    Returns:
+        (joined frame, info with "strategy" and "unmatched_rows")
+    """
+    strategy, build = plan_join(key_index(left, left_on), key_index(right, right_on), how)
+    if strategy != "merge":
+        joined, unmatched = lookup_join(left, right, left_on, right_on, how, strategy, build, suffix,
+                                        right_columns)
+        return joined, {"strategy": strategy, "lookup_side": build, "unmatched_rows": unmatched}
+
+    rows = estimate_rows(left, right, left_on, right_on, how)
+    if rows > MAX_JOIN_ROWS:
+        raise ValueError(f"Join would produce {rows} rows (limit {MAX_JOIN_ROWS}); "
+                         f"use more specific keys or filter the datasets first")
+    if right_columns is not None:
+        right = right[right_columns]
+    joined = pd.merge(left, right, left_on=left_on, right_on=right_on, how=how,
+                      suffixes=("", suffix), sort=False)
+    return joined, {"strategy": strategy, "estimated_rows": rows}
+
+
+def _resolve_keys(names: List[str], df: pd.DataFrame) -> Tuple[List[str], list, list]:
+    """Match column names inside one dataset; returns (columns, corrections, not found)."""
+    return validate_and_match_columns([str(name) for name in names], [str(c) for c in df.columns],
+                                      cutoff=0.6)
+
+
+def _join_key(workspace: Workspace, left: str, right: str, left_on, right_on, how, columns) -> str:
+    spec = json.dumps([workspace.key(left), workspace.key(right), left_on, right_on, how, columns])
+    return "join_" + hashlib.sha256(spec.encode()).hexdigest()[:24]
+
+
+@tool
+@bounded
+@filterable
+def tool_join(input_str: str) -> str:
+    """
+    Joins two datasets of the workspace on key columns (e.g. orders with customers) and
+    adds the result to the workspace as a new dataset that other tools can analyze
+    with {"dataset": "<name>"}.
+
+    Input JSON:
+    {
+        "left": "orders",  # Optional: defaults to the current dataset
+        "right": "customers",
+        "on": "customer_id",  # Or "left_on" / "right_on" when the names differ
+        "how": "left",  # Optional: inner (default), left, right, outer
+        "columns": ["name", "country"],  # Optional: right-side columns to bring
+        "name": "orders_customers"  # Optional: name of the joined dataset
+    }
+    """
+    try:
+        params = json.loads(input_str)
+    except json.JSONDecodeError:
+        return json.dumps({"error": "Invalid JSON input"})
+
+    workspace = current_workspace()
+    current = get_dataframe()
+    left = workspace.resolve(params["left"]) if params.get("left") else next(
+        (name for name in workspace.names if workspace.frame(name) is current), None)
+    right = workspace.resolve(params.get("right") or "")
+    if right is None or (params.get("left") and left is None):
+        return json.dumps({"error": "Provide 'right' (and optionally 'left') as dataset names",
+                           "datasets": workspace.summary()})
+    left_df = workspace.frame(left) if left is not None else current
+    left_label = left or "current"
+
+    how = str(params.get("how", "inner")).lower()
+    if how not in JOIN_TYPES:
+        return json.dumps({"error": f"Unknown join type '{how}'. Use one of {list(JOIN_TYPES)}"})
+    on = params.get("on")
+    left_on, right_on = params.get("left_on", on), params.get("right_on", on)
+    if not left_on or not right_on:
+        return json.dumps({"error": "Provide 'on' or both 'left_on' and 'right_on'"})
+    left_on = [left_on] if isinstance(left_on, str) else list(left_on)
+    right_on = [right_on] if isinstance(right_on, str) else list(right_on)
+    if len(left_on) != len(right_on):
+        return json.dumps({"error": "'left_on' and 'right_on' need the same number of columns"})
+
+    right_df = workspace.frame(right)
+    left_on, corrections, missing = _resolve_keys(left_on, left_df)
+    right_on, right_corrections, right_missing = _resolve_keys(right_on, right_df)
+    corrections += right_corrections
+    if missing or right_missing:
+        return json.dumps({"error": f"Key columns not found: {', '.join(missing + right_missing)}",
+                           "left_columns": [str(c) for c in left_df.columns],
+                           "right_columns": [str(c) for c in right_df.columns]})
+
+    columns = params.get("columns")
+    if columns:
+        keep, column_corrections, _ = _resolve_keys(list(columns), right_df)
+        corrections += column_corrections
+        columns = list(dict.fromkeys(right_on + keep))
+    else:
+        columns = None
+
+    key = None
+    if left is not None:
+        key = _join_key(workspace, left, right, left_on, right_on, how, sorted(columns or []))
+    cached = workspace.store.get(key) if key else None
+    if cached is not None:
+        joined, info = cached, {"strategy": "cached"}
+    else:
+        try:
+            joined, info = join_frames(left_df, right_df, left_on, right_on, how, f"_{right}", columns)
+        except ValueError as e:
+            return json.dumps({"error": str(e)})
+        if key:
+            workspace.store.put(key, joined, params.get("name") or f"{left_label}_{right}")
+
+    name = workspace.add(params.get("name") or f"{left_label}_{right}", joined, key)
+    preview = joined.head(PREVIEW_ROWS)
+    result = {
+        "name": name,
+        "how": how,
+        "left": {"name": left_label, "rows": int(len(left_df)), "keys": left_on},
+        "right": {"name": right, "rows": int(len(right_df)), "keys": right_on},
+        "rows": int(len(joined)),
+        "columns": [str(c) for c in joined.columns],
+        **info,
+        "preview": preview.astype(object).where(preview.notna(), None).to_dict(orient="records"),
+        "note": f"Use {{\"dataset\": \"{name}\"}} in other tools to analyze the joined data.",
+    }
+    if corrections:
+        result["note"] += " " + get_correction_message(corrections)
+    return json.dumps(result, default=str)
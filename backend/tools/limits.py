@@ -0,0 +1,201 @@
+"""
+Cancellation and per-tool time/row budgets for EDA Agent tools.
+
+Cancellation: the API runs a request under cancellation(event) and sets
+the event when the client disconnects. checkpoint(), called by the agent
+before every LLM and tool call and by tools between units of work (plot
+panels, column blocks, pairs...), then raises Cancelled, which stops the
+agent loop and the tool in flight.
+
+Budgets: tools decorated with @budgeted run on a stratified sample when
+the dataset has more rows than the tool's row budget, and stop at the next
+checkpoint once their time budget is spent. They are then run again on
+smaller and smaller samples (at most BUDGET_RETRIES times), and an
+identical call on the same dataset starts from a sample sized with the
+speed of the run that fit. Either way the result says so ("budget"),
+instead of the tool running unbounded.
+
+Cancelled and BudgetExceeded derive from BaseException, like
+asyncio.CancelledError, so the "except Exception" blocks that turn tool
+failures into error results do not swallow them.
+"""
+import os
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+import pandas as pd
+
+from .cache import frame_cache
+from .context import get_dataframe, use_dataframe
+from .sql_engine import source_of
+
+
+def _per_tool(value: str, cast) -> Dict[str, float]:
+    """Parse per-tool overrides: "tool_plot=20,tool_association=10"."""
+    overrides = {}
+    for item in value.split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            overrides[name.strip()] = cast(limit)
+    return overrides
+
+
+# --- Configuration ---
+# Seconds a tool call may take before it degrades to a sample (0: unlimited)
+TOOL_TIME_BUDGET = float(os.getenv("EDA_TOOL_TIME_BUDGET", "60"))
+# Rows a tool call may process; larger datasets are sampled (0: unlimited)
+TOOL_ROW_BUDGET = int(os.getenv("EDA_TOOL_ROW_BUDGET", "0"))
+# Per-tool overrides, e.g. "tool_plot=20,tool_association=10"
+TOOL_TIME_BUDGETS = _per_tool(os.getenv("EDA_TOOL_TIME_BUDGETS", ""), float)
+TOOL_ROW_BUDGETS = _per_tool(os.getenv("EDA_TOOL_ROW_BUDGETS", ""), int)
+# After a time overrun, the call is retried on a sample at least this many times smaller, at most BUDGET_RETRIES times
+BUDGET_SHRINK = 4
+BUDGET_RETRIES = 2
+# Samples sized from an earlier call's speed aim at this share of the budget
+BUDGET_SAFETY = 0.5
+# Samples are never smaller than this
+MIN_BUDGET_ROWS = 10_000
+
+
+class Cancelled(BaseException):
+    """Raised at a checkpoint once the request was cancelled (e.g. the client disconnected)."""
+
+
+class BudgetExceeded(BaseException):
+    """Raised at a checkpoint once the running tool has spent its time budget."""
+
+
+# Set when the current request is cancelled (None: not cancellable)
+_cancel: ContextVar[Optional[threading.Event]] = ContextVar("cancel", default=None)
+# perf_counter() value at which the running tool's time budget ends (None: no budget)
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+@contextmanager
+def cancellation(event: Optional[threading.Event]) -> Iterator[None]:
+    """Stop the agent and its tools at the next checkpoint once event is set, in this block."""
+    token = _cancel.set(event)
+    try:
+        yield
+    finally:
+        _cancel.reset(token)
+
+
+def detach():
+    """Clear cancellation and time budget in the current context (for background work outliving a request)."""
+    _cancel.set(None)
+    _deadline.set(None)
+
+
+def cancelled() -> bool:
+    event = _cancel.get()
+    return event is not None and event.is_set()
+
+
+def checkpoint():
+    """Raise Cancelled if the request was cancelled, BudgetExceeded if the tool's time is up."""
+    if cancelled():
+        raise Cancelled("Request cancelled")
+    deadline = _deadline.get()
+    if deadline is not None and time.perf_counter() > deadline:
+        raise BudgetExceeded("Time budget exceeded")
+
+
+def time_budget(name: str) -> float:
+    return TOOL_TIME_BUDGETS.get(name, TOOL_TIME_BUDGET)
+
+
+def row_budget(name: str) -> int:
+    return TOOL_ROW_BUDGETS.get(name, TOOL_ROW_BUDGET)
+
+
+def _run(func, args, kwargs, df: pd.DataFrame, seconds: float):
+    """Call func on df, stopping at a checkpoint after seconds (0: no limit)."""
+    token = _deadline.set(time.perf_counter() + seconds if seconds else None)
+    try:
+        with use_dataframe(df):
+            return func(*args, **kwargs)
+    finally:
+        _deadline.reset(token)
+
+
+def _sample(df: pd.DataFrame, rows: int) -> pd.DataFrame:
+    # Imported here: estimates imports this module
+    from .estimates import stratified_sample
+
+    return stratified_sample(df, rows)[0]
+
+
+def _annotate(output: str, budget: dict) -> str:
+    """Add what the budget changed to a tool result."""
+    try:
+        result = json.loads(output)
+    except (json.JSONDecodeError, TypeError):
+        result = None
+    if isinstance(result, dict):
+        if "error" not in result:
+            result["budget"] = budget
+        return json.dumps(result, default=str)
+    return f"{output}\n# Budget: {budget['note']}"
+
+
+def budgeted(func):
+    """
+    Decorator for tool functions: keep the call within the tool's row and
+    time budgets, sampling rows when needed, and report it. Apply it below
+    @filterable, so the budget applies to the selected (and filtered) frame.
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        checkpoint()
+        df = get_dataframe()
+        seconds, max_rows = time_budget(name), row_budget(name)
+        # Datasets backed by a source file are already sampled, and aggregated by the SQL engine over every row
+        can_sample = source_of(df) is None
+        total = len(df)
+        # Seconds per row of an identical call that had to be sampled to fit the time budget
+        key = (name, json.dumps([args, kwargs], default=str))
+        per_row = frame_cache(df, "budget").get(key)
+        rows, reason = total, None
+        if can_sample and max_rows and total > max_rows:
+            rows, reason = max_rows, "rows"
+        if can_sample and seconds and per_row and per_row * rows > seconds:
+            rows, reason = max(MIN_BUDGET_ROWS, int(seconds * BUDGET_SAFETY / per_row)), "time"
+        if rows >= total:
+            rows, reason = total, None
+
+        frame = df if rows >= total else _sample(df, rows)
+        for attempt in range(BUDGET_RETRIES + 1):
+            start = time.perf_counter()
+            try:
+                output = _run(func, args, kwargs, frame, seconds)
+                break
+            except BudgetExceeded:
+                # Checkpoints may come well after the deadline: shrink more the further it was overrun
+                overrun = max(1.0, (time.perf_counter() - start) / seconds)
+                rows = max(MIN_BUDGET_ROWS, int(len(frame) / (BUDGET_SHRINK * overrun)))
+                if not can_sample or attempt == BUDGET_RETRIES or rows >= len(frame):
+                    return json.dumps({"error": f"{name} exceeded its time budget of {seconds:g}s "
+                                                f"on {len(frame)} of {total} rows"})
+                print(f"[DEBUG] {name} exceeded its {seconds:g}s budget on {len(frame)} rows; "
+                      f"retrying on {rows} of {total} rows")
+                frame, reason = _sample(df, rows), "time"
+        if reason == "time":
+            # Identical calls start from a sample sized with the speed of the run that fit
+            frame_cache(df, "budget").put(key, (time.perf_counter() - start) / len(frame))
+
+        if reason is None:
+            return output
+        if reason == "rows":
+            note = f"Computed on a sample of {len(frame)} of {total} rows (row budget {max_rows})."
+        else:
+            note = f"Computed on a sample of {len(frame)} of {total} rows to fit the {seconds:g}s time budget."
+        return _annotate(output, {"limited_by": reason, "rows": len(frame), "total_rows": total,
+                                  "note": note + " Counts and sums cover the sample only."})
+    return wrapper
@@ -0,0 +1,222 @@
+"""
+Missingness tool - Finds which columns are missing together.
+
+Built on the packed null bitmaps of tools/nulls.py (one bit per row and
+column with missing values, computed once per dataset): rows with nothing
+missing come from OR-ing the bitmaps, pairwise co-missing counts from
+AND-ing them, and missing-value patterns from the bits of each row, all
+counted with popcounts over cache-sized chunks. The SQL engine counts the
+patterns in one GROUP BY scan instead.
+"""
+import json
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .context import get_dataframe
+from .filters import filterable
+from .limits import budgeted, checkpoint
+from .nulls import null_bitmaps, null_counts
+from .profiling import precomputed
+from .shaping import bounded
+from .sql_engine import sql_engine
+from .utils import validate_and_match_columns, get_correction_message
+
+# Patterns are counted over at most this many columns (the ones with most missing values)
+MAX_PATTERN_COLUMNS = 64
+# Co-missing counts are computed between at most this many columns
+MAX_PAIR_COLUMNS = 30
+DEFAULT_TOP_K = 10
+# Bitmap bytes processed at once (8 rows per byte)
+CHUNK_BYTES = 1 << 13
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+_REVERSED_BITS = np.array([int(f"{i:08b}"[::-1], 2) for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray, axis=None):
+    """Set bits of a uint8 array (in total, or along axis)."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits).sum(axis=axis, dtype=np.int64)
+    return _POPCOUNT[bits].sum(axis=axis, dtype=np.int64)
+
+
+def _chunks(bitmaps: List[np.ndarray]):
+    """Row chunks of several bitmaps, stacked (one row per bitmap)."""
+    size = len(bitmaps[0])
+    for start in range(0, size, CHUNK_BYTES):
+        checkpoint()
+        yield start, np.stack([b[start:start + CHUNK_BYTES] for b in bitmaps])
+
+
+def _complete_rows(df: pd.DataFrame, columns: list) -> int:
+    """Rows with none of the columns (all with missing values) missing."""
+    bitmaps = null_bitmaps(df)
+    selected = [bitmaps.bitmap(c) for c in columns]
+    if not selected:
+        return bitmaps.rows
+    missing = sum(int(popcount(np.bitwise_or.reduce(chunk, axis=0))) for _, chunk in _chunks(selected))
+    return bitmaps.rows - missing
+
+
+def _pattern_keys(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """One 64-bit key per row: bit i set when columns[i] (at most 64) is missing."""
+    bitmaps = null_bitmaps(df)
+    keys = np.zeros((bitmaps.rows, 8), dtype=np.uint8)
+    for start, chunk in _chunks([bitmaps.bitmap(c) for c in columns]):
+        rows = min(8 * chunk.shape[1], bitmaps.rows - 8 * start)
+        packed = np.packbits(np.unpackbits(chunk, axis=1, count=rows), axis=0, bitorder="little").T
+        keys[8 * start:8 * start + rows, :packed.shape[1]] = packed
+    return keys.view("<u8").ravel()
+
+
+def _top_patterns(keys: np.ndarray, counts: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The top_k most common patterns: most rows first, then (as the SQL engine
+    orders them) the pattern whose first differing column is missing.
+    """
+    # Bit-reversed keys compare like the patterns' flags, first column first
+    reversed_keys = _REVERSED_BITS[keys.view(np.uint8).reshape(-1, 8)[:, ::-1]].copy().view("<u8").ravel()
+    order = np.lexsort((~reversed_keys, -counts.astype(np.int64)))[:top_k]
+    return keys[order], counts[order]
+
+
+def _co_missing(df: pd.DataFrame, columns: list) -> np.ndarray:
+    """Rows missing both columns of each pair (the diagonal: rows missing each column)."""
+    selected = [null_bitmaps(df).bitmap(c) for c in columns]
+    matrix = np.zeros((len(columns), len(columns)), dtype=np.int64)
+    for _, chunk in _chunks(selected):
+        for i in range(len(columns)):
+            matrix[i, i:] += popcount(chunk[i] & chunk[i:], axis=1)
+    return np.triu(matrix) + np.triu(matrix, 1).T
+
+
+def missingness(df: pd.DataFrame, missing: list, pattern_columns: list, pair_columns: list,
+                top_k: int = DEFAULT_TOP_K) -> dict:
+    """
+    Missing-value structure of df.
+
+    Args:
+        df: DataFrame
+        missing: Columns with missing values (rows are complete when none of them is missing)
+        pattern_columns: Leading columns of missing whose patterns are counted (at most MAX_PATTERN_COLUMNS)
+        pair_columns: Leading columns of missing whose co-missing counts are computed
+        top_k: Patterns returned
+
+    Returns:
+        Dict with "complete_rows", "patterns" (the top_k most common patterns
+        with any column missing, as (flags per column of pattern_columns, rows)),
+        "n_patterns" and "co_missing" (matrix over pair_columns)
+    """
+    sql = sql_engine(df)
+    if sql is None:
+        keys, counts = np.unique(_pattern_keys(df, pattern_columns), return_counts=True)
+        complete = int(counts[0]) if len(keys) and keys[0] == 0 else 0
+        keys, counts = (keys[1:], counts[1:]) if complete else (keys, counts)
+        n_patterns = len(keys)
+        keys, counts = _top_patterns(keys, counts, top_k)
+        patterns = [(tuple(bool(key >> i & 1) for i in range(len(pattern_columns))), n)
+                    for key, n in zip(keys.tolist(), counts.tolist())]
+        co_missing = _co_missing(df, pair_columns)
+        if len(pattern_columns) < len(missing):
+            complete = _complete_rows(df, missing)
+    else:
+        patterns, n_patterns, complete = sql.missing_patterns([str(c) for c in pattern_columns], top_k)
+        co_missing = sql.co_missing([str(c) for c in pair_columns])
+        if len(pattern_columns) < len(missing):
+            # Columns left out of the patterns may be missing in rows the patterns count as complete
+            complete = sql.complete_rows([str(c) for c in missing])
+    return {"complete_rows": complete, "patterns": patterns, "n_patterns": n_patterns, "co_missing": co_missing}
+
+
+@tool
+@bounded
+@filterable
+@budgeted
+def tool_missingness(input_str: str = "") -> str:
+    """
+    Analyzes how missing values co-occur: rows with nothing missing, the most common
+    missing-value patterns (which columns are missing together in the same rows) and the
+    column pairs most often missing together.
+
+    Input JSON (all fields optional):
+    {
+        "columns": ["age", "deck", "embark_town"],  # Default: every column
+        "top_k": 10  # Patterns and pairs listed
+    }
+
+    Examples:
+    - "" → missing-value patterns of the whole dataset
+    - {"columns": ["age", "deck"]}
+    """
+    df = get_dataframe()
+    params = json.loads(input_str) if input_str.strip() else {}
+    top_k = max(1, int(params.get("top_k", DEFAULT_TOP_K)))
+
+    corrections = []
+    columns = params.get("columns")
+    if columns:
+        if not isinstance(columns, list):
+            return json.dumps({"error": "'columns' must be a list of column names"})
+        columns, corrections, not_found = validate_and_match_columns(columns, list(df.columns), cutoff=0.6)
+        if not_found:
+            return json.dumps({
+                "error": f"Columns not found: {', '.join(not_found)}",
+                "available_columns": list(df.columns)
+            })
+        columns = list(dict.fromkeys(columns))
+    else:
+        columns = list(df.columns)
+
+    nulls = precomputed(df, "nulls")
+    if nulls is None:
+        nulls = null_counts(df)
+    rows = len(df) if sql_engine(df) is None else sql_engine(df).rows
+    # Most missing first (ties in column order)
+    missing = sorted((c for c in columns if nulls[c] > 0), key=lambda c: -nulls[c])
+    result = {
+        "rows": rows,
+        "columns_checked": len(columns),
+        "missing_by_column": {str(c): int(nulls[c]) for c in columns if nulls[c] > 0},
+    }
+    if not missing:
+        result.update({"complete_rows": rows, "complete_rows_pct": 100.0, "n_patterns": 0, "patterns": [],
+                       "co_missing": []})
+        return json.dumps(result)
+
+    notes = []
+    pattern_columns = missing[:MAX_PATTERN_COLUMNS]
+    pair_columns = missing[:MAX_PAIR_COLUMNS]
+    if len(missing) > len(pattern_columns):
+        notes.append(f"Patterns cover the {MAX_PATTERN_COLUMNS} columns with most missing values "
+                     f"({len(missing)} have some).")
+    stats = missingness(df, missing, pattern_columns, pair_columns, top_k)
+
+    pct = lambda n: round(100 * n / rows, 2) if rows else 0.0
+    co_missing = stats["co_missing"]
+    pairs = []
+    for i, a in enumerate(pair_columns):
+        for j in range(i + 1, len(pair_columns)):
+            both = int(co_missing[i, j])
+            if both:
+                either = int(co_missing[i, i] + co_missing[j, j]) - both
+                pairs.append({"columns": [str(a), str(pair_columns[j])], "rows": both,
+                              "jaccard": round(both / either, 4)})
+    pairs.sort(key=lambda pair: -pair["rows"])
+
+    result.update({
+        "complete_rows": int(stats["complete_rows"]),
+        "complete_rows_pct": pct(stats["complete_rows"]),
+        "n_patterns": stats["n_patterns"],
+        "patterns": [{"missing": [str(c) for c, flag in zip(pattern_columns, p) if flag],
+                      "rows": int(n), "pct": pct(n)} for p, n in stats["patterns"]],
+        "co_missing": pairs[:top_k],
+    })
+    if stats["n_patterns"] > top_k or len(pairs) > top_k:
+        notes.append(f"Showing the {top_k} most common patterns and pairs "
+                     f"(of {stats['n_patterns']} and {len(pairs)}).")
+    if corrections:
+        notes.append(get_correction_message(corrections))
+    if notes:
+        result["note"] = " ".join(notes)
+    return json.dumps(result)
@@ -1,12 +1,67 @@
 """
 Nulls tool - Returns missing values information.
+
+Missing values are counted from each column's null mask packed into a
+bitmap (8 rows per byte, see null_bitmaps), built one column at a time and
+kept with the DataFrame, instead of from df.isna(), which materializes a
+boolean copy of the whole frame. tool_missingness reuses the bitmaps.
 """
 import json
+from typing import Dict, List
+import numpy as np
+import pandas as pd
 from langchain_core.tools import tool
+from .cache import frame_cache
 from .context import get_dataframe
+from .filters import filterable
+from .profiling import precomputed
+from .shaping import bounded
+from .sql_engine import sql_engine
+
+
+class NullBitmaps:
+    """Null masks of a DataFrame's columns, packed 8 rows per byte (only columns with missing values)."""
+
+    def __init__(self, rows: int, counts: Dict[str, int], columns: list, bits: List[np.ndarray]):
+        self.rows = rows
+        # Missing values of every column
+        self.counts = counts
+        # Columns with missing values and their bitmaps (bit set = missing, padding bits clear)
+        self.columns = columns
+        self.bits = bits
+
+    @property
+    def nbytes(self) -> int:
+        return sum(b.nbytes for b in self.bits)
+
+    def bitmap(self, column) -> np.ndarray:
+        return self.bits[self.columns.index(column)]
+
+
+def null_bitmaps(df: pd.DataFrame) -> NullBitmaps:
+    """Packed null masks of df, computed once per DataFrame."""
+    def compute():
+        counts, columns, bits = {}, [], []
+        for col, series in df.items():
+            mask = series.isna().to_numpy()
+            counts[col] = int(np.count_nonzero(mask))
+            if counts[col]:
+                columns.append(col)
+                bits.append(np.packbits(mask))
+        return NullBitmaps(len(df), counts, columns, bits)
+
+    return frame_cache(df, "null_bitmaps", 1).get_or_compute("bitmaps", compute)
+
+
+def null_counts(df) -> dict:
+    """Missing values per column."""
+    sql = sql_engine(df)
+    return sql.null_counts() if sql is not None else dict(null_bitmaps(df).counts)
 
 
 @tool
+@bounded
+@filterable
 def tool_nulls(input_str: str = "") -> str:
     """
     Returns columns with the number of missing values as JSON (only columns with >0 missing values).
@@ -20,6 +75,8 @@ def tool_nulls(input_str: str = "") -> str:
     Example: Call with empty string: tool_nulls("")
     """
     df = get_dataframe()
-    nulls = df.isna().sum()
+    nulls = precomputed(df, "nulls")
+    if nulls is None:
+        nulls = null_counts(df)
     result = {col: int(n) for col, n in nulls.items() if n > 0}
     return json.dumps(result)
@@ -1,49 +1,295 @@
 """
 Outliers tool - Detects outliers in numeric columns.
+
+A single column can be inspected in detail, or every numeric column can be
+checked in one call: bounds and outlier counts are then computed for whole
+blocks of columns as numpy matrix operations and the columns are ranked by
+outlier share. The multivariate mode scores rows with an isolation forest.
 """
 import json
+import warnings
+from typing import Optional
+import numpy as np
 import pandas as pd
 from langchain_core.tools import tool
 from .context import get_dataframe
-from .utils import find_column_match
+from .estimates import progressive
+from .filters import filterable
+from .limits import budgeted, checkpoint
+from .shaping import bounded
+from .isolation import isolation_scores
+from .sql_engine import sql_engine
+from .utils import find_column_match, validate_and_match_columns, get_correction_message
+
+METHODS = ("iqr", "zscore", "mad", "isolation_forest")
+# IQR multiplier, |z| cut-off, modified z cut-off, anomaly score cut-off
+DEFAULT_THRESHOLDS = {"iqr": 1.5, "zscore": 3.0, "mad": 3.5, "isolation_forest": 0.6}
+# Columns listed in a multi-column result (keeps the LLM context small)
+MAX_RANKED_COLUMNS = 20
+# Cells converted to a float matrix at once in multi-column mode
+BLOCK_CELLS = 5_000_000
+# Isolation forest: rows scored (a random sample above this) and features used
+ISOLATION_MAX_ROWS = 50_000
+ISOLATION_MAX_FEATURES = 50
+MAX_ANOMALOUS_ROWS = 10
+
+
+def _robust_center_scale(X: np.ndarray) -> tuple:
+    """
+    Median and MAD-based scale per column (MAD / 0.6745, so it matches the
+    standard deviation for normal data). Columns with MAD 0 fall back to the
+    mean absolute deviation.
+    """
+    median = np.nanmedian(X, axis=0)
+    deviation = np.abs(X - median)
+    scale = np.nanmedian(deviation, axis=0) / 0.6745
+    fallback = np.nanmean(deviation, axis=0) * 1.2533
+    return median, np.where(scale > 0, scale, fallback)
+
+
+def outlier_bounds(X: np.ndarray, method: str, threshold: float) -> tuple:
+    """Lower and upper bounds per column of X (NaN = missing) for a univariate method."""
+    with np.errstate(invalid="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        if method == "iqr":
+            q1, q3 = np.nanpercentile(X, [25, 75], axis=0)
+            return q1 - threshold * (q3 - q1), q3 + threshold * (q3 - q1)
+        if method == "zscore":
+            present = ~np.isnan(X)
+            count = present.sum(axis=0)
+            mean = np.where(present, X, 0.0).sum(axis=0) / count
+            centered = np.where(present, X - mean, 0.0)
+            std = np.sqrt((centered * centered).sum(axis=0) / (count - 1))
+            return mean - threshold * std, mean + threshold * std
+        median, scale = _robust_center_scale(X)
+        return median - threshold * scale, median + threshold * scale
+
+
+def column_outlier_stats(numeric: pd.DataFrame, method: str, threshold: float) -> list:
+    """
+    Bounds and outlier counts for every column of numeric, a block of columns at a time.
+
+    Returns:
+        One dict per column with lower, upper, below, above, valid, min_outlier, max_outlier
+    """
+    block = max(1, BLOCK_CELLS // max(len(numeric), 1))
+    stats = []
+    for start in range(0, numeric.shape[1], block):
+        checkpoint()
+        columns = numeric.columns[start:start + block]
+        X = numeric[columns].to_numpy(dtype=float, na_value=np.nan)
+        lower, upper = outlier_bounds(X, method, threshold)
+        # Comparisons with NaN (missing values, undefined bounds) are False
+        with np.errstate(invalid="ignore"):
+            low, high = X < lower, X > upper
+        low_count, high_count = low.sum(axis=0), high.sum(axis=0)
+        valid = (~np.isnan(X)).sum(axis=0)
+        flagged = low | high
+        smallest = np.where(flagged, X, np.inf).min(axis=0)
+        largest = np.where(flagged, X, -np.inf).max(axis=0)
+        for i, col in enumerate(columns):
+            count = int(low_count[i] + high_count[i])
+            stats.append({
+                "column": col,
+                "lower": float(lower[i]),
+                "upper": float(upper[i]),
+                "below": int(low_count[i]),
+                "above": int(high_count[i]),
+                "valid": int(valid[i]),
+                "min_outlier": float(smallest[i]) if count else None,
+                "max_outlier": float(largest[i]) if count else None,
+            })
+    return stats
+
+
+def outlier_stats(df: pd.DataFrame, numeric: pd.DataFrame, method: str, threshold: float) -> list:
+    """column_outlier_stats, pushed down to the SQL engine when one is active for df."""
+    sql = sql_engine(df)
+    if sql is not None:
+        return sql.outlier_stats(list(numeric.columns), method, threshold)
+    return column_outlier_stats(numeric, method, threshold)
+
+
+def rank_column_outliers(stats: list) -> list:
+    """
+    Columns with outliers from column_outlier_stats.
+
+    Returns:
+        One dict per column with outliers, sorted by outlier percentage (highest first)
+    """
+    ranking = []
+    for s in stats:
+        count = s["below"] + s["above"]
+        if count == 0:
+            continue
+        ranking.append({
+            "column": str(s["column"]),
+            "count": count,
+            "percentage": round(float(count / s["valid"] * 100), 2),
+            "below": s["below"],
+            "above": s["above"],
+            "bounds": [round(float(s["lower"]), 4), round(float(s["upper"]), 4)],
+            "min_outlier": float(s["min_outlier"]),
+            "max_outlier": float(s["max_outlier"]),
+        })
+    ranking.sort(key=lambda r: (-r["percentage"], r["column"]))
+    return ranking
+
+
+def isolation_forest_outliers(numeric: pd.DataFrame, threshold: float,
+                              contamination: Optional[float] = None) -> dict:
+    """
+    Multivariate outliers: rows that are unusual as a combination of values.
+    Missing values are imputed with the column median; large frames are scored
+    on a random sample of ISOLATION_MAX_ROWS rows.
+    """
+    numeric = numeric.iloc[:, :ISOLATION_MAX_FEATURES]
+    rng = np.random.default_rng(0)
+    positions = np.arange(len(numeric))
+    sampled = len(numeric) > ISOLATION_MAX_ROWS
+    if sampled:
+        positions = np.sort(rng.choice(len(numeric), ISOLATION_MAX_ROWS, replace=False))
+
+    X = numeric.iloc[positions].to_numpy(dtype=float, na_value=np.nan)
+    median, scale = _robust_center_scale(X)
+    usable = ~np.isnan(median)
+    X, median, scale, columns = X[:, usable], median[usable], scale[usable], numeric.columns[usable]
+    X = np.where(np.isnan(X), median, X)
+
+    scores = isolation_scores(X)
+    if contamination:
+        threshold = float(np.quantile(scores, 1 - contamination))
+    flagged = scores > threshold
+
+    # How far each value is from its column's median, in robust standard deviations
+    with np.errstate(invalid="ignore", divide="ignore"):
+        robust_z = np.abs(X - median) / np.where(scale > 0, scale, np.inf)
+
+    top = np.argsort(-scores)[:MAX_ANOMALOUS_ROWS]
+    top = top[scores[top] > threshold]
+    anomalies = []
+    for i in top:
+        unusual = np.argsort(-robust_z[i])[:5]
+        anomalies.append({
+            "row": str(numeric.index[positions[i]]),
+            "score": round(float(scores[i]), 4),
+            "values": {str(columns[j]): round(float(X[i, j]), 4) for j in unusual},
+        })
+
+    result = {
+        "features": [str(c) for c in columns],
+        "rows_scored": int(len(X)),
+        "sampled": sampled,
+        "threshold": round(float(threshold), 4),
+        "anomalous_rows": {
+            "count": int(flagged.sum()),
+            "percentage": round(float(flagged.mean() * 100), 2) if len(X) else 0.0,
+        },
+        "top_anomalies": anomalies,
+    }
+    if flagged.any():
+        contribution = robust_z[flagged].mean(axis=0)
+        drivers = np.argsort(-contribution)[:5]
+        result["most_unusual_columns"] = {str(columns[j]): round(float(contribution[j]), 2)
+                                          for j in drivers}
+    return result
+
+
+def _multi_column_outliers(df: pd.DataFrame, params: dict, method: str) -> str:
+    """Outliers across many numeric columns (all of them by default)."""
+    requested = params.get("columns")
+    if isinstance(requested, str) and requested.lower() != "all":
+        requested = [c.strip() for c in requested.split(",") if c.strip()]
+    corrections, not_found = [], []
+    if isinstance(requested, list) and requested:
+        columns, corrections, not_found = validate_and_match_columns(requested, list(df.columns), cutoff=0.6)
+        if not columns:
+            return json.dumps({"error": "None of the requested columns were found",
+                               "available_columns": list(df.columns)})
+        frame = df[list(dict.fromkeys(columns))]
+    else:
+        frame = df
+    numeric = frame.select_dtypes(include="number")
+    if numeric.empty:
+        return json.dumps({"error": "No numeric columns to analyze"})
+
+    threshold = float(params.get("threshold", DEFAULT_THRESHOLDS[method]))
+    top_k = max(1, min(int(params.get("top_k", 10)), MAX_RANKED_COLUMNS))
+    skipped = [str(c) for c in frame.columns if c not in numeric.columns]
+    result = {"method": method, "threshold": threshold, "columns_checked": int(numeric.shape[1])}
+
+    if method == "isolation_forest":
+        contamination = params.get("contamination")
+        result.update(isolation_forest_outliers(numeric, threshold,
+                                                float(contamination) if contamination else None))
+    else:
+        ranking = rank_column_outliers(outlier_stats(df, numeric, method, threshold))
+        result["columns_with_outliers"] = len(ranking)
+        result["ranking"] = ranking[:top_k]
+
+    notes = []
+    if method != "isolation_forest" and len(result["ranking"]) < result["columns_with_outliers"]:
+        notes.append(f"Showing the top {top_k} of {result['columns_with_outliers']} columns with outliers.")
+    if method == "isolation_forest" and numeric.shape[1] > ISOLATION_MAX_FEATURES:
+        notes.append(f"Only the first {ISOLATION_MAX_FEATURES} numeric columns were used.")
+    if skipped and requested:
+        notes.append(f"Skipped non-numeric columns: {', '.join(skipped[:10])}")
+    if not_found:
+        notes.append(f"Columns not found: {', '.join(not_found)}")
+    if corrections:
+        notes.append(get_correction_message(corrections))
+    if notes:
+        result["note"] = " ".join(notes)
+    return json.dumps(result)
 
 @tool
+@bounded
+@filterable
+@budgeted
+@progressive
 def tool_outliers(input_str: str) -> str:
     """
-    Detects outliers for a numeric column using statistical methods.
+    Detects outliers for one numeric column, or for ALL numeric columns in one call.
     
     Input format (JSON string):
     {
-        "column": "column_name",  # Required: name of the numeric column to analyze
-        "method": "iqr" | "zscore"  # Optional: detection method (default: "iqr")
+        "column": "column_name",  # Optional: analyze one column in detail
+        "columns": ["age", "fare"],  # Optional: several columns; omit both to check every numeric column
+        "method": "iqr" | "zscore" | "mad" | "isolation_forest",  # Optional (default: "iqr")
+        "threshold": 1.5,  # Optional: overrides the method's default cut-off
+        "top_k": 10  # Optional: columns listed in multi-column results
     }
     
     Methods:
     - "iqr": Interquartile Range method (recommended, detects values beyond 1.5*IQR from Q1/Q3)
     - "zscore": Z-score method (detects values with |z-score| > 3)
+    - "mad": Robust z-score from the median absolute deviation (> 3.5), good for skewed data
+    - "isolation_forest": Multivariate; finds unusual ROWS across all numeric columns
     
     Examples:
     - {"column": "age"} → Uses IQR method by default
-    - {"column": "fare", "method": "iqr"} → Uses IQR method explicitly
     - {"column": "age", "method": "zscore"} → Uses Z-score method
+    - "" or {} → Which columns have outliers? Columns ranked by outlier percentage
+    - {"method": "isolation_forest"} → Most anomalous rows and the columns that make them unusual
     
     Returns: JSON with outlier count, percentage, bounds, and min/max outlier values.
     """
     df = get_dataframe()
     
     try:
-        params = json.loads(input_str)
+        params = json.loads(input_str) if input_str and input_str.strip() else {}
     except json.JSONDecodeError:
         return json.dumps({"error": "Invalid JSON input. Expected format: {\"column\": \"column_name\", \"method\": \"iqr\"}"})
     
     column = params.get("column")
     method = params.get("method", "iqr").lower()
+    if method not in METHODS:
+        return json.dumps({"error": f"Method must be one of: {', '.join(METHODS)}"})
 
-    if not column:
-        return json.dumps({
-            "error": "Column parameter is required",
-            "hint": "Specify a numeric column name, e.g., {\"column\": \"age\"}"
-        })
+    if not column or method == "isolation_forest":
+        if column and not params.get("columns"):
+            params["columns"] = [column]
+        return _multi_column_outliers(df, params, method)
 
     # Use fuzzy matching to find the column
     matched_column = find_column_match(column, list(df.columns), cutoff=0.6)
@@ -56,9 +302,7 @@ def tool_outliers(input_str: str) -> str:
             error_msg += f" Did you mean '{suggestion}'?"
         return json.dumps({"error": error_msg})
 
-    s = df[matched_column].dropna()
-
-    if not pd.api.types.is_numeric_dtype(s):
+    if not pd.api.types.is_numeric_dtype(df[matched_column]):
         return json.dumps({"error": f"Column '{matched_column}' is not numeric"})
 
     result = {
@@ -66,37 +310,24 @@ def tool_outliers(input_str: str) -> str:
         "method": method
     }
 
-    if method == "iqr":
-        q1 = s.quantile(0.25)
-        q3 = s.quantile(0.75)
-        iqr = q3 - q1
-        lower = q1 - 1.5 * iqr
-        upper = q3 + 1.5 * iqr
-        mask = (s < lower) | (s > upper)
-
+    threshold = DEFAULT_THRESHOLDS[method]
+    stats = outlier_stats(df, df[[matched_column]], method, threshold)[0]
+    if method == "zscore":
+        result["zscore_threshold"] = threshold
+    else:
         result["bounds"] = {
-            "lower": float(lower),
-            "upper": float(upper)
+            "lower": round(float(stats["lower"]), 4),
+            "upper": round(float(stats["upper"]), 4)
         }
+        if method == "mad":
+            result["modified_zscore_threshold"] = threshold
 
-    elif method == "zscore":
-        mean = s.mean()
-        std = s.std()
-        z = (s - mean) / std
-        mask = z.abs() > 3
-
-        result["zscore_threshold"] = 3.0
-
-    else:
-        return json.dumps({"error": "Method must be 'iqr' or 'zscore'"})
-
-    outliers = s[mask]
-
+    count = stats["below"] + stats["above"]
     result["outliers"] = {
-        "count": int(len(outliers)),
-        "percentage": round(float(len(outliers) / len(s) * 100), 2),
-        "min": float(outliers.min()) if not outliers.empty else None,
-        "max": float(outliers.max()) if not outliers.empty else None
+        "count": count,
+        "percentage": round(float(count / stats["valid"] * 100), 2) if stats["valid"] else 0.0,
+        "min": float(stats["min_outlier"]) if count else None,
+        "max": float(stats["max_outlier"]) if count else None
     }
 
     return json.dumps(result)
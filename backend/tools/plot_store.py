@@ -0,0 +1,113 @@
+"""
+Plot storage for EDA Agent.
+Single storage root for generated charts, shared by tool_plot (writer) and
+the API (reader).
+
+Files are named after a hash of their encoded bytes, so a URL always refers
+to the same image: identical charts are stored once and browsers/proxies can
+cache them forever.
+"""
+import io
+import os
+import re
+import hashlib
+import tempfile
+from typing import Optional, Tuple
+
+# --- Configuration ---
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PLOTS_DIR = os.path.abspath(os.getenv("EDA_PLOTS_DIR", os.path.join(BACKEND_DIR, "plots")))
+os.makedirs(PLOTS_DIR, exist_ok=True)
+# Image encoding: "png" or "webp"
+PLOT_FORMAT = os.getenv("EDA_PLOT_FORMAT", "png").lower()
+# Losslessly re-compress PNGs with Pillow (smaller files, slower saves)
+PLOT_OPTIMIZE_PNG = os.getenv("EDA_PLOT_OPTIMIZE_PNG", "1").lower() in ("1", "true", "yes")
+PLOT_WEBP_QUALITY = int(os.getenv("EDA_PLOT_WEBP_QUALITY", "85"))
+PLOT_DPI = 100
+
+MEDIA_TYPES = {"png": "image/png", "webp": "image/webp"}
+# Content-addressed names produced by save_figure
+HASHED_NAME = re.compile(r"^plot_[a-z]+_(?P<hash>[0-9a-f]{16})\.(?:png|webp)$")
+# Any servable plot file name (also covers older timestamped names)
+SAFE_NAME = re.compile(r"^[A-Za-z0-9_\-]+\.(?:png|webp)$")
+
+
+def _encode(fig) -> Tuple[bytes, str]:
+    """Render a matplotlib figure to bytes in the configured format."""
+    buffer = io.BytesIO()
+    if PLOT_FORMAT == "webp":
+        fig.savefig(buffer, format="webp", dpi=PLOT_DPI, bbox_inches='tight',
+                    pil_kwargs={"quality": PLOT_WEBP_QUALITY, "method": 4})
+        return buffer.getvalue(), "webp"
+
+    fig.savefig(buffer, format="png", dpi=PLOT_DPI, bbox_inches='tight')
+    data = buffer.getvalue()
+    if PLOT_OPTIMIZE_PNG:
+        from PIL import Image
+
+        optimized = io.BytesIO()
+        with Image.open(io.BytesIO(data)) as image:
+            # Charts use few colors; an adaptive palette is visually identical
+            # when it fits, otherwise keep full color and only re-compress.
+            colors = image.convert("RGB").getcolors(maxcolors=256)
+            if colors is not None:
+                image = image.convert("RGB").quantize(colors=256)
+            image.save(optimized, format="png", optimize=True)
+        if optimized.tell() < len(data):
+            data = optimized.getvalue()
+    return data, "png"
+
+
+def save_figure(fig, plot_type: str) -> Tuple[str, str]:
+    """
+    Encode and store a figure under a content-hash file name.
+
+    Args:
+        fig: matplotlib Figure to save
+        plot_type: Plot type, used as part of the file name
+
+    Returns:
+        Tuple of (absolute file path, URL path served by the API)
+    """
+    data, ext = _encode(fig)
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    kind = re.sub(r"[^a-z]", "", plot_type.lower()) or "plot"
+    filename = f"plot_{kind}_{digest}.{ext}"
+    filepath = os.path.join(PLOTS_DIR, filename)
+
+    if not os.path.exists(filepath):
+        # Write atomically so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=PLOTS_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+
+    return filepath, f"/plots/{filename}"
+
+
+def resolve_plot(filename: str) -> Optional[str]:
+    """Return the path of a stored plot, or None if the name is invalid or missing."""
+    if not SAFE_NAME.match(filename):
+        return None
+    filepath = os.path.join(PLOTS_DIR, filename)
+    return filepath if os.path.isfile(filepath) else None
+
+
+def plot_etag(filename: str, filepath: str) -> Tuple[str, bool]:
+    """
+    Strong ETag for a stored plot.
+
+    Returns:
+        Tuple of (ETag header value, immutable) where immutable is True for
+        content-addressed names that can be cached indefinitely
+    """
+    match = HASHED_NAME.match(filename)
+    if match:
+        return f'"{match.group("hash")}"', True
+    stat = os.stat(filepath)
+    return f'"{int(stat.st_mtime)}-{stat.st_size}"', False
+
+
+def media_type(filename: str) -> str:
+    return MEDIA_TYPES.get(filename.rsplit(".", 1)[-1].lower(), "application/octet-stream")
@@ -0,0 +1,182 @@
+"""
+Eager background profiling for EDA Agent tools.
+
+When a dataset is registered, profile_dataset() queues the computations
+most questions start with, in priority order, in a small worker pool:
+
+1. Missing values per column (and the packed null bitmaps tool_missingness
+   works from)
+2. Per-column statistics: describe() of the numeric columns, the
+   tool_batch_profile profiles and the value counts of the other columns
+3. The Pearson correlation matrix of the numeric columns
+
+Tools ask for these results with precomputed(df, name). A result that is
+ready is returned at once; one being computed is waited for; one still
+queued is computed right away by the caller (the pool then skips it); a
+result that was never scheduled returns None and the tool computes as
+usual. A caller cancelled (or out of time) while computing a result hands
+it back to the pool, so others waiting for it are not left hanging. Tools reuse a result for narrower requests too, e.g. describe() of
+some columns is a slice of describe() of all of them.
+
+Results are kept with the DataFrame (and dropped with it), under the engine
+that computed them, so a block forcing another engine (use_engine) does not
+see them.
+"""
+import os
+import queue
+import weakref
+import itertools
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, List, Optional, Tuple
+import pandas as pd
+
+from .cache import frame_cache
+from .limits import BudgetExceeded, Cancelled
+from .sql_engine import engine_name, use_engine
+
+# --- Configuration ---
+# Profile datasets in the background as soon as they are registered
+PROFILE_ON_LOAD = os.getenv("EDA_PROFILE_ON_LOAD", "1").lower() in ("1", "true", "yes")
+# Threads profiling datasets (kept low: requests run alongside)
+PROFILE_WORKERS = int(os.getenv("EDA_PROFILE_WORKERS", "1"))
+# Columns whose value counts are computed ahead
+PROFILE_MAX_COUNTED_COLUMNS = 64
+
+# Priorities, lowest first
+NULLS, COLUMN_STATS, RELATIONS = 0, 1, 2
+
+
+class ProfileTask:
+    """One background computation on a DataFrame; whoever claims it first runs it."""
+
+    def __init__(self, name: str, compute: Callable[[], Any], priority: int):
+        self.name = name
+        self.priority = priority
+        self.future: Future = Future()
+        self._compute = compute
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def _claim(self) -> bool:
+        with self._lock:
+            claimed, self._claimed = self._claimed, True
+        return not claimed
+
+    def run(self):
+        """Compute the result unless a pool thread or a tool already did."""
+        if not self._claim():
+            return
+        try:
+            result = self._compute()
+        except (Cancelled, BudgetExceeded):
+            # The tool that claimed the task stopped, not the computation: hand it
+            # back to the pool so callers waiting for it still get a result
+            with self._lock:
+                self._claimed = False
+            _enqueue(self)
+            raise
+        except BaseException as e:
+            print(f"[DEBUG] Profiling {self.name} failed: {e}")
+            self._compute = None
+            self.future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+        else:
+            self._compute = None
+            self.future.set_result(result)
+
+    def result(self) -> Any:
+        """The result, computing it now if it is still queued."""
+        self.run()
+        return self.future.result()
+
+
+_queue: "queue.PriorityQueue[Tuple[int, int, ProfileTask]]" = queue.PriorityQueue()
+_order = itertools.count()
+_workers: List[threading.Thread] = []
+_workers_lock = threading.Lock()
+
+
+def _work():
+    while True:
+        _, _, task = _queue.get()
+        task.run()
+
+
+def _enqueue(task: ProfileTask):
+    _queue.put((task.priority, next(_order), task))
+    _start_workers()
+
+
+def _start_workers():
+    with _workers_lock:
+        while len(_workers) < PROFILE_WORKERS:
+            worker = threading.Thread(target=_work, name=f"eda-profile-{len(_workers)}", daemon=True)
+            worker.start()
+            _workers.append(worker)
+
+
+def _tasks(df: pd.DataFrame):
+    return frame_cache(df, "profile", PROFILE_MAX_COUNTED_COLUMNS + 8)
+
+
+def schedule(df: pd.DataFrame, name: str, compute: Callable[[pd.DataFrame], Any], priority: int):
+    """Queue compute(df) as the result name of df (unless it is already scheduled)."""
+    engine = engine_name(df)
+    key = (name, engine)
+    tasks = _tasks(df)
+    if tasks.get(key) is not None:
+        return
+    # The task must not keep df alive: its results are dropped with df
+    ref = weakref.ref(df)
+
+    def run():
+        frame = ref()
+        if frame is None:
+            raise LookupError("dataset was released")
+        with use_engine(engine):
+            return compute(frame)
+
+    task = ProfileTask(name, run, priority)
+    tasks.put(key, task)
+    _enqueue(task)
+
+
+def precomputed(df: pd.DataFrame, name: str) -> Optional[Any]:
+    """
+    Result name of df from the background profile, waiting for it if needed.
+
+    Returns:
+        The result, or None if it was not scheduled (or failed)
+    """
+    task = _tasks(df).get((name, engine_name(df)))
+    if task is None:
+        return None
+    try:
+        return task.result()
+    except Exception:
+        return None
+
+
+def profile_dataset(df: pd.DataFrame):
+    """Queue the background profile of df (no-op with EDA_PROFILE_ON_LOAD off)."""
+    if not PROFILE_ON_LOAD:
+        return
+    # Imported here: the tool modules import this one
+    from .batch_profile import MAX_PROFILED_COLUMNS, profile_columns
+    from .correlation import correlation_matrix
+    from .describe import describe_stats
+    from .encoding import count_values
+    from .nulls import null_counts
+
+    schedule(df, "nulls", null_counts, NULLS)
+    schedule(df, "describe", lambda frame: describe_stats(frame), COLUMN_STATS)
+    schedule(df, "profiles", lambda frame: profile_columns(frame.iloc[:, :MAX_PROFILED_COLUMNS]), COLUMN_STATS)
+    counted = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])][:PROFILE_MAX_COUNTED_COLUMNS]
+    for col in counted:
+        schedule(df, f"counts:{col}", lambda frame, col=col: count_values(frame[col]), COLUMN_STATS)
+    numeric = list(df.select_dtypes(include="number").columns)
+    if len(numeric) > 1:
+        schedule(df, "correlation", lambda frame: correlation_matrix(frame, numeric), RELATIONS)
+    print(f"[DEBUG] Queued background profile of {df.shape[0]}x{df.shape[1]} dataset")
@@ -4,9 +4,13 @@ Schema tool - Returns column names and data types.
 import json
 from langchain_core.tools import tool
 from .context import get_dataframe
+from .filters import filterable
+from .shaping import bounded
 from .utils import validate_and_match_columns, get_correction_message
 
 @tool
+@bounded
+@filterable
 def tool_schema(input_str: str) -> str:
     """
     Returns column names and data types as JSON.
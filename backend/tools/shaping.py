@@ -0,0 +1,369 @@
+"""
+Output shaping for EDA Agent tools.
+
+Every tool result goes back into the LLM prompt, so its size drives prompt
+tokens, latency and cost. Results larger than the token budget
+(EDA_TOOL_TOKEN_BUDGET) are reduced before they reach the model:
+
+- JSON results: the largest lists and uniform dicts (per-column or
+  per-value maps) are cut, a ranked prefix at a time, until the result
+  fits. Lists keep their order (tools already return them ranked); dicts
+  of numbers keep their largest values. The result itself and dicts of
+  distinct fields are never cut, so the payload keeps its structure.
+- Text results (CSV tables such as describe): extra columns, then extra
+  lines are dropped.
+
+The full result is kept under a handle ("res_..."), reported next to what
+was cut, and tool_expand returns any part of it on request.
+"""
+import io
+import os
+import csv
+import json
+import math
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Tuple
+from langchain_core.tools import tool
+
+# --- Configuration ---
+# Approximate tokens one tool result may use in the prompt (0 disables shaping)
+TOKEN_BUDGET = int(os.getenv("EDA_TOOL_TOKEN_BUDGET", "1500"))
+# Full results kept for tool_expand
+RESULT_HANDLES = int(os.getenv("EDA_RESULT_HANDLES", "64"))
+# Characters per token used to estimate sizes (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+# Collections with at most this many items are never cut
+MIN_ITEMS = 5
+# Items returned by one tool_expand call
+EXPAND_LIMIT = 50
+# Tokens reserved for the truncation note and handle
+NOTE_TOKENS = 60
+
+# Budget override for the current context (benchmarks, tool_expand)
+_budget: ContextVar[Optional[int]] = ContextVar("token_budget", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of LLM tokens in text."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def current_budget() -> int:
+    budget = _budget.get()
+    return TOKEN_BUDGET if budget is None else budget
+
+
+@contextmanager
+def output_budget(tokens: int) -> Iterator[None]:
+    """Use another token budget (0 = unlimited) for tool calls in this block."""
+    token = _budget.set(tokens)
+    try:
+        yield
+    finally:
+        _budget.reset(token)
+
+
+class ResultStore:
+    """In-process LRU of full tool results, addressed by handle."""
+
+    def __init__(self, max_entries: int = RESULT_HANDLES):
+        self.max_entries = max_entries
+        self._results: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, output: str) -> str:
+        """Store output and return its handle; equal outputs share a handle."""
+        handle = "res_" + hashlib.sha256(output.encode()).hexdigest()[:12]
+        with self._lock:
+            self._results[handle] = output
+            self._results.move_to_end(handle)
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return handle
+
+    def get(self, handle: str) -> Optional[str]:
+        with self._lock:
+            output = self._results.get(handle)
+            if output is not None:
+                self._results.move_to_end(handle)
+            return output
+
+
+result_store = ResultStore()
+
+
+# --- JSON results ---
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+def _kind(value: Any) -> str:
+    if _is_number(value):
+        return "number"
+    return "collection" if isinstance(value, (dict, list)) else type(value).__name__
+
+
+def _is_uniform(value: Any) -> bool:
+    """
+    True for lists, and for dicts whose values are all of one kind (numbers,
+    strings or collections): per-column or per-value maps such as counts or
+    profiles, as opposed to dicts of distinct fields.
+    """
+    if isinstance(value, list):
+        return True
+    return isinstance(value, dict) and len({_kind(v) for v in value.values()}) == 1
+
+
+def _containers(value: Any, path: Tuple = ()) -> List[Tuple[Tuple, Any]]:
+    """
+    (path, container) for every uniform list or dict below the result itself
+    with more than MIN_ITEMS items. The result and other dicts of distinct
+    fields hold the payload's structure and are never cut.
+    """
+    found = []
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return found
+    if path and len(value) > MIN_ITEMS and _is_uniform(value):
+        found.append((path, value))
+    for key, child in items:
+        found.extend(_containers(child, path + (key,)))
+    return found
+
+
+def rank_items(value: dict) -> dict:
+    """Order a dict by absolute value, largest first, when every value is a number."""
+    if all(_is_number(v) for v in value.values()):
+        return dict(sorted(value.items(), key=lambda item: -abs(item[1])))
+    return value
+
+
+def _cut(container, keep: int):
+    if isinstance(container, list):
+        return container[:keep]
+    return dict(list(rank_items(container).items())[:keep])
+
+
+def _get(value: Any, path: Tuple) -> Any:
+    for key in path:
+        value = value[key]
+    return value
+
+
+def _set(value: Any, path: Tuple, new: Any) -> Any:
+    """Replace the item at path with new; returns value (new itself for the root path)."""
+    if not path:
+        return new
+    _get(value, path[:-1])[path[-1]] = new
+    return value
+
+
+def _path_text(path: Tuple) -> str:
+    """"a.b.0" for nested keys; "." is the result itself."""
+    return ".".join(str(p) for p in path) or "."
+
+
+def _parse_path(result: Any, text: str) -> Tuple:
+    keys, node = [], result
+    for part in [p for p in str(text).split(".") if p]:
+        key = int(part) if isinstance(node, list) and part.isdigit() else part
+        node = node[key]
+        keys.append(key)
+    return tuple(keys)
+
+
+def shape_json(result: dict, budget: int) -> Tuple[dict, dict]:
+    """
+    Cut the largest collections of result until it fits budget tokens.
+
+    Returns:
+        (shaped copy of result, {path: [items kept, items total]} for every cut collection)
+    """
+    shaped = json.loads(json.dumps(result, default=str))
+    totals, cut = {}, {}
+    while True:
+        excess = len(json.dumps(shaped, default=str)) - budget * CHARS_PER_TOKEN
+        if excess <= 0:
+            break
+        candidates = [(path, c, len(json.dumps(c, default=str))) for path, c in _containers(shaped)]
+        if not candidates:
+            break
+        path, container, size = max(candidates, key=lambda pcs: pcs[2])
+        # Items are roughly the same size: keep the share that removes the excess
+        keep = int(len(container) * (size - excess) / size)
+        keep = max(MIN_ITEMS, min(keep, len(container) - 1))
+        name = _path_text(path)
+        totals.setdefault(name, len(container))
+        shaped = _set(shaped, path, _cut(container, keep))
+        cut[name] = [keep, totals[name]]
+    return shaped, cut
+
+
+# --- Text results ---
+
+def _split_notes(text: str) -> Tuple[List[str], List[str]]:
+    """Separate "# ..." note lines from the table lines; blank lines are dropped."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    notes = [line for line in lines if line.startswith("#")]
+    return [line for line in lines if not line.startswith("#")], notes
+
+
+def _table(rows: List[List[str]], columns: int, offset: int = 0) -> str:
+    """CSV text of the label column plus columns [offset, offset + columns) of rows."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(
+        [r[0]] + r[1 + offset:1 + offset + columns] for r in rows)
+    return buffer.getvalue().rstrip("\n")
+
+
+def shape_text(text: str, budget: int) -> Tuple[str, dict]:
+    """
+    Drop columns of a CSV table (keeping the first, the row labels), then lines, until text fits.
+
+    Returns:
+        (shaped text, {"columns" or "lines": [kept, total]})
+    """
+    lines, notes = _split_notes(text)
+    cut = {}
+    rows = list(csv.reader(lines)) if lines else []
+    if len(rows) > 1 and len({len(r) for r in rows}) == 1 and len(rows[0]) > MIN_ITEMS + 1:
+        total = len(rows[0]) - 1
+        # Largest number of columns that fits, by bisection
+        low, high = MIN_ITEMS, total
+        while low < high:
+            middle = (low + high + 1) // 2
+            if estimate_tokens(_table(rows, middle)) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        if low < total:
+            lines = _table(rows, low).splitlines()
+            cut["columns"] = [low, total]
+    total_lines = len(lines)
+    while estimate_tokens("\n".join(lines)) > budget and len(lines) > MIN_ITEMS:
+        lines = lines[:max(MIN_ITEMS, len(lines) // 2)]
+    if len(lines) < total_lines:
+        cut["lines"] = [len(lines), total_lines]
+    return "\n".join(lines + notes), cut
+
+
+def shape_output(output: str, budget: Optional[int] = None) -> str:
+    """
+    Bound a tool result to budget tokens (default: the current budget).
+    The full result is stored and its handle is reported when anything is cut.
+    """
+    budget = current_budget() if budget is None else budget
+    if not budget or not isinstance(output, str) or estimate_tokens(output) <= budget:
+        return output
+    try:
+        result = json.loads(output)
+    except json.JSONDecodeError:
+        result = None
+
+    if isinstance(result, dict):
+        if "error" in result:
+            return output
+        shaped, cut = shape_json(result, max(budget - NOTE_TOKENS, 1))
+        if not cut:
+            return output
+        handle = result_store.put(output)
+        shaped["truncated"] = {"handle": handle, "kept": cut,
+                               "note": f"Partial result. Call tool_expand with {{\"handle\": \"{handle}\", "
+                                       f"\"path\": \"<one of the kept paths>\"}} for the rest."}
+        return json.dumps(shaped, default=str)
+
+    shaped, cut = shape_text(output, max(budget - NOTE_TOKENS, 1))
+    if not cut:
+        return output
+    handle = result_store.put(output)
+    kept = ", ".join(f"{kept} of {total} {part}" for part, (kept, total) in cut.items())
+    return (f"{shaped}\n# Truncated: showing {kept}. Call tool_expand with "
+            f"{{\"handle\": \"{handle}\"}} for the rest.")
+
+
+def bounded(func):
+    """
+    Decorator for tool functions: shape the result to the token budget.
+    Apply it between @tool and @filterable, so filter notes count towards the budget.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return shape_output(func(*args, **kwargs))
+    return wrapper
+
+
+# --- Expansion ---
+
+def _page(container, offset: int, limit: int):
+    if isinstance(container, list):
+        return container[offset:offset + limit]
+    return dict(list(rank_items(container).items())[offset:offset + limit])
+
+
+@tool
+def tool_expand(input_str: str) -> str:
+    """
+    Returns more of a tool result that was truncated to save space (it reported a "handle").
+
+    Input JSON:
+    {
+        "handle": "res_1a2b3c4d5e6f",
+        "path": "data_summary.frequencies",  # Optional: part of a JSON result to page through
+        "offset": 0,  # Optional: first item (or table column / line) to return
+        "limit": 50  # Optional: number of items to return
+    }
+    For truncated tables, offset/limit select columns (and lines for plain text).
+    """
+    try:
+        params = json.loads(input_str)
+    except json.JSONDecodeError:
+        params = {"handle": input_str.strip()}
+    handle = str(params.get("handle", "")).strip()
+    offset = max(0, int(params.get("offset", 0)))
+    limit = max(1, int(params.get("limit", EXPAND_LIMIT)))
+
+    output = result_store.get(handle)
+    if output is None:
+        return json.dumps({"error": f"Unknown or expired handle '{handle}'; run the original tool again"})
+    try:
+        result = json.loads(output)
+    except json.JSONDecodeError:
+        result = None
+
+    if isinstance(result, dict):
+        path = params.get("path")
+        if not path:
+            paths = [_path_text(p) for p, _ in _containers(result)]
+            return json.dumps({"handle": handle, "paths": paths,
+                               "note": "Pass one of these paths to page through it."})
+        try:
+            container = _get(result, _parse_path(result, path))
+        except (KeyError, IndexError, TypeError):
+            return json.dumps({"error": f"Path '{path}' not found",
+                               "paths": [_path_text(p) for p, _ in _containers(result)]})
+        if not isinstance(container, (list, dict)):
+            return json.dumps({"handle": handle, "path": path, "value": container}, default=str)
+        page = _page(container, offset, limit)
+        return json.dumps({"handle": handle, "path": path, "offset": offset, "items": page,
+                           "total": len(container), "has_more": offset + limit < len(container)},
+                          default=str)
+
+    lines, notes = _split_notes(output)
+    rows = list(csv.reader(lines)) if lines else []
+    if len(rows) > 1 and len({len(r) for r in rows}) == 1:
+        total, unit = len(rows[0]) - 1, "columns"
+        page = _table(rows, limit, offset)
+    else:
+        total, unit = len(lines), "lines"
+        page = "\n".join(lines[offset:offset + limit])
+    shown = min(total, offset + limit)
+    return f"{page}\n# {unit} {offset + 1}-{shown} of {total} ({handle})"
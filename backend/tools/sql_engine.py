@@ -0,0 +1,565 @@
+"""
+SQL execution engine for EDA Agent tools (DuckDB).
+
+pandas is the default engine and works on the DataFrame in memory. For
+datasets too large for that, the heavy aggregations of describe, nulls,
+categorical distribution, correlation, outliers and groupby are pushed
+down as SQL to DuckDB, an embedded columnar engine that runs them with
+multiple threads and spills to disk when memory runs short.
+
+A DataFrame can be backed by a source file (see attach_source): large
+uploads are converted once to Parquet and only a random sample is loaded
+into pandas for the remaining tools, while the SQL engine scans the whole
+file. Without a source, DuckDB scans the DataFrame itself (no copy).
+
+Engine selection (EDA_ENGINE):
+- "pandas": never use SQL
+- "auto" (default): SQL only for DataFrames backed by a source file
+- "duckdb": SQL for every DataFrame, when duckdb is installed
+
+Every method returns the same intermediate values the pandas code paths
+compute, so tool outputs do not depend on the engine (see
+benchmarks/check_engines.py).
+"""
+import os
+import math
+import tempfile
+import threading
+import importlib.util
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .cache import frame_cache
+
+# --- Configuration ---
+ENGINE = os.getenv("EDA_ENGINE", "auto").lower()
+DUCKDB_AVAILABLE = importlib.util.find_spec("duckdb") is not None
+# Uploads at least this large are kept on disk and queried with SQL (EDA_ENGINE=auto/duckdb)
+OUT_OF_CORE_MIN_MB = float(os.getenv("EDA_OUT_OF_CORE_MIN_MB", "256"))
+# Rows loaded into pandas from an out-of-core dataset, for tools without SQL support
+SAMPLE_ROWS = int(os.getenv("EDA_SAMPLE_ROWS", "100000"))
+DUCKDB_THREADS = int(os.getenv("EDA_DUCKDB_THREADS", str(os.cpu_count() or 1)))
+# e.g. "4GB"; empty lets DuckDB use its default (80% of RAM)
+DUCKDB_MEMORY_LIMIT = os.getenv("EDA_DUCKDB_MEMORY_LIMIT", "")
+DUCKDB_TEMP_DIR = os.getenv("EDA_DUCKDB_TEMP_DIR", os.path.join(tempfile.gettempdir(), "eda_duckdb"))
+
+NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+                 "UINTEGER", "UBIGINT", "FLOAT", "DOUBLE", "REAL")
+DATETIME_TYPES = ("DATE", "TIMESTAMP", "TIMESTAMP_S", "TIMESTAMP_MS", "TIMESTAMP_NS")
+# Engine forced for the current context (parity checks, benchmarks)
+_forced: ContextVar[Optional[str]] = ContextVar("forced_engine", default=None)
+
+_database = None
+_database_lock = threading.Lock()
+
+
+@dataclass
+class Source:
+    """File a DataFrame was sampled from; SQL queries scan it instead of the DataFrame."""
+    path: str
+    rows: int
+
+
+def _connection():
+    """Shared in-process DuckDB database; each query uses its own cursor."""
+    global _database
+    if _database is None:
+        with _database_lock:
+            if _database is None:
+                import duckdb
+
+                os.makedirs(DUCKDB_TEMP_DIR, exist_ok=True)
+                config = {"threads": DUCKDB_THREADS, "temp_directory": DUCKDB_TEMP_DIR}
+                if DUCKDB_MEMORY_LIMIT:
+                    config["memory_limit"] = DUCKDB_MEMORY_LIMIT
+                _database = duckdb.connect(config=config)
+    return _database
+
+
+def quote(name) -> str:
+    """Quote a column name as a SQL identifier."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value: float) -> str:
+    return "NULL" if value is None or not math.isfinite(value) else repr(float(value))
+
+
+def _timestamp(microseconds) -> Optional[pd.Timestamp]:
+    return None if microseconds is None else pd.Timestamp(int(microseconds), unit="us")
+
+
+def scan(path: str, na_values: Optional[List[str]] = None) -> str:
+    """SQL table expression reading a CSV or Parquet file."""
+    escaped = path.replace("'", "''")
+    if path.lower().endswith(".parquet"):
+        return f"read_parquet('{escaped}')"
+    options = ""
+    if na_values:
+        options = ", nullstr=[" + ", ".join("'" + v.replace("'", "''") + "'" for v in na_values) + "]"
+    return f"read_csv('{escaped}'{options})"
+
+
+def attach_source(df: pd.DataFrame, path: str, rows: int):
+    """Record that df is a sample of the file at path, which holds rows rows."""
+    frame_cache(df, "engine").put("source", Source(path, rows))
+
+
+def source_of(df: pd.DataFrame) -> Optional[Source]:
+    return frame_cache(df, "engine").get("source")
+
+
+@contextmanager
+def use_engine(name: str) -> Iterator[None]:
+    """Force "pandas" or "duckdb" for tool calls in this block."""
+    token = _forced.set(name)
+    try:
+        yield
+    finally:
+        _forced.reset(token)
+
+
+def engine_name(df: pd.DataFrame) -> str:
+    """Engine the tools use for df: "duckdb" or "pandas"."""
+    choice = _forced.get() or ENGINE
+    if not DUCKDB_AVAILABLE or choice == "pandas":
+        return "pandas"
+    if choice == "duckdb" or source_of(df) is not None:
+        return "duckdb"
+    return "pandas"
+
+
+def sql_engine(df: pd.DataFrame) -> Optional["DuckDBEngine"]:
+    """The SQL engine to run df's aggregations on, or None to use pandas."""
+    if engine_name(df) != "duckdb":
+        return None
+    source = source_of(df)
+    return DuckDBEngine(df if source is None else source)
+
+
+class DuckDBEngine:
+    """
+    Runs tool aggregations as SQL over a DataFrame or a source file.
+
+    Args:
+        data: DataFrame to scan in place, or the Source file it was sampled from
+    """
+
+    name = "duckdb"
+
+    def __init__(self, data):
+        self._data = data
+        self._schema: Optional[Dict[str, str]] = None
+
+    def _query(self, sql: str, params: Optional[list] = None):
+        cursor = _connection().cursor()
+        try:
+            if isinstance(self._data, Source):
+                # Views are per connection, and every cursor is its own connection
+                cursor.execute(f"CREATE TEMP VIEW data AS SELECT * FROM {scan(self._data.path)}")
+            else:
+                cursor.register("data", self._data)
+            return cursor.execute(sql, params or [])
+        except Exception:
+            cursor.close()
+            raise
+
+    def _fetchall(self, sql: str, params: Optional[list] = None) -> list:
+        result = self._query(sql, params)
+        try:
+            return result.fetchall()
+        finally:
+            result.close()
+
+    def _frame(self, sql: str) -> pd.DataFrame:
+        result = self._query(sql)
+        try:
+            return result.df()
+        finally:
+            result.close()
+
+    # --- schema ---
+
+    @property
+    def schema(self) -> Dict[str, str]:
+        """Column name -> DuckDB type."""
+        if self._schema is None:
+            self._schema = {name: dtype for name, dtype, *_ in self._fetchall("DESCRIBE data")}
+        return self._schema
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self.schema)
+
+    @property
+    def rows(self) -> int:
+        if isinstance(self._data, Source):
+            return self._data.rows
+        return len(self._data)
+
+    def is_numeric(self, column: str) -> bool:
+        return self.schema.get(column, "").split("(")[0] in NUMERIC_TYPES or \
+            self.schema.get(column, "").startswith("DECIMAL")
+
+    def numeric_columns(self, columns: Optional[List[str]] = None) -> List[str]:
+        return [c for c in (columns or self.columns) if self.is_numeric(c)]
+
+    # --- tool aggregations ---
+
+    def _missing(self, column: str) -> str:
+        # Missing-value condition (NaN counts as missing, as in pandas)
+        missing = f"{quote(column)} IS NULL"
+        if self.schema[column] in ("FLOAT", "DOUBLE", "REAL"):
+            missing += f" OR isnan({quote(column)})"
+        return f"({missing})"
+
+    def null_counts(self) -> Dict[str, int]:
+        """Missing values per column (NaN counts as missing, as in pandas)."""
+        parts = [f"count(*) FILTER (WHERE {self._missing(col)})" for col in self.columns]
+        if not parts:
+            return {}
+        values = self._fetchall(f"SELECT {', '.join(parts)} FROM data")[0]
+        return {col: int(v) for col, v in zip(self.columns, values)}
+
+    def missing_patterns(self, columns: List[str], top_k: int) -> Tuple[List[Tuple[Tuple[bool, ...], int]], int, int]:
+        """
+        The top_k most common combinations of missing columns (missing-value
+        patterns with any column missing), in one scan: most rows first, then
+        the pattern whose first differing column is missing.
+
+        Returns:
+            The patterns as (one flag per column, True when missing; rows),
+            the number of patterns, and the rows with none of the columns missing
+        """
+        if not columns:
+            return [], 0, self.rows
+        flags = ", ".join(f"{self._missing(c)} AS m{i}" for i, c in enumerate(columns))
+        groups = ", ".join(f"m{i}" for i in range(len(columns)))
+        order = ", ".join(f"m{i} DESC" for i in range(len(columns)))
+        rows = self._fetchall(
+            f"SELECT {groups}, n, count(*) OVER (), sum(n) OVER () FROM ("
+            f"SELECT {groups}, count(*) AS n FROM (SELECT {flags} FROM data) "
+            f"WHERE {' OR '.join(f'm{i}' for i in range(len(columns)))} GROUP BY {groups}) "
+            f"ORDER BY n DESC, {order} LIMIT {int(top_k)}")
+        if not rows:
+            return [], 0, self.rows
+        patterns = [(tuple(bool(v) for v in row[:len(columns)]), int(row[len(columns)])) for row in rows]
+        return patterns, int(rows[0][-2]), self.rows - int(rows[0][-1])
+
+    def co_missing(self, columns: List[str]) -> np.ndarray:
+        """Rows missing both columns of each pair (the diagonal: rows missing each column)."""
+        matrix = np.zeros((len(columns), len(columns)), dtype=np.int64)
+        if not columns:
+            return matrix
+        pairs = [(i, j) for i in range(len(columns)) for j in range(i, len(columns))]
+        flags = ", ".join(f"{self._missing(c)} AS m{i}" for i, c in enumerate(columns))
+        # Sums over precomputed flags: one FILTER clause per pair is an order of magnitude slower
+        parts = [f"sum((m{i} AND m{j})::BIGINT)" for i, j in pairs]
+        values = self._fetchall(f"SELECT {', '.join(parts)} FROM (SELECT {flags} FROM data)")[0]
+        for (i, j), n in zip(pairs, values):
+            matrix[i, j] = matrix[j, i] = int(n or 0)
+        return matrix
+
+    def complete_rows(self, columns: List[str]) -> int:
+        """Rows with none of the columns missing."""
+        if not columns:
+            return self.rows
+        missing = " OR ".join(self._missing(c) for c in columns)
+        return int(self._fetchall(f"SELECT count(*) FILTER (WHERE NOT ({missing})) FROM data")[0][0])
+
+    def _key(self, column: str) -> str:
+        # Grouping key with NaN as missing, as in pandas
+        col = quote(column)
+        if self.schema[column] in ("FLOAT", "DOUBLE", "REAL"):
+            return f"CASE WHEN isnan({col}) THEN NULL ELSE {col} END AS {col}"
+        return col
+
+    def distinct_counts(self, columns: List[str]) -> Dict[str, int]:
+        """Distinct non-missing values of each column."""
+        if not columns:
+            return {}
+        keys = ", ".join(self._key(c) for c in columns)
+        values = self._fetchall(f"SELECT {', '.join(f'count(DISTINCT {quote(c)})' for c in columns)} "
+                                f"FROM (SELECT {keys} FROM data)")[0]
+        return {col: int(v) for col, v in zip(columns, values)}
+
+    def pair_counts(self, pairs: List[Tuple[str, ...]]) -> List[pd.DataFrame]:
+        """
+        Rows per combination of values of each group of columns (pairs, or single
+        columns), in one scan. Rows with a missing value in the group are left out.
+
+        Returns:
+            One frame per group: its columns and "n"
+        """
+        columns = list(dict.fromkeys(c for group in pairs for c in group))
+        if not pairs:
+            return []
+        keys = ", ".join(self._key(c) for c in columns)
+        column_list = ", ".join(quote(c) for c in columns)
+        sets = ", ".join("(" + ", ".join(quote(c) for c in group) + ")" for group in pairs)
+        # GROUPING() tells the sets apart: bit set for every column not grouped, first column highest
+        frame = self._frame(f"SELECT {column_list}, GROUPING({column_list}) AS grouping_id, count(*) AS n "
+                            f"FROM (SELECT {keys} FROM data) GROUP BY GROUPING SETS ({sets})")
+        position = {c: len(columns) - 1 - i for i, c in enumerate(columns)}
+        everything = (1 << len(columns)) - 1
+        counts = []
+        for group in pairs:
+            grouping_id = everything & ~sum(1 << position[c] for c in set(group))
+            rows = frame[frame["grouping_id"] == grouping_id]
+            rows = rows[rows[list(group)].notna().all(axis=1)]
+            counts.append(rows[list(dict.fromkeys(group)) + ["n"]].reset_index(drop=True))
+        return counts
+
+    def is_datetime(self, column: str) -> bool:
+        return self.schema.get(column, "") in DATETIME_TYPES
+
+    def describe_columns(self, columns: Optional[List[str]] = None) -> List[str]:
+        """Columns DataFrame.describe() reports by default: numeric and datetime."""
+        return [c for c in (columns or self.columns) if self.is_numeric(c) or self.is_datetime(c)]
+
+    def describe(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Same table as DataFrame.describe() for the numeric and datetime columns."""
+        columns = self.describe_columns(columns)
+        parts = []
+        for col in columns:
+            if self.is_datetime(col):
+                x = f"epoch_us({quote(col)})"
+                # Exact integer sum; the mean is divided in Python like pandas does
+                parts += [f"count({x})", f"sum({x})", "NULL", f"min({x})",
+                          f"quantile_cont({x}, [0.25, 0.5, 0.75])", f"max({x})"]
+            else:
+                x = f"CAST({quote(col)} AS DOUBLE)"
+                parts += [f"count({x})", f"avg({x})", f"stddev_samp({x})", f"min({x})",
+                          f"quantile_cont({x}, [0.25, 0.5, 0.75])", f"max({x})"]
+        row = self._fetchall(f"SELECT {', '.join(parts)} FROM data")[0] if parts else []
+
+        described = []
+        for i, col in enumerate(columns):
+            count, mean, std, low, quartiles, high = row[i * 6:(i + 1) * 6]
+            quartiles = quartiles or [None, None, None]
+            if self.is_datetime(col):
+                mean = mean / count if count else None
+                values = [_timestamp(v) for v in (mean, low, *quartiles, high)]
+                described.append(pd.Series([count, *values], name=col, dtype=object,
+                                           index=["count", "mean", "min", "25%", "50%", "75%", "max"]))
+            else:
+                described.append(pd.Series([count, mean, std, low, *quartiles, high], name=col, dtype=float,
+                                           index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"]))
+        if not described:
+            return pd.DataFrame(index=["count", "mean", "std", "min", "25%", "50%", "75%", "max"])
+        # Row order of pandas.core.methods.describe.reorder_columns: shortest index first
+        rows = list(dict.fromkeys(name for s in sorted(described, key=len) for name in s.index))
+        return pd.concat([s.reindex(rows) for s in described], axis=1)
+
+    def value_counts(self, column: str, top_k: int) -> Tuple[pd.Series, int, int]:
+        """
+        Most frequent non-missing values of column, with ties at the cut-off included.
+
+        Returns:
+            (counts of the candidate values, number of distinct values, number of non-missing values)
+        """
+        col = quote(column)
+        rows = self._fetchall(
+            f"WITH counts AS (SELECT {col} AS value, count(*) AS n FROM data "
+            f"WHERE {col} IS NOT NULL GROUP BY {col}) "
+            f"SELECT value, n, count(*) OVER (), sum(n) OVER () FROM counts "
+            f"QUALIFY rank() OVER (ORDER BY n DESC) <= ?", [max(top_k, 1)])
+        if not rows:
+            return pd.Series(dtype="int64"), 0, 0
+        counts = pd.Series([r[1] for r in rows], index=[r[0] for r in rows], dtype="int64")
+        return counts, int(rows[0][2]), int(rows[0][3])
+
+    def correlation(self, columns: List[str], method: str = "pearson") -> pd.DataFrame:
+        """Pairwise correlation matrix (pairwise complete observations, like pandas)."""
+        columns = self.numeric_columns(columns)
+        matrix = pd.DataFrame(np.eye(len(columns)), index=columns, columns=columns)
+        pairs = [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]]
+        if method == "pearson":
+            values = self._pearson(pairs)
+        else:
+            values = [self._spearman(a, b) for a, b in pairs]
+        for (a, b), value in zip(pairs, values):
+            matrix.loc[a, b] = matrix.loc[b, a] = np.nan if value is None else value
+        if columns:
+            # A column without variance correlates with nothing, not even itself
+            distinct = self._fetchall("SELECT " + ", ".join(
+                f"count(DISTINCT {quote(c)}) FILTER (WHERE NOT isnan(CAST({quote(c)} AS DOUBLE)))"
+                for c in columns) + " FROM data")[0]
+            for col, n in zip(columns, distinct):
+                if n < 2:
+                    matrix.loc[col, col] = np.nan
+        return matrix
+
+    def _pearson(self, pairs: List[Tuple[str, str]]) -> list:
+        # One scan for every pair; corr() skips rows where either value is missing
+        if not pairs:
+            return []
+        return list(self._fetchall("SELECT " + ", ".join(
+            f"corr(CAST({quote(a)} AS DOUBLE), CAST({quote(b)} AS DOUBLE))" for a, b in pairs) + " FROM data")[0])
+
+    def _spearman(self, a: str, b: str) -> Optional[float]:
+        # Average ranks for ties, over the rows where both values are present
+        x, y = quote(a), quote(b)
+        rank = "(rank() OVER (ORDER BY {c}) + (count(*) OVER (PARTITION BY {c}) - 1) / 2.0)"
+        return self._fetchall(
+            f"SELECT corr(rx, ry) FROM (SELECT {rank.format(c=x)} AS rx, {rank.format(c=y)} AS ry "
+            f"FROM data WHERE {x} IS NOT NULL AND {y} IS NOT NULL)")[0][0]
+
+    def outlier_stats(self, columns: List[str], method: str, threshold: float) -> List[dict]:
+        """
+        Bounds and outlier counts per column for "iqr", "zscore" or "mad".
+
+        Returns:
+            One dict per column with lower, upper, below, above, valid, min_outlier, max_outlier
+        """
+        bounds = self._outlier_bounds(columns, method, threshold)
+        parts = []
+        for col in columns:
+            x = f"CAST({quote(col)} AS DOUBLE)"
+            low, high = bounds[col]
+            below, above = f"{x} < {_literal(low)}", f"{x} > {_literal(high)}"
+            parts += [f"count(*) FILTER (WHERE {below})", f"count(*) FILTER (WHERE {above})",
+                      f"count({x}) FILTER (WHERE NOT isnan({x}))",
+                      f"min({x}) FILTER (WHERE {below} OR {above})",
+                      f"max({x}) FILTER (WHERE {below} OR {above})"]
+        row = self._fetchall(f"SELECT {', '.join(parts)} FROM data")[0]
+        stats = []
+        for i, col in enumerate(columns):
+            below, above, valid, smallest, largest = row[i * 5:(i + 1) * 5]
+            stats.append({"column": col, "lower": bounds[col][0], "upper": bounds[col][1],
+                          "below": int(below), "above": int(above), "valid": int(valid),
+                          "min_outlier": smallest, "max_outlier": largest})
+        return stats
+
+    def _outlier_bounds(self, columns: List[str], method: str, threshold: float) -> Dict[str, tuple]:
+        """Bounds computed with the same float arithmetic as outliers.outlier_bounds."""
+        exprs = {col: f"CAST({quote(col)} AS DOUBLE)" for col in columns}
+        present = {col: f"{x} IS NOT NULL AND NOT isnan({x})" for col, x in exprs.items()}
+        if method == "iqr":
+            row = self._fetchall("SELECT " + ", ".join(
+                f"quantile_cont({x}, [0.25, 0.75]) FILTER (WHERE {present[c]})" for c, x in exprs.items())
+                + " FROM data")[0]
+            bounds = {}
+            for col, quartiles in zip(columns, row):
+                q1, q3 = quartiles if quartiles else (np.nan, np.nan)
+                bounds[col] = (q1 - threshold * (q3 - q1), q3 + threshold * (q3 - q1))
+            return bounds
+        if method == "zscore":
+            row = self._fetchall("SELECT " + ", ".join(
+                f"avg({x}) FILTER (WHERE {present[c]}), stddev_samp({x}) FILTER (WHERE {present[c]})"
+                for c, x in exprs.items()) + " FROM data")[0]
+            bounds = {}
+            for i, col in enumerate(columns):
+                mean, std = (np.nan if v is None else v for v in row[i * 2:i * 2 + 2])
+                bounds[col] = (mean - threshold * std, mean + threshold * std)
+            return bounds
+
+        # MAD: median first, then the median (and mean) absolute deviation from it
+        medians = self._fetchall("SELECT " + ", ".join(
+            f"median({x}) FILTER (WHERE {present[c]})" for c, x in exprs.items()) + " FROM data")[0]
+        parts = []
+        for (col, x), median in zip(exprs.items(), medians):
+            deviation = f"abs({x} - {_literal(median)})"
+            parts += [f"median({deviation}) FILTER (WHERE {present[col]})",
+                      f"avg({deviation}) FILTER (WHERE {present[col]})"]
+        row = self._fetchall(f"SELECT {', '.join(parts)} FROM data")[0]
+        bounds = {}
+        for i, col in enumerate(columns):
+            median = np.nan if medians[i] is None else medians[i]
+            mad, mean_dev = (np.nan if v is None else v for v in row[i * 2:i * 2 + 2])
+            scale = mad / 0.6745
+            scale = scale if scale > 0 else mean_dev * 1.2533
+            bounds[col] = (median - threshold * scale, median + threshold * scale)
+        return bounds
+
+    def groupby(self, keys: List[str], metrics: List[Tuple[str, str]], dropna: bool = True) -> pd.DataFrame:
+        """
+        One row per group, sorted by key (missing keys last): the key columns,
+        "size" and one "<column>_<metric>" column per requested metric.
+        """
+        aggregations = ["count(*) AS size"]
+        for column, metric in metrics:
+            x = quote(column)
+            value = f"CAST({x} AS DOUBLE)"
+            expr = {
+                "count": f"count({x})",
+                "nunique": f"count(DISTINCT {x})",
+                "sum": f"sum({value}) FILTER (WHERE NOT isnan({value}))",
+                "mean": f"avg({value}) FILTER (WHERE NOT isnan({value}))",
+                "median": f"median({value}) FILTER (WHERE NOT isnan({value}))",
+                "min": f"min({value}) FILTER (WHERE NOT isnan({value}))",
+                "max": f"max({value}) FILTER (WHERE NOT isnan({value}))",
+                "std": f"stddev_samp({value}) FILTER (WHERE NOT isnan({value}))",
+                "var": f"var_samp({value}) FILTER (WHERE NOT isnan({value}))",
+            }[metric]
+            if metric == "sum":
+                # pandas sums of empty groups are 0, not missing
+                expr = f"coalesce({expr}, 0)"
+            aggregations.append(f"{expr} AS {quote(f'{column}_{metric}')}")
+        key_list = ", ".join(quote(k) for k in keys)
+        where = " AND ".join(f"{quote(k)} IS NOT NULL" for k in keys) if dropna else "TRUE"
+        return self._frame(f"SELECT {key_list}, {', '.join(aggregations)} FROM data WHERE {where} "
+                           f"GROUP BY {key_list} ORDER BY {key_list} NULLS LAST")
+
+
+def sample_source(path: str, rows: int = SAMPLE_ROWS,
+                  na_values: Optional[List[str]] = None) -> Tuple[pd.DataFrame, int]:
+    """
+    Random sample of a CSV or Parquet file, read without loading the whole file.
+
+    Returns:
+        (sample DataFrame, total number of rows in the file)
+    """
+    source = scan(path, na_values)
+    cursor = _connection().cursor()
+    try:
+        total = cursor.execute(f"SELECT count(*) FROM {source}").fetchall()[0][0]
+        sample = cursor.execute(f"SELECT * FROM {source} USING SAMPLE reservoir({int(rows)} ROWS) "
+                                f"REPEATABLE (0)").df()
+    finally:
+        cursor.close()
+    return sample, int(total)
+
+
+def convert_to_parquet(path: str, target: str, casts: Optional[Dict[str, str]] = None,
+                       date_formats: Optional[Dict[str, str]] = None,
+                       na_values: Optional[List[str]] = None) -> str:
+    """
+    Convert a CSV to Parquet once (streaming, out of core) so later queries scan columns.
+    Values that fail a cast become missing, as with pandas' errors="coerce".
+
+    Args:
+        path: Source CSV
+        target: Parquet file to write
+        casts: Column -> DuckDB type for columns read as text that hold numbers
+        date_formats: Column -> strptime format for text columns that hold dates. A column
+            without a format stays text: DuckDB's own cast would silently drop non-ISO dates
+        na_values: Strings read as missing values
+    """
+    casts, date_formats = casts or {}, date_formats or {}
+    source = scan(path, na_values)
+    cursor = _connection().cursor()
+
+    def column(name: str) -> str:
+        x = quote(name)
+        if date_formats.get(name):
+            fmt = date_formats[name].replace("'", "''")
+            return f"try_strptime({x}, '{fmt}') AS {x}"
+        if name in casts:
+            return f"TRY_CAST({x} AS {casts[name]}) AS {x}"
+        return x
+
+    try:
+        schema = [row[0] for row in cursor.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()]
+        select = ", ".join(column(c) for c in schema)
+        partial = target + ".tmp"
+        escaped = partial.replace("'", "''")
+        cursor.execute(f"COPY (SELECT {select} FROM {source}) TO '{escaped}' (FORMAT parquet)")
+        os.replace(partial, target)
+    finally:
+        cursor.close()
+    return target
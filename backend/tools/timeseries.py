@@ -0,0 +1,343 @@
+"""
+Time Series tool - Resampling and rolling statistics over a datetime column.
+
+Rows are assigned to time buckets (hour, day, week, month, ... optionally
+multiplied, e.g. 15min or 2W) with integer arithmetic on the timestamps. The bucket codes are cached per dataset, time
+column and frequency, and aggregation reuses the groupby engine. Work after
+the first call is one vectorized pass over a column, and everything after
+that (rolling windows, summaries, plots) scales with the number of buckets,
+not the number of rows.
+"""
+import re
+import json
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from langchain_core.tools import tool
+from .context import get_dataframe
+from .filters import filterable
+from .limits import budgeted
+from .shaping import bounded
+from .cache import frame_cache
+from .groupby import GroupIndex, aggregate, NUMERIC_METRICS, ANY_METRICS
+from .utils import find_column_match
+
+# Buckets with a fixed length, in nanoseconds
+FIXED_FREQS = {"s": 10**9, "min": 60 * 10**9, "h": 3600 * 10**9, "D": 86400 * 10**9}
+# Calendar buckets (W, M, Q, Y) are pandas periods
+FREQ_ORDER = ["s", "min", "h", "D", "W", "M", "Q", "Y"]
+FREQ_ALIASES = {
+    "second": "s", "seconds": "s", "sec": "s", "S": "s",
+    "minute": "min", "minutes": "min", "T": "min", "m": "min",
+    "hour": "h", "hours": "h", "hourly": "h", "H": "h",
+    "day": "D", "days": "D", "daily": "D", "d": "D",
+    "week": "W", "weeks": "W", "weekly": "W", "w": "W",
+    "month": "M", "months": "M", "monthly": "M", "MS": "M", "ME": "M",
+    "quarter": "Q", "quarterly": "Q", "q": "Q", "QS": "Q", "QE": "Q",
+    "year": "Y", "years": "Y", "yearly": "Y", "annual": "Y", "A": "Y", "y": "Y", "YS": "Y", "YE": "Y",
+}
+# Optional integer multiplier and a unit: "15min", "2 W", "1D"
+FREQ_PATTERN = re.compile(r"^\s*(\d+)?\s*([A-Za-z]+)\s*$")
+# Automatic frequency: the finest one giving at most this many buckets
+TARGET_BUCKETS = 120
+# Refuse frequencies that would create more buckets than this
+MAX_BUCKETS = 10_000
+DEFAULT_MAX_POINTS = 30
+
+
+def datetime_columns(df: pd.DataFrame) -> List[str]:
+    """Names of the datetime64 columns of df."""
+    return [str(c) for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])]
+
+
+def normalize_freq(freq: Optional[str]) -> Optional[str]:
+    """
+    Map user frequency names ("daily", "15min", "2W", "ME") to the ones used here; None for auto.
+    A multiplier is kept ("15min", "2M"); a multiplier of 1 is dropped ("1D" -> "D").
+    """
+    if not freq or str(freq).strip().lower() == "auto":
+        return None
+    match = FREQ_PATTERN.match(str(freq))
+    count, unit = match.groups() if match else (None, str(freq).strip())
+    if unit not in FREQ_ORDER:
+        unit = FREQ_ALIASES.get(unit, FREQ_ALIASES.get(unit.lower(), unit))
+    if match is None or unit not in FREQ_ORDER or (count is not None and int(count) < 1):
+        raise ValueError(f"Unknown frequency '{freq}'. Use one of: {', '.join(FREQ_ORDER)}, "
+                         f"optionally with a multiplier (e.g. 15min, 2W)")
+    count = int(count) if count else 1
+    return unit if count == 1 else f"{count}{unit}"
+
+
+def split_freq(freq: str) -> Tuple[int, str]:
+    """Multiplier and unit of a normalized frequency: "15min" -> (15, "min")."""
+    count, unit = FREQ_PATTERN.match(freq).groups()
+    return int(count or 1), unit
+
+
+def _timestamps(series: pd.Series) -> np.ndarray:
+    """Wall-clock timestamps as int64 nanoseconds (NaT -> iNaT)."""
+    if getattr(series.dt, "tz", None) is not None:
+        series = series.dt.tz_localize(None)
+    return series.to_numpy(dtype="datetime64[ns]").view("i8")
+
+
+def _bucket_keys(stamps: np.ndarray, freq: str) -> Tuple[np.ndarray, int]:
+    """
+    Integer bucket number of every (valid) timestamp; consecutive buckets differ by 1.
+    Multiples of a unit start at midnight of the first day (fixed lengths, as
+    pandas' resample does) or at the first period (calendar units) of the data.
+
+    Returns:
+        (bucket numbers, where bucket 0 starts: nanoseconds or a period ordinal)
+    """
+    count, unit = split_freq(freq)
+    if unit in FIXED_FREQS:
+        day = FIXED_FREQS["D"]
+        origin = int(stamps.min()) // day * day if count > 1 else 0
+        return (stamps - origin) // (FIXED_FREQS[unit] * count), origin
+    ordinals = pd.DatetimeIndex(stamps.view("datetime64[ns]")).to_period(unit).asi8
+    origin = int(ordinals.min()) if count > 1 else 0
+    return (ordinals - origin) // count, origin
+
+
+def _bucket_labels(first_key: int, size: int, freq: str, origin: int = 0) -> pd.Index:
+    """Start of every bucket: a Timestamp, or the first period of a calendar bucket."""
+    count, unit = split_freq(freq)
+    keys = first_key + np.arange(size, dtype=np.int64)
+    if unit in FIXED_FREQS:
+        return pd.to_datetime(origin + keys * FIXED_FREQS[unit] * count)
+    return pd.PeriodIndex.from_ordinals(origin + keys * count, freq=unit)
+
+
+def choose_freq(df: pd.DataFrame, time_col: str) -> str:
+    """Finest frequency that splits the time range into at most TARGET_BUCKETS buckets."""
+    series = df[time_col]
+    start, end = series.min(), series.max()
+    if pd.isna(start):
+        return "D"
+    span = (end - start).total_seconds() * 10**9
+    approx = {"W": 7 * FIXED_FREQS["D"], "M": 30.44 * FIXED_FREQS["D"],
+              "Q": 91.3 * FIXED_FREQS["D"], "Y": 365.25 * FIXED_FREQS["D"]}
+    for freq in FREQ_ORDER:
+        length = FIXED_FREQS.get(freq) or approx[freq]
+        if span / length + 1 <= TARGET_BUCKETS:
+            return freq
+    return "Y"
+
+
+def build_time_buckets(df: pd.DataFrame, time_col: str, freq: str) -> GroupIndex:
+    """
+    Assign every row to a time bucket. Buckets cover the whole range from the
+    first to the last timestamp, including empty ones, in chronological order.
+    """
+    stamps = _timestamps(df[time_col])
+    valid = stamps != np.iinfo(np.int64).min
+    codes = np.full(len(stamps), -1, dtype=np.int64)
+    if not valid.any():
+        return GroupIndex(keys=[time_col], codes=codes, labels=pd.DataFrame({time_col: []}),
+                          sizes=np.zeros(0, dtype=np.int64))
+
+    keys, origin = _bucket_keys(stamps[valid], freq)
+    first, last = int(keys.min()), int(keys.max())
+    size = last - first + 1
+    if size > MAX_BUCKETS:
+        raise ValueError(f"Frequency '{freq}' would create {size} buckets (max {MAX_BUCKETS}); "
+                         f"use a coarser frequency")
+    codes[valid] = keys - first
+    return GroupIndex(
+        keys=[time_col],
+        codes=codes,
+        labels=pd.DataFrame({time_col: _bucket_labels(first, size, freq, origin)}),
+        sizes=np.bincount(codes[valid], minlength=size),
+    )
+
+
+def get_time_buckets(df: pd.DataFrame, time_col: str, freq: str) -> GroupIndex:
+    """Return the cached time buckets of df for (time_col, freq)."""
+    cache = frame_cache(df, "timeseries")
+    return cache.get_or_compute((time_col, freq), lambda: build_time_buckets(df, time_col, freq))
+
+
+def resample(df: pd.DataFrame, time_col: str, freq: str, value_col: Optional[str] = None,
+             agg: str = "mean") -> pd.Series:
+    """
+    Aggregate value_col per time bucket (row counts when value_col is None).
+
+    Returns:
+        Series indexed by bucket label (Timestamp or Period), one entry per bucket
+    """
+    buckets = get_time_buckets(df, time_col, freq)
+    if value_col is None:
+        values = buckets.sizes
+    else:
+        values = aggregate(df[value_col], buckets, agg)
+    return pd.Series(values, index=pd.Index(buckets.labels[time_col]), name=value_col or "rows")
+
+
+def resample_by(df: pd.DataFrame, time_col: str, freq: str, value_col: Optional[str],
+                agg: str, hue_col: str, max_levels: int = 10) -> pd.DataFrame:
+    """
+    Like resample, with one column per level of hue_col (the max_levels most frequent).
+    Reuses the cached time buckets; each level costs one masked aggregation.
+    """
+    buckets = get_time_buckets(df, time_col, freq)
+    valid = buckets.codes >= 0
+    levels = df[hue_col].value_counts().head(max_levels)
+    columns = {}
+    for level in levels[levels > 0].index:
+        mask = (df[hue_col] == level).to_numpy(dtype=bool, na_value=False)
+        if value_col is None:
+            columns[str(level)] = np.bincount(buckets.codes[valid & mask], minlength=buckets.n_groups)
+        else:
+            columns[str(level)] = aggregate(df[value_col].where(mask), buckets, agg)
+    return pd.DataFrame(columns, index=pd.Index(buckets.labels[time_col]))
+
+
+def bucket_label(label) -> str:
+    """Readable bucket label: "2024-01-05", "2024-01-05 13:00", "2024-01", "2024Q1"."""
+    if isinstance(label, pd.Period):
+        return str(label.start_time.date()) if label.freqstr.startswith("W") else str(label)
+    if label.hour == 0 and label.minute == 0 and label.second == 0:
+        return str(label.date())
+    return label.strftime("%Y-%m-%d %H:%M:%S" if label.second else "%Y-%m-%d %H:%M")
+
+
+def bucket_timestamps(index: pd.Index) -> pd.DatetimeIndex:
+    """Bucket start times, for plotting."""
+    return index.to_timestamp() if isinstance(index, pd.PeriodIndex) else pd.DatetimeIndex(index)
+
+
+def _rounded(value) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else round(value, 4)
+
+
+def summarize_series(series: pd.Series) -> dict:
+    """Compact description of a bucketed series: extremes, first/last, change and trend."""
+    values = series.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    if not present.any():
+        return {}
+    positions = np.flatnonzero(present)
+    peak, low = int(np.nanargmax(values)), int(np.nanargmin(values))
+    first, last = values[positions[0]], values[positions[-1]]
+    # Least-squares slope per bucket over the non-empty buckets
+    slope = np.polyfit(positions, values[present], 1)[0] if len(positions) > 1 else 0.0
+    return {
+        "mean": _rounded(np.nanmean(values)),
+        "max": {"bucket": bucket_label(series.index[peak]), "value": _rounded(values[peak])},
+        "min": {"bucket": bucket_label(series.index[low]), "value": _rounded(values[low])},
+        "first": _rounded(first),
+        "last": _rounded(last),
+        "change_pct": _rounded((last - first) / abs(first) * 100) if first else None,
+        "trend_per_bucket": _rounded(slope),
+    }
+
+
+def _points(series: pd.Series, max_points: int) -> dict:
+    """The most recent max_points buckets as {label: value}."""
+    tail = series.iloc[-max_points:]
+    return {bucket_label(k): _rounded(v) for k, v in tail.items()}
+
+
+def _resolve_time_column(df: pd.DataFrame, requested: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    """Return (time column, error message)."""
+    candidates = datetime_columns(df)
+    if not requested:
+        if not candidates:
+            return None, "No datetime columns found in dataset"
+        return candidates[0], None
+    matched = find_column_match(requested, [str(c) for c in df.columns], cutoff=0.6)
+    if matched is None:
+        return None, f"Column '{requested}' not found. Datetime columns: {candidates}"
+    if matched not in candidates:
+        return None, f"Column '{matched}' is not a datetime column. Datetime columns: {candidates}"
+    return matched, None
+
+
+@tool
+@bounded
+@filterable
+@budgeted
+def tool_timeseries(input_str: str = "") -> str:
+    """
+    Analyzes how a value evolves over time using a datetime column: resamples rows into
+    time buckets, aggregates each bucket and optionally adds a rolling statistic.
+    Returns a summary (peak, lowest bucket, first/last, % change, trend) and recent buckets.
+
+    Input JSON (all fields optional):
+    {
+        "time": "timestamp",  # Datetime column (default: first datetime column)
+        "value": "amount",  # Column to aggregate (default: number of rows per bucket)
+        "freq": "D",  # s, min, h, D, W, M, Q, Y, optionally multiplied ("15min", "2W"), or "auto" (default)
+        "agg": "mean",  # count, sum, mean, median, min, max, std, var, nunique
+        "rolling": 7,  # Rolling window size, in buckets
+        "max_points": 30  # Number of most recent buckets listed
+    }
+
+    Examples:
+    - "" → rows per bucket over the first datetime column
+    - {"value": "amount", "agg": "sum", "freq": "M"} → monthly totals
+    - {"value": "latency", "freq": "h", "rolling": 24} → hourly mean with a 24h rolling mean
+    """
+    df = get_dataframe()
+    try:
+        params = json.loads(input_str) if input_str and input_str.strip() else {}
+    except json.JSONDecodeError:
+        return json.dumps({"error": "Invalid JSON input"})
+
+    time_col, error = _resolve_time_column(df, params.get("time"))
+    if error:
+        return json.dumps({"error": error})
+
+    value_col = params.get("value")
+    agg = str(params.get("agg", "mean" if value_col else "count")).lower()
+    if value_col:
+        value_col = find_column_match(value_col, [str(c) for c in df.columns], cutoff=0.6)
+        if value_col is None:
+            return json.dumps({"error": f"Column '{params.get('value')}' not found",
+                               "available_columns": [str(c) for c in df.columns]})
+        if agg not in NUMERIC_METRICS + ANY_METRICS:
+            return json.dumps({"error": f"Unknown agg '{agg}'"})
+        if agg in NUMERIC_METRICS and not pd.api.types.is_numeric_dtype(df[value_col]):
+            return json.dumps({"error": f"Column '{value_col}' is not numeric; use agg 'count' or 'nunique'"})
+
+    try:
+        freq = normalize_freq(params.get("freq")) or choose_freq(df, time_col)
+        series = resample(df, time_col, freq, value_col, agg)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    if series.empty:
+        return json.dumps({"error": f"Column '{time_col}' has no valid timestamps"})
+
+    max_points = max(1, min(int(params.get("max_points", DEFAULT_MAX_POINTS)), 500))
+    sizes = get_time_buckets(df, time_col, freq).sizes
+    result = {
+        "time_column": time_col,
+        "value_column": value_col,
+        "agg": agg if value_col else "count",
+        "freq": freq,
+        "start": bucket_label(series.index[0]),
+        "end": bucket_label(series.index[-1]),
+        "buckets": int(len(series)),
+        "empty_buckets": int((sizes == 0).sum()),
+        "rows": int(sizes.sum()),
+        "missing_timestamps": int(df[time_col].isna().sum()),
+        "summary": summarize_series(series),
+        "points": _points(series, max_points),
+    }
+
+    window = params.get("rolling")
+    if window:
+        window = max(1, int(window))
+        rolling = series.rolling(window, min_periods=1).mean()
+        result["rolling"] = {
+            "window": window,
+            "last": _rounded(rolling.iloc[-1]),
+            "points": _points(rolling, max_points),
+        }
+
+    if len(series) > max_points:
+        result["note"] = (f"Showing the last {max_points} of {len(series)} buckets; "
+                          f"use a coarser freq or max_points for more.")
+    return json.dumps(result)
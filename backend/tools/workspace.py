@@ -0,0 +1,134 @@
+"""
+Workspace of named datasets for EDA Agent tools.
+
+A request can bring several datasets (e.g. "orders" and "customers"). The
+workspace maps their names to DataFrames; one of them is the current
+dataframe and the others are reachable with the "dataset" parameter that
+every tool accepts. Datasets derived during the request (join results)
+are added to the workspace under a new name so later tool calls can use them.
+
+Each dataset also has a stable key (the registry id, a content hash), used
+to cache derived datasets across requests. The store that holds them is
+pluggable: the API passes the dataset registry, which enforces the memory
+budget; without one, a small in-process LRU is used.
+"""
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Protocol
+import pandas as pd
+
+from .context import get_dataframe, get_workspace
+from .sql_engine import source_of
+from .utils import find_column_match
+
+# Name of the current dataframe when no workspace was set up (scripts, benchmarks)
+DEFAULT_NAME = "data"
+# Derived datasets kept by the fallback store
+LOCAL_STORE_ENTRIES = 4
+
+
+class DatasetStore(Protocol):
+    """Where derived datasets are cached, keyed by a hash of their inputs."""
+
+    def get(self, key: str) -> Optional[pd.DataFrame]: ...
+
+    def put(self, key: str, df: pd.DataFrame, name: str) -> None: ...
+
+
+class LocalStore:
+    """In-process LRU of derived datasets, used when no registry is configured."""
+
+    def __init__(self, max_entries: int = LOCAL_STORE_ENTRIES):
+        self.max_entries = max_entries
+        self._frames: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            df = self._frames.get(key)
+            if df is not None:
+                self._frames.move_to_end(key)
+            return df
+
+    def put(self, key: str, df: pd.DataFrame, name: str) -> None:
+        with self._lock:
+            self._frames[key] = df
+            self._frames.move_to_end(key)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+
+
+_local_store = LocalStore()
+
+
+def dataset_name(filename: Optional[str], fallback: str) -> str:
+    """Short identifier-like name for a dataset: 'Orders 2024.csv' -> 'orders_2024'."""
+    stem = (filename or "").rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    name = re.sub(r"\W+", "_", stem.lower()).strip("_")
+    return name or fallback
+
+
+class Workspace:
+    """
+    Named datasets visible to the tools during one request.
+
+    Args:
+        frames: name -> DataFrame, in the order they were added
+        keys: name -> stable key of the dataset (defaults to the name)
+        store: Cache for derived datasets (defaults to an in-process LRU)
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], keys: Optional[Dict[str, str]] = None,
+                 store: Optional[DatasetStore] = None):
+        self._frames: Dict[str, pd.DataFrame] = dict(frames)
+        self._keys: Dict[str, str] = {name: (keys or {}).get(name, name) for name in frames}
+        self.store: DatasetStore = store or _local_store
+        self._lock = threading.Lock()
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._frames)
+
+    def key(self, name: str) -> str:
+        return self._keys[name]
+
+    def resolve(self, name: str) -> Optional[str]:
+        """Return the workspace name matching name (case-insensitive, typo tolerant), or None."""
+        return find_column_match(name, self.names, cutoff=0.6)
+
+    def frame(self, name: str) -> pd.DataFrame:
+        """Return the DataFrame called name; raises KeyError listing the available names."""
+        matched = self.resolve(name)
+        if matched is None:
+            raise KeyError(f"Dataset '{name}' not found. Available datasets: {', '.join(self.names)}")
+        return self._frames[matched]
+
+    def add(self, name: str, df: pd.DataFrame, key: Optional[str] = None) -> str:
+        """Add a derived dataset, renaming it if the name is taken by another frame. Returns its name."""
+        with self._lock:
+            base, suffix = name, 2
+            while name in self._frames and self._frames[name] is not df:
+                name, suffix = f"{base}_{suffix}", suffix + 1
+            self._frames[name] = df
+            self._keys[name] = key or name
+        return name
+
+    def summary(self) -> List[Dict]:
+        entries = []
+        for name, df in self._frames.items():
+            source = source_of(df)
+            entry = {"name": name, "rows": int(source.rows if source else df.shape[0]),
+                     "columns": int(df.shape[1])}
+            if source is not None:
+                entry["sample_rows"] = int(df.shape[0])
+            entries.append(entry)
+        return entries
+
+
+def current_workspace() -> Workspace:
+    """The request's workspace, or a one-dataset workspace around the current dataframe."""
+    workspace = get_workspace()
+    if workspace is None:
+        workspace = Workspace({DEFAULT_NAME: get_dataframe()})
+    return workspace
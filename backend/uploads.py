@@ -0,0 +1,440 @@
+"""
+Chunked, resumable CSV uploads for EDA Agent.
+
+A client opens an upload session, sends the file in ordered chunks and
+completes the session. Chunks are spooled to disk and fed to an incremental
+CSV parser as they arrive, so neither the raw upload nor a second copy of it
+is held in memory. If a connection drops, the client asks for the current
+offset and resumes from there.
+
+Datasets are identified by the SHA-256 of their bytes: uploading a file the
+server already holds returns the existing dataset id without re-parsing.
+
+Uploads of at least EDA_OUT_OF_CORE_MIN_MB (when the SQL engine is available)
+are not parsed into memory: on completion the file is converted to Parquet
+and only a sample is loaded, while aggregations scan the whole file.
+
+With several worker processes (EDA_SHARED_DIR), consecutive chunks may reach
+different workers. Sessions are then described by a small JSON file next
+to the spool file, the offset is the spool file's size, and the file is
+hashed and parsed once on completion instead of while chunks arrive.
+
+Finished uploads are kept as uploads/ds_<hash>.csv (or .parquet), the file
+an evicted dataset is loaded again from. They are deleted once unused for
+EDA_UPLOAD_FILE_TTL_SECONDS, and the least recently used ones go first when
+they take more than EDA_UPLOADS_MAX_MB (see cleanup_uploads).
+"""
+import os
+import glob
+import json
+import time
+import uuid
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock on chunks
+    fcntl = None
+
+from datasets import Dataset, BACKEND_DIR, get_dataset, has_dataset, register_dataset
+from ingest import (IncrementalCSVParser, parse_csv, coerce_numeric_columns, prepare_dataframe,
+                    load_out_of_core)
+from tools.cache import SHARED_DIR
+from tools.sql_engine import DUCKDB_AVAILABLE, ENGINE, OUT_OF_CORE_MIN_MB
+
+# --- Configuration ---
+UPLOADS_DIR = os.getenv("EDA_UPLOADS_DIR", os.path.join(BACKEND_DIR, "uploads"))
+os.makedirs(UPLOADS_DIR, exist_ok=True)
+# Suggested chunk size returned to clients
+UPLOAD_CHUNK_SIZE = int(os.getenv("EDA_UPLOAD_CHUNK_SIZE", str(4 * 1024 * 1024)))
+# Maximum accepted upload size
+MAX_UPLOAD_BYTES = int(os.getenv("EDA_MAX_UPLOAD_MB", "1024")) * 1024 * 1024
+# Incomplete sessions idle for longer than this are discarded
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("EDA_UPLOAD_SESSION_TTL_SECONDS", "3600"))
+# Keep session state on disk so any worker process can take the next chunk
+SHARED_SESSIONS = bool(SHARED_DIR)
+# Block size used to hash a spooled upload on completion
+HASH_BLOCK_SIZE = 1024 * 1024
+# Finished uploads not used for longer than this are deleted
+UPLOAD_FILE_TTL_SECONDS = int(os.getenv("EDA_UPLOAD_FILE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Disk space for finished uploads; the least recently used are deleted beyond it
+UPLOADS_MAX_MB = float(os.getenv("EDA_UPLOADS_MAX_MB", "10240"))
+# Minimum seconds between two cleanups of the uploads directory
+UPLOAD_CLEANUP_INTERVAL_SECONDS = 60
+# Files written this recently are never deleted (e.g. a Parquet conversion in progress)
+UPLOAD_FILE_GRACE_SECONDS = 60
+
+
+def use_out_of_core(size: Optional[int]) -> bool:
+    """Whether an upload of size bytes is sampled from Parquet instead of parsed in memory."""
+    return (size is not None and size >= OUT_OF_CORE_MIN_MB * 1024 * 1024
+            and DUCKDB_AVAILABLE and ENGINE != "pandas")
+
+
+class UploadError(Exception):
+    """Invalid upload request. status_code is the HTTP status to return."""
+
+    def __init__(self, message: str, status_code: int = 400, expected_offset: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.expected_offset = expected_offset
+
+
+def dataset_id_for_digest(digest: str) -> str:
+    """Dataset id derived from the SHA-256 hex digest of the raw file."""
+    return f"ds_{digest[:16]}"
+
+
+def file_sha256(path: str) -> str:
+    """Hex SHA-256 of a file, read in blocks."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+class UploadSession:
+    """State of one in-progress upload."""
+
+    def __init__(self, filename: str, size: Optional[int], sha256: Optional[str],
+                 upload_id: Optional[str] = None):
+        self.id = upload_id or uuid.uuid4().hex
+        self.filename = filename
+        self.size = size
+        self.expected_sha256 = sha256.lower() if sha256 else None
+        self.path = os.path.join(UPLOADS_DIR, f"{self.id}.part")
+        self.state_path = os.path.join(UPLOADS_DIR, f"{self.id}.json")
+        self.updated_at = time.time()
+        self.out_of_core = use_out_of_core(size)
+        self.shared = SHARED_SESSIONS
+        # Shared sessions are hashed and parsed on completion: chunks may go to other workers
+        self._hasher = None if self.shared else hashlib.sha256()
+        self._parser = None if self.out_of_core or self.shared else IncrementalCSVParser()
+        # Append mode: other workers' chunks may have been added to the file since our last write
+        self._file = open(self.path, "ab" if self.shared else "wb")
+        self.offset = self._file.tell()
+        self._busy = threading.Lock()
+        if self.shared and upload_id is None:
+            with open(self.state_path, "w") as f:
+                json.dump({"filename": filename, "size": size, "sha256": self.expected_sha256}, f)
+
+    @classmethod
+    def resume(cls, upload_id: str) -> Optional["UploadSession"]:
+        """Open a shared session created by another worker, or return None if it is gone."""
+        state_path = os.path.join(UPLOADS_DIR, f"{upload_id}.json")
+        try:
+            with open(state_path) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(state["filename"], state["size"], state["sha256"], upload_id=upload_id)
+
+    def sync(self) -> bool:
+        """Pick up chunks written by other workers. Returns False if the session is gone."""
+        if not self.shared:
+            return True
+        if not os.path.exists(self.state_path):
+            return False
+        self.offset = os.path.getsize(self.path)
+        self.updated_at = os.path.getmtime(self.path)
+        return True
+
+    def begin(self, offset: int):
+        """Claim the session for one chunk starting at offset."""
+        if not self._busy.acquire(blocking=False):
+            raise UploadError("Another chunk is being written to this upload", 409, self.offset)
+        if self.shared and fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._busy.release()
+                raise UploadError("Another chunk is being written to this upload", 409, self.offset)
+        if not self.sync():
+            self.end()
+            raise UploadError("Upload not found or expired", 404)
+        if offset != self.offset:
+            self.end()
+            raise UploadError(f"Expected offset {self.offset}, got {offset}", 409, self.offset)
+
+    def write(self, data: bytes):
+        """Append bytes to the spool file, hash and parser."""
+        if self.offset + len(data) > MAX_UPLOAD_BYTES:
+            raise UploadError("Upload exceeds the maximum allowed size", 413, self.offset)
+        self._file.write(data)
+        if self._hasher is not None:
+            self._hasher.update(data)
+        if self._parser is not None:
+            self._parser.feed(data)
+        self.offset += len(data)
+        self.updated_at = time.time()
+
+    def end(self):
+        """Release the session after a chunk."""
+        if not self._file.closed:
+            self._file.flush()
+            if self.shared and fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._busy.release()
+
+    @property
+    def busy(self) -> bool:
+        return self._busy.locked()
+
+    def finish(self) -> Dataset:
+        """Finalize the upload: verify, deduplicate, parse and register."""
+        if self.size is not None and self.offset != self.size:
+            raise UploadError(f"Upload incomplete: received {self.offset} of {self.size} bytes",
+                              409, self.offset)
+        self._file.close()
+        digest = self._hasher.hexdigest() if self._hasher is not None else file_sha256(self.path)
+        if self.expected_sha256 and digest != self.expected_sha256:
+            self.discard()
+            raise UploadError("SHA-256 mismatch; the upload was corrupted", 400)
+
+        dataset_id = dataset_id_for_digest(digest)
+        existing = get_dataset(dataset_id)
+        if existing is not None:
+            print(f"[DEBUG] Upload {self.id} deduplicated to dataset {dataset_id}")
+            self.discard()
+            return existing
+
+        final_path = os.path.join(UPLOADS_DIR, f"{dataset_id}.csv")
+        if self.out_of_core:
+            parquet_path = os.path.join(UPLOADS_DIR, f"{dataset_id}.parquet")
+            try:
+                df, rows = load_out_of_core(self.path, parquet_path)
+            except Exception as e:
+                # e.g. an encoding DuckDB cannot read; parse the spooled file in memory instead
+                print(f"[DEBUG] Out-of-core load failed, parsing in memory: {e}")
+            else:
+                print(f"[DEBUG] Loaded large CSV: {self.filename}, {rows} rows, sample shape: {df.shape}")
+                # The Parquet file replaces the raw upload
+                self.discard()
+                return register_dataset(dataset_id, df, filename=self.filename, source_path=parquet_path)
+
+        df = self._parser.finish(self.path) if self._parser is not None else parse_csv(self.path)
+        print(f"[DEBUG] Loaded custom CSV: {self.filename}, shape: {df.shape}")
+        df = prepare_dataframe(coerce_numeric_columns(df))
+
+        os.replace(self.path, final_path)
+        self._remove_state()
+        return register_dataset(dataset_id, df, filename=self.filename, source_path=final_path)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Close and delete the spool file."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self._remove_state()
+
+    def _remove_state(self):
+        if self.shared and os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def to_dict(self) -> Dict:
+        return {
+            "upload_id": self.id,
+            "filename": self.filename,
+            "offset": self.offset,
+            "size": self.size,
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+        }
+
+
+class UploadManager:
+    """Tracks open upload sessions and expires abandoned ones."""
+
+    def __init__(self):
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self._cleaned_at = 0.0
+
+    def create(self, filename: str, size: Optional[int] = None,
+               sha256: Optional[str] = None) -> UploadSession:
+        if size is not None and size > MAX_UPLOAD_BYTES:
+            raise UploadError("Upload exceeds the maximum allowed size", 413)
+        session = UploadSession(filename, size, sha256)
+        with self._lock:
+            self._purge_expired()
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        """Return an open session, attaching to one created by another worker if needed."""
+        with self._lock:
+            self._purge_expired()
+            session = self._sessions.get(upload_id)
+            if session is None and SHARED_SESSIONS and upload_id.isalnum():
+                session = UploadSession.resume(upload_id)
+                if session is not None:
+                    self._sessions[upload_id] = session
+            return session
+
+    def complete(self, upload_id: str) -> Dataset:
+        session = self.get(upload_id)
+        if session is None:
+            raise UploadError("Upload not found or expired", 404)
+        session.begin(session.offset)
+        try:
+            dataset = session.finish()
+        except UploadError as e:
+            # An incomplete upload can still be resumed; anything else is final
+            if e.status_code != 409:
+                self._drop(upload_id)
+            raise
+        except Exception:
+            session.discard()
+            self._drop(upload_id)
+            raise
+        finally:
+            session.end()
+        self._drop(upload_id)
+        return dataset
+
+    def _drop(self, upload_id: str):
+        with self._lock:
+            self._sessions.pop(upload_id, None)
+
+    def _purge_expired(self):
+        """Drop idle sessions. Caller must hold the lock."""
+        now = time.time()
+        for upload_id, session in list(self._sessions.items()):
+            if session.busy:
+                continue
+            if not session.sync():
+                # Completed or discarded by another worker
+                session.close()
+                del self._sessions[upload_id]
+            elif now - session.updated_at > UPLOAD_SESSION_TTL_SECONDS:
+                session.discard()
+                del self._sessions[upload_id]
+        if SHARED_SESSIONS:
+            # Sessions abandoned in other workers
+            for state_path in glob.glob(os.path.join(UPLOADS_DIR, "*.json")):
+                spool_path = state_path[:-len(".json")] + ".part"
+                try:
+                    idle = now - os.path.getmtime(spool_path if os.path.exists(spool_path) else state_path)
+                    if idle > UPLOAD_SESSION_TTL_SECONDS:
+                        for path in (spool_path, state_path):
+                            if os.path.exists(path):
+                                os.remove(path)
+                except OSError:
+                    pass
+        if now - self._cleaned_at > UPLOAD_CLEANUP_INTERVAL_SECONDS:
+            self._cleaned_at = now
+            cleanup_uploads()
+
+
+def cleanup_uploads() -> List[str]:
+    """
+    Delete finished uploads unused for UPLOAD_FILE_TTL_SECONDS, then the least
+    recently used ones while all of them take more than UPLOADS_MAX_MB.
+
+    A file counts as used when it was written or when its dataset is held
+    in memory: the mtime of those is refreshed here, so the cleanups of
+    other workers keep them too. Datasets of deleted files can no longer
+    be reloaded after eviction and have to be uploaded again.
+
+    Returns:
+        Paths of the deleted files
+    """
+    now = time.time()
+    files, used = [], 0
+    for path in glob.glob(os.path.join(UPLOADS_DIR, "ds_*")):
+        dataset_id = os.path.splitext(os.path.basename(path))[0]
+        try:
+            if has_dataset(dataset_id):
+                os.utime(path)
+            stat = os.stat(path)
+        except OSError:
+            continue
+        used += stat.st_size
+        if now - stat.st_mtime > UPLOAD_FILE_GRACE_SECONDS:
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    deleted = []
+    budget = UPLOADS_MAX_MB * 1024 * 1024
+    for mtime, size, path in sorted(files):
+        if now - mtime <= UPLOAD_FILE_TTL_SECONDS and used <= budget:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        used -= size
+        deleted.append(path)
+        print(f"[DEBUG] Deleted unused upload {os.path.basename(path)} ({size / 1024 / 1024:.1f} MB)")
+    return deleted
+
+
+def ingest_bytes(contents: bytes, filename: Optional[str] = None) -> Dataset:
+    """
+    Register a dataset from an in-memory upload (the single-request /ask path).
+    Files already held by the server are not parsed again.
+    """
+    dataset_id = dataset_id_for_digest(hashlib.sha256(contents).hexdigest())
+    existing = get_dataset(dataset_id)
+    if existing is not None:
+        print(f"[DEBUG] Reusing parsed dataset {dataset_id} for {filename}")
+        return existing
+
+    df = parse_csv(contents)
+    print(f"[DEBUG] Loaded custom CSV: {filename}, shape: {df.shape}")
+    print(f"[DEBUG] Initial dtypes: {df.dtypes.to_dict()}")
+
+    # Try to convert columns to numeric when possible
+    df = coerce_numeric_columns(df)
+
+    print(f"[DEBUG] Final dtypes after conversion: {df.dtypes.to_dict()}")
+    print(f"[DEBUG] Numeric columns: {df.select_dtypes(include=['number']).columns.tolist()}")
+
+    df = prepare_dataframe(df)
+    return register_dataset(dataset_id, df, filename=filename)
+
+
+def ingest_file(path: str) -> Tuple[Dataset, bool]:
+    """
+    Register a dataset from a CSV file on disk (the batch CLI path).
+    As with uploads, files already held (in memory or in the shared store)
+    are not parsed again, and large files are converted to Parquet and sampled.
+
+    Returns:
+        Tuple of (dataset, True if the file was parsed now rather than reused)
+    """
+    dataset_id = dataset_id_for_digest(file_sha256(path))
+    existing = get_dataset(dataset_id)
+    if existing is not None:
+        print(f"[DEBUG] Reusing parsed dataset {dataset_id} for {path}")
+        return existing, False
+
+    filename = os.path.basename(path)
+    if use_out_of_core(os.path.getsize(path)):
+        parquet_path = os.path.join(UPLOADS_DIR, f"{dataset_id}.parquet")
+        try:
+            df, rows = load_out_of_core(path, parquet_path)
+        except Exception as e:
+            print(f"[DEBUG] Out-of-core load failed, parsing in memory: {e}")
+        else:
+            print(f"[DEBUG] Loaded large CSV: {path}, {rows} rows, sample shape: {df.shape}")
+            return register_dataset(dataset_id, df, filename=filename, source_path=parquet_path), True
+
+    # Same parser as chunked uploads: the fast C engine, falling back to parse_csv
+    parser = IncrementalCSVParser()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b""):
+            parser.feed(chunk)
+    df = parser.finish(path)
+    print(f"[DEBUG] Loaded CSV: {path}, shape: {df.shape}")
+    df = prepare_dataframe(coerce_numeric_columns(df))
+    return register_dataset(dataset_id, df, filename=filename, source_path=path), True
+
+
+# Shared manager used by the API
+upload_manager = UploadManager()
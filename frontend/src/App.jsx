@@ -1,8 +1,9 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import pokerCard from './assets/poker-card.png'
 import { Button } from './components/ui/button'
 import { Textarea } from './components/ui/textarea'
 import { Card, CardContent } from './components/ui/card'
+import { uploadDataset } from './lib/upload'
 
 // Get API URL from environment variable, fallback to localhost
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
@@ -10,7 +11,7 @@ const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000'
 function App() {
   // Function to extract plot URLs from text
   const extractPlotUrl = (text) => {
-    const urlMatch = text.match(/plots\/plot_\w+_\d+\.png/)
+    const urlMatch = text.match(/plots\/plot_\w+\.(?:png|webp)/)
     return urlMatch ? `${API_URL}/${urlMatch[0]}` : null
   }
 
@@ -39,6 +40,14 @@ function App() {
     return localStorage.getItem('eda_uploaded_file_name') || ''
   })
   const [uploadedFile, setUploadedFile] = useState(null) // Store the actual file
+  const [datasetId, setDatasetId] = useState(() => {
+    // Id of the uploaded CSV on the backend, so the file is not re-sent with every question
+    return localStorage.getItem('eda_dataset_id') || ''
+  })
+  // Upload in flight ({ file, controller, promise }), shared by everyone waiting for its dataset id
+  const uploadRef = useRef(null)
+  // Last file the user selected (null once removed)
+  const selectedFileRef = useRef(null)
   const [isDragging, setIsDragging] = useState(false)
   const [copiedMessageIndex, setCopiedMessageIndex] = useState(null)
   const [saveToLocalStorage, setSaveToLocalStorage] = useState(() => {
@@ -102,6 +111,57 @@ function App() {
     localStorage.removeItem('eda_chat_history')
   }
 
+  const rememberDatasetId = (id) => {
+    setDatasetId(id)
+    if (id) {
+      localStorage.setItem('eda_dataset_id', id)
+    } else {
+      localStorage.removeItem('eda_dataset_id')
+    }
+  }
+
+  // Upload file in chunks, or join its upload already in flight. Only the upload of
+  // the selected file may set the dataset id: a newer file aborts the older upload.
+  const startUpload = (file) => {
+    const current = uploadRef.current
+    if (current?.file === file) return current.promise
+    current?.controller.abort()
+    const upload = { file, controller: new AbortController() }
+    upload.promise = uploadDataset(file, API_URL, { signal: upload.controller.signal })
+      .then(
+        (id) => {
+          if (uploadRef.current === upload) rememberDatasetId(id)
+          return id
+        },
+        (e) => {
+          if (uploadRef.current === upload) rememberDatasetId('')
+          throw e
+        },
+      )
+      .finally(() => {
+        if (uploadRef.current === upload) uploadRef.current = null
+      })
+    uploadRef.current = upload
+    return upload.promise
+  }
+
+  const cancelUpload = () => {
+    uploadRef.current?.controller.abort()
+    uploadRef.current = null
+  }
+
+  // Upload the CSV in chunks once and reuse its dataset id for every question
+  const ensureDatasetId = async (force = false) => {
+    if (datasetId && !force) return datasetId
+    if (!uploadedFile) return ''
+    try {
+      return await startUpload(uploadedFile)
+    } catch (e) {
+      console.error('Chunked upload failed, sending the file with the question instead:', e)
+      return ''
+    }
+  }
+
   const askQuestion = async () => {
     if (!question.trim()) return
     
@@ -109,19 +169,32 @@ function App() {
     setError('')
     
     try {
-      const formData = new FormData()
-      formData.append('question', question)
-      formData.append('dataset_type', datasetType)
-      
-      // If custom dataset and file is uploaded, send the file
-      if (datasetType === 'custom' && uploadedFile) {
-        formData.append('file', uploadedFile)
+      const sendQuestion = (id) => {
+        const formData = new FormData()
+        formData.append('question', question)
+        formData.append('dataset_type', datasetType)
+        
+        // If custom dataset, reference the uploaded dataset (or send the file as a fallback)
+        if (datasetType === 'custom' && id) {
+          formData.append('dataset_id', id)
+        } else if (datasetType === 'custom' && uploadedFile) {
+          formData.append('file', uploadedFile)
+        }
+        
+        return fetch(`${API_URL}/ask`, {
+          method: 'POST',
+          body: formData,
+        })
       }
       
-      const response = await fetch(`${API_URL}/ask`, {
-        method: 'POST',
-        body: formData,
-      })
+      let id = datasetType === 'custom' ? await ensureDatasetId() : ''
+      let response = await sendQuestion(id)
+      
+      // The backend may have dropped the dataset (e.g. after a restart): upload it again once
+      if (response.status === 404 && datasetType === 'custom' && id && uploadedFile) {
+        id = await ensureDatasetId(true)
+        response = await sendQuestion(id)
+      }
       
       if (!response.ok) {
         // Try to get detailed error message from backend
@@ -191,7 +264,8 @@ function App() {
       const blobUrl = window.URL.createObjectURL(blob)
       const link = document.createElement('a')
       link.href = blobUrl
-      link.download = `plot_${Date.now()}.png`
+      const extension = url.split('.').pop() || 'png'
+      link.download = `plot_${Date.now()}.${extension}`
       document.body.appendChild(link)
       link.click()
       document.body.removeChild(link)
@@ -207,9 +281,19 @@ function App() {
       return
     }
 
+    // Upload right away so the backend parses the CSV while the user types.
+    // Started before any await, so a later selection always aborts this upload.
+    selectedFileRef.current = file
+    rememberDatasetId('')
+    startUpload(file).catch((e) => {
+      if (e?.name !== 'AbortError') console.error('Chunked upload failed, will retry on first question:', e)
+    })
+
     try {
       // Read file content to save in localStorage
       const fileContent = await file.text()
+      // Another file was selected (or this one removed) while reading
+      if (selectedFileRef.current !== file) return
       
       // Store the file for later use in ask requests
       setUploadedFile(file)
@@ -271,9 +355,12 @@ function App() {
   }
   
   const deleteUploadedCSV = () => {
+    cancelUpload()
+    selectedFileRef.current = null
     setDatasetType('default')
     setUploadedFileName('')
     setUploadedFile(null)
+    rememberDatasetId('')
     setHistory([])
     localStorage.removeItem('eda_chat_history')
     localStorage.removeItem('eda_uploaded_file_content')
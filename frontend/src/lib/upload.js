@@ -0,0 +1,101 @@
+// Chunked, resumable CSV upload against the backend /uploads API.
+// Returns the dataset_id to send with /ask instead of the whole file.
+
+// Chunk conflicts (409, e.g. another chunk is still being written) are retried
+// after a growing delay, up to this many times in a row
+const MAX_CONFLICT_RETRIES = 8
+const CONFLICT_DELAY_MS = 100
+const MAX_CONFLICT_DELAY_MS = 3000
+
+// Resolves after ms, or rejects as soon as signal is aborted
+const sleep = (ms, signal) =>
+  new Promise((resolve, reject) => {
+    const timer = setTimeout(resolve, ms)
+    signal?.addEventListener(
+      'abort',
+      () => {
+        clearTimeout(timer)
+        reject(signal.reason)
+      },
+      { once: true },
+    )
+  })
+
+const sha256Hex = async (file) => {
+  if (!window.crypto?.subtle) return null
+  const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer())
+  return Array.from(new Uint8Array(digest))
+    .map((b) => b.toString(16).padStart(2, '0'))
+    .join('')
+}
+
+const errorDetail = async (response) => {
+  try {
+    const data = await response.json()
+    return data.detail || `Error: ${response.status}`
+  } catch (e) {
+    return `Error: ${response.status}`
+  }
+}
+
+// signal (an AbortSignal) cancels the upload, e.g. when another file is selected
+export async function uploadDataset(file, apiUrl, { onProgress, maxRetries = 3, signal } = {}) {
+  const form = new FormData()
+  form.append('filename', file.name)
+  form.append('size', String(file.size))
+  const hash = await sha256Hex(file)
+  if (hash) form.append('sha256', hash)
+  signal?.throwIfAborted()
+
+  const startResponse = await fetch(`${apiUrl}/uploads`, { method: 'POST', body: form, signal })
+  if (!startResponse.ok) throw new Error(await errorDetail(startResponse))
+  const session = await startResponse.json()
+
+  // The server already has this exact file
+  if (session.complete && session.dataset_id) {
+    onProgress?.(1)
+    return session.dataset_id
+  }
+
+  const chunkSize = session.chunk_size || 4 * 1024 * 1024
+  let offset = session.offset || 0
+  let retries = 0
+  let conflicts = 0
+
+  while (offset < file.size) {
+    const chunk = file.slice(offset, offset + chunkSize)
+    try {
+      const response = await fetch(`${apiUrl}/uploads/${session.upload_id}?offset=${offset}`, {
+        method: 'PUT',
+        headers: { 'Content-Type': 'application/octet-stream' },
+        body: chunk,
+        signal,
+      })
+      if (response.status === 409) {
+        if (++conflicts > MAX_CONFLICT_RETRIES) throw new Error(await errorDetail(response))
+        // Out of sync or busy: wait, then resume from the offset the server reports
+        offset = Number(response.headers.get('Upload-Offset') ?? offset)
+        await sleep(Math.min(CONFLICT_DELAY_MS * 2 ** (conflicts - 1), MAX_CONFLICT_DELAY_MS), signal)
+        continue
+      }
+      if (!response.ok) throw new Error(await errorDetail(response))
+      offset = (await response.json()).offset
+      retries = 0
+      conflicts = 0
+      onProgress?.(offset / file.size)
+    } catch (e) {
+      if (signal?.aborted || conflicts > MAX_CONFLICT_RETRIES || ++retries > maxRetries) throw e
+      // Network error: ask the server how much it received and resume
+      const status = await fetch(`${apiUrl}/uploads/${session.upload_id}`, { signal })
+      if (!status.ok) throw new Error(await errorDetail(status))
+      offset = (await status.json()).offset
+    }
+  }
+
+  const completeResponse = await fetch(`${apiUrl}/uploads/${session.upload_id}/complete`, {
+    method: 'POST',
+    signal,
+  })
+  if (!completeResponse.ok) throw new Error(await errorDetail(completeResponse))
+  return (await completeResponse.json()).dataset_id
+}